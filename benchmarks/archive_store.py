@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2015-2019 Bitergia
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+#
+
+"""Benchmark of the archive write throughput.
+
+It stores a set of synthetic HTTP responses in a brand new archive
+with and without the write-batching mode enabled, and reports the
+number of responses written per second.
+
+    $ python3 benchmarks/archive_store.py --responses 100000
+"""
+
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+import requests
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from perceval.archive import Archive, CompactCodec
+
+
+BASE_URL = "https://api.example.com/repos/chaoss/perceval/issues"
+
+
+def make_response(n, body_size):
+    """Build a synthetic `requests.Response` object"""
+
+    response = requests.Response()
+    response.status_code = 200
+    response.url = BASE_URL + "?page=%s" % n
+    response.encoding = 'utf-8'
+    response.headers['Content-Type'] = 'application/json'
+    response.headers['ETag'] = '"%040d"' % n
+    response._content = ('{"page": %s, "data": "%s"}' % (n, 'x' * body_size)).encode('utf-8')
+
+    return response
+
+
+def run(dirpath, nresponses, body_size, batch_size=None, batch_timeout=None,
+        compression=None):
+    """Store `nresponses` in a new archive; returns the elapsed time"""
+
+    archive_path = os.path.join(dirpath, 'archive-%s-%s' % (batch_size, batch_timeout))
+    archive = Archive.create(archive_path, batch_size=batch_size,
+                             batch_timeout=batch_timeout,
+                             codec=CompactCodec(compression=compression))
+    archive.init_metadata('https://api.example.com', 'GitHub', '0.1.0',
+                          'issue', {})
+
+    headers = {'Accept': 'application/json'}
+
+    start = time.perf_counter()
+    for n in range(nresponses):
+        response = make_response(n, body_size)
+        archive.store(BASE_URL, {'page': n}, headers, response)
+    archive.close()
+    elapsed = time.perf_counter() - start
+
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Archive write throughput benchmark")
+    parser.add_argument('--responses', type=int, default=100000,
+                        help="number of responses to store")
+    parser.add_argument('--body-size', type=int, default=1024,
+                        help="size in bytes of each response body")
+    parser.add_argument('--batch-size', type=int, default=1000,
+                        help="number of items per transaction in batching mode")
+    parser.add_argument('--batch-timeout', type=float, default=None,
+                        help="max seconds per transaction in batching mode")
+    parser.add_argument('--compression', choices=['zlib', 'zstd'], default=None,
+                        help="compress archived responses")
+    args = parser.parse_args()
+
+    dirpath = tempfile.mkdtemp(prefix='perceval_bench_')
+
+    try:
+        runs = [
+            ('no batching', None, None),
+            ('batching', args.batch_size, args.batch_timeout)
+        ]
+
+        for name, batch_size, batch_timeout in runs:
+            elapsed = run(dirpath, args.responses, args.body_size,
+                          batch_size=batch_size, batch_timeout=batch_timeout,
+                          compression=args.compression)
+            print("%-12s %8d responses in %8.2fs  %10.1f responses/s"
+                  % (name, args.responses, elapsed, args.responses / elapsed))
+    finally:
+        shutil.rmtree(dirpath)
+
+
+if __name__ == '__main__':
+    main()
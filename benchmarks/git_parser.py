@@ -0,0 +1,231 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2015-2019 Bitergia
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+#
+
+"""Benchmark of the Git log parser.
+
+It generates large synthetic logs, with the same format given by
+`git log --raw --numstat --pretty=fuller --decorate=full --parents
+-M -C -c`, and measures the number of commits per second parsed
+by `GitParser`. With `--machine`, the same logs are also generated
+using the machine-oriented format, with NUL-delimited fields, and
+parsed by `GitMachineParser`. Each scenario reproduces a kind of
+history:
+
+  - small: commits touching a few files, with short messages
+  - large: commits touching hundreds of files
+  - merges: merge commits with combined raw data and refs
+  - messages: long messages with trailers and header-like lines
+
+    $ python3 benchmarks/git_parser.py --commits 100000
+    $ python3 benchmarks/git_parser.py --scenarios large merges --repeat 5
+    $ python3 benchmarks/git_parser.py --machine
+"""
+
+import argparse
+import io
+import os
+import random
+import sys
+import time
+
+BASE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+
+sys.path.insert(0, BASE_PATH)
+
+from perceval.backends.core.git import GitMachineParser, GitParser
+
+
+SCENARIOS = {
+    # name: (files per commit, message lines, merge ratio)
+    'small': (3, 2, 0.0),
+    'large': (200, 4, 0.0),
+    'merges': (5, 3, 0.5),
+    'messages': (2, 60, 0.05),
+}
+
+
+def sha(rnd):
+    return '%040x' % rnd.getrandbits(160)
+
+
+def synthetic_commits(ncommits, nfiles, nmessage, merge_ratio, seed=0):
+    """Generate the data of `ncommits` commits"""
+
+    rnd = random.Random(seed)
+
+    for n in range(ncommits):
+        commit = sha(rnd)
+        merge = rnd.random() < merge_ratio
+        parents = [sha(rnd) for _ in range(2 if merge else 1)]
+        refs = 'HEAD -> refs/heads/master, tag: refs/tags/v%s' % n if n % 100 == 0 else ''
+
+        message = ['Fix issue %s in the parser' % n]
+        for i in range(1, nmessage):
+            if i == nmessage - 1:
+                message.append('Signed-off-by: John Smith <jsmith@example.com>')
+            elif i % 10 == 1:
+                message.append('')
+            elif i % 10 == 5:
+                message.append('Reported-by: Jane Rae <jrae@example.com>')
+            else:
+                message.append('Line %s of the message: see http://example.com/%s' % (i, i))
+
+        files = []
+        for i in range(nfiles):
+            filename = 'src/module%s/file%s.c' % (i % 17, i)
+            newfile = filename + '.renamed' if not merge and i % 50 == 49 else None
+            files.append((filename, newfile, i, i % 7))
+
+        yield commit, parents, refs, message, files
+
+
+def synthetic_log(ncommits, nfiles, nmessage, merge_ratio, seed=0):
+    """Generate a Git log of `ncommits` commits"""
+
+    lines = []
+
+    for commit, parents, refs, message, files in synthetic_commits(ncommits, nfiles, nmessage,
+                                                                   merge_ratio, seed=seed):
+        merge = len(parents) > 1
+        refs = ' (%s)' % refs if refs else ''
+
+        lines.append('commit %s %s%s' % (commit, ' '.join(parents), refs))
+        if merge:
+            lines.append('Merge: %s' % ' '.join(p[:7] for p in parents))
+        lines.append('Author:     John Smith <jsmith@example.com>')
+        lines.append('AuthorDate: Tue Aug 14 14:30:13 2012 -0300')
+        lines.append('Commit:     Jane Rae <jrae@example.com>')
+        lines.append('CommitDate: Tue Aug 14 14:30:13 2012 -0300')
+        lines.append('')
+        lines.extend('    ' + line for line in message)
+        lines.append('')
+
+        for f, newfile, added, removed in files:
+            if merge:
+                lines.append('::100644 100644 100644 %s... %s... %s... MM\t%s'
+                             % (commit[:7], parents[0][:7], parents[1][:7], f))
+            elif newfile:
+                lines.append(':100644 100644 %s... %s... R087\t%s\t%s'
+                             % (commit[:7], parents[0][:7], f, newfile))
+            else:
+                lines.append(':100644 100644 %s... %s... M\t%s' % (commit[:7], parents[0][:7], f))
+
+        for f, newfile, added, removed in files:
+            if newfile:
+                head, name = f.rsplit('/', 1)
+                lines.append('%s\t%s\t%s/{%s => %s}' % (added, removed, head, name, newfile.rsplit('/', 1)[1]))
+            else:
+                lines.append('%s\t%s\t%s' % (added, removed, f))
+        lines.append('')
+
+    return '\n'.join(lines) + '\n'
+
+
+def synthetic_machine_log(ncommits, nfiles, nmessage, merge_ratio, seed=0):
+    """Generate a Git machine-oriented log of `ncommits` commits"""
+
+    fields = []
+
+    for commit, parents, refs, message, files in synthetic_commits(ncommits, nfiles, nmessage,
+                                                                   merge_ratio, seed=seed):
+        merge = len(parents) > 1
+
+        fields.extend([commit, ' '.join(parents), refs,
+                       'John Smith <jsmith@example.com>', 'Tue Aug 14 14:30:13 2012 -0300',
+                       'Jane Rae <jrae@example.com>', 'Tue Aug 14 14:30:13 2012 -0300',
+                       ' '.join(p[:7] for p in parents), '\n'.join(message) + '\n', ''])
+
+        prefix = '\n'
+        for f, newfile, added, removed in files:
+            if merge:
+                fields.append('%s::100644 100644 100644 %s %s %s MM'
+                              % (prefix, commit[:7], parents[0][:7], parents[1][:7]))
+                fields.append(f)
+            elif newfile:
+                fields.append('%s:100644 100644 %s %s R087' % (prefix, commit[:7], parents[0][:7]))
+                fields.extend([f, newfile])
+            else:
+                fields.append('%s:100644 100644 %s %s M' % (prefix, commit[:7], parents[0][:7]))
+                fields.append(f)
+            prefix = ''
+
+        for f, newfile, added, removed in files:
+            if newfile:
+                fields.extend(['%s\t%s\t' % (added, removed), f, newfile])
+            else:
+                fields.append('%s\t%s\t%s' % (added, removed, f))
+
+    return ('\0'.join(fields) + '\0').encode('utf-8')
+
+
+def run(log, repeat):
+    """Parse the log `repeat` times; returns the best elapsed time and the commits"""
+
+    best = None
+    ncommits = 0
+
+    for _ in range(repeat):
+        if isinstance(log, bytes):
+            # Bytes are read in lines, like they are read from git
+            parser = GitMachineParser(io.BytesIO(log))
+        else:
+            parser = GitParser(io.StringIO(log))
+
+        start = time.perf_counter()
+        ncommits = sum(1 for _ in parser.parse())
+        elapsed = time.perf_counter() - start
+
+        best = elapsed if best is None else min(best, elapsed)
+
+    return best, ncommits
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Git log parser benchmark")
+    parser.add_argument('--commits', type=int, default=20000,
+                        help="number of commits of the logs")
+    parser.add_argument('--scenarios', nargs='+', choices=sorted(SCENARIOS.keys()),
+                        default=sorted(SCENARIOS.keys()),
+                        help="scenarios to benchmark")
+    parser.add_argument('--repeat', type=int, default=3,
+                        help="times each log is parsed; the best time is reported")
+    parser.add_argument('--machine', action='store_true',
+                        help="also parse the logs using the machine-oriented format")
+    args = parser.parse_args()
+
+    for name in args.scenarios:
+        nfiles, nmessage, merge_ratio = SCENARIOS[name]
+
+        # Large commits would take too long with the same number of commits
+        ncommits = max(args.commits // nfiles, 1) if nfiles > 10 else args.commits
+
+        logs = [('pretty', synthetic_log(ncommits, nfiles, nmessage, merge_ratio))]
+        if args.machine:
+            logs.append(('machine', synthetic_machine_log(ncommits, nfiles, nmessage, merge_ratio)))
+
+        for log_format, log in logs:
+            elapsed, ncommits = run(log, args.repeat)
+            size = len(log) / (1024 * 1024)
+
+            print("%-10s %-8s %8d commits in %6.2fs  %10.1f commits/s  %8.1f MB/s"
+                  % (name, log_format, ncommits, elapsed, ncommits / elapsed, size / elapsed))
+
+
+if __name__ == '__main__':
+    main()
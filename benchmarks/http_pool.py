@@ -0,0 +1,226 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2015-2019 Bitergia
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+#
+
+"""Benchmark of the connections opened by HTTP clients.
+
+It starts a local HTTPS server, which counts the TLS handshakes
+it completes, and sends requests to it with `HttpClient` using
+different pool settings. For each scenario, it reports the number
+of handshakes per 1,000 requests. The certificate of the server is
+generated with the `openssl` command.
+
+    $ python3 benchmarks/http_pool.py --requests 2000 --clients 100
+    $ python3 benchmarks/http_pool.py --scenarios shared concurrent
+
+The server only speaks HTTP/1.1, so the `http2` scenario measures
+the HTTP/2 transport (it requires `httpx`) when it falls back to
+HTTP/1.1.
+"""
+
+import argparse
+import http.server
+import logging
+import os
+import shutil
+import ssl
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+import requests
+
+BASE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+
+sys.path.insert(0, BASE_PATH)
+
+from perceval.client import HttpClient, SharedPoolAdapter, httpx
+
+
+class CountingHandler(http.server.BaseHTTPRequestHandler):
+    """Answer every request with a small body, keeping the connection"""
+
+    protocol_version = 'HTTP/1.1'
+    disable_nagle_algorithm = True
+
+    def do_GET(self):
+        body = b'{"item": "' + self.path.encode('utf-8') + b'"}'
+
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class TLSServer(http.server.ThreadingHTTPServer):
+    """HTTPS server that counts the handshakes"""
+
+    daemon_threads = True
+
+    def __init__(self, certfile, keyfile):
+        super().__init__(('127.0.0.1', 0), CountingHandler)
+
+        self.context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+        self.context.load_cert_chain(certfile, keyfile)
+        self.handshakes = 0
+        self._lock = threading.Lock()
+
+    def get_request(self):
+        sock, addr = super().get_request()
+        sock = self.context.wrap_socket(sock, server_side=True)
+
+        with self._lock:
+            self.handshakes += 1
+
+        return sock, addr
+
+    def reset(self):
+        with self._lock:
+            self.handshakes = 0
+
+
+class PerClientPoolsClient(HttpClient):
+    """Client with pools of its own, as every client had before"""
+
+    def _create_http_session(self):
+        super()._create_http_session()
+
+        adapter = requests.adapters.HTTPAdapter(max_retries=self.max_retries,
+                                                pool_maxsize=self.pool_maxsize)
+        self.session.mount('https://', adapter)
+
+
+def make_certificate(dirpath):
+    """Generate a self-signed certificate for the local server"""
+
+    certfile = os.path.join(dirpath, 'cert.pem')
+    keyfile = os.path.join(dirpath, 'key.pem')
+
+    subprocess.run(['openssl', 'req', '-x509', '-newkey', 'rsa:2048', '-nodes',
+                    '-keyout', keyfile, '-out', certfile, '-days', '1',
+                    '-subj', '/CN=localhost',
+                    '-addext', 'subjectAltName=IP:127.0.0.1,DNS:localhost'],
+                   check=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+    return certfile, keyfile
+
+
+def clear_shared_pools():
+    """Close the connections kept by previous scenarios"""
+
+    for pool_manager in SharedPoolAdapter._pool_managers.values():
+        pool_manager.clear()
+
+
+def run_sequential(client_class, base_url, certfile, nrequests, nclients, **kwargs):
+    """Send the requests from `nclients` clients, one after the other"""
+
+    per_client = nrequests // nclients
+
+    for x in range(nclients):
+        client = client_class(base_url, **kwargs)
+        for y in range(per_client):
+            client.fetch('%s/items/%s/%s' % (base_url, x, y), verify=certfile)
+
+    return per_client * nclients
+
+
+def run_concurrent(base_url, certfile, nrequests, **kwargs):
+    """Send the requests concurrently from a single client"""
+
+    client = HttpClient(base_url, **kwargs)
+    urls = ['%s/items/%s' % (base_url, x) for x in range(nrequests)]
+
+    batch = client.max_concurrent_requests * 10
+    for x in range(0, nrequests, batch):
+        client.fetch_many(urls[x:x + batch], verify=certfile)
+
+    return nrequests
+
+
+def scenarios(args, base_url, certfile):
+    return {
+        'per-client': lambda: run_sequential(PerClientPoolsClient, base_url, certfile,
+                                             args.requests, args.clients),
+        'shared': lambda: run_sequential(HttpClient, base_url, certfile,
+                                         args.requests, args.clients),
+        'concurrent-small': lambda: run_concurrent(base_url, certfile, args.requests,
+                                                   pool_maxsize=2),
+        'concurrent': lambda: run_concurrent(base_url, certfile, args.requests),
+        'http2': lambda: run_sequential(HttpClient, base_url, certfile,
+                                        args.requests, args.clients, http2=True),
+    }
+
+
+def main():
+    names = ['per-client', 'shared', 'concurrent-small', 'concurrent', 'http2']
+
+    parser = argparse.ArgumentParser(description="HTTP connection pools benchmark")
+    parser.add_argument('--requests', type=int, default=1000,
+                        help="number of requests sent per scenario")
+    parser.add_argument('--clients', type=int, default=50,
+                        help="number of clients of the sequential scenarios")
+    parser.add_argument('--scenarios', nargs='+', choices=names, default=names,
+                        help="scenarios to run")
+    args = parser.parse_args()
+
+    # Discarded connections are expected in some scenarios
+    logging.getLogger('urllib3').setLevel(logging.ERROR)
+
+    tmp_path = tempfile.mkdtemp(prefix='perceval_')
+
+    try:
+        certfile, keyfile = make_certificate(tmp_path)
+
+        server = TLSServer(certfile, keyfile)
+        thread = threading.Thread(target=server.serve_forever, daemon=True)
+        thread.start()
+
+        base_url = 'https://127.0.0.1:%s' % server.server_address[1]
+        runs = scenarios(args, base_url, certfile)
+
+        for name in args.scenarios:
+            if name == 'http2' and not httpx:
+                print("%-17s skipped; httpx package not found" % name)
+                continue
+
+            clear_shared_pools()
+            server.reset()
+
+            start = time.perf_counter()
+            nrequests = runs[name]()
+            elapsed = time.perf_counter() - start
+
+            print("%-17s %6d requests %6d handshakes %8.1f handshakes/1000 req %8.1f req/s"
+                  % (name, nrequests, server.handshakes,
+                     server.handshakes * 1000 / nrequests, nrequests / elapsed))
+
+        server.shutdown()
+        server.server_close()
+    finally:
+        shutil.rmtree(tmp_path)
+
+
+if __name__ == '__main__':
+    main()
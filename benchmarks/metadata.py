@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2015-2019 Bitergia
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+#
+
+"""Microbenchmark of the item envelope stage.
+
+For each core backend, it loads the raw items of one of the fixtures
+under `tests/data` and measures the number of items per second that
+`Backend.metadata` wraps with their metadata.
+
+    $ python3 benchmarks/metadata.py --items 200000
+    $ python3 benchmarks/metadata.py --backends git github
+"""
+
+import argparse
+import itertools
+import json
+import os
+import sys
+import time
+
+BASE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+
+sys.path.insert(0, BASE_PATH)
+
+from perceval.backends.core.git import Git
+from perceval.backends.core.github import GitHub
+from perceval.backends.core.gitlab import GitLab
+from perceval.backends.core.jira import Jira
+from perceval.backends.core.mbox import MBox
+from perceval.backends.core.meetup import Meetup
+from perceval.backends.core.redmine import Redmine
+from perceval.backends.core.slack import Slack
+from perceval.backends.core.stackexchange import StackExchange
+from perceval.backends.core.telegram import Telegram
+
+
+DATA_PATH = os.path.join(BASE_PATH, 'tests', 'data')
+
+
+def read_json(*path):
+    with open(os.path.join(DATA_PATH, *path)) as fd:
+        return json.load(fd)
+
+
+def git_items():
+    filepath = os.path.join(DATA_PATH, 'git', 'git_log.txt')
+    return list(Git.parse_git_log_from_file(filepath))
+
+
+def mbox_items():
+    filepath = os.path.join(DATA_PATH, 'mbox', 'mbox_complex.mbox')
+    backend = MBox('http://example.com/mbox', '/tmp/mbox')
+    return [backend._casedict_to_dict(msg) for msg in MBox.parse_mbox(filepath)]
+
+
+def slack_items():
+    channel_info = read_json('slack', 'slack_info.json')['channel']
+    items = read_json('slack', 'slack_history.json')['messages']
+    items = [item for item in items if 'user' in item or 'bot_id' in item]
+
+    for item in items:
+        item['channel_info'] = channel_info
+
+    return items
+
+
+BENCHMARKS = {
+    'git': (lambda: Git('http://example.com/git', '/tmp/git'), git_items),
+    'github': (lambda: GitHub('zhquan_example', 'repo'),
+               lambda: read_json('github', 'github_request')),
+    'gitlab': (lambda: GitLab('fdroid', 'fdroiddata'),
+               lambda: read_json('gitlab', 'issue_page_1')),
+    'jira': (lambda: Jira('http://example.com'),
+             lambda: read_json('jira', 'jira_issues_page_1.json')['issues']),
+    'mbox': (lambda: MBox('http://example.com/mbox', '/tmp/mbox'), mbox_items),
+    'meetup': (lambda: Meetup('sqlpass-es', 'aaaa'),
+               lambda: read_json('meetup', 'meetup_events.json')),
+    'redmine': (lambda: Redmine('http://example.com'),
+                lambda: read_json('redmine', 'redmine_issues.json')['issues']),
+    'slack': (lambda: Slack('C011DUKE8', 'aaaa'), slack_items),
+    'stackexchange': (lambda: StackExchange('stackoverflow', tagged='python', api_token='aaaa'),
+                      lambda: read_json('stackexchange', 'stackexchange_question_page')['items']),
+    'telegram': (lambda: Telegram('mybot', 'aaaa'),
+                 lambda: read_json('telegram', 'telegram_messages.json')['result']),
+}
+
+
+def run(name, nitems):
+    """Wrap `nitems` with their metadata; returns the elapsed time"""
+
+    make_backend, load_items = BENCHMARKS[name]
+
+    backend = make_backend()
+    items = load_items()
+
+    start = time.perf_counter()
+    for item in itertools.islice(itertools.cycle(items), nitems):
+        backend.metadata(item)
+    elapsed = time.perf_counter() - start
+
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Item envelope microbenchmark")
+    parser.add_argument('--items', type=int, default=100000,
+                        help="number of items wrapped per backend")
+    parser.add_argument('--backends', nargs='+', choices=sorted(BENCHMARKS.keys()),
+                        default=sorted(BENCHMARKS.keys()),
+                        help="backends to benchmark")
+    args = parser.parse_args()
+
+    for name in args.backends:
+        elapsed = run(name, args.items)
+        print("%-14s %8d items in %6.2fs  %10.1f items/s"
+              % (name, args.items, elapsed, args.items / elapsed))
+
+
+if __name__ == '__main__':
+    main()
@@ -26,7 +26,15 @@ import logging
 import os
 import pickle
 import sqlite3
+import struct
+import threading
+import time
+import urllib.request
 import uuid
+import zlib
+
+import requests
+import requests.structures
 
 from grimoirelab_toolkit.datetime import (datetime_utcnow,
                                           datetime_to_utc,
@@ -34,10 +42,246 @@ from grimoirelab_toolkit.datetime import (datetime_utcnow,
 
 from .errors import ArchiveError, ArchiveManagerError
 
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
 
 logger = logging.getLogger(__name__)
 
 
+class ArchiveCodec:
+    """Abstract class for archive codecs.
+
+    Codecs convert the data stored in an archive to bytes and
+    back again. Derived classes have to implement `encode` and
+    `decode` methods. Otherwise, `NotImplementedError` exception
+    will be raised.
+    """
+    def encode(self, data):
+        raise NotImplementedError
+
+    def decode(self, blob):
+        raise NotImplementedError
+
+
+class PickleCodec(ArchiveCodec):
+    """Legacy archive codec.
+
+    Data is serialized using the pickle protocol 0. This was the only
+    format available in previous versions of Perceval. It is kept to
+    read and to write archives with that format.
+    """
+    def encode(self, data):
+        return pickle.dumps(data, 0)
+
+    def decode(self, blob):
+        return pickle.loads(blob)
+
+
+class CompactCodec(ArchiveCodec):
+    """Compact and version-stable archive codec.
+
+    Instead of pickling `requests.Response` objects, this codec only
+    stores their status code, reason, URL, encoding, headers and the
+    body. The same applies to the `HTTPError` exceptions raised by
+    the clients. The body can be compressed using `zlib` or `zstd`
+    (the latter requires `zstandard` package). Any other type of
+    data is pickled with the highest protocol available and, then,
+    compressed.
+
+    Encoded blobs start with a header which defines how they were
+    encoded, so the codec is able to decode any blob regardless the
+    compression set. Blobs without that header are considered legacy
+    data and they are decoded using the pickle module.
+
+    Responses are rebuilt as `ArchivedResponse` objects, which defer
+    decompressing the body until it is accessed.
+
+    :param compression: compression algorithm (`zlib`, `zstd` or `None`)
+    :param level: compression level; when `None`, the default level
+        of the algorithm is used
+
+    :raises ArchiveError: when the compression algorithm is not supported
+    """
+    MAGIC = b'PCV\x01'
+
+    KIND_OBJECT = 0
+    KIND_RESPONSE = 1
+    KIND_HTTP_ERROR = 2
+
+    COMPRESSION_NONE = 0
+    COMPRESSION_ZLIB = 1
+    COMPRESSION_ZSTD = 2
+
+    COMPRESSIONS = {
+        None: COMPRESSION_NONE,
+        'zlib': COMPRESSION_ZLIB,
+        'zstd': COMPRESSION_ZSTD
+    }
+
+    HEADER = struct.Struct('>4sBBI')
+
+    def __init__(self, compression=None, level=None):
+        if compression not in self.COMPRESSIONS:
+            msg = "compression %s not supported" % compression
+            raise ArchiveError(cause=msg)
+        if compression == 'zstd' and not zstandard:
+            msg = "compression zstd not supported; zstandard package not found"
+            raise ArchiveError(cause=msg)
+
+        self.compression = compression
+        self.level = level
+        self._compression_id = self.COMPRESSIONS[compression]
+
+    def encode(self, data):
+        """Encode data into bytes"""
+
+        meta = None
+
+        if isinstance(data, requests.Response):
+            kind = self.KIND_RESPONSE
+            meta = self._response_to_dict(data)
+            body = data.content or b''
+        elif isinstance(data, requests.exceptions.HTTPError) and \
+                isinstance(data.response, requests.Response):
+            kind = self.KIND_HTTP_ERROR
+            meta = self._response_to_dict(data.response)
+            meta['error'] = str(data)
+            body = data.response.content or b''
+        else:
+            kind = self.KIND_OBJECT
+            body = pickle.dumps(data, pickle.HIGHEST_PROTOCOL)
+
+        meta = json.dumps(meta, separators=(',', ':')).encode('utf-8') if meta else b''
+        header = self.HEADER.pack(self.MAGIC, kind, self._compression_id, len(meta))
+
+        return header + meta + self._compress(body)
+
+    def decode(self, blob):
+        """Decode bytes into data"""
+
+        blob = bytes(blob)
+
+        if not blob.startswith(self.MAGIC):
+            return pickle.loads(blob)
+
+        _, kind, compression, meta_len = self.HEADER.unpack_from(blob)
+
+        offset = self.HEADER.size
+        meta = blob[offset:offset + meta_len]
+        body = blob[offset + meta_len:]
+
+        if kind == self.KIND_OBJECT:
+            return pickle.loads(self._decompress(body, compression))
+
+        meta = json.loads(meta.decode('utf-8'))
+        response = ArchivedResponse(meta, body, compression, self._decompress)
+
+        if kind == self.KIND_RESPONSE:
+            return response
+        else:
+            return requests.exceptions.HTTPError(meta['error'], response=response)
+
+    @classmethod
+    def split(cls, blob):
+        """Split an encoded blob into its header and its body.
+
+        The header includes the metadata of responses, such as their
+        HTTP headers, which usually change on every request. The body
+        is the part of the blob that can be shared among identical
+        responses. Legacy blobs do not have header.
+
+        :param blob: encoded data
+
+        :returns: a tuple with the header and the body
+        """
+        blob = bytes(blob)
+
+        if not blob.startswith(cls.MAGIC):
+            return b'', blob
+
+        _, _, _, meta_len = cls.HEADER.unpack_from(blob)
+        offset = cls.HEADER.size + meta_len
+
+        return blob[:offset], blob[offset:]
+
+    @staticmethod
+    def _response_to_dict(response):
+        return {
+            'status_code': response.status_code,
+            'reason': response.reason,
+            'url': response.url,
+            'encoding': response.encoding,
+            'headers': list(response.headers.items())
+        }
+
+    def _compress(self, data):
+        if self._compression_id == self.COMPRESSION_ZLIB:
+            level = self.level if self.level is not None else zlib.Z_DEFAULT_COMPRESSION
+            return zlib.compress(data, level)
+        elif self._compression_id == self.COMPRESSION_ZSTD:
+            level = self.level if self.level is not None else 3
+            return zstandard.ZstdCompressor(level=level).compress(data)
+        else:
+            return data
+
+    @staticmethod
+    def _decompress(data, compression):
+        if compression == CompactCodec.COMPRESSION_NONE:
+            return data
+        elif compression == CompactCodec.COMPRESSION_ZLIB:
+            return zlib.decompress(data)
+        elif compression == CompactCodec.COMPRESSION_ZSTD:
+            if not zstandard:
+                msg = "unable to decompress zstd data; zstandard package not found"
+                raise ArchiveError(cause=msg)
+            return zstandard.ZstdDecompressor().decompress(data)
+        else:
+            msg = "unknown compression type %s" % compression
+            raise ArchiveError(cause=msg)
+
+
+class ArchivedResponse(requests.Response):
+    """HTTP response rebuilt from an archive.
+
+    The body of the response is decompressed the first time
+    its content is accessed.
+
+    :param meta: dict with status code, reason, URL, encoding and headers
+    :param body: raw, maybe compressed, body
+    :param compression: compression type of the body
+    :param decompress: function to decompress the body
+    """
+    def __init__(self, meta, body, compression, decompress):
+        super().__init__()
+        self.status_code = meta['status_code']
+        self.reason = meta['reason']
+        self.url = meta['url']
+        self.encoding = meta['encoding']
+        self.headers = requests.structures.CaseInsensitiveDict(meta['headers'])
+        self._content_consumed = True
+        self._raw_body = body
+        self._compression = compression
+        self._decompress = decompress
+
+    def __getstate__(self):
+        _ = self.content
+        return super().__getstate__()
+
+    @property
+    def content(self):
+        if self._content is False:
+            self._content = self._decompress(self._raw_body, self._compression)
+            self._raw_body = None
+        return self._content
+
+    def iter_content(self, chunk_size=1, decode_unicode=False):
+        _ = self.content
+        return super().iter_content(chunk_size=chunk_size, decode_unicode=decode_unicode)
+
+
 class Archive:
     """Basic class for archiving raw items fetched by Perceval.
 
@@ -55,7 +299,36 @@ class Archive:
     initialized calling to `init_metadata` method after creating
     a new archive.
 
+    By default, every call to `store` is committed on its own
+    transaction. Setting `batch_size` and/or `batch_timeout` enables
+    the write-batching mode: the archive is switched to WAL journaling
+    and the stored items are grouped into a single transaction until
+    `batch_size` items are pending or `batch_timeout` seconds have
+    elapsed since the last commit, whatever happens first. Pending
+    items are also committed when `flush` or `close` are called or
+    when an error occurs storing an item.
+
+    Data is encoded using a `CompactCodec` unless other codec is
+    given with the parameter `codec`. Data stored with the legacy
+    pickle format is always readable and it can be converted to the
+    format of the codec calling to `migrate`.
+
+    Archives can also be opened in replay mode, setting `replay`
+    parameter. This mode is meant to retrieve data in bulk: the file
+    is opened in read-only mode and memory-mapped, and the same
+    instance can be shared among threads. When `preload_index` is
+    also set, the index of hash codes is loaded in memory, so each
+    retrieval is a direct lookup by row id. Archives opened in this
+    mode cannot store data.
+
     :param archive_path: path where this archive is stored
+    :param batch_size: number of items stored per transaction
+    :param batch_timeout: max number of seconds a transaction is
+        kept open
+    :param codec: codec to encode and decode archived data
+    :param replay: open the archive in read-only replay mode
+    :param preload_index: load the index of hash codes in memory;
+        only available in replay mode
 
     :raises ArchiveError: when the archive does not exist or is invalid
     """
@@ -80,11 +353,46 @@ class Archive:
                            "backend_params BLOB, " \
                            "created_on TEXT)"
 
-    def __init__(self, archive_path):
+    REPLAY_MMAP_SIZE = 2 ** 30
+
+    def __init__(self, archive_path, batch_size=None, batch_timeout=None, codec=None,
+                 replay=False, preload_index=False):
         if not os.path.exists(archive_path):
             raise ArchiveError(cause="archive %s does not exist" % (archive_path))
+        if replay and (batch_size is not None or batch_timeout is not None):
+            raise ArchiveError(cause="write-batching mode is not available in replay mode")
+        if preload_index and not replay:
+            raise ArchiveError(cause="index preloading is only available in replay mode")
+        if batch_size is not None and batch_size < 1:
+            raise ArchiveError(cause="batch size must be greater than 0; %s given" % batch_size)
+        if batch_timeout is not None and batch_timeout < 0:
+            raise ArchiveError(cause="batch timeout must be a positive number; %s given" % batch_timeout)
+
+        self._init_state(archive_path, batch_size, batch_timeout, codec, replay)
+
+        # Entries can be stored and retrieved from several threads;
+        # the connection is shared but its use is serialized
+        if self.replay:
+            self._db = self._connect_read_only(self.archive_path)
+        else:
+            self._db = sqlite3.connect(self.archive_path, check_same_thread=False)
+
+        self._verify_archive()
+        self._load_metadata()
+
+        if self.batching:
+            self._enable_wal_mode()
+        if preload_index:
+            self._preload_index()
+
+    def _init_state(self, archive_path, batch_size, batch_timeout, codec, replay):
+        """Set the attributes of the archive before its data is read"""
 
         self.archive_path = archive_path
+        self.batch_size = batch_size
+        self.batch_timeout = batch_timeout
+        self.codec = codec or CompactCodec()
+        self.replay = replay
         self.origin = None
         self.backend_name = None
         self.backend_version = None
@@ -92,15 +400,30 @@ class Archive:
         self.backend_params = None
         self.created_on = None
 
-        self._db = sqlite3.connect(self.archive_path)
-
-        self._verify_archive()
-        self._load_metadata()
+        self._pending = 0
+        self._last_commit = time.monotonic()
+        self._index = None
+        self._lock = threading.RLock()
 
     def __del__(self):
         conn = getattr(self, '_db', None)
         if conn:
-            conn.close()
+            try:
+                self.close()
+            except ArchiveError:
+                conn.close()
+
+    @property
+    def batching(self):
+        """Whether the write-batching mode is enabled or not"""
+
+        return self.batch_size is not None or self.batch_timeout is not None
+
+    @property
+    def pending(self):
+        """Number of stored items not committed yet"""
+
+        return self._pending
 
     def init_metadata(self, origin, backend_name, backend_version,
                       category, backend_params):
@@ -118,6 +441,8 @@ class Archive:
 
         raises ArchiveError: when an error occurs initializing the metadata
         """
+        self._check_writable()
+
         created_on = datetime_to_utc(datetime_utcnow())
         created_on_dumped = created_on.isoformat()
         backend_params_dumped = pickle.dumps(backend_params, 0)
@@ -163,32 +488,79 @@ class Archive:
 
         :raises ArchiveError: when an error occurs storing the given data
         """
+        self._check_writable()
+
         hashcode = self.make_hashcode(uri, payload, headers)
         payload_dump = pickle.dumps(payload, 0)
         headers_dump = pickle.dumps(headers, 0)
-        data_dump = pickle.dumps(data, 0)
+        data_dump = self.codec.encode(data)
 
         logger.debug("Archiving %s with %s %s %s in %s",
                      hashcode, uri, payload, headers, self.archive_path)
 
-        try:
-            cursor = self._db.cursor()
-            insert_stmt = "INSERT INTO " + self.ARCHIVE_TABLE + " (" \
-                          "id, hashcode, uri, payload, headers, data) " \
-                          "VALUES(?,?,?,?,?,?)"
-            cursor.execute(insert_stmt, (None, hashcode, uri,
-                                         payload_dump, headers_dump, data_dump))
-            self._db.commit()
-            cursor.close()
-        except sqlite3.IntegrityError as e:
-            msg = "data storage error; cause: duplicated entry %s" % hashcode
-            raise ArchiveError(cause=msg)
-        except sqlite3.DatabaseError as e:
-            msg = "data storage error; cause: %s" % str(e)
-            raise ArchiveError(cause=msg)
+        with self._lock:
+            try:
+                cursor = self._db.cursor()
+                insert_stmt = "INSERT INTO " + self.ARCHIVE_TABLE + " (" \
+                              "id, hashcode, uri, payload, headers, data) " \
+                              "VALUES(?,?,?,?,?,?)"
+                cursor.execute(insert_stmt, (None, hashcode, uri,
+                                             payload_dump, headers_dump, data_dump))
+                cursor.close()
+            except sqlite3.IntegrityError as e:
+                self._flush_on_error()
+                msg = "data storage error; cause: duplicated entry %s" % hashcode
+                raise ArchiveError(cause=msg)
+            except sqlite3.DatabaseError as e:
+                self._flush_on_error()
+                msg = "data storage error; cause: %s" % str(e)
+                raise ArchiveError(cause=msg)
+
+            self._pending += 1
+
+            if self._is_batch_completed():
+                self.flush()
 
         logger.debug("%s data archived in %s", hashcode, self.archive_path)
 
+    def flush(self):
+        """Commit the items pending to be written.
+
+        Items stored while the write-batching mode is enabled are
+        not durable until this method is called, either explicitly
+        or when the current batch is completed.
+
+        :raises ArchiveError: when an error occurs committing the data
+        """
+        with self._lock:
+            if not self._pending:
+                return
+
+            try:
+                self._db.commit()
+            except sqlite3.DatabaseError as e:
+                msg = "data storage error; cause: %s" % str(e)
+                raise ArchiveError(cause=msg)
+
+            logger.debug("%s entries committed in %s", self._pending, self.archive_path)
+
+            self._pending = 0
+            self._last_commit = time.monotonic()
+
+    def close(self):
+        """Flush the pending items and close the archive.
+
+        :raises ArchiveError: when an error occurs committing the data
+        """
+        if not self._db:
+            return
+
+        try:
+            self.flush()
+        finally:
+            self._db.close()
+            self._db = None
+
     def retrieve(self, uri, payload, headers):
         """Retrieve a raw item from the archive.
 
@@ -208,36 +580,92 @@ class Archive:
         logger.debug("Retrieving entry %s with %s %s %s in %s",
                      hashcode, uri, payload, headers, self.archive_path)
 
-        self._db.row_factory = sqlite3.Row
+        if self._index is not None:
+            rowid = self._index.get(hashcode, None)
+            row = self._fetch_data("id", rowid) if rowid is not None else None
+        else:
+            row = self._fetch_data("hashcode", hashcode)
+
+        if row:
+            found = self.codec.decode(row[0])
+        else:
+            msg = "entry %s not found in archive %s" % (hashcode, self.archive_path)
+            raise ArchiveError(cause=msg)
+
+        return found
+
+    def _fetch_data(self, field, value):
+        """Fetch the data of the entry which matches the given field"""
+
+        select_stmt = "SELECT data " \
+                      "FROM " + self.ARCHIVE_TABLE + " " \
+                      "WHERE " + field + " = ?"
 
         try:
-            cursor = self._db.cursor()
-            select_stmt = "SELECT data " \
-                          "FROM " + self.ARCHIVE_TABLE + " " \
-                          "WHERE hashcode = ?"
-            cursor.execute(select_stmt, (hashcode,))
-            row = cursor.fetchone()
-            cursor.close()
+            with self._lock:
+                cursor = self._db.cursor()
+                cursor.execute(select_stmt, (value,))
+                row = cursor.fetchone()
+                cursor.close()
         except sqlite3.DatabaseError as e:
             msg = "data retrieval error; cause: %s" % str(e)
             raise ArchiveError(cause=msg)
 
-        if row:
-            found = pickle.loads(row['data'])
-        else:
-            msg = "entry %s not found in archive %s" % (hashcode, self.archive_path)
+        return row
+
+    def migrate(self):
+        """Convert the archived data to the format of the codec.
+
+        Data stored using other formats, such as the legacy pickle
+        one, is decoded and encoded again with the codec of this
+        archive. All the entries are updated in a single transaction.
+
+        :returns: the number of entries migrated
+
+        :raises ArchiveError: when an error occurs migrating the data
+        """
+        self._check_writable()
+        self.flush()
+
+        try:
+            cursor = self._db.cursor()
+            cursor.execute("SELECT id, data FROM " + self.ARCHIVE_TABLE)
+            rows = cursor.fetchall()
+
+            nentries = 0
+            update_stmt = "UPDATE " + self.ARCHIVE_TABLE + " SET data = ? WHERE id = ?"
+
+            for rowid, blob in rows:
+                blob_dump = self.codec.encode(self.codec.decode(blob))
+
+                if blob_dump == blob:
+                    continue
+
+                cursor.execute(update_stmt, (blob_dump, rowid))
+                nentries += 1
+
+            self._db.commit()
+            cursor.close()
+        except sqlite3.DatabaseError as e:
+            self._db.rollback()
+            msg = "data migration error; cause: %s" % str(e)
             raise ArchiveError(cause=msg)
 
-        return found
+        logger.debug("%s entries migrated in archive %s", nentries, self.archive_path)
+
+        return nentries
 
     @classmethod
-    def create(cls, archive_path):
+    def create(cls, archive_path, batch_size=None, batch_timeout=None, codec=None):
         """Create a brand new archive.
 
          Call this method to create a new and empty archive. It will initialize
          the storage file in the path defined by `archive_path`.
 
         :param archive_path: absolute path where the archive file will be created
+        :param batch_size: number of items stored per transaction
+        :param batch_timeout: max number of seconds a transaction is kept open
+        :param codec: codec to encode and decode archived data
 
         :raises ArchiveError: when the archive file already exists
         """
@@ -256,7 +684,8 @@ class Archive:
         conn.close()
 
         logger.debug("Creating archive %s", archive_path)
-        archive = cls(archive_path)
+        archive = cls(archive_path, batch_size=batch_size,
+                      batch_timeout=batch_timeout, codec=codec)
         logger.debug("Achive %s was created", archive_path)
 
         return archive
@@ -281,6 +710,102 @@ class Archive:
         hashcode = hashlib.sha1(content.encode('utf-8'))
         return hashcode.hexdigest()
 
+    def _is_batch_completed(self):
+        """Check whether the pending items have to be committed"""
+
+        if not self.batching:
+            return True
+        if self.batch_size is not None and self._pending >= self.batch_size:
+            return True
+        if self.batch_timeout is not None and \
+                time.monotonic() - self._last_commit >= self.batch_timeout:
+            return True
+
+        return False
+
+    def _flush_on_error(self):
+        """Commit the pending items after a failed statement"""
+
+        try:
+            self.flush()
+        except ArchiveError as e:
+            logger.warning("Pending entries of archive %s lost; %s", self.archive_path, str(e))
+            self._db.rollback()
+            self._pending = 0
+
+    def _check_writable(self):
+        """Raise an exception when the archive is in replay mode"""
+
+        if self.replay:
+            msg = "archive %s is opened in replay mode; data cannot be written" % self.archive_path
+            raise ArchiveError(cause=msg)
+
+    def _connect_read_only(self, db_path):
+        """Open a read-only and memory-mapped connection to a database"""
+
+        uri = 'file:' + urllib.request.pathname2url(os.path.abspath(db_path)) + '?mode=ro'
+
+        try:
+            conn = sqlite3.connect(uri, uri=True, check_same_thread=False)
+            conn.execute("PRAGMA mmap_size=%d" % self.REPLAY_MMAP_SIZE)
+            conn.execute("PRAGMA query_only=1")
+        except sqlite3.DatabaseError as e:
+            msg = "invalid archive file; cause: %s" % str(e)
+            raise ArchiveError(cause=msg)
+
+        return conn
+
+    def _preload_index(self):
+        """Load the map of hash codes to row ids in memory"""
+
+        select_stmt = "SELECT hashcode, id FROM " + self.ARCHIVE_TABLE
+
+        try:
+            with self._lock:
+                cursor = self._db.cursor()
+                cursor.execute(select_stmt)
+                self._index = dict(cursor.fetchall())
+                cursor.close()
+        except sqlite3.DatabaseError as e:
+            msg = "invalid archive file; cause: %s" % str(e)
+            raise ArchiveError(cause=msg)
+
+        logger.debug("Index of archive %s loaded; %s entries",
+                     self.archive_path, len(self._index))
+
+    def _enable_wal_mode(self):
+        """Switch the journal of the archive to write-ahead logging"""
+
+        cursor = self._db.cursor()
+
+        try:
+            cursor.execute("PRAGMA journal_mode=WAL")
+            mode = cursor.fetchone()[0]
+        except sqlite3.DatabaseError as e:
+            msg = "invalid archive file; cause: %s" % str(e)
+            raise ArchiveError(cause=msg)
+        finally:
+            cursor.close()
+
+        logger.debug("Journal mode of archive %s set to %s", self.archive_path, mode)
+
+    def _fetch_entries(self):
+        """Generate the entries stored in the archive, in insertion order"""
+
+        select_stmt = "SELECT hashcode, uri, payload, headers, data " \
+                      "FROM " + self.ARCHIVE_TABLE + " " \
+                      "ORDER BY id"
+
+        try:
+            cursor = self._db.cursor()
+            cursor.execute(select_stmt)
+            for row in cursor:
+                yield row
+            cursor.close()
+        except sqlite3.DatabaseError as e:
+            msg = "data retrieval error; cause: %s" % str(e)
+            raise ArchiveError(cause=msg)
+
     def _verify_archive(self):
         """Check whether the archive is valid or not.
 
@@ -344,6 +869,381 @@ class Archive:
         return row[0]
 
 
+class ArchiveStore:
+    """Content-addressed store of compacted archives.
+
+    A store keeps the entries of several archives with the same
+    origin, backend and category. Each archive added to the store
+    is registered as a manifest, which keeps the metadata of the
+    archive and the list of its entries, identified by their hash
+    codes. The bodies of the entries are stored once, using their
+    SHA1 digest as key, so identical bodies archived by different
+    fetches do not take up space again. Headers of responses, which
+    usually change on every request, are kept by each entry.
+
+    The data of a manifest can be retrieved using `ArchiveManifest`
+    objects.
+
+    :param store_path: path to the store; it will be created when
+        it does not exist
+
+    :raises ArchiveError: when the store is invalid
+    """
+    MANIFESTS_TABLE = "manifests"
+    ENTRIES_TABLE = "entries"
+    BLOBS_TABLE = "blobs"
+
+    # Table structure
+    MANIFESTS_CREATE_STMT = "CREATE TABLE IF NOT EXISTS " + MANIFESTS_TABLE + " ( " \
+                            "id INTEGER PRIMARY KEY AUTOINCREMENT, " \
+                            "source TEXT UNIQUE NOT NULL, " \
+                            "origin TEXT, " \
+                            "backend_name TEXT, " \
+                            "backend_version TEXT, " \
+                            "category TEXT, " \
+                            "backend_params BLOB, " \
+                            "created_on TEXT)"
+
+    ENTRIES_CREATE_STMT = "CREATE TABLE IF NOT EXISTS " + ENTRIES_TABLE + " ( " \
+                          "id INTEGER PRIMARY KEY AUTOINCREMENT, " \
+                          "manifest_id INTEGER NOT NULL, " \
+                          "hashcode VARCHAR(256) NOT NULL, " \
+                          "uri TEXT, " \
+                          "payload BLOB, " \
+                          "headers BLOB, " \
+                          "meta BLOB, " \
+                          "digest VARCHAR(40) NOT NULL, " \
+                          "UNIQUE (manifest_id, hashcode))"
+
+    BLOBS_CREATE_STMT = "CREATE TABLE IF NOT EXISTS " + BLOBS_TABLE + " ( " \
+                        "digest VARCHAR(40) PRIMARY KEY, " \
+                        "body BLOB)"
+
+    ENTRIES_INDEX_STMT = "CREATE INDEX IF NOT EXISTS " + ENTRIES_TABLE + "_digest " \
+                         "ON " + ENTRIES_TABLE + " (digest)"
+
+    def __init__(self, store_path):
+        self.store_path = store_path
+
+        try:
+            self._db = sqlite3.connect(self.store_path)
+            cursor = self._db.cursor()
+            cursor.execute(self.MANIFESTS_CREATE_STMT)
+            cursor.execute(self.ENTRIES_CREATE_STMT)
+            cursor.execute(self.BLOBS_CREATE_STMT)
+            cursor.execute(self.ENTRIES_INDEX_STMT)
+            self._db.commit()
+            cursor.close()
+        except sqlite3.DatabaseError as e:
+            msg = "invalid store file %s; cause: %s" % (self.store_path, str(e))
+            raise ArchiveError(cause=msg)
+
+    def __del__(self):
+        self.close()
+
+    def close(self):
+        """Close the store"""
+
+        conn = getattr(self, '_db', None)
+        if conn:
+            conn.close()
+            self._db = None
+
+    def add_archive(self, archive, source):
+        """Add the entries of an archive to the store.
+
+        A new manifest is created with the metadata of the archive.
+        Bodies that are already in the store are not stored again.
+        The whole archive is added in a single transaction. When
+        an archive with the same `source` was already added, the
+        existing manifest is returned.
+
+        :param archive: archive to add
+        :param source: unique name of the archive
+
+        :returns: a tuple with the manifest id, the number of entries
+            and the number of new bodies stored
+
+        :raises ArchiveError: when an error occurs adding the archive
+        """
+        manifest_id = self._find_manifest(source)
+
+        if manifest_id is not None:
+            logger.debug("Archive %s already in store %s", source, self.store_path)
+            return manifest_id, 0, 0
+
+        insert_manifest_stmt = "INSERT INTO " + self.MANIFESTS_TABLE + " " \
+                               "(source, origin, backend_name, backend_version, " \
+                               "category, backend_params, created_on) " \
+                               "VALUES (?, ?, ?, ?, ?, ?, ?)"
+        insert_blob_stmt = "INSERT OR IGNORE INTO " + self.BLOBS_TABLE + " " \
+                           "(digest, body) VALUES (?, ?)"
+        insert_entry_stmt = "INSERT INTO " + self.ENTRIES_TABLE + " " \
+                            "(manifest_id, hashcode, uri, payload, headers, meta, digest) " \
+                            "VALUES (?, ?, ?, ?, ?, ?, ?)"
+
+        nentries = 0
+        nblobs = 0
+
+        try:
+            cursor = self._db.cursor()
+            cursor.execute(insert_manifest_stmt,
+                           (source, archive.origin, archive.backend_name,
+                            archive.backend_version, archive.category,
+                            pickle.dumps(archive.backend_params, 0),
+                            archive.created_on.isoformat() if archive.created_on else None))
+            manifest_id = cursor.lastrowid
+
+            for hashcode, uri, payload, headers, data in archive._fetch_entries():
+                meta, body = CompactCodec.split(data)
+                digest = hashlib.sha1(body).hexdigest()
+
+                cursor.execute(insert_blob_stmt, (digest, body))
+                nblobs += cursor.rowcount
+                cursor.execute(insert_entry_stmt,
+                               (manifest_id, hashcode, uri, payload, headers, meta, digest))
+                nentries += 1
+
+            self._db.commit()
+            cursor.close()
+        except sqlite3.DatabaseError as e:
+            self._db.rollback()
+            msg = "store error; cause: %s" % str(e)
+            raise ArchiveError(cause=msg)
+
+        logger.debug("Archive %s added to store %s; %s entries, %s new bodies",
+                     source, self.store_path, nentries, nblobs)
+
+        return manifest_id, nentries, nblobs
+
+    def remove_manifest(self, manifest_id):
+        """Remove a manifest and the bodies only used by it.
+
+        :param manifest_id: identifier of the manifest
+
+        :raises ArchiveError: when an error occurs removing the manifest
+        """
+        try:
+            cursor = self._db.cursor()
+            cursor.execute("DELETE FROM " + self.ENTRIES_TABLE + " WHERE manifest_id = ?",
+                           (manifest_id,))
+            cursor.execute("DELETE FROM " + self.MANIFESTS_TABLE + " WHERE id = ?",
+                           (manifest_id,))
+            cursor.execute("DELETE FROM " + self.BLOBS_TABLE + " "
+                           "WHERE digest NOT IN (SELECT digest FROM " + self.ENTRIES_TABLE + ")")
+            self._db.commit()
+            cursor.close()
+        except sqlite3.DatabaseError as e:
+            self._db.rollback()
+            msg = "store error; cause: %s" % str(e)
+            raise ArchiveError(cause=msg)
+
+    def manifests(self):
+        """Get the manifests of the store.
+
+        :returns: a list of `ArchiveManifest` objects
+        """
+        try:
+            cursor = self._db.cursor()
+            cursor.execute("SELECT id FROM " + self.MANIFESTS_TABLE + " ORDER BY id")
+            rows = cursor.fetchall()
+            cursor.close()
+        except sqlite3.DatabaseError as e:
+            msg = "store error; cause: %s" % str(e)
+            raise ArchiveError(cause=msg)
+
+        return [ArchiveManifest(make_manifest_path(self.store_path, row[0])) for row in rows]
+
+    def _find_manifest(self, source):
+        cursor = self._db.cursor()
+        cursor.execute("SELECT id FROM " + self.MANIFESTS_TABLE + " WHERE source = ?",
+                       (source,))
+        row = cursor.fetchone()
+        cursor.close()
+
+        return row[0] if row else None
+
+
+class ArchiveManifest(Archive):
+    """Archive stored in an `ArchiveStore`.
+
+    This class gives access to the data of a manifest as if it
+    were a regular archive opened in replay mode. Manifests are
+    identified by the path of the store and the manifest id,
+    separated by `#` (see `make_manifest_path`).
+
+    :param archive_path: path to the manifest
+    :param codec: codec to decode archived data
+    :param replay: manifests are always opened in replay mode
+    :param preload_index: load the index of hash codes in memory
+
+    :raises ArchiveError: when the manifest does not exist or is invalid
+    """
+    def __init__(self, archive_path, codec=None, replay=True, preload_index=False):
+        store_path, manifest_id = split_manifest_path(archive_path)
+
+        if manifest_id is None or not os.path.exists(store_path):
+            raise ArchiveError(cause="archive %s does not exist" % (archive_path))
+
+        self._init_state(archive_path, None, None, codec, True)
+        self.store_path = store_path
+        self.manifest_id = manifest_id
+
+        self._db = self._connect_read_only(self.store_path)
+
+        self._load_metadata()
+
+        if preload_index:
+            self._preload_index()
+
+    def retrieve(self, uri, payload, headers):
+        """Retrieve a raw item from the manifest.
+
+        :param uri: request URI
+        :param payload: request payload
+        :param headers: request headers
+
+        :returns: the archived data
+
+        :raises ArchiveError: when an error occurs retrieving data
+        """
+        hashcode = self.make_hashcode(uri, payload, headers)
+
+        select_stmt = "SELECT e.meta, b.body " \
+                      "FROM " + ArchiveStore.ENTRIES_TABLE + " e " \
+                      "JOIN " + ArchiveStore.BLOBS_TABLE + " b ON e.digest = b.digest "
+
+        if self._index is not None:
+            entry_id = self._index.get(hashcode, None)
+            select_stmt += "WHERE e.id = ?"
+            params = (entry_id,)
+        else:
+            entry_id = None
+            select_stmt += "WHERE e.manifest_id = ? AND e.hashcode = ?"
+            params = (self.manifest_id, hashcode)
+
+        row = None
+
+        if self._index is None or entry_id is not None:
+            try:
+                with self._lock:
+                    cursor = self._db.cursor()
+                    cursor.execute(select_stmt, params)
+                    row = cursor.fetchone()
+                    cursor.close()
+            except sqlite3.DatabaseError as e:
+                msg = "data retrieval error; cause: %s" % str(e)
+                raise ArchiveError(cause=msg)
+
+        if not row:
+            msg = "entry %s not found in archive %s" % (hashcode, self.archive_path)
+            raise ArchiveError(cause=msg)
+
+        return self.codec.decode(bytes(row[0]) + bytes(row[1]))
+
+    def _fetch_entries(self):
+        """Generate the entries of the manifest, in insertion order"""
+
+        select_stmt = "SELECT e.hashcode, e.uri, e.payload, e.headers, e.meta, b.body " \
+                      "FROM " + ArchiveStore.ENTRIES_TABLE + " e " \
+                      "JOIN " + ArchiveStore.BLOBS_TABLE + " b ON e.digest = b.digest " \
+                      "WHERE e.manifest_id = ? ORDER BY e.id"
+
+        cursor = self._db.cursor()
+        cursor.execute(select_stmt, (self.manifest_id,))
+        for hashcode, uri, payload, headers, meta, body in cursor:
+            yield hashcode, uri, payload, headers, bytes(meta) + bytes(body)
+        cursor.close()
+
+    def _preload_index(self):
+        """Load the map of hash codes to entry ids in memory"""
+
+        select_stmt = "SELECT hashcode, id FROM " + ArchiveStore.ENTRIES_TABLE + " " \
+                      "WHERE manifest_id = ?"
+
+        try:
+            with self._lock:
+                cursor = self._db.cursor()
+                cursor.execute(select_stmt, (self.manifest_id,))
+                self._index = dict(cursor.fetchall())
+                cursor.close()
+        except sqlite3.DatabaseError as e:
+            msg = "invalid store file; cause: %s" % str(e)
+            raise ArchiveError(cause=msg)
+
+    def _load_metadata(self):
+        """Load the metadata of the manifest"""
+
+        select_stmt = "SELECT origin, backend_name, backend_version, " \
+                      "category, backend_params, created_on " \
+                      "FROM " + ArchiveStore.MANIFESTS_TABLE + " " \
+                      "WHERE id = ?"
+
+        try:
+            cursor = self._db.cursor()
+            cursor.execute(select_stmt, (self.manifest_id,))
+            row = cursor.fetchone()
+            cursor.close()
+        except sqlite3.DatabaseError as e:
+            msg = "invalid store file; cause: %s" % str(e)
+            raise ArchiveError(cause=msg)
+
+        if not row:
+            raise ArchiveError(cause="archive %s does not exist" % (self.archive_path))
+
+        self.origin = row[0]
+        self.backend_name = row[1]
+        self.backend_version = row[2]
+        self.category = row[3]
+        self.backend_params = pickle.loads(row[4])
+        self.created_on = str_to_datetime(row[5]) if row[5] else None
+
+
+MANIFEST_SEPARATOR = '#'
+
+
+def make_manifest_path(store_path, manifest_id):
+    """Build the path that identifies a manifest of a store"""
+
+    return store_path + MANIFEST_SEPARATOR + str(manifest_id)
+
+
+def split_manifest_path(archive_path):
+    """Split a path into the store path and the manifest id.
+
+    When `archive_path` does not identify a manifest, the manifest
+    id will be `None`.
+
+    :returns: a tuple with the path and the manifest id
+    """
+    path, sep, manifest_id = archive_path.rpartition(MANIFEST_SEPARATOR)
+
+    if not sep or not manifest_id.isdigit() or not path.endswith(ArchiveManager.STORE_EXT):
+        return archive_path, None
+
+    return path, int(manifest_id)
+
+
+def open_archive(archive_path, **kwargs):
+    """Open an archive or a manifest of a store.
+
+    :param archive_path: path to the archive or to the manifest
+    :param kwargs: parameters to initialize the archive
+
+    :returns: an `Archive` or an `ArchiveManifest` object
+
+    :raises ArchiveError: when the archive does not exist or is invalid
+    """
+    _, manifest_id = split_manifest_path(archive_path)
+
+    if manifest_id is not None:
+        kwargs.pop('batch_size', None)
+        kwargs.pop('batch_timeout', None)
+        return ArchiveManifest(archive_path, **kwargs)
+    else:
+        return Archive(archive_path, **kwargs)
+
+
 class ArchiveManager:
     """Manager for handling archives in Perceval.
 
@@ -353,17 +1253,74 @@ class ArchiveManager:
     be the name of the subdirectory; the remaining bytes, the archive
     name.
 
+    Archives created by the manager will use the write-batching
+    mode when `batch_size` or `batch_timeout` are set and they will
+    encode data using `codec`. See `Archive` for more information.
+
+    The manager keeps a catalog of the archives under `dirpath`,
+    stored in a SQLite database on that directory. It is updated
+    when archives are created or removed, and it is used to search
+    archives without opening every file of the directory. When the
+    catalog does not exist, it is built from the archives found on
+    disk. Call to `reindex` to rebuild it in case it gets out of
+    sync with the directory. Archives without metadata are read
+    again on searches only when their files change.
+
+    Archives can be compacted calling to `compact`. Their entries are
+    moved to content-addressed stores (see `ArchiveStore`), one per
+    origin, backend and category, under the `stores` subdirectory.
+    Each compacted archive is kept in the catalog as a manifest of
+    its store, so searches still return what every fetch archived.
+
     :param: dirpath: path where the archives are stored
+    :param batch_size: number of items stored per transaction
+    :param batch_timeout: max number of seconds a transaction is kept open
+    :param codec: codec to encode and decode archived data
     """
 
     STORAGE_EXT = '.sqlite3'
+    STORE_EXT = '.store'
+    STORES_DIR = 'stores'
+    WAL_EXTS = ['-wal', '-shm']
+
+    CATALOG_NAME = 'catalog.db'
+    CATALOG_TABLE = 'archives'
+    CATALOG_TIMEOUT = 30
 
-    def __init__(self, dirpath):
+    # Table structure
+    CATALOG_CREATE_STMT = "CREATE TABLE IF NOT EXISTS " + CATALOG_TABLE + " ( " \
+                          "archive_path TEXT PRIMARY KEY, " \
+                          "origin TEXT, " \
+                          "backend_name TEXT, " \
+                          "category TEXT, " \
+                          "created_on REAL, " \
+                          "scanned_mtime INTEGER, " \
+                          "scanned_size INTEGER)"
+
+    # Columns added to catalogs created by previous versions
+    CATALOG_NEW_COLUMNS = [('scanned_mtime', 'INTEGER'), ('scanned_size', 'INTEGER')]
+
+    CATALOG_INDEX_STMT = "CREATE INDEX IF NOT EXISTS " + CATALOG_TABLE + "_search " \
+                         "ON " + CATALOG_TABLE + " " \
+                         "(origin, backend_name, category, created_on)"
+
+    def __init__(self, dirpath, batch_size=None, batch_timeout=None, codec=None):
         self.dirpath = dirpath
+        self.batch_size = batch_size
+        self.batch_timeout = batch_timeout
+        self.codec = codec
 
         if not os.path.exists(self.dirpath):
             os.makedirs(self.dirpath)
 
+        self.catalog_path = os.path.join(self.dirpath, self.CATALOG_NAME)
+        self._catalog = None
+
+    def __del__(self):
+        conn = getattr(self, '_catalog', None)
+        if conn:
+            conn.close()
+
     def create_archive(self):
         """Create a new archive.
 
@@ -386,29 +1343,154 @@ class ArchiveManager:
             os.makedirs(archive_dir)
 
         try:
-            archive = Archive.create(archive_path)
+            archive = Archive.create(archive_path,
+                                     batch_size=self.batch_size,
+                                     batch_timeout=self.batch_timeout,
+                                     codec=self.codec)
         except ArchiveError as e:
             raise ArchiveManagerError(cause=str(e))
 
+        self._catalog_store(archive)
+
         return archive
 
     def remove_archive(self, archive_path):
         """Remove an archive.
 
         This method deletes from the filesystem the archive stored
-        in `archive_path`.
+        in `archive_path`, together with its write-ahead log files,
+        if any. The archive is removed from the catalog too.
 
         :param archive_path: path to the archive
 
         :raises ArchiveManangerError: when an error occurs removing the
             archive
         """
+        store_path, manifest_id = split_manifest_path(archive_path)
+
         try:
-            Archive(archive_path)
+            if manifest_id is not None:
+                archive = ArchiveManifest(archive_path)
+                archive.close()
+                store = ArchiveStore(store_path)
+                store.remove_manifest(manifest_id)
+                store.close()
+            else:
+                archive = Archive(archive_path)
+                archive.close()
         except ArchiveError as e:
             raise ArchiveManagerError(cause=str(e))
 
-        os.remove(archive_path)
+        if manifest_id is None:
+            self._remove_files(archive_path)
+
+        self._catalog_remove(archive_path)
+
+    def compact(self, origin=None, backend_name=None, category=None,
+                archived_before=None):
+        """Compact the archives of the manager.
+
+        The entries of the archives are moved to the store of their
+        origin, backend and category. Bodies shared by several archives,
+        such as the pages of a repository fetched many times, are kept
+        only once. Every archive is replaced in the catalog by its
+        manifest and then, its file is removed.
+
+        Archives can be filtered by `origin`, `backend_name`, `category`
+        and by their date of creation; only those archives created
+        before `archived_before` will be compacted. Archives still
+        being written should not be compacted.
+
+        :param origin: compact only the archives of this origin
+        :param backend_name: compact only the archives of this backend
+        :param category: compact only the archives of this category
+        :param archived_before: compact archives created before this date
+
+        :returns: the number of archives compacted
+
+        :raises ArchiveManangerError: when an error occurs compacting
+            the archives
+        """
+        self._catalog_refresh()
+
+        select_stmt = "SELECT archive_path, origin, backend_name, category " \
+                      "FROM " + self.CATALOG_TABLE + " " \
+                      "WHERE origin IS NOT NULL"
+        params = []
+
+        for column, value in (('origin', origin),
+                              ('backend_name', backend_name),
+                              ('category', category)):
+            if value is not None:
+                select_stmt += " AND " + column + " = ?"
+                params.append(value)
+
+        if archived_before:
+            select_stmt += " AND created_on < ?"
+            params.append(archived_before.timestamp())
+
+        select_stmt += " ORDER BY created_on"
+
+        rows = self._catalog_execute(select_stmt, params)
+
+        stores = {}
+        ncompacted = 0
+        nentries = 0
+        nblobs = 0
+
+        try:
+            for relpath, arch_origin, arch_backend, arch_category in rows:
+                archive_path = os.path.join(self.dirpath, relpath)
+
+                if split_manifest_path(archive_path)[1] is not None:
+                    continue
+
+                store_path = self._store_path(arch_origin, arch_backend, arch_category)
+
+                try:
+                    archive = Archive(archive_path)
+
+                    if store_path not in stores:
+                        stores[store_path] = ArchiveStore(store_path)
+
+                    manifest_id, n, m = stores[store_path].add_archive(archive, relpath)
+                    archive.close()
+
+                    manifest = ArchiveManifest(make_manifest_path(store_path, manifest_id))
+                    manifest.close()
+                except ArchiveError as e:
+                    logger.warning("Skipping archive %s; cause: %s", archive_path, str(e))
+                    continue
+
+                self._catalog_store(manifest)
+                self._catalog_remove(archive_path)
+                self._remove_files(archive_path)
+
+                ncompacted += 1
+                nentries += n
+                nblobs += m
+        finally:
+            for store in stores.values():
+                store.close()
+
+        logger.info("%s archives compacted; %s entries, %s unique bodies stored",
+                    ncompacted, nentries, nblobs)
+
+        return ncompacted
+
+    def reindex(self):
+        """Rebuild the catalog of archives.
+
+        The method removes every entry of the catalog and adds
+        the valid archives found under the base path.
+
+        :returns: the number of archives indexed
+
+        :raises ArchiveManangerError: when an error occurs updating
+            the catalog
+        """
+        conn = self._open_catalog()
+        return self._reindex(conn)
 
     def search(self, origin, backend_name, category, archived_after):
         """Search archives.
@@ -436,29 +1518,243 @@ class ArchiveManager:
 
         return archives
 
+    def _store_path(self, origin, backend_name, category):
+        """Get the path of the store of the given parameters"""
+
+        key = ':'.join([origin, backend_name, category or ''])
+        hashcode = hashlib.sha1(key.encode('utf-8')).hexdigest()
+
+        stores_dir = os.path.join(self.dirpath, self.STORES_DIR)
+
+        if not os.path.exists(stores_dir):
+            os.makedirs(stores_dir)
+
+        return os.path.join(stores_dir, hashcode + self.STORE_EXT)
+
+    def _remove_files(self, archive_path):
+        """Remove an archive file and its write-ahead log files"""
+
+        os.remove(archive_path)
+
+        for ext in self.WAL_EXTS:
+            wal_path = archive_path + ext
+            if os.path.exists(wal_path):
+                os.remove(wal_path)
+
     def _search_archives(self, origin, backend_name, category, archived_after):
         """Search archives using filters."""
 
-        for archive_path in self._search_files():
-            try:
-                archive = Archive(archive_path)
-            except ArchiveError:
-                continue
+        self._catalog_refresh()
+
+        select_stmt = "SELECT archive_path, created_on " \
+                      "FROM " + self.CATALOG_TABLE + " " \
+                      "WHERE origin = ? AND backend_name = ? " \
+                      "AND category = ? AND created_on >= ? " \
+                      "ORDER BY created_on"
 
-            match = archive.origin == origin and \
-                archive.backend_name == backend_name and \
-                archive.category == category and \
-                archive.created_on >= archived_after
+        rows = self._catalog_execute(select_stmt, (origin, backend_name, category,
+                                                   archived_after.timestamp()))
 
-            if not match:
+        for relpath, created_on in rows:
+            archive_path = os.path.join(self.dirpath, relpath)
+            filepath, _ = split_manifest_path(archive_path)
+
+            if not os.path.exists(filepath):
+                self._catalog_remove(archive_path)
                 continue
 
-            yield archive_path, archive.created_on
+            yield archive_path, created_on
 
     def _search_files(self):
         """Retrieve the file paths stored under the base path."""
 
         for root, _, files in os.walk(self.dirpath):
             for filename in files:
+                if filename.endswith(tuple(self.WAL_EXTS)):
+                    continue
+                if root == self.dirpath and filename.startswith(self.CATALOG_NAME):
+                    continue
                 location = os.path.join(root, filename)
                 yield location
+
+    def _open_catalog(self):
+        """Open the catalog, building it when it does not exist"""
+
+        if self._catalog:
+            return self._catalog
+
+        exists = os.path.exists(self.catalog_path)
+
+        try:
+            conn = sqlite3.connect(self.catalog_path, timeout=self.CATALOG_TIMEOUT)
+            cursor = conn.cursor()
+            cursor.execute(self.CATALOG_CREATE_STMT)
+            cursor.execute(self.CATALOG_INDEX_STMT)
+
+            cursor.execute("PRAGMA table_info(" + self.CATALOG_TABLE + ")")
+            columns = [row[1] for row in cursor.fetchall()]
+            for name, column_type in self.CATALOG_NEW_COLUMNS:
+                if name not in columns:
+                    cursor.execute("ALTER TABLE " + self.CATALOG_TABLE + " "
+                                   "ADD COLUMN " + name + " " + column_type)
+
+            conn.commit()
+            cursor.close()
+        except sqlite3.DatabaseError as e:
+            msg = "invalid catalog file %s; cause: %s" % (self.catalog_path, str(e))
+            raise ArchiveManagerError(cause=msg)
+
+        if not exists:
+            logger.debug("Catalog %s not found; indexing archives", self.catalog_path)
+            self._reindex(conn)
+
+        self._catalog = conn
+
+        return self._catalog
+
+    def _reindex(self, conn):
+        """Rebuild the catalog using the given connection"""
+
+        entries = []
+
+        for archive_path in self._search_files():
+            try:
+                if archive_path.endswith(self.STORE_EXT):
+                    store = ArchiveStore(archive_path)
+                    archives = store.manifests()
+                    store.close()
+                else:
+                    archives = [Archive(archive_path)]
+            except ArchiveError:
+                continue
+
+            for archive in archives:
+                archive.close()
+                entries.append(self._catalog_entry(archive.archive_path, archive))
+
+        insert_stmt = "INSERT INTO " + self.CATALOG_TABLE + " " \
+                      "(archive_path, origin, backend_name, category, created_on) " \
+                      "VALUES (?, ?, ?, ?, ?)"
+
+        try:
+            cursor = conn.cursor()
+            cursor.execute("DELETE FROM " + self.CATALOG_TABLE)
+            cursor.executemany(insert_stmt, entries)
+            conn.commit()
+            cursor.close()
+        except sqlite3.DatabaseError as e:
+            conn.rollback()
+            msg = "catalog update error; cause: %s" % str(e)
+            raise ArchiveManagerError(cause=msg)
+
+        logger.debug("Catalog %s reindexed; %s archives found",
+                     self.catalog_path, len(entries))
+
+        return len(entries)
+
+    def _catalog_refresh(self):
+        """Update the entries of the archives without metadata.
+
+        Archives are added to the catalog when they are created, but
+        their metadata is set later, once the fetch process starts.
+        This method loads the metadata of these archives, if any, and
+        removes those entries that are no longer valid archives. The
+        modification time and size of the archives still without
+        metadata are recorded, so they are not read again until
+        their files change.
+        """
+        select_stmt = "SELECT archive_path, scanned_mtime, scanned_size " \
+                      "FROM " + self.CATALOG_TABLE + " " \
+                      "WHERE origin IS NULL"
+        update_stmt = "UPDATE " + self.CATALOG_TABLE + " " \
+                      "SET scanned_mtime = ?, scanned_size = ? " \
+                      "WHERE archive_path = ?"
+
+        rows = self._catalog_execute(select_stmt)
+
+        for relpath, scanned_mtime, scanned_size in rows:
+            archive_path = os.path.join(self.dirpath, relpath)
+            signature = self._file_signature(archive_path)
+
+            if signature and signature == (scanned_mtime, scanned_size):
+                continue
+
+            try:
+                archive = open_archive(archive_path)
+            except ArchiveError:
+                self._catalog_remove(archive_path)
+                continue
+
+            archive.close()
+
+            if archive.origin is not None:
+                self._catalog_store(archive)
+            elif signature:
+                self._catalog_execute(update_stmt, signature + (relpath,), commit=True)
+
+    def _file_signature(self, archive_path):
+        """Get the last modification time, in nanoseconds, and size of an archive file.
+
+        Data kept in the write-ahead log of the archive is taken into
+        account too. Returns `None` when the file does not exist.
+        """
+        try:
+            stat = os.stat(archive_path)
+        except OSError:
+            return None
+
+        mtime = stat.st_mtime_ns
+        size = stat.st_size
+
+        for ext in self.WAL_EXTS:
+            try:
+                stat = os.stat(archive_path + ext)
+            except OSError:
+                continue
+            mtime = max(mtime, stat.st_mtime_ns)
+            size += stat.st_size
+
+        return mtime, size
+
+    def _catalog_store(self, archive):
+        """Add or replace the entry of an archive in the catalog"""
+
+        insert_stmt = "INSERT OR REPLACE INTO " + self.CATALOG_TABLE + " " \
+                      "(archive_path, origin, backend_name, category, created_on) " \
+                      "VALUES (?, ?, ?, ?, ?)"
+
+        entry = self._catalog_entry(archive.archive_path, archive)
+        self._catalog_execute(insert_stmt, entry, commit=True)
+
+    def _catalog_remove(self, archive_path):
+        """Remove the entry of an archive from the catalog"""
+
+        delete_stmt = "DELETE FROM " + self.CATALOG_TABLE + " WHERE archive_path = ?"
+        relpath = os.path.relpath(archive_path, self.dirpath)
+        self._catalog_execute(delete_stmt, (relpath,), commit=True)
+
+    def _catalog_entry(self, archive_path, archive):
+        relpath = os.path.relpath(archive_path, self.dirpath)
+        created_on = archive.created_on.timestamp() if archive.created_on else None
+
+        return (relpath, archive.origin, archive.backend_name,
+                archive.category, created_on)
+
+    def _catalog_execute(self, stmt, params=(), commit=False):
+        """Run a statement on the catalog and return its rows"""
+
+        conn = self._open_catalog()
+
+        try:
+            cursor = conn.cursor()
+            cursor.execute(stmt, params)
+            rows = cursor.fetchall()
+            if commit:
+                conn.commit()
+            cursor.close()
+        except sqlite3.DatabaseError as e:
+            conn.rollback()
+            msg = "catalog error; cause: %s" % str(e)
+            raise ArchiveManagerError(cause=msg)
+
+        return rows
@@ -21,20 +21,33 @@
 
 import argparse
 import collections
+import concurrent.futures
 import hashlib
 import importlib
-import json
 import logging
 import os
+import multiprocessing
 import pkgutil
+import queue
 import sys
+import time
+import urllib.parse
 
 from grimoirelab_toolkit.introspect import find_signature_parameters
-from grimoirelab_toolkit.datetime import (datetime_utcnow,
+from grimoirelab_toolkit.datetime import (datetime_to_utc,
                                           str_to_datetime,
                                           unixtime_to_datetime)
-from .archive import Archive, ArchiveManager
-from .errors import ArchiveError, BackendError, BackendCommandArgumentParserError
+from .archive import Archive, ArchiveManager, CompactCodec, open_archive
+from .cache import ResponseCache
+from .checkpoint import CheckpointStore
+from .client import HttpClient, RateLimitHandler, RatePacer
+from .errors import (ArchiveError,
+                     BackendError,
+                     BackendCommandArgumentParserError,
+                     CacheError,
+                     CheckpointError)
+from .metrics import METRICS_EXPORTERS, METRICS_FORMAT_JSON, FetchMetrics
+from .output import OUTPUT_FORMATS, OUTPUT_FORMAT_JSON, OUTPUT_FORMAT_JSONL, make_item_writer
 from ._version import __version__
 
 
@@ -42,6 +55,12 @@ logger = logging.getLogger(__name__)
 
 
 ARCHIVES_DEFAULT_PATH = '~/.perceval/archives/'
+CHECKPOINTS_DEFAULT_PATH = '~/.perceval/checkpoints.json'
+CHECKPOINT_INTERVAL = 100
+REPLAY_CHUNK_SIZE = 100
+REPLAY_QUEUE_SIZE = 4
+REPLAY_POLL_TIMEOUT = 1
+HTTP_CACHE_DEFAULT_PATH = '~/.perceval/http_cache.db'
 DEFAULT_SEARCH_FIELD = 'item_id'
 
 OriginUniqueField = collections.namedtuple('OriginUniqueField', 'name type')
@@ -87,6 +106,33 @@ class Backend:
     the summary also includes some extra fields, which can be used by any
     backend to include fetch-specific information.
 
+    Backends which fetch their items sorted by update date or offset,
+    from the oldest to the newest, can set `SORTED_FETCH`. They save
+    the progress of their fetches when a `CheckpointStore` is assigned
+    to the attribute `checkpoint_store`. The summary is saved every
+    `CHECKPOINT_INTERVAL` items, once the last of them was consumed,
+    and when the fetch finishes. When the attribute `resume` is also
+    set, the `from_date` or `offset` given to `fetch` are moved forward
+    to the point reached by the latest fetch of the same origin and
+    category. Backends returning items in any other order (e.g., Git
+    commits in topological order or messages in file order) must not
+    set it, or resumed fetches would skip items never fetched.
+
+    Backends using an `HttpClient` revalidate their GET requests with
+    the `ResponseCache` assigned to the attribute `response_cache`, so
+    unchanged resources are not downloaded again. The number of cache
+    hits, misses and bytes saved are included in the summary.
+
+    When the attribute `rate_pacing` is set, clients handling rate
+    limits spread their requests over the time left to the reset,
+    using a `RatePacer` shared by every backend of the process that
+    sends requests to the same host.
+
+    Requests are traced when a `FetchMetrics` object is assigned to
+    the attribute `metrics`. Besides the metrics recorded by the
+    clients, like latencies, retries or time slept, the duration
+    of the whole fetch is recorded as the stage `fetch`.
+
     Each backend can also provide a set of search fields to simplify query
     operations (avoiding the manual inspection of the items). The search
     fields are included in a dict with the following shape:
@@ -127,14 +173,23 @@ class Backend:
     CLASSIFIED_FIELDS = []
     EXTRA_SEARCH_FIELDS = {}
     ORIGIN_UNIQUE_FIELD = None
+    SORTED_FETCH = False
 
     def __init__(self, origin, tag=None, archive=None, blacklist_ids=None):
         self._origin = origin
         self.tag = tag if tag else origin
         self.archive = archive or None
         self.blacklist_ids = blacklist_ids or None
+        self.checkpoint_store = None
+        self.resume = False
+        self.response_cache = None
+        self.rate_pacing = False
+        self.metrics = None
         self._summary = None
 
+        # Values shared by the metadata of every item
+        self._metadata_constants = (self.__class__.__name__, self.version, origin)
+
     @property
     def origin(self):
         return self._origin
@@ -210,8 +265,26 @@ class Backend:
             self.archive.init_metadata(self.origin, self.__class__.__name__, self.version, category,
                                        kwargs)
 
+        checkpoint_store = self.checkpoint_store if self.checkpoint_store and self.SORTED_FETCH else None
+
+        if checkpoint_store and self.resume:
+            kwargs = self._resume_fetch(checkpoint_store, category, kwargs)
+
         self.client = self._init_client()
 
+        cached_client = self.response_cache and isinstance(self.client, HttpClient)
+        if cached_client:
+            self.client.cache = self.response_cache
+
+        if self.rate_pacing and isinstance(self.client, RateLimitHandler):
+            host = urllib.parse.urlparse(self.client.base_url).netloc
+            self.client.rate_pacer = RatePacer.shared(host)
+
+        if self.metrics and isinstance(self.client, HttpClient):
+            self.client.metrics = self.metrics
+
+        start = time.perf_counter()
+
         for item in self.fetch_items(category, **kwargs):
             if filter_classified:
                 item = self.filter_classified_data(item)
@@ -221,6 +294,25 @@ class Backend:
 
             yield metadata_item
 
+            # The item was consumed; it is safe to save it as the last one
+            if checkpoint_store and self.summary.fetched % CHECKPOINT_INTERVAL == 0:
+                self._save_checkpoint(checkpoint_store, category)
+
+        # Make sure the archived data is durable before finishing
+        if self.archive:
+            self.archive.flush()
+
+        if cached_client:
+            self.summary.cache_hits = self.client.cache_hits
+            self.summary.cache_misses = self.client.cache_misses
+            self.summary.cache_bytes_saved = self.client.cache_bytes_saved
+
+        if checkpoint_store and self.summary.fetched:
+            self._save_checkpoint(checkpoint_store, category)
+
+        if self.metrics:
+            self.metrics.record_stage('fetch', time.perf_counter() - start)
+
     def fetch_from_archive(self):
         """Fetch the questions from an archive.
 
@@ -253,18 +345,22 @@ class Backend:
 
         :returns: the same item but with confidential data filtered
         """
-        item_uuid = uuid(self.origin, self.metadata_id(item))
+        debug = logger.isEnabledFor(logging.DEBUG)
 
-        logger.debug("Filtering classified data for item %s", item_uuid)
+        if debug:
+            item_uuid = uuid(self.origin, self.metadata_id(item))
+            logger.debug("Filtering classified data for item %s", item_uuid)
 
         for cf in self.CLASSIFIED_FIELDS:
             try:
                 _remove_key_from_nested_dict(item, cf)
             except KeyError:
-                logger.debug("Classified field '%s' not found for item %s; field ignored",
-                             '.'.join(cf), item_uuid)
+                if debug:
+                    logger.debug("Classified field '%s' not found for item %s; field ignored",
+                                 '.'.join(cf), item_uuid)
 
-        logger.debug("Classified data filtered for item %s", item_uuid)
+        if debug:
+            logger.debug("Classified data filtered for item %s", item_uuid)
 
         return item
 
@@ -278,31 +374,7 @@ class Backend:
 
         :returns: a dict of search fields
         """
-        item_uuid = uuid(self.origin, self.metadata_id(item))
-
-        logger.debug("Adding search fields to item %s", item_uuid)
-
-        logger.debug("Adding default `item_id` search field to item %s", item_uuid)
-        search_fields = {
-            DEFAULT_SEARCH_FIELD: self.metadata_id(item)
-        }
-
-        logger.debug("Adding extra search fields to item %s", item_uuid)
-        for sf in self.EXTRA_SEARCH_FIELDS:
-            try:
-                search_field = self.EXTRA_SEARCH_FIELDS[sf]
-                field_value = _find_value_from_nested_dict(item, search_field)
-                search_fields[sf] = field_value
-            except KeyError:
-                logger.warning("Extra search field '%s' not found for item %s; field ignored",
-                               sf, item_uuid)
-            except IndexError:
-                logger.warning("Extra search field '%s' is empty %s; field ignored",
-                               sf, item_uuid)
-
-        logger.debug("Search fields added for item %s", item_uuid)
-
-        return search_fields
+        return self._search_fields(item, self.metadata_id(item))
 
     def metadata(self, item, filter_classified=False):
         """Add metadata to an item.
@@ -314,23 +386,99 @@ class Backend:
         :param item: an item fetched by a backend
         :param filter_classified: sets if classified fields were filtered
         """
+        backend_name, backend_version, origin = self._metadata_constants
+
+        item_id = self.metadata_id(item)
+
+        # Backends overriding `search_fields` only receive the item
+        if type(self).search_fields is Backend.search_fields:
+            search_fields = self._search_fields(item, item_id)
+        else:
+            search_fields = self.search_fields(item)
+
         item = {
-            'backend_name': self.__class__.__name__,
-            'backend_version': self.version,
+            'backend_name': backend_name,
+            'backend_version': backend_version,
             'perceval_version': __version__,
-            'timestamp': datetime_utcnow().timestamp(),
-            'origin': self.origin,
-            'uuid': uuid(self.origin, self.metadata_id(item)),
+            'timestamp': time.time(),
+            'origin': origin,
+            'uuid': uuid(origin, item_id),
             'updated_on': self.metadata_updated_on(item),
             'classified_fields_filtered': self.classified_fields if filter_classified else None,
             'category': self.metadata_category(item),
-            'search_fields': self.search_fields(item),
+            'search_fields': search_fields,
             'tag': self.tag,
             'data': item,
         }
 
         return item
 
+    def _search_fields(self, item, item_id):
+        """Build the default search fields of an item with the given id"""
+
+        debug = logger.isEnabledFor(logging.DEBUG)
+
+        if debug:
+            item_uuid = uuid(self.origin, item_id)
+            logger.debug("Adding search fields to item %s", item_uuid)
+            logger.debug("Adding default `item_id` search field to item %s", item_uuid)
+
+        search_fields = {
+            DEFAULT_SEARCH_FIELD: item_id
+        }
+
+        if debug:
+            logger.debug("Adding extra search fields to item %s", item_uuid)
+
+        for sf in self.EXTRA_SEARCH_FIELDS:
+            try:
+                search_field = self.EXTRA_SEARCH_FIELDS[sf]
+                field_value = _find_value_from_nested_dict(item, search_field)
+                search_fields[sf] = field_value
+            except KeyError:
+                logger.warning("Extra search field '%s' not found for item %s; field ignored",
+                               sf, uuid(self.origin, item_id))
+            except IndexError:
+                logger.warning("Extra search field '%s' is empty %s; field ignored",
+                               sf, uuid(self.origin, item_id))
+
+        if debug:
+            logger.debug("Search fields added for item %s", item_uuid)
+
+        return search_fields
+
+    def _resume_fetch(self, checkpoint_store, category, kwargs):
+        """Move forward the fetch arguments to the stored checkpoint"""
+
+        checkpoint = checkpoint_store.load(self.__class__.__name__, self.origin, category)
+
+        if not checkpoint:
+            logger.info("No checkpoint found for %s (%s); fetching from the beginning",
+                        self.origin, category)
+            return kwargs
+
+        kwargs = dict(kwargs)
+
+        from_date = checkpoint['from_date']
+        if 'from_date' in kwargs and from_date:
+            if not kwargs['from_date'] or datetime_to_utc(kwargs['from_date']) < from_date:
+                kwargs['from_date'] = from_date
+                logger.info("Resuming fetch of %s (%s) from date %s",
+                            self.origin, category, from_date)
+
+        offset = checkpoint['offset']
+        if 'offset' in kwargs and offset is not None:
+            if kwargs['offset'] is None or kwargs['offset'] < offset:
+                kwargs['offset'] = offset
+                logger.info("Resuming fetch of %s (%s) from offset %s",
+                            self.origin, category, offset)
+
+        return kwargs
+
+    def _save_checkpoint(self, checkpoint_store, category):
+        checkpoint_store.save(self.__class__.__name__, self.origin,
+                              category, self.summary)
+
     @classmethod
     def has_archiving(cls):
         raise NotImplementedError
@@ -407,17 +555,26 @@ class BackendCommandArgumentParser:
     :param token_auth: set token/key authentication arguments
     :param archive: set archiving arguments
     :param aliases: define aliases for parsed arguments
+    :param resume: set resuming arguments; it needs either `from_date`
+        or `offset`
+    :param http_cache: set HTTP cache arguments
+    :param rate_pacing: set rate pacing arguments
 
     :raises AttributeArror: when both `from_date` and `offset` are set
-        to `True`
+        to `True` or when `resume` is set without any of them
+    :raises BackendCommandArgumentParserError: when `resume` is set
+        but the backend does not fetch its items sorted (see
+        `Backend.SORTED_FETCH`)
     """
 
     def __init__(self, backend, from_date=False, to_date=False, offset=False,
                  basic_auth=False, token_auth=False, archive=False,
-                 aliases=None, blacklist=False):
+                 aliases=None, blacklist=False, resume=False, http_cache=False,
+                 rate_pacing=False):
         self._from_date = from_date
         self._to_date = to_date
         self._archive = archive
+        self._resume = resume
         self._backend = backend
 
         self.aliases = aliases or {}
@@ -465,6 +622,22 @@ class BackendCommandArgumentParser:
         if archive:
             self._set_archive_arguments()
 
+        if resume:
+            if not (from_date or offset):
+                raise AttributeError("resume parameter needs either date or offset parameters")
+            if not backend.SORTED_FETCH:
+                msg = "Resuming not supported by {} backend".format(backend.__name__)
+                raise BackendCommandArgumentParserError(cause=msg)
+
+            self._set_resume_arguments()
+
+        if http_cache:
+            self._set_http_cache_arguments()
+
+        if rate_pacing:
+            self._set_rate_pacing_arguments()
+
+        self._set_metrics_arguments()
         self._set_output_arguments()
 
     def parse(self, *args):
@@ -495,6 +668,8 @@ class BackendCommandArgumentParser:
             raise AttributeError("fetch-archive and no-archive arguments are not compatible")
         if self._archive and parsed_args.fetch_archive and not parsed_args.category:
             raise AttributeError("fetch-archive needs a category to work with")
+        if self._archive and self._resume and parsed_args.fetch_archive and parsed_args.resume:
+            raise AttributeError("fetch-archive and resume arguments are not compatible")
 
         # Set aliases
         for alias, arg in self.aliases.items():
@@ -530,6 +705,67 @@ class BackendCommandArgumentParser:
                            help="fetch data from the archives")
         group.add_argument('--archived-since', dest='archived_since', default='1970-01-01',
                            help="retrieve items archived since the given date")
+        group.add_argument('--archive-batch-size', dest='archive_batch_size',
+                           type=int, default=None,
+                           help="number of items archived per transaction")
+        group.add_argument('--archive-batch-timeout', dest='archive_batch_timeout',
+                           type=float, default=None,
+                           help="max seconds to wait before committing archived items")
+        group.add_argument('--archive-compression', dest='archive_compression',
+                           choices=['zlib', 'zstd'], default=None,
+                           help="compress the archived data")
+        group.add_argument('--archive-workers', dest='archive_workers',
+                           type=int, default=None,
+                           help="number of processes replaying archives in parallel")
+        group.add_argument('--archive-unordered', dest='archive_ordered',
+                           action='store_false',
+                           help="return archived items as soon as they are available, \
+                                 regardless the order of the archives")
+
+    def _set_resume_arguments(self):
+        """Activate resume arguments parsing"""
+
+        group = self.parser.add_argument_group('resume arguments')
+        group.add_argument('--resume', dest='resume', action='store_true',
+                           help="resume the fetch from the last checkpoint \
+                                 saved for this origin and category")
+        group.add_argument('--checkpoint-path', dest='checkpoint_path', default=None,
+                           help="file path to the checkpoints; setting it \
+                                 saves the progress of the fetch")
+
+    def _set_http_cache_arguments(self):
+        """Activate HTTP cache arguments parsing"""
+
+        group = self.parser.add_argument_group('HTTP cache arguments')
+        group.add_argument('--http-cache', dest='http_cache', action='store_true',
+                           help="revalidate the responses stored in the HTTP cache \
+                                 instead of downloading them again")
+        group.add_argument('--http-cache-path', dest='http_cache_path', default=None,
+                           help="file path to the HTTP cache; setting it \
+                                 enables the cache")
+        group.add_argument('--http-cache-size', dest='http_cache_size',
+                           type=int, default=None,
+                           help="max size of the HTTP cache in bytes")
+
+    def _set_rate_pacing_arguments(self):
+        """Activate rate pacing arguments parsing"""
+
+        group = self.parser.add_argument_group('rate pacing arguments')
+        group.add_argument('--rate-pacing', dest='rate_pacing', action='store_true',
+                           help="spread the requests over the time left \
+                                 to the rate limit reset")
+
+    def _set_metrics_arguments(self):
+        """Activate metrics arguments parsing"""
+
+        group = self.parser.add_argument_group('metrics arguments')
+        group.add_argument('--metrics-path', dest='metrics_path', default=None,
+                           help="file path to the report with the metrics of \
+                                 the requests; setting it traces the requests")
+        group.add_argument('--metrics-format', dest='metrics_format',
+                           choices=list(METRICS_EXPORTERS.keys()),
+                           default=METRICS_FORMAT_JSON,
+                           help="format of the metrics report")
 
     def _set_output_arguments(self):
         """Activate output arguments parsing"""
@@ -540,6 +776,12 @@ class BackendCommandArgumentParser:
                            help="output file")
         group.add_argument('--json-line', dest='json_line', action='store_true',
                            help="produce a JSON line for each output item")
+        group.add_argument('--output-format', dest='output_format',
+                           choices=OUTPUT_FORMATS, default=None,
+                           help="format of the output items; '--json-line' is \
+                                 the same as 'jsonl'")
+        group.add_argument('--unsorted-keys', dest='sort_keys', action='store_false',
+                           help="do not sort the keys of the output items")
 
 
 class BackendCommand:
@@ -564,20 +806,36 @@ class BackendCommand:
         self.parsed_args = parser.parse(*args)
 
         self.archive_manager = None
+        self.checkpoint_store = None
+        self.response_cache = None
+        self.metrics = None
+        self.summary = None
 
         self._pre_init()
         self._initialize_archive()
+        self._initialize_checkpoint()
+        self._initialize_http_cache()
+        self._initialize_metrics()
         self._post_init()
 
         self.outfile = self.parsed_args.outfile
         self.json_line = self.parsed_args.json_line
+        self.output_format = self.parsed_args.output_format
+        self.sort_keys = self.parsed_args.sort_keys
+
+        if not self.output_format:
+            self.output_format = OUTPUT_FORMAT_JSONL if self.json_line else OUTPUT_FORMAT_JSON
 
     def run(self):
         """Fetch and write items.
 
         This method runs the backend to fetch the items from the given
-        origin. Items are converted to JSON objects and written to the
-        defined output. A summary with the result is written to the log.
+        origin. Items are encoded using the selected output format and
+        written to the defined output as they are fetched. A summary
+        with the result is written to the log and stored in the
+        attribute `summary`. When the requests are traced, their
+        metrics are written to the log and exported to the metrics
+        report.
 
         If `fetch-archive` parameter was given as an argument during
         the initialization of the instance, the items will be retrieved
@@ -588,22 +846,39 @@ class BackendCommand:
         filter_classified = backend_args.pop('filter_classified', False)
         fetch_archive = self.archive_manager and self.parsed_args.fetch_archive
         archived_since = backend_args.pop('archived_since', None)
+        archive_workers = backend_args.pop('archive_workers', None)
+        archive_ordered = backend_args.pop('archive_ordered', True)
+        resume = backend_args.pop('resume', False)
+        rate_pacing = backend_args.pop('rate_pacing', False)
+        metrics_path = backend_args.pop('metrics_path', None)
+        metrics_format = backend_args.pop('metrics_format', METRICS_FORMAT_JSON)
+
+        writer = make_item_writer(self.outfile, self.output_format,
+                                  sort_keys=self.sort_keys)
 
         with BackendItemsGenerator(self.BACKEND, backend_args, category,
                                    filter_classified=filter_classified,
                                    manager=self.archive_manager,
                                    fetch_archive=fetch_archive,
-                                   archived_after=archived_since) as big:
+                                   archived_after=archived_since,
+                                   archive_workers=archive_workers,
+                                   archive_ordered=archive_ordered,
+                                   checkpoint_store=self.checkpoint_store,
+                                   resume=resume,
+                                   response_cache=self.response_cache,
+                                   rate_pacing=rate_pacing,
+                                   metrics=self.metrics) as big:
             try:
-                for item in big.items:
-                    if self.json_line:
-                        obj = json.dumps(item, separators=(',', ':'), sort_keys=True)
-                    else:
-                        obj = json.dumps(item, indent=4, sort_keys=True)
-                    self.outfile.write(obj)
-                    self.outfile.write('\n')
+                with writer:
+                    for item in big.items:
+                        writer.write(item)
 
+                self.summary = big.summary
                 self._log_summary(big.summary)
+
+                if self.metrics:
+                    exporter = METRICS_EXPORTERS[metrics_format](metrics_path)
+                    exporter.export(self.metrics)
             except IOError as e:
                 raise RuntimeError(str(e))
             except Exception as e:
@@ -630,10 +905,81 @@ class BackendCommand:
             else:
                 archive_path = self.parsed_args.archive_path
 
-            manager = ArchiveManager(archive_path)
+            try:
+                codec = CompactCodec(compression=self.parsed_args.archive_compression)
+            except ArchiveError as e:
+                raise BackendError(cause=str(e))
+
+            manager = ArchiveManager(archive_path,
+                                     batch_size=self.parsed_args.archive_batch_size,
+                                     batch_timeout=self.parsed_args.archive_batch_timeout,
+                                     codec=codec)
 
         self.archive_manager = manager
 
+    def _initialize_checkpoint(self):
+        """Initialize the checkpoint store based on the parsed parameters.
+
+        Checkpoints are saved when a checkpoint path is given or when
+        the fetch is resumed; in that case, the default path is used
+        when none is given.
+        """
+        if 'resume' not in self.parsed_args:
+            store = None
+        elif not self.parsed_args.resume and not self.parsed_args.checkpoint_path:
+            store = None
+        else:
+            if not self.parsed_args.checkpoint_path:
+                checkpoint_path = os.path.expanduser(CHECKPOINTS_DEFAULT_PATH)
+            else:
+                checkpoint_path = self.parsed_args.checkpoint_path
+
+            try:
+                store = CheckpointStore(checkpoint_path)
+            except CheckpointError as e:
+                raise BackendError(cause=str(e))
+
+        self.checkpoint_store = store
+
+    def _initialize_http_cache(self):
+        """Initialize the HTTP cache based on the parsed parameters.
+
+        The cache is used when its path is given or when it is
+        enabled; in that case, the default path is used when none
+        is given.
+        """
+        if 'http_cache' not in self.parsed_args:
+            cache = None
+        elif not self.parsed_args.http_cache and not self.parsed_args.http_cache_path:
+            cache = None
+        else:
+            if not self.parsed_args.http_cache_path:
+                cache_path = os.path.expanduser(HTTP_CACHE_DEFAULT_PATH)
+            else:
+                cache_path = self.parsed_args.http_cache_path
+
+            kwargs = {}
+            if self.parsed_args.http_cache_size:
+                kwargs['max_size'] = self.parsed_args.http_cache_size
+
+            try:
+                cache = ResponseCache(cache_path, **kwargs)
+            except CacheError as e:
+                raise BackendError(cause=str(e))
+
+        self.response_cache = cache
+
+    def _initialize_metrics(self):
+        """Initialize the metrics based on the parsed parameters.
+
+        Requests are traced only when the path of the report
+        is given.
+        """
+        if 'metrics_path' not in self.parsed_args or not self.parsed_args.metrics_path:
+            self.metrics = None
+        else:
+            self.metrics = FetchMetrics()
+
     def _log_summary(self, summary):
         """Write a formatted summary to the log."""
 
@@ -655,6 +1001,27 @@ class BackendCommand:
             "\n"
         )
 
+        if self.response_cache:
+            template += (
+                "\t    Cache hits: \t{cache_hits}\n"
+                "\t  Cache misses: \t{cache_misses}\n"
+                "\t   Bytes saved: \t{cache_bytes_saved}\n"
+                "\n"
+            )
+
+        totals = self.metrics.totals if self.metrics else {}
+
+        if self.metrics:
+            template += (
+                "\t      Requests: \t{requests}\n"
+                "\t Failed reqs.: \t{errors}\n"
+                "\t       Retries: \t{retries}\n"
+                "\tBytes received: \t{bytes}\n"
+                "\t Time in reqs.: \t{request_seconds:.2f}s\n"
+                "\t    Time slept: \t{sleep_seconds:.2f}s\n"
+                "\n"
+            )
+
         values = {
             'total': summary.total,
             'fetched': summary.fetched,
@@ -666,8 +1033,11 @@ class BackendCommand:
             'min_offset': summary.min_offset or '-',
             'max_offset': summary.min_offset or '-',
             'last_offset': summary.last_offset or '-',
-
+            'cache_hits': summary.cache_hits,
+            'cache_misses': summary.cache_misses,
+            'cache_bytes_saved': summary.cache_bytes_saved
         }
+        values.update(totals)
         message = template.format(**values)
 
         logger.info(message)
@@ -691,6 +1061,14 @@ class BackendItemsGenerator:
 
     This object can also be used as a context manager.
 
+    When items are fetched from archives, these archives can be replayed
+    in parallel by a pool of `archive_workers` processes, each one using
+    its own backend instance. By default, items are returned in the same
+    order they would be returned by a single process. Set `archive_ordered`
+    to `False` to return the items of each archive as soon as it is
+    replayed. In both cases, the summary includes the items of all the
+    archives.
+
     :param backend_class: backend class to fetch items
     :param backend_args: dict of arguments needed to fetch the items
     :param category: category of the items to retrieve
@@ -701,23 +1079,45 @@ class BackendItemsGenerator:
     :param manager: archive manager where the items will be retrieved
     :param fetch_archive: If enabled, items are fetched from archives
     :param archived_after: return items archived after this date
+    :param archive_workers: number of processes replaying archives
+    :param archive_ordered: keep the order of the archives
+    :param checkpoint_store: `CheckpointStore` where the progress of
+        the fetch is saved; ignored for archived items
+    :param resume: resume the fetch from the last saved checkpoint
+    :param response_cache: `ResponseCache` to revalidate the requests
+        of the backend; ignored for archived items
+    :param rate_pacing: spread the requests of the backend over the
+        time left to the rate limit reset; ignored for archived items
+    :param metrics: `FetchMetrics` where the requests of the backend
+        are traced; ignored for archived items
     """
     def __init__(self, backend_class, backend_args, category,
                  filter_classified=False, manager=None,
-                 fetch_archive=False, archived_after=None):
+                 fetch_archive=False, archived_after=None,
+                 archive_workers=None, archive_ordered=True,
+                 checkpoint_store=None, resume=False, response_cache=None,
+                 rate_pacing=False, metrics=None):
         init_args = find_signature_parameters(backend_class.__init__,
                                               backend_args)
+        self._summary = None
 
         if not fetch_archive:
             archive = manager.create_archive() if manager else None
             init_args['archive'] = archive
             self.backend = backend_class(**init_args)
+            self.backend.checkpoint_store = checkpoint_store
+            self.backend.resume = resume
+            self.backend.response_cache = response_cache
+            self.backend.rate_pacing = rate_pacing
+            self.backend.metrics = metrics
             items = self.__fetch(backend_args, category,
                                  filter_classified=filter_classified,
                                  manager=manager)
         else:
             self.backend = backend_class(**init_args)
-            items = self.__fetch_from_archive(category, manager, archived_after)
+            self._summary = Summary()
+            items = self.__fetch_from_archive(category, manager, archived_after,
+                                              init_args, archive_workers, archive_ordered)
 
         self.items = items
 
@@ -732,6 +1132,9 @@ class BackendItemsGenerator:
     def summary(self):
         """Return the summary object of the last fetch execution"""
 
+        if self._summary:
+            return self._summary
+
         return self.backend.summary
 
     def __fetch(self, backend_args, category, filter_classified=False,
@@ -770,10 +1173,12 @@ class BackendItemsGenerator:
         except Exception as e:
             if manager:
                 archive_path = self.backend.archive.archive_path
+                self.backend.archive.close()
                 manager.remove_archive(archive_path)
             raise e
 
-    def __fetch_from_archive(self, category, manager, archived_after):
+    def __fetch_from_archive(self, category, manager, archived_after,
+                             init_args, workers=None, ordered=True):
         """Fetch items from an archive manager.
 
         Generator to get the items of a category (previously fetched
@@ -783,6 +1188,9 @@ class BackendItemsGenerator:
         :param category: category of the items to retrieve
         :param manager: archive manager where the items will be retrieved
         :param archived_after: return items archived after this date
+        :param init_args: arguments to initialize the backends of the workers
+        :param workers: number of processes replaying archives
+        :param ordered: keep the order of the archives
 
         :returns: a generator of archived items
         """
@@ -791,9 +1199,33 @@ class BackendItemsGenerator:
                                    category,
                                    archived_after)
 
+        items = _fetch_from_archives(self.backend, init_args, filepaths,
+                                     self._summary, workers=workers,
+                                     ordered=ordered)
+        for item in items:
+            yield item
+
+
+def _fetch_from_archives(backend, init_args, filepaths, summary,
+                         workers=None, ordered=True):
+    """Replay a list of archives, sequentially or in parallel.
+
+    When `workers` is greater than one, the archives are replayed
+    by a pool of processes. Each process creates its own backend
+    instance using `init_args`. Workers send the items back in chunks
+    of `REPLAY_CHUNK_SIZE`, and no more than `REPLAY_QUEUE_SIZE` chunks
+    of an archive are waiting to be read, so the memory used does not
+    depend on the size of the archives. Items are returned following
+    the order of `filepaths` when `ordered` is set; otherwise, as soon
+    as they are read, mixing the items of several archives.
+
+    The summaries of the archives are merged into `summary`.
+    Archives that cannot be read are ignored.
+    """
+    if not workers or workers < 2 or len(filepaths) < 2:
         for filepath in filepaths:
-            self.backend.archive = Archive(filepath)
-            items = self.backend.fetch_from_archive()
+            backend.archive = open_archive(filepath, replay=True, preload_index=True)
+            items = backend.fetch_from_archive()
 
             try:
                 for item in items:
@@ -801,6 +1233,106 @@ class BackendItemsGenerator:
             except ArchiveError as e:
                 logger.warning("Ignoring %s archive due to: %s", filepath, str(e))
 
+            summary.merge(backend.summary)
+        return
+
+    backend_class = backend.__class__
+    max_pending = workers * 2
+    filepaths = collections.deque(filepaths)
+    pending = collections.deque()
+
+    # The manager is shut down first, so workers waiting to send
+    # their chunks stop when the items are no longer read
+    with concurrent.futures.ProcessPoolExecutor(max_workers=workers) as executor, \
+            multiprocessing.Manager() as mp_manager:
+
+        # Archives send their chunks to their own queues to keep
+        # their order; otherwise, every archive uses the same queue
+        shared_queue = None if ordered else mp_manager.Queue(maxsize=REPLAY_QUEUE_SIZE)
+
+        def submit_next():
+            filepath = filepaths.popleft()
+            chunks = shared_queue or mp_manager.Queue(maxsize=REPLAY_QUEUE_SIZE)
+            future = executor.submit(_replay_archive, backend_class, init_args,
+                                     filepath, chunks)
+            pending.append((filepath, future, chunks))
+
+        try:
+            while filepaths and len(pending) < max_pending:
+                submit_next()
+
+            while pending:
+                chunks = pending[0][2] if ordered else shared_queue
+                filepath, chunk = _next_replay_chunk(chunks, pending)
+
+                if chunk is not None:
+                    for item in chunk:
+                        yield item
+                    continue
+
+                # The archive was replayed
+                entry = next(entry for entry in pending if entry[0] == filepath)
+                pending.remove(entry)
+
+                archive_summary, error = entry[1].result()
+
+                if filepaths:
+                    submit_next()
+
+                if error:
+                    logger.warning("Ignoring %s archive due to: %s", filepath, error)
+
+                summary.merge(archive_summary)
+        finally:
+            for _, future, _ in pending:
+                future.cancel()
+
+
+def _next_replay_chunk(chunks, pending):
+    """Wait for the next chunk of replayed items.
+
+    Workers that die abruptly never send the end of their archives,
+    so the pending replays are checked while waiting.
+    """
+    while True:
+        try:
+            return chunks.get(timeout=REPLAY_POLL_TIMEOUT)
+        except queue.Empty:
+            for _, future, _ in pending:
+                if future.done() and future.exception():
+                    future.result()
+
+
+def _replay_archive(backend_class, init_args, filepath, chunks):
+    """Fetch the items of an archive; run by replay workers.
+
+    Items are sent in chunks through the `chunks` queue, so only a
+    few of them are kept in memory at the same time. A chunk set to
+    `None` marks the end of the archive.
+    """
+    backend = backend_class(**init_args)
+    backend.archive = open_archive(filepath, replay=True, preload_index=True)
+
+    chunk = []
+    error = None
+
+    try:
+        for item in backend.fetch_from_archive():
+            chunk.append(item)
+
+            if len(chunk) == REPLAY_CHUNK_SIZE:
+                chunks.put((filepath, chunk))
+                chunk = []
+    except ArchiveError as e:
+        error = str(e)
+    finally:
+        if chunk:
+            chunks.put((filepath, chunk))
+        chunks.put((filepath, None))
+        backend.archive.close()
+
+    return backend.summary, error
+
 
 class Summary:
     """Summary class for fetch executions.
@@ -812,6 +1344,10 @@ class Summary:
     Furthermore, for backends using offsets, the corresponding summary
     contains the minimum, maximum and last offsets retrieved.
 
+    When the requests are revalidated with a `ResponseCache`, the
+    summary counts the cache hits and misses, and the bytes of the
+    bodies that were not downloaded.
+
     Finally, the summary also includes some extra fields, which can
     be used by any backend to include fetch-specific information.
     """
@@ -825,6 +1361,9 @@ class Summary:
         self.min_offset = None
         self.max_offset = None
         self.last_offset = None
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.cache_bytes_saved = 0
         self.extras = None
 
     @property
@@ -852,6 +1391,44 @@ class Summary:
             self.min_offset = offset if self.min_offset is None else min(self.min_offset, offset)
             self.max_offset = offset if self.max_offset is None else max(self.max_offset, offset)
 
+    def merge(self, summary):
+        """Add the results of other summary to this one.
+
+        Counters are added up and min and max values are
+        recalculated. The last values are taken from `summary`
+        when it includes any item.
+
+        :param summary: summary to merge; `None` is ignored
+        """
+        if not summary:
+            return
+
+        self.fetched += summary.fetched
+        self.skipped += summary.skipped
+        self.cache_hits += summary.cache_hits
+        self.cache_misses += summary.cache_misses
+        self.cache_bytes_saved += summary.cache_bytes_saved
+
+        def merge_value(func, a, b):
+            if a is None:
+                return b
+            if b is None:
+                return a
+            return func(a, b)
+
+        self.min_updated_on = merge_value(min, self.min_updated_on, summary.min_updated_on)
+        self.max_updated_on = merge_value(max, self.max_updated_on, summary.max_updated_on)
+        self.min_offset = merge_value(min, self.min_offset, summary.min_offset)
+        self.max_offset = merge_value(max, self.max_offset, summary.max_offset)
+
+        if summary.last_uuid is not None:
+            self.last_uuid = summary.last_uuid
+            self.last_updated_on = summary.last_updated_on
+        if summary.last_offset is not None:
+            self.last_offset = summary.last_offset
+        if summary.extras is not None:
+            self.extras = summary.extras
+
 
 def uuid(*args):
     """Generate a UUID based on the given parameters.
@@ -927,12 +1504,13 @@ def fetch(backend_class, backend_args, category, filter_classified=False,
     except Exception as e:
         if manager:
             archive_path = archive.archive_path
+            archive.close()
             manager.remove_archive(archive_path)
         raise e
 
 
 def fetch_from_archive(backend_class, backend_args, manager,
-                       category, archived_after):
+                       category, archived_after, workers=None, ordered=True):
     """Fetch items from an archive manager.
 
     Generator to get the items of a category (previously fetched
@@ -942,11 +1520,16 @@ def fetch_from_archive(backend_class, backend_args, manager,
     The parameters needed to initialize `backend` and get the
     items are given using `backend_args` dict parameter.
 
+    Archives can be replayed in parallel by a pool of `workers`
+    processes. See `BackendItemsGenerator` for more information.
+
     :param backend_class: backend class to retrive items
     :param backend_args: dict of arguments needed to retrieve the items
     :param manager: archive manager where the items will be retrieved
     :param category: category of the items to retrieve
     :param archived_after: return items archived after this date
+    :param workers: number of processes replaying archives
+    :param ordered: keep the order of the archives
 
     :returns: a generator of archived items
     """
@@ -959,15 +1542,10 @@ def fetch_from_archive(backend_class, backend_args, manager,
                                category,
                                archived_after)
 
-    for filepath in filepaths:
-        backend.archive = Archive(filepath)
-        items = backend.fetch_from_archive()
-
-        try:
-            for item in items:
-                yield item
-        except ArchiveError as e:
-            logger.warning("Ignoring %s archive due to: %s", filepath, str(e))
+    items = _fetch_from_archives(backend, init_args, filepaths, Summary(),
+                                 workers=workers, ordered=ordered)
+    for item in items:
+        yield item
 
 
 def find_backends(top_package):
@@ -55,6 +55,7 @@ class Askbot(Backend):
     version = '0.7.0'
 
     CATEGORIES = [CATEGORY_QUESTION]
+    SORTED_FETCH = True
     EXTRA_SEARCH_FIELDS = {
         'tags': ['tags']
     }
@@ -534,7 +535,8 @@ class AskbotCommand(BackendCommand):
 
         parser = BackendCommandArgumentParser(cls.BACKEND,
                                               from_date=True,
-                                              archive=True)
+                                              archive=True,
+                                              resume=True)
 
         # Required arguments
         parser.parser.add_argument('url',
@@ -62,6 +62,7 @@ class Bugzilla(Backend):
     version = '0.11.0'
 
     CATEGORIES = [CATEGORY_BUG]
+    SORTED_FETCH = True
     EXTRA_SEARCH_FIELDS = {
         'product': ['product', 0, '__text__'],
         'component': ['component', 0, '__text__']
@@ -357,7 +358,8 @@ class BugzillaCommand(BackendCommand):
         parser = BackendCommandArgumentParser(cls.BACKEND,
                                               from_date=True,
                                               basic_auth=True,
-                                              archive=True)
+                                              archive=True,
+                                              resume=True)
 
         # Bugzilla options
         group = parser.parser.add_argument_group('Bugzilla arguments')
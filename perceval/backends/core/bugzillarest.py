@@ -59,9 +59,10 @@ class BugzillaREST(Backend):
     :param tag: label used to mark the data
     :param archive: archive to store/retrieve items
     """
-    version = '0.9.0'
+    version = '0.10.0'
 
     CATEGORIES = [CATEGORY_BUG]
+    SORTED_FETCH = True
     EXTRA_SEARCH_FIELDS = {
         'product': ['product'],
         'component': ['component']
@@ -180,33 +181,43 @@ class BugzillaREST(Backend):
         while True:
             logger.debug("Fetching and parsing bugs from: %s, offset: %s, limit: %s ",
                          str(from_date), offset, self.max_bugs)
-            raw_bugs = self.client.bugs(from_date=from_date, offset=offset,
-                                        max_bugs=self.max_bugs)
+            bugs = self.client.stream_bugs(from_date=from_date, offset=offset,
+                                           max_bugs=self.max_bugs)
 
-            data = json.loads(raw_bugs)
-            buglist = data['bugs']
+            # Bugs are decoded while they are downloaded, so only
+            # a chunk of them is kept in memory
+            tbugs = 0
+            chunk = []
 
-            tbugs = len(buglist)
+            for bug in bugs:
+                tbugs += 1
+                chunk.append(bug)
+
+                if len(chunk) == max_contents:
+                    yield from self.__fetch_and_parse_contents(chunk)
+                    chunk = []
+
+            if chunk:
+                yield from self.__fetch_and_parse_contents(chunk)
 
             if tbugs == 0:
                 break
 
-            for i in range(0, tbugs, max_contents):
-                chunk = buglist[i:i + max_contents]
-                bug_ids = [b['id'] for b in chunk]
+            offset += self.max_bugs
 
-                comments = self.__fetch_and_parse_comments(*bug_ids)
-                histories = self.__fetch_and_parse_histories(*bug_ids)
-                attachments = self.__fetch_and_parse_attachments(*bug_ids)
+    def __fetch_and_parse_contents(self, chunk):
+        bug_ids = [b['id'] for b in chunk]
 
-                for bug in chunk:
-                    bug_id = str(bug['id'])
-                    bug['comments'] = comments[bug_id]
-                    bug['history'] = histories[bug_id]
-                    bug['attachments'] = attachments[bug_id]
-                    yield bug
+        comments = self.__fetch_and_parse_comments(*bug_ids)
+        histories = self.__fetch_and_parse_histories(*bug_ids)
+        attachments = self.__fetch_and_parse_attachments(*bug_ids)
 
-            offset += self.max_bugs
+        for bug in chunk:
+            bug_id = str(bug['id'])
+            bug['comments'] = comments[bug_id]
+            bug['history'] = histories[bug_id]
+            bug['attachments'] = attachments[bug_id]
+            yield bug
 
     def __fetch_and_parse_comments(self, *bug_ids):
         logger.debug("Fetching and parsing comments")
@@ -335,22 +346,27 @@ class BugzillaRESTClient(HttpClient):
             element, set this value to 10.
         :param max_bugs: maximum number of bugs to reteurn per query
         """
-        date = datetime_to_utc(from_date)
-        date = date.strftime("%Y-%m-%dT%H:%M:%SZ")
+        params = self.__build_bugs_params(from_date, offset, max_bugs)
+        response = self.call(self.RBUG, params)
 
-        params = {
-            self.PLAST_CHANGE_TIME: date,
-            self.PLIMIT: max_bugs,
-            self.PORDER: self.VCHANGE_DATE_ORDER,
-            self.PINCLUDE_FIELDS: self.VINCLUDE_ALL
-        }
+        return response
 
-        if offset:
-            params[self.POFFSET] = offset
+    def stream_bugs(self, from_date=DEFAULT_DATETIME, offset=None, max_bugs=MAX_BUGS):
+        """Get the information of a list of bugs, decoding them as they are read.
 
-        response = self.call(self.RBUG, params)
+        Bugs include all their fields, so pages of bugs can be large.
+        Instead of loading the whole page, this method returns an
+        iterator which decodes the bugs one by one. The parameters are
+        the same of `bugs`.
 
-        return response
+        :returns: a `JSONArrayStream` with the bugs
+
+        :raises BugzillaRESTError: raised when an error is returned by
+            the server, once the response is read
+        """
+        params = self.__build_bugs_params(from_date, offset, max_bugs)
+
+        return self.stream_call(self.RBUG, params, 'bugs')
 
     def comments(self, *bug_ids):
         """Get the comments of the given bugs.
@@ -409,6 +425,34 @@ class BugzillaRESTClient(HttpClient):
         :raises BugzillaRESTError: raised when an error is returned by
             the server
         """
+        url = self.__build_url(resource, params)
+        r = self.fetch(url, payload=params)
+
+        # Check for possible Bugzilla API errors
+        result = r.json()
+        self.__check_error(result)
+
+        return r.text
+
+    def stream_call(self, resource, params, key):
+        """Retrieve the given resource, decoding the elements of one of its lists.
+
+        :param resource: resource to retrieve
+        :param params: dict with the HTTP parameters needed to retrieve
+            the given resource
+        :param key: key of the list to decode
+
+        :returns: a `JSONArrayStream` with the elements of the list
+
+        :raises BugzillaRESTError: raised when an error is returned by
+            the server, once the response is read
+        """
+        url = self.__build_url(resource, params)
+
+        return self.fetch_json_stream(url, path=[key], payload=params,
+                                      validate=self.__check_error)
+
+    def __build_url(self, resource, params):
         url = self.URL % {'base': self.base_url, 'resource': resource}
 
         if self.api_token:
@@ -417,17 +461,30 @@ class BugzillaRESTClient(HttpClient):
         logger.debug("Bugzilla REST client requests: %s params: %s",
                      resource, str(params))
 
-        r = self.fetch(url, payload=params)
+        return url
 
-        # Check for possible Bugzilla API errors
-        result = r.json()
+    def __build_bugs_params(self, from_date, offset, max_bugs):
+        date = datetime_to_utc(from_date)
+        date = date.strftime("%Y-%m-%dT%H:%M:%SZ")
 
+        params = {
+            self.PLAST_CHANGE_TIME: date,
+            self.PLIMIT: max_bugs,
+            self.PORDER: self.VCHANGE_DATE_ORDER,
+            self.PINCLUDE_FIELDS: self.VINCLUDE_ALL
+        }
+
+        if offset:
+            params[self.POFFSET] = offset
+
+        return params
+
+    @staticmethod
+    def __check_error(result):
         if result.get('error', False):
             raise BugzillaRESTError(error=result['message'],
                                     code=result['code'])
 
-        return r.text
-
     @staticmethod
     def sanitize_for_archive(url, headers, payload):
         """Sanitize payload of a HTTP request by removing the login, password and token information
@@ -464,7 +521,8 @@ class BugzillaRESTCommand(BackendCommand):
                                               from_date=True,
                                               basic_auth=True,
                                               token_auth=True,
-                                              archive=True)
+                                              archive=True,
+                                              resume=True)
 
         # BugzillaREST options
         group = parser.parser.add_argument_group('Bugzilla REST arguments')
@@ -60,6 +60,7 @@ class Confluence(Backend):
     version = '0.11.0'
 
     CATEGORIES = [CATEGORY_HISTORICAL_CONTENT]
+    SORTED_FETCH = True
 
     def __init__(self, url, tag=None, archive=None):
         origin = url
@@ -323,7 +324,8 @@ class ConfluenceCommand(BackendCommand):
 
         parser = BackendCommandArgumentParser(cls.BACKEND,
                                               from_date=True,
-                                              archive=True)
+                                              archive=True,
+                                              resume=True)
 
         # Required arguments
         parser.parser.add_argument('url',
@@ -61,6 +61,7 @@ class Discourse(Backend):
     version = '0.11.0'
 
     CATEGORIES = [CATEGORY_TOPIC]
+    SORTED_FETCH = True
     EXTRA_SEARCH_FIELDS = {
         'category_id': ['category_id']
     }
@@ -408,7 +409,8 @@ class DiscourseCommand(BackendCommand):
         parser = BackendCommandArgumentParser(cls.BACKEND,
                                               from_date=True,
                                               token_auth=True,
-                                              archive=True)
+                                              archive=True,
+                                              resume=True)
 
         # Required arguments
         parser.parser.add_argument('url',
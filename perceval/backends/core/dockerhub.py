@@ -213,7 +213,8 @@ class DockerHubCommand(BackendCommand):
         """Returns the DockerHub argument parser."""
 
         parser = BackendCommandArgumentParser(cls.BACKEND,
-                                              archive=True)
+                                              archive=True,
+                                              http_cache=True)
 
         # Required arguments
         parser.parser.add_argument('owner',
@@ -20,14 +20,19 @@
 #
 
 import collections
+import concurrent.futures
 import io
+import itertools
 import logging
 import os
 import re
 import subprocess
+import tempfile
 import threading
 
 import dulwich.client
+import dulwich.objects
+import dulwich.pack
 import dulwich.repo
 
 from grimoirelab_toolkit.datetime import datetime_to_utc, str_to_datetime
@@ -42,6 +47,11 @@ CATEGORY_COMMIT = 'commit'
 
 logger = logging.getLogger(__name__)
 
+HEX_DIGITS = '0123456789abcdef'
+
+MAX_WORKERS = 1
+LOG_CHUNK_SIZE = 1000
+
 
 class Git(Backend):
     """Git backend.
@@ -59,23 +69,36 @@ class Git(Backend):
     :param gitpath: path to the repository or to the log file
     :param tag: label used to mark the data
     :param archive: archive to store/retrieve items
+    :param max_workers: number of processes parsing the log of
+        the repository; with `1`, the log is parsed by a single
+        process
+    :param chunk_size: number of commits parsed by each process
+        at a time
 
     :raises RepositoryError: raised when there was an error cloning or
         updating the repository.
     """
-    version = '0.12.0'
+    version = '0.14.0'
 
     CATEGORIES = [CATEGORY_COMMIT]
 
-    def __init__(self, uri, gitpath, tag=None, archive=None):
+    def __init__(self, uri, gitpath, tag=None, archive=None,
+                 max_workers=MAX_WORKERS, chunk_size=LOG_CHUNK_SIZE):
+        if max_workers < 1:
+            raise ValueError("'max_workers' must be greater than 0; %s given" % max_workers)
+        if chunk_size < 1:
+            raise ValueError("'chunk_size' must be greater than 0; %s given" % chunk_size)
+
         origin = uri
 
         super().__init__(origin, tag=tag, archive=archive)
         self.uri = uri
         self.gitpath = gitpath
+        self.max_workers = max_workers
+        self.chunk_size = chunk_size
 
     def fetch(self, category=CATEGORY_COMMIT, from_date=DEFAULT_DATETIME, to_date=DEFAULT_LAST_DATETIME,
-              branches=None, latest_items=False, no_update=False):
+              branches=None, latest_items=False, no_update=False, machine_log=False):
         """Fetch commits.
 
         The method retrieves from a Git repository or a log file
@@ -96,6 +119,12 @@ class Git(Backend):
         The parameter `no_update` returns all commits without performing
         an update of the repository before.
 
+        When `machine_log` is set, the log is read from the repository
+        using a machine-oriented format, parsed by `GitMachineParser`,
+        instead of the pretty format. Commits are the same but file
+        names with unusual characters, which are quoted by the pretty
+        format, are returned as they are.
+
         Take into account that `from_date` and `branches` are ignored
         when the commits are fetched from a Git log file or when
         `latest_items` flag is set.
@@ -111,6 +140,7 @@ class Git(Backend):
         :param latest_items: sync with the repository to fetch only the
             newest commits
         :param no_update: if enabled, don't update the repo with the latest changes
+        :param machine_log: if enabled, read the log using a machine-oriented format
 
         :returns: a generator of commits
         """
@@ -124,7 +154,8 @@ class Git(Backend):
             'to_date': to_date,
             'branches': branches,
             'latest_items': latest_items,
-            'no_update': no_update
+            'no_update': no_update,
+            'machine_log': machine_log
         }
         items = super().fetch(category, **kwargs)
 
@@ -143,6 +174,7 @@ class Git(Backend):
         branches = kwargs['branches']
         latest_items = kwargs['latest_items']
         no_update = kwargs['no_update']
+        machine_log = kwargs['machine_log']
 
         ncommits = 0
 
@@ -151,7 +183,7 @@ class Git(Backend):
                 commits = self.__fetch_from_log()
             else:
                 commits = self.__fetch_from_repo(from_date, to_date, branches,
-                                                 latest_items, no_update)
+                                                 latest_items, no_update, machine_log)
 
             for commit in commits:
                 yield commit
@@ -251,6 +283,25 @@ class Git(Backend):
         for commit in parser.parse():
             yield commit
 
+    @staticmethod
+    def parse_git_machine_log_from_iter(iterator):
+        """Parse a Git machine-oriented log obtained from an iterator.
+
+        The method parses the Git log fetched from an iterator, where
+        each item is a chunk of bytes of a log generated with the
+        options of `GitRepository.GIT_MACHINE_OUTPUT_OPTS`. It returns
+        an iterator of dictionaries. Each dictionary contains a commit.
+
+        :param iterator: iterator of chunks of the Git log
+
+        :raises ParseError: raised when the format of the Git log
+            is invalid
+        """
+        parser = GitMachineParser(iterator)
+
+        for commit in parser.parse():
+            yield commit
+
     def _init_client(self, from_archive=False):
         pass
 
@@ -259,7 +310,8 @@ class Git(Backend):
                     self.uri, self.gitpath)
         return self.parse_git_log_from_file(self.gitpath)
 
-    def __fetch_from_repo(self, from_date, to_date, branches, latest_items=False, no_update=False):
+    def __fetch_from_repo(self, from_date, to_date, branches, latest_items=False, no_update=False,
+                          machine_log=False):
         # When no latest items are set or the repository has not
         # been cloned use the default mode
         default_mode = not latest_items or not os.path.exists(self.gitpath)
@@ -267,13 +319,14 @@ class Git(Backend):
         repo = self.__create_git_repository()
 
         if default_mode:
-            commits = self.__fetch_commits_from_repo(repo, from_date, to_date, branches, no_update)
+            commits = self.__fetch_commits_from_repo(repo, from_date, to_date, branches,
+                                                     no_update, machine_log)
         else:
-            commits = self.__fetch_newest_commits_from_repo(repo)
+            commits = self.__fetch_newest_commits_from_repo(repo, machine_log)
 
         return commits
 
-    def __fetch_commits_from_repo(self, repo, from_date, to_date, branches, no_update):
+    def __fetch_commits_from_repo(self, repo, from_date, to_date, branches, no_update, machine_log):
         if branches is None:
             branches_text = "all"
         elif len(branches) == 0:
@@ -299,10 +352,62 @@ class Git(Backend):
         if not no_update:
             repo.update()
 
-        gitlog = repo.log(from_date, to_date, branches)
-        return self.parse_git_log_from_iter(gitlog)
+        if self.max_workers > 1:
+            return self.__fetch_commits_in_parallel(repo, from_date, to_date, branches, machine_log)
+
+        gitlog = repo.log(from_date, to_date, branches, machine=machine_log)
+        return self.__parse_git_log(gitlog, machine_log)
+
+    def __fetch_commits_in_parallel(self, repo, from_date, to_date, branches, machine_log):
+        """Parse the log of the repository using a pool of processes.
+
+        The list of commits, in the same order `log` returns them, is
+        split in chunks of contiguous commits. Each chunk is logged
+        and parsed by a process of the pool while the commits of the
+        previous chunks are returned, so the commits keep the order
+        of the serial log. Up to twice the number of workers chunks
+        are being parsed at the same time.
+        """
+        commits = list(repo.rev_list(branches, from_date=from_date, to_date=to_date))
+        commits.reverse()
+
+        chunks = collections.deque(commits[i:i + self.chunk_size]
+                                   for i in range(0, len(commits), self.chunk_size))
+
+        if len(chunks) < 2:
+            for chunk in chunks:
+                gitlog = repo.log_commits(chunk, machine=machine_log)
+                yield from self.__parse_git_log(gitlog, machine_log)
+            return
+
+        logger.debug("Parsing %s commits in %s chunks using %s workers",
+                     len(commits), len(chunks), self.max_workers)
+
+        window = 2 * self.max_workers
+        pending = collections.deque()
+
+        with concurrent.futures.ProcessPoolExecutor(max_workers=self.max_workers) as executor:
+            try:
+                while chunks or pending:
+                    while chunks and len(pending) < window:
+                        future = executor.submit(_parse_commits_chunk,
+                                                 repo.uri, repo.dirpath, chunks.popleft(),
+                                                 machine_log)
+                        pending.append(future)
+
+                    parsed, error = pending.popleft().result()
 
-    def __fetch_newest_commits_from_repo(self, repo):
+                    if error:
+                        error_class, cause = error
+                        raise error_class(cause=cause)
+
+                    yield from parsed
+            finally:
+                # Chunks not started yet won't be needed
+                for future in pending:
+                    future.cancel()
+
+    def __fetch_newest_commits_from_repo(self, repo, machine_log):
         logger.info("Fetching latest commits: '%s' git repository",
                     self.uri)
 
@@ -310,8 +415,14 @@ class Git(Backend):
         if not hashes:
             return []
 
-        gitshow = repo.show(hashes)
-        return self.parse_git_log_from_iter(gitshow)
+        gitlog = repo.log_commits(hashes, machine=machine_log)
+        return self.__parse_git_log(gitlog, machine_log)
+
+    def __parse_git_log(self, gitlog, machine_log):
+        if machine_log:
+            return self.parse_git_machine_log_from_iter(gitlog)
+        else:
+            return self.parse_git_log_from_iter(gitlog)
 
     def __create_git_repository(self):
         if not os.path.exists(self.gitpath):
@@ -321,6 +432,28 @@ class Git(Backend):
         return repo
 
 
+def _parse_commits_chunk(uri, dirpath, commits, machine_log=False):
+    """Log and parse a chunk of commits; run by the workers of the Git backend"""
+
+    repo = GitRepository(uri, dirpath)
+    parsed = []
+    error = None
+
+    try:
+        gitlog = repo.log_commits(commits, machine=machine_log)
+
+        if machine_log:
+            parsed.extend(Git.parse_git_machine_log_from_iter(gitlog))
+        else:
+            parsed.extend(Git.parse_git_log_from_iter(gitlog))
+    except ParseError as e:
+        error = (ParseError, str(e))
+    except RepositoryError as e:
+        error = (RepositoryError, str(e))
+
+    return parsed, error
+
+
 class GitCommand(BackendCommand):
     """Class to run Git backend from the command line."""
 
@@ -361,6 +494,13 @@ class GitCommand(BackendCommand):
         exgroup.add_argument('--git-log', dest='git_log',
                              help="Path to the Git log file")
 
+        group.add_argument('--max-workers', dest='max_workers',
+                           default=MAX_WORKERS, type=int,
+                           help="number of processes parsing the log")
+        group.add_argument('--chunk-size', dest='chunk_size',
+                           default=LOG_CHUNK_SIZE, type=int,
+                           help="number of commits parsed by each process at a time")
+
         exgroup_fetch = group.add_mutually_exclusive_group()
         exgroup_fetch.add_argument('--latest-items', dest='latest_items',
                                    action='store_true',
@@ -368,6 +508,9 @@ class GitCommand(BackendCommand):
         exgroup_fetch.add_argument('--no-update', dest='no_update',
                                    action='store_true',
                                    help="Fetch all commits without updating the repository")
+        group.add_argument('--machine-log', dest='machine_log',
+                           action='store_true',
+                           help="Read the log using a machine-oriented format")
 
         # Required arguments
         parser.parser.add_argument('uri',
@@ -506,192 +649,266 @@ class GitParser:
 
     def __init__(self, stream):
         self.stream = stream
-        self.nline = 0
-        self.state = self.INIT
-
-        # Aux vars to store the commit that is being parsed
-        self.commit = None
-        self.commit_files = {}
-
-        self.handlers = {
-            self.INIT: self._handle_init,
-            self.COMMIT: self._handle_commit,
-            self.HEADER: self._handle_header,
-            self.MESSAGE: self._handle_message,
-            self.FILE: self._handle_file
-        }
+
+        # Trailers are only searched on message lines starting with them
+        self._trailer_prefixes = tuple(trailer + ':' for trailer in self.TRAILERS)
 
     def parse(self):
-        """Parse the Git log stream."""
+        """Parse the Git log stream.
+
+        The state of the parser and the commit being parsed are kept
+        in local variables, and lines are classified by their first
+        characters. Action, stats, message and header lines, which
+        are most of the log, are split with string methods; regular
+        expressions are only used on commit lines and on lines with
+        an unusual form, so the result is the same in any case.
+        """
+        COMMIT, HEADER, MESSAGE, FILE = self.COMMIT, self.HEADER, self.MESSAGE, self.FILE
+        trailer_prefixes = self._trailer_prefixes
+
+        state = self.INIT
+        nline = 0
+
+        # Commit that is being parsed
+        commit = None
+        message = None
+        files = None
 
         for line in self.stream:
             line = line.rstrip('\n')
-            parsed = False
-            self.nline += 1
+            nline += 1
+
+            if state == MESSAGE:
+                if line[:4] == '    ':
+                    msg = line[4:]
+                elif not line:
+                    state = FILE
+                    continue
+                else:
+                    m = self.GIT_MESSAGE_REGEXP.match(line)
+                    msg = m.group('msg') if m else None
+
+                if msg is not None:
+                    if message is None:
+                        message = [commit['message']] if 'message' in commit else []
+                        commit['message'] = message
+                    message.append(msg)
+
+                    if msg.startswith(trailer_prefixes):
+                        self._handle_trailer(commit, msg)
+                    continue
+
+                logger.debug("Invalid message format on line %s. Skipping.", nline)
+                state = FILE
+
+            if state == FILE:
+                if not line:
+                    state = COMMIT
+                    yield self._build_commit(commit, message, files)
+                    commit = None
+                    continue
+
+                if line[0] == ':':
+                    data = self._split_action(line) or self._match_action(line)
+
+                    if data:
+                        modes, indexes, action, filename, newfile = data
+
+                        entry = files.get(filename, None)
+                        if entry is None:
+                            entry = {}
+                            files[filename] = entry
+
+                        entry['modes'] = modes
+                        entry['indexes'] = indexes
+                        entry['action'] = action
+                        entry['file'] = filename
+
+                        if newfile is not None:
+                            entry['newfile'] = newfile
+                        elif 'newfile' in entry:
+                            del entry['newfile']
+                        continue
+                else:
+                    data = self._split_stats(line) or self._match_stats(line)
+
+                    if data:
+                        added, removed, filename = data
+                        filename = self.__get_old_filepath(filename)
+
+                        entry = files.get(filename, None)
+                        if entry is None:
+                            entry = {'file': filename}
+                            files[filename] = entry
+
+                        entry['added'] = added
+                        entry['removed'] = removed
+                        continue
+
+                logger.debug("Invalid action format on line %s. Skipping.", nline)
+                state = COMMIT
+                yield self._build_commit(commit, message, files)
+                commit = None
+
+            if state == HEADER:
+                if not line:
+                    state = MESSAGE
+                    continue
+
+                header = self._split_header(line) or self._match_header(line)
+
+                if not header:
+                    msg = "invalid header format on line %s" % (str(nline))
+                    raise ParseError(cause=msg)
+
+                commit[header[0]] = header[1]
+                continue
 
-            while not parsed:
-                parsed = self.handlers[self.state](line)
+            if state == self.INIT:
+                # The first line is skipped when it is empty
+                state = COMMIT
 
-                if self.state == self.COMMIT and self.commit:
-                    commit = self._build_commit()
-                    logger.debug("Commit %s parsed", commit['commit'])
-                    yield commit
+                if not line:
+                    continue
 
-        # Return the last commit, if any
-        if self.commit:
-            commit = self._build_commit()
-            logger.debug("Commit %s parsed", commit['commit'])
-            yield commit
+            m = self.GIT_COMMIT_REGEXP.match(line) if line[:6] == 'commit' else None
 
-    def _build_commit(self):
-        def remove_none_values(d):
-            return {k: v for k, v in d.items() if v is not None}
+            if not m:
+                msg = "commit expected on line %s" % (str(nline))
+                raise ParseError(cause=msg)
 
-        commit = self.commit
-        commit = remove_none_values(commit)
-        commit['files'] = [remove_none_values(item)
-                           for _, item in sorted(self.commit_files.items())]
+            # Initialize a new commit
+            commit = {
+                'commit': m.group('commit'),
+                'parents': self.__parse_data_list(m.group('parents')),
+                'refs': self.__parse_data_list(m.group('refs'), sep=',')
+            }
+            message = None
+            files = {}
 
-        self.commit = None
-        self.commit_files = {}
+            state = HEADER
 
-        return commit
+        # Return the last commit, if any
+        if commit:
+            yield self._build_commit(commit, message, files)
 
-    def _handle_init(self, line):
-        m = self.GIT_NEXT_STATE_REGEXP.match(line)
+    @staticmethod
+    def _build_commit(commit, message, files):
+        if message is not None:
+            commit['message'] = '\n'.join(message)
 
-        # In both cases, the parser advances to the next state.
-        # It only has to check whether the line has to be parsed
-        # again or not
-        self.state = self.COMMIT
-        parsed = m is not None
+        commit['files'] = [files[filename] for filename in sorted(files)]
 
-        return parsed
+        logger.debug("Commit %s parsed", commit['commit'])
 
-    def _handle_commit(self, line):
-        m = self.GIT_COMMIT_REGEXP.match(line)
-        if not m:
-            msg = "commit expected on line %s" % (str(self.nline))
-            raise ParseError(cause=msg)
+        return commit
 
-        parents = self.__parse_data_list(m.group('parents'))
-        refs = self.__parse_data_list(m.group('refs'), sep=',')
+    @staticmethod
+    def _split_header(line):
+        """Split a header line with the usual form; `None` otherwise"""
 
-        # Initialize a new commit
-        self.commit = {}
-        self.commit['commit'] = m.group('commit')
-        self.commit['parents'] = parents
-        self.commit['refs'] = refs
+        name, sep, value = line.partition(':')
 
-        self.state = self.HEADER
+        if not sep or value[:1] not in (' ', '\t'):
+            return None
 
-        return True
+        value = value.lstrip(' \t')
 
-    def _handle_header(self, line):
-        m = self.GIT_NEXT_STATE_REGEXP.match(line)
-        if m:
-            self.state = self.MESSAGE
-            return True
+        if not value:
+            return None
+        if not name.isascii() or not name.replace('-', '').isalnum():
+            return None
+
+        return name, value
+
+    def _match_header(self, line):
+        m = self.GIT_HEADER_TRAILER_REGEXP.match(line)
+        return (m.group('name'), m.group('value')) if m else None
 
+    def _handle_trailer(self, commit, line):
         m = self.GIT_HEADER_TRAILER_REGEXP.match(line)
         if not m:
-            msg = "invalid header format on line %s" % (str(self.nline))
-            raise ParseError(cause=msg)
+            return
 
-        header = m.group('name')
-        value = m.group('value')
-        self.commit[header] = value
+        commit.setdefault(m.group('name'), []).append(m.group('value'))
 
-        return True
+    @staticmethod
+    def _split_action(line):
+        """Split an action line with the usual form; `None` otherwise.
 
-    def _handle_message(self, line):
-        m = self.GIT_NEXT_STATE_REGEXP.match(line)
-        if m:
-            self.state = self.FILE
-            return True
+        Usual lines have a mode and an index for the file and each
+        one of its parents, separated by single spaces, followed by
+        the action, a tab and the file names, separated by a tab.
+        """
+        head, _, tail = line.partition('\t')
 
-        m = self.GIT_MESSAGE_REGEXP.match(line)
-        if not m:
-            logger.debug("Invalid message format on line %s. Skipping.",
-                         str(self.nline))
-            self.state = self.FILE
-            return False
+        fields = head.split(' ')
+        first = fields[0].lstrip(':')
+        nparents = len(fields[0]) - len(first)
+        fields[0] = first
 
-        msg_line = m.group('msg')
+        if len(fields) != 2 * nparents + 3:
+            return None
 
-        # Concatenate message lines
-        if 'message' not in self.commit:
-            self.commit['message'] = ''
-        else:
-            self.commit['message'] += '\n'
-        self.commit['message'] += msg_line
+        modes = fields[:nparents + 1]
+        indexes = fields[nparents + 1:-1]
+        action = fields[-1]
 
-        # Check trailers
-        self._handle_trailer(msg_line)
+        for mode in modes:
+            if len(mode) != 6 or not mode.isdecimal():
+                return None
 
-        return True
+        for index in indexes:
+            sha = index.rstrip('.')
 
-    def _handle_file(self, line):
-        m = self.GIT_NEXT_STATE_REGEXP.match(line)
-        if m:
-            self.state = self.COMMIT
-            return True
+            # Indexes like modes are read as modes by the regular expression
+            if not sha or sha.strip(HEX_DIGITS) or len(index) - len(sha) > 3 or \
+                    (len(index) == 6 and index.isdecimal()):
+                return None
 
-        m = self.GIT_ACTION_REGEXP.match(line)
-        if m:
-            data = m.groupdict()
-            self._handle_action_data(data)
-            return True
+        if not action or not action.strip(HEX_DIGITS + '.'):
+            return None
 
-        m = self.GIT_STATS_REGEXP.match(line)
-        if m:
-            data = m.groupdict()
-            self._handle_stats_data(data)
-            return True
+        filename, sep, newfile = tail.partition('\t')
 
-        # No match case
-        logger.debug("Invalid action format on line %s. Skipping.",
-                     str(self.nline))
-        self.state = self.COMMIT
-        return False
+        if not filename:
+            return None
+        if not sep:
+            newfile = None
+        elif not newfile or newfile[0] == '\t':
+            return None
 
-    def _handle_trailer(self, line):
-        m = self.GIT_HEADER_TRAILER_REGEXP.match(line)
-        if not m:
-            return
-
-        trailer = m.group('name')
-        value = m.group('value')
+        return modes, indexes, action, filename, newfile
 
-        if trailer not in self.TRAILERS:
-            logger.debug("Trailer %s found on line %s but is not a core trailer. Skipping.",
-                         trailer, str(self.nline))
-            return
+    def _match_action(self, line):
+        m = self.GIT_ACTION_REGEXP.match(line)
 
-        self.commit.setdefault(trailer, []).append(value)
+        if not m:
+            return None
 
-    def _handle_action_data(self, data):
-        modes = self.__parse_data_list(data['modes'])
-        indexes = self.__parse_data_list(data['indexes'])
-        filename = data['file']
+        return (self.__parse_data_list(m.group('modes')),
+                self.__parse_data_list(m.group('indexes')),
+                m.group('action'),
+                m.group('file'),
+                m.group('newfile'))
 
-        if filename not in self.commit_files:
-            self.commit_files[filename] = {}
+    @staticmethod
+    def _split_stats(line):
+        """Split a stats line with the usual form; `None` otherwise"""
 
-        self.commit_files[filename]['modes'] = modes
-        self.commit_files[filename]['indexes'] = indexes
-        self.commit_files[filename]['action'] = data['action']
-        self.commit_files[filename]['file'] = filename
-        self.commit_files[filename]['newfile'] = data['newfile']
+        added, _, tail = line.partition('\t')
+        removed, sep, filename = tail.partition('\t')
 
-    def _handle_stats_data(self, data):
-        filename = self.__get_old_filepath(data['file'])
+        if not sep or not filename or filename[0] in ' \t':
+            return None
+        if not (added == '-' or added.isdecimal()) or not (removed == '-' or removed.isdecimal()):
+            return None
 
-        if filename not in self.commit_files:
-            self.commit_files[filename] = {'file': filename}
+        return added, removed, filename
 
-        self.commit_files[filename]['added'] = data['added']
-        self.commit_files[filename]['removed'] = data['removed']
+    def _match_stats(self, line):
+        m = self.GIT_STATS_REGEXP.match(line)
+        return (m.group('added'), m.group('removed'), m.group('file')) if m else None
 
     def __parse_data_list(self, data, sep=' '):
         if data:
@@ -726,6 +943,240 @@ class GitParser:
             return f
 
 
+class GitMachineParser(GitParser):
+    """Git machine-oriented log parser.
+
+    This class parses a Git log generated with a NUL-delimited format
+    and `-z` raw and numstat data, converting the commits into the same
+    dict items `GitParser` returns. The stream is an iterator of bytes
+    which is split in fields by the NUL chars, so neither messages nor
+    file names need to be matched with regular expressions.
+
+    Each commit starts with the next fields, each one of them ended
+    by a NUL char:
+
+        hash, parents, refs, author, author date, committer,
+        commit date, abbreviated parents and raw message
+
+    They are followed by the actions and stats over files. Action
+    fields start with one or more ':' chars and are followed by the
+    file name and, in the case of copied or renamed files, by the new
+    file name. Stats fields include the number of lines added and
+    removed and the name of the file; for copied or renamed files the
+    name is empty and the old and new names are given in the next two
+    fields. The next commit starts with the first field which is not
+    an action or a stats field.
+
+    Messages are cleaned like Git does when it pretty prints them:
+    leading blank lines are skipped, trailing whitespaces and blank
+    lines are removed and tabs are expanded. Unlike the pretty log,
+    file names are not quoted when they include unusual characters.
+
+    This is the command that generates a valid log:
+
+        git log -z --raw --numstat --decorate=full --parents -M -C -c \
+                --format=%H%x00%P%x00%D%x00%aN <%aE>%x00%ad%x00%cN <%cE>%x00%cd%x00%p%x00%B%x00
+
+    :param stream: an iterator of bytes of the log
+    :param encoding: encoding of the log
+    """
+    # Number of fields of the header of a commit
+    NUM_HEADER_FIELDS = 9
+
+    def __init__(self, stream, encoding='utf-8'):
+        super().__init__(stream)
+        self.encoding = encoding
+
+    def parse(self):
+        """Parse the Git log stream.
+
+        :raises ParseError: raised when the log is not valid
+        """
+        fields = self._split_fields()
+        nfield = 0
+
+        commit = None
+        files = None
+
+        for field in fields:
+            nfield += 1
+
+            if commit is not None:
+                field = field.lstrip('\n')
+
+                if not field:
+                    continue
+                elif field[0] == ':':
+                    data = self._split_action_field(field, fields)
+
+                    if not data:
+                        msg = "invalid action format on field %s" % (str(nfield))
+                        raise ParseError(cause=msg)
+
+                    nfield += len(data) - 3
+
+                    modes, indexes, action, filename = data[:4]
+
+                    entry = files.get(filename, None)
+                    if entry is None:
+                        entry = {}
+                        files[filename] = entry
+
+                    entry['modes'] = modes
+                    entry['indexes'] = indexes
+                    entry['action'] = action
+                    entry['file'] = filename
+
+                    if len(data) == 5:
+                        entry['newfile'] = data[4]
+                    elif 'newfile' in entry:
+                        del entry['newfile']
+                    continue
+                elif '\t' in field:
+                    added, removed, filename = field.split('\t', 2)
+
+                    # Copied or renamed files are followed by their names
+                    if not filename:
+                        filename = next(fields, None)
+                        _ = next(fields, None)
+                        nfield += 2
+
+                    if not filename:
+                        msg = "file name expected on field %s" % (str(nfield))
+                        raise ParseError(cause=msg)
+
+                    entry = files.get(filename, None)
+                    if entry is None:
+                        entry = {'file': filename}
+                        files[filename] = entry
+
+                    entry['added'] = added
+                    entry['removed'] = removed
+                    continue
+
+                yield self._build_commit(commit, None, files)
+                commit = None
+            elif not field:
+                continue
+
+            header = [field]
+            header.extend(itertools.islice(fields, self.NUM_HEADER_FIELDS - 1))
+            nfield += len(header) - 1
+
+            if len(header) < self.NUM_HEADER_FIELDS or \
+                    len(header[0]) not in (40, 64) or header[0].strip(HEX_DIGITS):
+                msg = "commit expected on field %s" % (str(nfield))
+                raise ParseError(cause=msg)
+
+            commit = self._build_header(header)
+            files = {}
+
+        # Return the last commit, if any
+        if commit:
+            yield self._build_commit(commit, None, files)
+
+    def _split_fields(self):
+        """Split the stream in fields, decoding each one of them"""
+
+        encoding = self.encoding
+        parts = []
+
+        for chunk in self.stream:
+            fields = chunk.split(b'\0')
+
+            if len(fields) == 1:
+                parts.append(chunk)
+                continue
+
+            parts.append(fields[0])
+            yield b''.join(parts).decode(encoding, errors='surrogateescape')
+
+            for field in fields[1:-1]:
+                yield field.decode(encoding, errors='surrogateescape')
+
+            parts = [fields[-1]]
+
+        last = b''.join(parts)
+        if last:
+            yield last.decode(encoding, errors='surrogateescape')
+
+    def _build_header(self, header):
+        commit_hash, parents, refs, author, author_date, \
+            committer, commit_date, abbrev_parents, message = header
+
+        commit = {
+            'commit': commit_hash,
+            'parents': parents.split(),
+            'refs': [ref.strip() for ref in refs.split(',')] if refs else []
+        }
+
+        if len(commit['parents']) > 1:
+            commit['Merge'] = abbrev_parents
+
+        commit['Author'] = author
+        commit['AuthorDate'] = author_date
+        commit['Commit'] = committer
+        commit['CommitDate'] = commit_date
+
+        lines = self._clean_message(message)
+
+        if lines:
+            commit['message'] = '\n'.join(lines)
+
+            for line in lines:
+                if line.startswith(self._trailer_prefixes):
+                    self._handle_trailer(commit, line)
+
+        return commit
+
+    @staticmethod
+    def _clean_message(message):
+        """Clean the lines of a message like Git pretty formats do"""
+
+        lines = []
+
+        for line in message.split('\n'):
+            line = line.rstrip(' \t\r')
+
+            # Leading blank lines are skipped
+            if not line and not lines:
+                continue
+            if '\t' in line:
+                line = line.expandtabs(8)
+
+            lines.append(line)
+
+        while lines and not lines[-1]:
+            lines.pop()
+
+        return lines
+
+    @staticmethod
+    def _split_action_field(field, fields):
+        """Split an action field, reading the names of the file; `None` when it is not valid"""
+
+        head = field.split(' ')
+        first = head[0].lstrip(':')
+        nparents = len(head[0]) - len(first)
+        head[0] = first
+
+        if len(head) != 2 * nparents + 3:
+            return None
+
+        modes = head[:nparents + 1]
+        indexes = head[nparents + 1:-1]
+        action = head[-1]
+
+        # Copied or renamed files have a new name, unless the data is combined
+        nfiles = 2 if nparents == 1 and action[:1] in ('C', 'R') else 1
+        names = list(itertools.islice(fields, nfiles))
+
+        if len(names) != nfiles or not all(names):
+            return None
+
+        return [modes, indexes, action] + names
+
+
 class EmptyRepositoryError(RepositoryError):
     """Exception raised when a repository is empty"""
 
@@ -756,6 +1207,15 @@ class _GraphWalker:
     __next__ = next
 
 
+class _UnpackedObjectsIterator(dulwich.pack.DeltaChainIterator):
+    """Iterator over the unpacked objects of a pack, with their deltas resolved"""
+
+    _compute_crc32 = False
+
+    def _result(self, unpacked):
+        return unpacked
+
+
 class GitRepository:
     """Manage a Git repository.
 
@@ -777,6 +1237,19 @@ class GitRepository:
         '-C',  # detect and report copies
         '-c',  # show merge info
     ]
+    GIT_MACHINE_FORMAT = '%x00'.join(['%H', '%P', '%D', '%aN <%aE>', '%ad',
+                                      '%cN <%cE>', '%cd', '%p', '%B']) + '%x00'
+    GIT_MACHINE_OUTPUT_OPTS = [
+        '-z',  # separate fields with NULs
+        '--raw',  # show data in raw format
+        '--numstat',  # show added/deleted lines per file
+        '--format=' + GIT_MACHINE_FORMAT,  # NUL-delimited output
+        '--decorate=full',  # show full refs
+        '--parents',  # show parents information
+        '-M',  # detect and report renames
+        '-C',  # detect and report copies
+        '-c',  # show merge info
+    ]
 
     def __init__(self, uri, dirpath):
         gitdir = os.path.join(dirpath, 'HEAD')
@@ -943,7 +1416,7 @@ class GitRepository:
 
         return commits
 
-    def rev_list(self, branches=None):
+    def rev_list(self, branches=None, from_date=None, to_date=None):
         """Read the list commits from the repository
 
         The list of branches is a list of strings, with the names of the
@@ -956,7 +1429,13 @@ class GitRepository:
 
             git rev-list --topo-order
 
+        When `from_date` or `to_date` are given, only the commits
+        between those dates are listed, like `log` does.
+
         :param branches: names of branches to fetch from (default: None)
+        :param from_date: list commits newer than a specific
+            date (inclusive)
+        :param to_date: list commits older than a specific date
 
         :raises EmptyRepositoryError: when the repository is empty and
             the action cannot be performed
@@ -969,6 +1448,14 @@ class GitRepository:
 
         cmd_rev_list = ['git', 'rev-list', '--topo-order']
 
+        if from_date:
+            dt = from_date.strftime("%Y-%m-%d %H:%M:%S %z")
+            cmd_rev_list.append('--since=' + dt)
+
+        if to_date:
+            dt = to_date.strftime("%Y-%m-%d %H:%M:%S %z")
+            cmd_rev_list.append('--until=' + dt)
+
         if branches is None:
             cmd_rev_list.extend(['--branches', '--tags', '--remotes=origin'])
         elif len(branches) == 0:
@@ -983,7 +1470,7 @@ class GitRepository:
         logger.debug("Git rev-list fetched from %s repository (%s)",
                      self.uri, self.dirpath)
 
-    def log(self, from_date=None, to_date=None, branches=None, encoding='utf-8'):
+    def log(self, from_date=None, to_date=None, branches=None, encoding='utf-8', machine=False):
         """Read the commit log from the repository.
 
         The method returns the Git log of the repository using the
@@ -1001,10 +1488,15 @@ class GitRepository:
         is fetched. If the list of branches is None, all commits
         for all branches will be fetched.
 
+        When `machine` is set, the log is generated using the options
+        of `GIT_MACHINE_OUTPUT_OPTS` and its lines are returned as
+        bytes, to be parsed by `GitMachineParser`.
+
         :param from_date: fetch commits newer than a specific
             date (inclusive)
         :param branches: names of branches to fetch from (default: None)
         :param encoding: encode the log using this format
+        :param machine: generate a machine-oriented log
 
         :returns: a generator where each item is a line from the log
 
@@ -1018,7 +1510,7 @@ class GitRepository:
             raise EmptyRepositoryError(repository=self.uri)
 
         cmd_log = ['git', 'log', '--reverse', '--topo-order']
-        cmd_log.extend(self.GIT_PRETTY_OUTPUT_OPTS)
+        cmd_log.extend(self._output_opts(machine))
 
         if from_date:
             dt = from_date.strftime("%Y-%m-%d %H:%M:%S %z")
@@ -1036,13 +1528,60 @@ class GitRepository:
             branches = ['refs/heads/' + branch for branch in branches]
             cmd_log.extend(branches)
 
-        for line in self._exec_nb(cmd_log, cwd=self.dirpath, env=self.gitenv):
+        for line in self._exec_nb(cmd_log, cwd=self.dirpath, env=self.gitenv,
+                                  decode=not machine):
             yield line
 
         logger.debug("Git log fetched from %s repository (%s)",
                      self.uri, self.dirpath)
 
-    def show(self, commits=None, encoding='utf-8'):
+    def log_commits(self, commits, encoding='utf-8', machine=False):
+        """Read the log of a list of commits.
+
+        The method returns the Git log of the given commits, in the
+        same order they are listed, using the following options:
+
+            git log --raw --numstat --pretty=fuller --decorate=full
+                --parents -M -C -c --no-walk=unsorted --stdin
+
+        The history of the commits is not walked, so only the commits
+        of the list are logged. They are written to the standard input
+        of the command, so the list can be as long as needed.
+
+        Like in `log`, when `machine` is set the log is generated
+        using a machine-oriented format and returned as bytes.
+
+        :param commits: list of commits to log
+        :param encoding: encode the log using this format
+        :param machine: generate a machine-oriented log
+
+        :returns: a generator where each item is a line from the log
+
+        :raises EmptyRepositoryError: when the repository is empty and
+            the action cannot be performed
+        :raises RepositoryError: when an error occurs fetching the log
+        """
+        if self.is_empty():
+            logger.warning("Git %s repository is empty; unable to get the log",
+                           self.uri)
+            raise EmptyRepositoryError(repository=self.uri)
+
+        if not commits:
+            return
+
+        cmd_log = ['git', 'log', '--no-walk=unsorted', '--stdin']
+        cmd_log.extend(self._output_opts(machine))
+
+        data = ''.join(commit + '\n' for commit in commits).encode(encoding)
+
+        for line in self._exec_nb(cmd_log, cwd=self.dirpath, env=self.gitenv,
+                                  encoding=encoding, stdin=data, decode=not machine):
+            yield line
+
+        logger.debug("Git log of %s commits fetched from %s repository (%s)",
+                     len(commits), self.uri, self.dirpath)
+
+    def show(self, commits=None, encoding='utf-8', machine=False):
         """Show the data of a set of commits.
 
         The method returns the output of Git show command for a
@@ -1055,8 +1594,12 @@ class GitRepository:
         data about the last commit, like the default behaviour of
         `git show`.
 
+        Like in `log`, when `machine` is set the output is generated
+        using a machine-oriented format and returned as bytes.
+
         :param commits: list of commits to show data
         :param encoding: encode the output using this format
+        :param machine: generate a machine-oriented output
 
         :returns: a generator where each item is a line from the show output
 
@@ -1073,15 +1616,19 @@ class GitRepository:
             commits = []
 
         cmd_show = ['git', 'show']
-        cmd_show.extend(self.GIT_PRETTY_OUTPUT_OPTS)
+        cmd_show.extend(self._output_opts(machine))
         cmd_show.extend(commits)
 
-        for line in self._exec_nb(cmd_show, cwd=self.dirpath, env=self.gitenv):
+        for line in self._exec_nb(cmd_show, cwd=self.dirpath, env=self.gitenv,
+                                  decode=not machine):
             yield line
 
         logger.debug("Git show fetched from %s repository (%s)",
                      self.uri, self.dirpath)
 
+    def _output_opts(self, machine):
+        return self.GIT_MACHINE_OUTPUT_OPTS if machine else self.GIT_PRETTY_OUTPUT_OPTS
+
     def _fetch_pack(self):
         """Fetch changes and store them in a pack."""
 
@@ -1090,16 +1637,18 @@ class GitRepository:
                     if not ref.refname.endswith('^{}')]
 
         def determine_wants(refs):
-            remote_refs = prepare_refs(self._discover_refs(remote=True))
-            local_refs = prepare_refs(self._discover_refs())
-            wants = [ref for ref in remote_refs if ref not in local_refs]
+            # Use the refs advertised by the remote instead of listing them again
+            remote_refs = [ref_hash for ref_name, ref_hash in refs.items()
+                           if ref_name.startswith((b'refs/heads/', b'refs/tags/')) and
+                           not ref_name.endswith(b'^{}')]
+            wants = [ref for ref in remote_refs if ref not in local_hashes]
             return wants
 
         client, repo_path = dulwich.client.get_transport_and_path(self.uri)
-        repo = dulwich.repo.Repo(self.dirpath)
         fd = io.BytesIO()
 
         local_refs = self._discover_refs()
+        local_hashes = set(prepare_refs(local_refs))
         graph_walker = _GraphWalker(local_refs)
 
         result = client.fetch_pack(repo_path,
@@ -1111,35 +1660,51 @@ class GitRepository:
 
         if len(fd.getvalue()) > 0:
             fd.seek(0)
-            pack = repo.object_store.add_thin_pack(fd.read, None)
-            pack_name = pack.name().decode('utf-8')
+            with dulwich.repo.Repo(self.dirpath) as repo:
+                pack = repo.object_store.add_thin_pack(fd.read, None)
+                pack_name = pack.name().decode('utf-8')
         else:
             pack_name = None
 
         return (pack_name, refs)
 
     def _read_commits_from_pack(self, packet_name):
-        """Read the commits of a pack."""
-
-        filepath = 'objects/pack/pack-' + packet_name
+        """Read the commits of a pack.
 
-        cmd_verify_pack = ['git', 'verify-pack', '-v', filepath]
+        The objects of the pack are read with the object store of the
+        repository, resolving their deltas in-process, so the type of
+        each object is known without running `git verify-pack`.
+        """
+        with dulwich.repo.Repo(self.dirpath) as repo:
+            pack_dir = repo.object_store.pack_dir
 
-        outs = self._exec(cmd_verify_pack, cwd=self.dirpath, env=self.gitenv)
-        outs = outs.decode('utf-8', errors='surrogateescape').rstrip()
+        pack = dulwich.pack.Pack(os.path.join(pack_dir, 'pack-' + packet_name))
 
-        lines = [line.split(' ') for line in outs.split('\n')]
+        try:
+            objects = _UnpackedObjectsIterator.for_pack_data(pack.data,
+                                                             resolve_ext_ref=pack.resolve_ext_ref)
+            commits = [(unpacked.offset, unpacked.sha()) for unpacked in objects
+                       if unpacked.obj_type_num == dulwich.objects.Commit.type_num]
+        finally:
+            pack.close()
 
         # Commits usually come in the pack ordered from newest to oldest
-        commits = [parts[0] for parts in lines if parts[1] == 'commit']
-        commits.reverse()
+        commits.sort(reverse=True)
 
-        return commits
+        return [dulwich.objects.sha_to_hex(sha).decode('utf-8') for _, sha in commits]
 
     def _update_references(self, refs):
-        """Update references removing old ones."""
+        """Update references removing old ones.
+
+        References are deleted and updated in a single transaction,
+        running `git update-ref --stdin` once. When the transaction
+        fails, they are updated one by one, skipping those that
+        cannot be updated.
+        """
+        new_refs = set(ref.refname for ref in refs)
 
-        new_refs = [ref.refname for ref in refs]
+        deleted_refs = []
+        updated_refs = []
 
         # Delete old references
         for old_ref in self._discover_refs():
@@ -1147,7 +1712,7 @@ class GitRepository:
                 continue
             if old_ref.refname in new_refs:
                 continue
-            self._update_ref(old_ref, delete=True)
+            deleted_refs.append(old_ref)
 
         # Update new references
         for new_ref in refs:
@@ -1162,47 +1727,70 @@ class GitRepository:
                              refname)
                 continue
             else:
+                updated_refs.append(new_ref)
+
+        try:
+            self._update_refs_transaction(deleted_refs, updated_refs)
+        except RepositoryError as e:
+            logger.warning("Git refs could not be updated in a single transaction during sync process in %s (%s); "
+                           "updating them one by one; %s",
+                           self.uri, self.dirpath, str(e))
+
+            for old_ref in deleted_refs:
+                self._update_ref(old_ref, delete=True)
+            for new_ref in updated_refs:
                 self._update_ref(new_ref)
 
         # Prune repository to remove old branches
         cmd = ['git', 'remote', 'prune', 'origin']
         self._exec(cmd, cwd=self.dirpath, env=self.gitenv)
 
-    def _discover_refs(self, remote=False):
-        """Get the current list of local or remote refs."""
+    def _discover_refs(self):
+        """Get the current list of local refs.
 
-        if remote:
-            cmd_refs = ['git', 'ls-remote', '-h', '-t', '--exit-code', 'origin']
-            sep = '\t'
-            ignored_error_codes = [2]
-        else:
-            # Check first whether the local repo is empty;
-            # Running 'show-ref' in empty repos gives an error
-            if self.is_empty():
-                raise EmptyRepositoryError(repository=self.uri)
-
-            cmd_refs = ['git', 'show-ref', '--heads', '--tags']
-            sep = ' '
-            ignored_error_codes = [1]
-
-        # Error codes returned when no matching refs (i.e, no heads
-        # or tags) are found in a repository will be ignored. Otherwise,
-        # the full process would fail for those situations.
-        outs = self._exec(cmd_refs, cwd=self.dirpath,
-                          env=self.gitenv,
-                          ignored_error_codes=ignored_error_codes)
-        outs = outs.decode('utf-8', errors='surrogateescape').rstrip()
-        outs = outs.split('\n') if outs else []
+        Heads and tags are read from the refs directory and the
+        `packed-refs` file of the repository using the refs container
+        of dulwich, sorted by name like `git show-ref` does.
+
+        :raises EmptyRepositoryError: when the repository is empty
+        """
+        # Check first whether the local repo is empty
+        if self.is_empty():
+            raise EmptyRepositoryError(repository=self.uri)
+
+        with dulwich.repo.Repo(self.dirpath) as repo:
+            repo_refs = repo.refs.as_dict()
 
         refs = []
 
-        for line in outs:
-            data = line.split(sep)
-            ref = GitRef(data[0], data[1])
+        for refname, ref_hash in sorted(repo_refs.items()):
+            if not refname.startswith((b'refs/heads/', b'refs/tags/')):
+                continue
+            ref = GitRef(ref_hash.decode('utf-8'),
+                         refname.decode('utf-8', errors='surrogateescape'))
             refs.append(ref)
 
         return refs
 
+    def _update_refs_transaction(self, deleted_refs, updated_refs):
+        """Delete and update a list of references in a single transaction.
+
+        :raises RepositoryError: when any of the references cannot be
+            deleted or updated; none of them is modified then
+        """
+        commands = ['delete %s\n' % ref.refname for ref in deleted_refs]
+        commands.extend(['update %s %s\n' % (ref.refname, ref.hash) for ref in updated_refs])
+
+        if not commands:
+            return
+
+        cmd = ['git', 'update-ref', '--stdin']
+        stdin = ''.join(commands).encode('utf-8', errors='surrogateescape')
+        self._exec(cmd, cwd=self.dirpath, env=self.gitenv, stdin=stdin)
+
+        logger.debug("Git %s refs deleted and %s refs updated in %s (%s)",
+                     len(deleted_refs), len(updated_refs), self.uri, self.dirpath)
+
     def _update_ref(self, ref, delete=False):
         """Update a reference."""
 
@@ -1224,14 +1812,16 @@ class GitRepository:
             logger.debug("Git %s ref %s in %s (%s)",
                          ref.refname, action, self.uri, self.dirpath)
 
-    def _exec_nb(self, cmd, cwd=None, env=None, encoding='utf-8'):
+    def _exec_nb(self, cmd, cwd=None, env=None, encoding='utf-8', stdin=None, decode=True):
         """Run a command with a non blocking call.
 
         Execute `cmd` command with a non blocking call. The command will
         be run in the directory set by `cwd`. Enviroment variables can be
         set using the `env` dictionary. The output data is returned
         as encoded bytes in an iterator. Each item will be a line of the
-        output.
+        output. The bytes of `stdin`, when given, are read by the
+        command from its standard input. When `decode` is not set,
+        lines are returned as bytes.
 
         :returns: an iterator with the output of the command as encoded bytes
 
@@ -1242,8 +1832,16 @@ class GitRepository:
         logger.debug("Running command %s (cwd: %s, env: %s)",
                      ' '.join(cmd), cwd, str(env))
 
+        # A file avoids blocking the command while its input is written
+        stdin_file = None
+        if stdin is not None:
+            stdin_file = tempfile.TemporaryFile()
+            stdin_file.write(stdin)
+            stdin_file.seek(0)
+
         try:
             self.proc = subprocess.Popen(cmd,
+                                         stdin=stdin_file,
                                          stdout=subprocess.PIPE,
                                          stderr=subprocess.PIPE,
                                          cwd=cwd,
@@ -1253,7 +1851,7 @@ class GitRepository:
                                           daemon=True)
             err_thread.start()
             for line in self.proc.stdout:
-                yield line.decode(encoding, errors='surrogateescape')
+                yield line.decode(encoding, errors='surrogateescape') if decode else line
             err_thread.join()
 
             self.proc.communicate()
@@ -1262,6 +1860,9 @@ class GitRepository:
         except OSError as e:
             err_thread.join()
             raise RepositoryError(cause=str(e))
+        finally:
+            if stdin_file:
+                stdin_file.close()
 
         if self.proc.returncode != 0:
             cause = "git command - %s (return code: %d)" % \
@@ -1296,12 +1897,13 @@ class GitRepository:
 
     @staticmethod
     def _exec(cmd, cwd=None, env=None, ignored_error_codes=None,
-              encoding='utf-8'):
+              encoding='utf-8', stdin=None):
         """Run a command.
 
         Execute `cmd` command in the directory set by `cwd`. Environment
         variables can be set using the `env` dictionary. The output
-        data is returned as encoded bytes.
+        data is returned as encoded bytes. The bytes of `stdin`, when
+        given, are read by the command from its standard input.
 
         Commands which their returning status codes are non-zero will
         be treated as failed. Error codes considered as valid can be
@@ -1320,8 +1922,9 @@ class GitRepository:
         try:
             proc = subprocess.Popen(cmd, stdout=subprocess.PIPE,
                                     stderr=subprocess.PIPE,
+                                    stdin=subprocess.PIPE if stdin is not None else None,
                                     cwd=cwd, env=env)
-            (outs, errs) = proc.communicate()
+            (outs, errs) = proc.communicate(input=stdin)
         except OSError as e:
             raise RepositoryError(cause=str(e))
 
@@ -21,8 +21,16 @@
 #     Alberto Martín <alberto.martin@bitergia.com>
 #
 
+import collections
+import concurrent.futures
+import contextlib
+import hashlib
 import json
 import logging
+import os
+import sqlite3
+import threading
+import time
 
 import requests
 from grimoirelab_toolkit.datetime import (datetime_to_utc,
@@ -35,6 +43,7 @@ from ...backend import (Backend,
                         BackendCommandArgumentParser,
                         DEFAULT_SEARCH_FIELD)
 from ...client import HttpClient, RateLimitHandler
+from ...errors import BackendError
 from ...utils import DEFAULT_DATETIME, DEFAULT_LAST_DATETIME
 
 CATEGORY_ISSUE = "issue"
@@ -57,6 +66,15 @@ PER_PAGE = 100
 DEFAULT_SLEEP_TIME = 1
 MAX_RETRIES = 5
 
+# Number of items enriched at the same time
+MAX_WORKERS = 1
+
+# Number of pages of items requested in advance
+PREFETCH_DEPTH = 1
+
+# Seconds before the users in the persistent cache are revalidated
+USERS_CACHE_TTL = 7 * 24 * 60 * 60
+
 TARGET_ISSUE_FIELDS = ['user', 'assignee', 'assignees', 'comments', 'reactions']
 TARGET_PULL_FIELDS = ['user', 'review_comments', 'requested_reviewers', "merged_by", "commits"]
 
@@ -94,17 +112,35 @@ class GitHub(Backend):
         pull requests) per query
     :param sleep_time: time to sleep in case
         of connection problems
+    :param max_workers: number of items (e.g., issues, pull requests)
+        enriched at the same time; with `1`, items are enriched
+        one after the other
+    :param users_cache_path: path to the persistent cache of users
+        and organizations; when it is not set, users are only cached
+        in memory during the fetch
+    :param users_cache_ttl: seconds before the users stored in the
+        persistent cache have to be revalidated
+    :param tokens_state_path: path to the state of the API tokens;
+        set it to share the tokens with other processes without
+        exhausting them
+    :param prefetch_depth: number of pages of items requested
+        in advance; with `0`, pages are requested one after the other
     """
-    version = '0.23.0'
+    version = '0.27.0'
 
     CATEGORIES = [CATEGORY_ISSUE, CATEGORY_PULL_REQUEST, CATEGORY_REPO]
+    SORTED_FETCH = True
 
     def __init__(self, owner=None, repository=None,
                  api_token=None, base_url=None,
                  tag=None, archive=None,
                  sleep_for_rate=False, min_rate_to_sleep=MIN_RATE_LIMIT,
                  max_retries=MAX_RETRIES, sleep_time=DEFAULT_SLEEP_TIME,
-                 max_items=MAX_CATEGORY_ITEMS_PER_PAGE):
+                 max_items=MAX_CATEGORY_ITEMS_PER_PAGE, max_workers=MAX_WORKERS,
+                 users_cache_path=None, users_cache_ttl=USERS_CACHE_TTL,
+                 tokens_state_path=None, prefetch_depth=PREFETCH_DEPTH):
+        if max_workers < 1:
+            raise ValueError("'max_workers' must be greater than 0; %s given" % max_workers)
         if api_token is None:
             api_token = []
         origin = base_url if base_url else GITHUB_URL
@@ -122,6 +158,11 @@ class GitHub(Backend):
         self.max_retries = max_retries
         self.sleep_time = sleep_time
         self.max_items = max_items
+        self.max_workers = max_workers
+        self.users_cache_path = users_cache_path
+        self.users_cache_ttl = users_cache_ttl
+        self.tokens_state_path = tokens_state_path
+        self.prefetch_depth = prefetch_depth
 
         self.client = None
         self._users = {}  # internal users cache
@@ -189,7 +230,11 @@ class GitHub(Backend):
         else:
             items = self.__fetch_repo_info()
 
-        return items
+        # The databases of the client are not needed once the fetch ends
+        try:
+            yield from items
+        finally:
+            self._close_client()
 
     @classmethod
     def has_archiving(cls):
@@ -256,73 +301,154 @@ class GitHub(Backend):
     def _init_client(self, from_archive=False):
         """Init client"""
 
+        users_cache = None
+        if self.users_cache_path and not from_archive:
+            users_cache = GitHubUsersCache(self.users_cache_path, ttl=self.users_cache_ttl)
+
+        token_pool = None
+        if not from_archive:
+            token_pool = GitHubTokenPool(self.api_token, state_path=self.tokens_state_path)
+
         return GitHubClient(self.owner, self.repository, self.api_token, self.base_url,
                             self.sleep_for_rate, self.min_rate_to_sleep,
                             self.sleep_time, self.max_retries, self.max_items,
-                            self.archive, from_archive)
+                            self.archive, from_archive, users_cache=users_cache,
+                            token_pool=token_pool, prefetch_depth=self.prefetch_depth)
 
-    def __fetch_issues(self, from_date, to_date):
-        """Fetch the issues"""
+    def _close_client(self):
+        """Close the cache of users and the pool of tokens of the client"""
 
-        issues_groups = self.client.issues(from_date=from_date)
+        if self.client.users_cache:
+            self.client.users_cache.close()
+        self.client.token_pool.close()
 
-        for raw_issues in issues_groups:
-            issues = json.loads(raw_issues)
-            for issue in issues:
+    def __fetch_issues(self, from_date, to_date):
+        """Fetch the issues"""
 
-                if str_to_datetime(issue['updated_at']) > to_date:
-                    return
+        def fetch_issues():
+            issues_groups = self.client.issues(from_date=from_date)
 
-                self.__init_extra_issue_fields(issue)
-                for field in TARGET_ISSUE_FIELDS:
+            for raw_issues in issues_groups:
+                issues = json.loads(raw_issues)
+                for issue in issues:
 
-                    if not issue[field]:
-                        continue
+                    if str_to_datetime(issue['updated_at']) > to_date:
+                        return
 
-                    if field == 'user':
-                        issue[field + '_data'] = self.__get_user(issue[field]['login'])
-                    elif field == 'assignee':
-                        issue[field + '_data'] = self.__get_issue_assignee(issue[field])
-                    elif field == 'assignees':
-                        issue[field + '_data'] = self.__get_issue_assignees(issue[field])
-                    elif field == 'comments':
-                        issue[field + '_data'] = self.__get_issue_comments(issue['number'])
-                    elif field == 'reactions':
-                        issue[field + '_data'] = \
-                            self.__get_issue_reactions(issue['number'], issue['reactions']['total_count'])
+                    yield issue
 
-                yield issue
+        yield from self.__enrich_items(fetch_issues(), self.__enrich_issue)
 
     def __fetch_pull_requests(self, from_date, to_date):
         """Fetch the pull requests"""
 
-        raw_pulls = self.client.pulls(from_date=from_date)
-        for raw_pull in raw_pulls:
-            pull = json.loads(raw_pull)
+        def fetch_pulls():
+            issues_groups = self.client.issues(from_date=from_date)
 
-            if str_to_datetime(pull['updated_at']) > to_date:
-                return
+            for raw_issues in issues_groups:
+                issues = json.loads(raw_issues)
+                for issue in issues:
 
-            self.__init_extra_pull_fields(pull)
+                    if "pull_request" not in issue:
+                        continue
 
-            pull['reviews_data'] = self.__get_pull_reviews(pull['number'])
+                    # Pull requests are fetched before their enrichment is
+                    # submitted, so no work is done after 'to_date'
+                    raw_pull = self.client.pull(issue['number'])
+                    pull = json.loads(raw_pull)
 
-            for field in TARGET_PULL_FIELDS:
-                if not pull[field]:
-                    continue
+                    # Pull requests updated after 'to_date' end the fetch
+                    if str_to_datetime(pull['updated_at']) > to_date:
+                        return
+
+                    yield pull
+
+        yield from self.__enrich_items(fetch_pulls(), self.__enrich_pull)
 
-                if field == 'user':
-                    pull[field + '_data'] = self.__get_user(pull[field]['login'])
-                elif field == 'merged_by':
-                    pull[field + '_data'] = self.__get_user(pull[field]['login'])
-                elif field == 'review_comments':
-                    pull[field + '_data'] = self.__get_pull_review_comments(pull['number'])
-                elif field == 'requested_reviewers':
-                    pull[field + '_data'] = self.__get_pull_requested_reviewers(pull['number'])
-                elif field == 'commits':
-                    pull[field + '_data'] = self.__get_pull_commits(pull['number'])
+    def __enrich_items(self, items, enrich):
+        """Enrich the items using a pool of threads.
 
-            yield pull
+        While the enriched items are returned, up to twice the number
+        of workers are being enriched in the background. The items
+        keep the order given by the API.
+        """
+        if self.max_workers == 1:
+            for item in items:
+                yield enrich(item)
+            return
+
+        window = 2 * self.max_workers
+        pending = collections.deque()
+
+        with concurrent.futures.ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            try:
+                items = iter(items)
+                exhausted = False
+
+                while not exhausted or pending:
+                    while not exhausted and len(pending) < window:
+                        try:
+                            item = next(items)
+                        except StopIteration:
+                            exhausted = True
+                            break
+                        pending.append(executor.submit(enrich, item))
+
+                    if not pending:
+                        break
+
+                    yield pending.popleft().result()
+            finally:
+                # Items not started yet won't be needed
+                for future in pending:
+                    future.cancel()
+
+    def __enrich_issue(self, issue):
+        """Add the data of the sub-resources to an issue"""
+
+        self.__init_extra_issue_fields(issue)
+        for field in TARGET_ISSUE_FIELDS:
+
+            if not issue[field]:
+                continue
+
+            if field == 'user':
+                issue[field + '_data'] = self.__get_user(issue[field]['login'])
+            elif field == 'assignee':
+                issue[field + '_data'] = self.__get_issue_assignee(issue[field])
+            elif field == 'assignees':
+                issue[field + '_data'] = self.__get_issue_assignees(issue[field])
+            elif field == 'comments':
+                issue[field + '_data'] = self.__get_issue_comments(issue['number'])
+            elif field == 'reactions':
+                issue[field + '_data'] = \
+                    self.__get_issue_reactions(issue['number'], issue['reactions']['total_count'])
+
+        return issue
+
+    def __enrich_pull(self, pull):
+        """Add the data of the sub-resources to a pull request"""
+
+        self.__init_extra_pull_fields(pull)
+
+        pull['reviews_data'] = self.__get_pull_reviews(pull['number'])
+
+        for field in TARGET_PULL_FIELDS:
+            if not pull[field]:
+                continue
+
+            if field == 'user':
+                pull[field + '_data'] = self.__get_user(pull[field]['login'])
+            elif field == 'merged_by':
+                pull[field + '_data'] = self.__get_user(pull[field]['login'])
+            elif field == 'review_comments':
+                pull[field + '_data'] = self.__get_pull_review_comments(pull['number'])
+            elif field == 'requested_reviewers':
+                pull[field + '_data'] = self.__get_pull_requested_reviewers(pull['number'])
+            elif field == 'commits':
+                pull[field + '_data'] = self.__get_pull_commits(pull['number'])
+
+        return pull
 
     def __fetch_repo_info(self):
         """Get repo info about stars, watchers and forks"""
@@ -534,6 +660,271 @@ class GitHub(Backend):
         pull['commits_data'] = []
 
 
+class GitHubUsersCache:
+    """Persistent cache of GitHub users and organizations.
+
+    The data of users and their organizations is stored in a SQLite
+    database, together with the ETag returned by GitHub, so it can
+    be reused by later fetches. Entries older than `ttl` seconds are
+    marked as expired and should be revalidated with a conditional
+    request.
+
+    The database can be shared by several processes; each of them
+    replaces the entries it fetches.
+
+    :param cache_path: path to the database; it will be created
+        when it does not exist
+    :param ttl: seconds an entry is fresh after being stored
+        or revalidated
+
+    :raises BackendError: when the database cannot be opened
+    """
+    CACHE_TABLE = 'users'
+
+    CACHE_CREATE_STMT = "CREATE TABLE IF NOT EXISTS " + CACHE_TABLE + " ( " \
+                        "url TEXT PRIMARY KEY, " \
+                        "etag TEXT, " \
+                        "data TEXT, " \
+                        "updated_on REAL)"
+
+    # Seconds to wait while other processes write in the cache
+    LOCK_TIMEOUT = 30
+
+    def __init__(self, cache_path, ttl=USERS_CACHE_TTL):
+        self.cache_path = cache_path
+        self.ttl = ttl
+        self._lock = threading.Lock()
+
+        dirpath = os.path.dirname(os.path.abspath(cache_path))
+        if not os.path.exists(dirpath):
+            os.makedirs(dirpath)
+
+        try:
+            self._db = sqlite3.connect(cache_path, timeout=self.LOCK_TIMEOUT,
+                                       check_same_thread=False)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute(self.CACHE_CREATE_STMT)
+            self._db.commit()
+        except sqlite3.DatabaseError as e:
+            msg = "invalid users cache %s; %s" % (cache_path, str(e))
+            raise BackendError(cause=msg)
+
+    def get(self, url):
+        """Get the cache entry of the given URL.
+
+        :param url: URL of the user or organizations
+
+        :returns: a dict with the `data`, its `etag` and whether
+            the entry is `expired`; `None` when the URL is not
+            in the cache
+        """
+        select_stmt = "SELECT etag, data, updated_on " \
+                      "FROM " + self.CACHE_TABLE + " " \
+                      "WHERE url = ?"
+
+        with self._lock:
+            row = self._db.execute(select_stmt, (url,)).fetchone()
+
+        if not row:
+            return None
+
+        etag, data, updated_on = row
+
+        return {
+            'etag': etag,
+            'data': data,
+            'expired': time.time() - updated_on >= self.ttl
+        }
+
+    def set(self, url, data, etag=None):
+        """Store the data of a URL in the cache.
+
+        :param url: URL of the user or organizations
+        :param data: raw data
+        :param etag: ETag of the data
+        """
+        insert_stmt = "INSERT OR REPLACE INTO " + self.CACHE_TABLE + " " \
+                      "(url, etag, data, updated_on) VALUES (?, ?, ?, ?)"
+
+        with self._lock:
+            self._db.execute(insert_stmt, (url, etag, data, time.time()))
+            self._db.commit()
+
+    def refresh(self, url):
+        """Mark the entry of a URL as fresh after revalidating it.
+
+        :param url: URL of the user or organizations
+        """
+        update_stmt = "UPDATE " + self.CACHE_TABLE + " " \
+                      "SET updated_on = ? WHERE url = ?"
+
+        with self._lock:
+            self._db.execute(update_stmt, (time.time(), url))
+            self._db.commit()
+
+    def close(self):
+        """Close the cache"""
+
+        with self._lock:
+            self._db.close()
+
+
+class GitHubTokenPool:
+    """Pool of GitHub API tokens.
+
+    This class keeps the remaining API points of each token and the
+    time when they will be reset, as they are reported by GitHub in
+    the headers of the responses. With this data, the pool chooses
+    the token with more points available without sending extra
+    requests to the API. Tokens not used yet, or whose points were
+    already reset, are chosen first because their budget is full.
+
+    The state is kept in a SQLite database. By default, the database
+    lives in memory, but it can be stored in `state_path` to share
+    the pool with other processes. Tokens are identified by a hash,
+    so they are not written in the file.
+
+    :param tokens: list of GitHub auth tokens
+    :param state_path: path to the database of the shared state;
+        when it is not set, the state is kept in memory
+
+    :raises BackendError: when the database cannot be opened
+    """
+    POOL_TABLE = 'tokens'
+
+    POOL_CREATE_STMT = "CREATE TABLE IF NOT EXISTS " + POOL_TABLE + " ( " \
+                       "token_id VARCHAR(64) PRIMARY KEY, " \
+                       "remaining INTEGER, " \
+                       "reset_ts REAL, " \
+                       "picked_on REAL)"
+
+    # Seconds to wait while other processes write in the state
+    LOCK_TIMEOUT = 30
+
+    def __init__(self, tokens, state_path=None):
+        self.tokens = tokens
+        self.state_path = state_path
+        self._lock = threading.Lock()
+
+        db_path = state_path if state_path else ':memory:'
+
+        if state_path:
+            dirpath = os.path.dirname(os.path.abspath(state_path))
+            if not os.path.exists(dirpath):
+                os.makedirs(dirpath)
+
+        try:
+            self._db = sqlite3.connect(db_path, timeout=self.LOCK_TIMEOUT,
+                                       isolation_level=None,
+                                       check_same_thread=False)
+            self._db.execute(self.POOL_CREATE_STMT)
+        except sqlite3.DatabaseError as e:
+            msg = "invalid tokens state %s; %s" % (state_path, str(e))
+            raise BackendError(cause=msg)
+
+    def pick(self):
+        """Choose the token with more API points available.
+
+        The points of tokens whose reset time has passed are unknown,
+        as the points of the tokens not used yet. In both cases, the
+        full budget is available so these tokens are the preferred
+        ones. Ties are solved choosing the token that was picked
+        the longest time ago, so the load is spread among them.
+
+        :returns: a tuple with the token, its remaining points and
+            the time when they will be reset; points and time are
+            `None` when they are not known
+        """
+        if not self.tokens:
+            return None, None, None
+
+        select_stmt = "SELECT token_id, remaining, reset_ts, picked_on " \
+                      "FROM " + self.POOL_TABLE
+        update_stmt = "INSERT OR REPLACE INTO " + self.POOL_TABLE + " " \
+                      "(token_id, remaining, reset_ts, picked_on) VALUES (?, ?, ?, ?)"
+
+        with self._lock, self._transaction():
+            now = time.time()
+            states = {row[0]: row[1:] for row in self._db.execute(select_stmt)}
+
+            candidates = []
+            for token in self.tokens:
+                remaining, reset_ts, picked_on = states.get(self._token_id(token), (None, None, 0))
+
+                if reset_ts is not None and reset_ts <= now:
+                    remaining, reset_ts = None, None
+
+                candidates.append((remaining is None, remaining or 0, -picked_on, token, remaining, reset_ts))
+
+            best = max(candidates, key=lambda candidate: candidate[:3])
+            token, remaining, reset_ts = best[3:]
+
+            self._db.execute(update_stmt, (self._token_id(token), remaining, reset_ts, now))
+
+        return token, remaining, reset_ts
+
+    def update(self, token, remaining, reset_ts):
+        """Update the API points of a token.
+
+        Updates reported by older responses are ignored. Within
+        the same reset window the points only decrease, so the
+        lowest value is kept when several processes use the
+        same token.
+
+        :param token: GitHub auth token
+        :param remaining: remaining API points of the token
+        :param reset_ts: time when the points will be reset
+        """
+        if remaining is None:
+            return
+
+        select_stmt = "SELECT remaining, reset_ts, picked_on " \
+                      "FROM " + self.POOL_TABLE + " " \
+                      "WHERE token_id = ?"
+        update_stmt = "INSERT OR REPLACE INTO " + self.POOL_TABLE + " " \
+                      "(token_id, remaining, reset_ts, picked_on) VALUES (?, ?, ?, ?)"
+
+        token_id = self._token_id(token)
+
+        with self._lock, self._transaction():
+            row = self._db.execute(select_stmt, (token_id,)).fetchone()
+            picked_on = 0
+
+            if row:
+                last_remaining, last_reset_ts, picked_on = row
+
+                if last_reset_ts is not None and reset_ts is not None:
+                    if reset_ts < last_reset_ts:
+                        return
+                    if reset_ts == last_reset_ts and last_remaining is not None:
+                        remaining = min(remaining, last_remaining)
+
+            self._db.execute(update_stmt, (token_id, remaining, reset_ts, picked_on))
+
+    def close(self):
+        """Close the pool"""
+
+        with self._lock:
+            self._db.close()
+
+    @contextlib.contextmanager
+    def _transaction(self):
+        """Run statements in a transaction that locks the database"""
+
+        self._db.execute("BEGIN IMMEDIATE")
+        try:
+            yield
+        except BaseException:
+            self._db.execute("ROLLBACK")
+            raise
+        else:
+            self._db.execute("COMMIT")
+
+    @staticmethod
+    def _token_id(token):
+        return hashlib.sha256(token.encode('utf-8')).hexdigest()
+
+
 class GitHubClient(HttpClient, RateLimitHandler):
     """Client for retieving information from GitHub API
 
@@ -554,6 +945,12 @@ class GitHubClient(HttpClient, RateLimitHandler):
         pull requests) per query
     :param archive: collect issues already retrieved from an archive
     :param from_archive: it tells whether to write/read the archive
+    :param users_cache: `GitHubUsersCache` where users and organizations
+        are kept between fetches; it is not used when the data is read
+        from an archive
+    :param token_pool: `GitHubTokenPool` that chooses the token to use;
+        when it is not set, a pool for `tokens` is created
+    :param prefetch_depth: number of pages of items requested in advance
     """
     EXTRA_STATUS_FORCELIST = [403, 500, 502, 503]
 
@@ -563,7 +960,8 @@ class GitHubClient(HttpClient, RateLimitHandler):
     def __init__(self, owner, repository, tokens,
                  base_url=None, sleep_for_rate=False, min_rate_to_sleep=MIN_RATE_LIMIT,
                  sleep_time=DEFAULT_SLEEP_TIME, max_retries=MAX_RETRIES,
-                 max_items=MAX_CATEGORY_ITEMS_PER_PAGE, archive=None, from_archive=False):
+                 max_items=MAX_CATEGORY_ITEMS_PER_PAGE, archive=None, from_archive=False,
+                 users_cache=None, token_pool=None, prefetch_depth=PREFETCH_DEPTH):
         self.owner = owner
         self.repository = repository
         self.tokens = tokens
@@ -571,6 +969,10 @@ class GitHubClient(HttpClient, RateLimitHandler):
         self.current_token = None
         self.last_rate_limit_checked = None
         self.max_items = max_items
+        self.users_cache = users_cache if not from_archive else None
+        self.token_pool = token_pool if token_pool else GitHubTokenPool(tokens)
+        self._logins_locks = {}
+        self._logins_lock = threading.Lock()
 
         if base_url:
             base_url = urijoin(base_url, 'api', 'v3')
@@ -580,7 +982,7 @@ class GitHubClient(HttpClient, RateLimitHandler):
         super().__init__(base_url, sleep_time=sleep_time, max_retries=max_retries,
                          extra_headers=self._set_extra_headers(),
                          extra_status_forcelist=self.EXTRA_STATUS_FORCELIST,
-                         archive=archive, from_archive=from_archive)
+                         archive=archive, from_archive=from_archive, prefetch_depth=prefetch_depth)
         super().setup_rate_limit_handler(sleep_for_rate=sleep_for_rate, min_rate_to_sleep=min_rate_to_sleep)
 
         # Choose best API token (with maximum API points remaining)
@@ -674,11 +1076,17 @@ class GitHubClient(HttpClient, RateLimitHandler):
                 if "pull_request" not in issue:
                     continue
 
-                pull_number = issue["number"]
-                path = urijoin(self.base_url, 'repos', self.owner, self.repository, "pulls", pull_number)
-                r = self.fetch(path)
-                pull = r.text
-                yield pull
+                yield self.pull(issue["number"])
+
+    def pull(self, pr_number):
+        """Get pull request data"""
+
+        path = urijoin(self.base_url, 'repos', self.owner, self.repository, "pulls", pr_number)
+
+        r = self.fetch(path)
+        pull = r.text
+
+        return pull
 
     def repo(self):
         """Get repository data"""
@@ -749,13 +1157,17 @@ class GitHubClient(HttpClient, RateLimitHandler):
         if login in self._users:
             return self._users[login]
 
-        url_user = urijoin(self.base_url, 'users', login)
+        with self._login_lock(login):
+            # The user might be fetched by another thread meanwhile
+            if login in self._users:
+                return self._users[login]
 
-        logging.info("Getting info for %s" % (url_user))
+            url_user = urijoin(self.base_url, 'users', login)
 
-        r = self.fetch(url_user)
-        user = r.text
-        self._users[login] = user
+            logging.info("Getting info for %s" % (url_user))
+
+            user = self._fetch_user_resource(url_user)
+            self._users[login] = user
 
         return user
 
@@ -764,19 +1176,22 @@ class GitHubClient(HttpClient, RateLimitHandler):
         if login in self._users_orgs:
             return self._users_orgs[login]
 
-        url = urijoin(self.base_url, 'users', login, 'orgs')
-        try:
-            r = self.fetch(url)
-            orgs = r.text
-        except requests.exceptions.HTTPError as error:
-            # 404 not found is wrongly received sometimes
-            if error.response.status_code == 404:
-                logger.error("Can't get github login orgs: %s", error)
-                orgs = '[]'
-            else:
-                raise error
-
-        self._users_orgs[login] = orgs
+        with self._login_lock(login):
+            if login in self._users_orgs:
+                return self._users_orgs[login]
+
+            url = urijoin(self.base_url, 'users', login, 'orgs')
+            try:
+                orgs = self._fetch_user_resource(url)
+            except requests.exceptions.HTTPError as error:
+                # 404 not found is wrongly received sometimes
+                if error.response.status_code == 404:
+                    logger.error("Can't get github login orgs: %s", error)
+                    orgs = '[]'
+                else:
+                    raise error
+
+            self._users_orgs[login] = orgs
 
         return orgs
 
@@ -797,109 +1212,167 @@ class GitHubClient(HttpClient, RateLimitHandler):
         response = super().fetch(url, payload, headers, method, stream, verify)
 
         if not self.from_archive:
-            if self._need_check_tokens():
-                self._choose_best_api_token()
-            else:
-                self.update_rate_limit(response)
+            self._update_tokens_rate_limit(response)
 
         return response
 
     def fetch_items(self, path, payload):
-        """Return the items from github API using links pagination"""
+        """Return the items from github API using links pagination.
 
+        The next pages are requested while the items of the current
+        one are processed (see `HttpClient.fetch_pages`).
+        """
         page = 0  # current page
         last_page = None  # last page
         url_next = urijoin(self.base_url, 'repos', self.owner, self.repository, path)
         logger.debug("Get GitHub paginated items from " + url_next)
 
-        response = self.fetch(url_next, payload=payload)
+        def next_page(response):
+            if 'next' in response.links:
+                return response.links['next']['url'], payload
+            return None
 
-        items = response.text
-        page += 1
+        for response in self.fetch_pages(url_next, next_page, payload=payload):
+            items = response.text
+            page += 1
 
-        if 'last' in response.links:
-            last_url = response.links['last']['url']
-            last_page = last_url.split('&page=')[1].split('&')[0]
-            last_page = int(last_page)
-            logger.debug("Page: %i/%i" % (page, last_page))
+            if page == 1 and 'last' in response.links:
+                last_url = response.links['last']['url']
+                last_page = last_url.split('&page=')[1].split('&')[0]
+                last_page = int(last_page)
+                logger.debug("Page: %i/%i" % (page, last_page))
+            elif page > 1:
+                logger.debug("Page: %i/%i" % (page, last_page))
+
+            if not items:
+                break
 
-        while items:
             yield items
 
-            items = None
+    def _send_prefetch_request(self, url, payload, headers):
+        """Send the request of a page fetched in advance"""
 
-            if 'next' in response.links:
-                url_next = response.links['next']['url']
-                response = self.fetch(url_next, payload=payload)
-                page += 1
+        self.sleep_for_rate_limit()
+        response = self._send_cached_request(url, payload, headers, self.GET, False, True, None)
+        self._update_tokens_rate_limit(response)
 
-                items = response.text
-                logger.debug("Page: %i/%i" % (page, last_page))
+        return response
 
-    def _get_token_rate_limit(self, token):
-        """Return token's remaining API points"""
+    def _fetch_user_resource(self, url):
+        """Fetch the data of a user or its organizations.
+
+        When the persistent cache of users is set, data found in
+        it is returned while it is fresh. Expired entries are
+        revalidated with a conditional request, which GitHub does
+        not count against the rate limit when the data did not
+        change. Data taken from the cache is archived as if it
+        was fetched, so the fetch can be replayed. Users not found
+        in this cache are requested through the response cache, as
+        `fetch` does.
+        """
+        if not self.users_cache:
+            return self.fetch(url).text
 
-        rate_url = urijoin(self.base_url, "rate_limit")
-        self.session.headers.update({'Authorization': 'token ' + token})
-        remaining = 0
-        try:
-            headers = super().fetch(rate_url).headers
-            if self.rate_limit_header in headers:
-                remaining = int(headers[self.rate_limit_header])
-        except requests.exceptions.HTTPError as error:
-            logger.warning("Rate limit not initialized: %s", error)
-        return remaining
-
-    def _get_tokens_rate_limits(self):
-        """Return array of all tokens remaining API points"""
-
-        remainings = [0] * self.n_tokens
-        # Turn off archiving when checking rates, because that would cause
-        # archive key conflict (the same URLs giving different responses)
-        arch = self.archive
-        self.archive = None
-        for idx, token in enumerate(self.tokens):
-            # Pass flag to skip disabling archiving because this function doies it
-            remainings[idx] = self._get_token_rate_limit(token)
-        # Restore archiving to whatever state it was
-        self.archive = arch
-        logger.debug("Remaining API points: {}".format(remainings))
-        return remainings
+        entry = self.users_cache.get(url)
+
+        if entry and not entry['expired']:
+            logger.debug("User data of %s found in cache", url)
+            if self.archive:
+                self._process_response(self._cached_response(url, entry['data']), url, None, None)
+            return entry['data']
+
+        headers = {'If-None-Match': entry['etag']} if entry and entry['etag'] else None
+
+        self.sleep_for_rate_limit()
+        response = self._send_cached_request(url, None, headers, self.GET, False, True, None)
+        self._update_tokens_rate_limit(response)
+
+        not_modified = response.status_code == 304
+        if not_modified:
+            logger.debug("User data of %s not modified", url)
+            response = self._cached_response(url, entry['data'])
+
+        # Archive the response as if it was fetched without validators
+        response = self._process_response(response, url, None, None)
+
+        if not_modified:
+            self.users_cache.refresh(url)
+        else:
+            self.users_cache.set(url, response.text, response.headers.get('ETag', None))
+
+        return response.text
+
+    @staticmethod
+    def _cached_response(url, data):
+        """Build the response of a request served by the users cache"""
+
+        response = requests.Response()
+        response.status_code = 200
+        response.reason = 'OK'
+        response.url = url
+        response.encoding = 'utf-8'
+        response._content = data.encode('utf-8')
+
+        return response
+
+    def _update_tokens_rate_limit(self, response):
+        """Update the rate limit or switch to a better token after a request.
+
+        Requests can be sent from several threads, so the update holds
+        the lock of the rate limit handler, the one used to reserve the
+        rate limit. That lock is not reentrant: nothing called while it
+        is held may reserve the rate limit, as `fetch` does, or send
+        requests.
+        """
+        with self._rate_limit_lock:
+            self.update_rate_limit(response)
+
+            if self.current_token:
+                self.token_pool.update(self.current_token, self.rate_limit, self.rate_limit_reset_ts)
+
+            if self._need_check_tokens():
+                self._choose_best_api_token()
 
     def _choose_best_api_token(self):
-        """Check all API tokens defined and choose one with most remaining API points"""
+        """Choose the API token with most remaining API points.
 
+        The token is taken from the pool, which knows the points of
+        each token from the responses already received. The points
+        of tokens not used yet, or whose points were reset, are not
+        requested to the API.
+        """
         # Return if no tokens given
         if self.n_tokens == 0:
             return
 
-        # If multiple tokens given, choose best
-        token_idx = 0
-        if self.n_tokens > 1:
-            remainings = self._get_tokens_rate_limits()
-            token_idx = remainings.index(max(remainings))
-            logger.debug("Remaining API points: {}, choosen index: {}".format(remainings, token_idx))
+        token, remaining, reset_ts = self.token_pool.pick()
+        logger.debug("Remaining API points: %s, chosen index: %s",
+                     remaining, self.tokens.index(token))
 
-        # If we have any tokens - use best of them
-        self.current_token = self.tokens[token_idx]
+        self.current_token = token
         self.session.headers.update({'Authorization': 'token ' + self.current_token})
-        # Update rate limit data for the current token
-        self._update_current_rate_limit()
+
+        # Unknown points are the full budget of the token; the
+        # headers of the next response will set their value
+        self.rate_limit = remaining
+        self.rate_limit_reset_ts = reset_ts
+        self.last_rate_limit_checked = remaining
 
     def _need_check_tokens(self):
         """Check if we need to switch GitHub API tokens"""
 
         if self.n_tokens <= 1 or self.rate_limit is None:
             return False
-        elif self.last_rate_limit_checked is None:
-            self.last_rate_limit_checked = self.rate_limit
-            return True
 
         # If approaching minimum rate limit for sleep
         approaching_limit = float(self.min_rate_to_sleep) * (1.0 + TOKEN_USAGE_BEFORE_SWITCH) + 1
         if self.rate_limit <= approaching_limit:
             self.last_rate_limit_checked = self.rate_limit
             return True
+        elif self.last_rate_limit_checked is None:
+            # First points known of the token; the next checks use them
+            self.last_rate_limit_checked = self.rate_limit
+            return False
 
         # Only switch token when used predefined factor of the current token's remaining API points
         ratio = float(self.rate_limit) / float(self.last_rate_limit_checked)
@@ -912,24 +1385,28 @@ class GitHubClient(HttpClient, RateLimitHandler):
         else:
             return False
 
-    def _update_current_rate_limit(self):
-        """Update rate limits data for the current token"""
+    @contextlib.contextmanager
+    def _login_lock(self, login):
+        """Hold the lock that avoids fetching a login more than once.
+
+        Locks are removed once no thread is using them, so there are
+        never more locks than threads fetching logins.
+        """
+        with self._logins_lock:
+            lock, nusers = self._logins_locks.get(login, (None, 0))
+            lock = lock or threading.Lock()
+            self._logins_locks[login] = (lock, nusers + 1)
 
-        url = urijoin(self.base_url, "rate_limit")
         try:
-            # Turn off archiving when checking rates, because that would cause
-            # archive key conflict (the same URLs giving different responses)
-            arch = self.archive
-            self.archive = None
-            response = super().fetch(url)
-            self.archive = arch
-            self.update_rate_limit(response)
-            self.last_rate_limit_checked = self.rate_limit
-        except requests.exceptions.HTTPError as error:
-            if error.response.status_code == 404:
-                logger.warning("Rate limit not initialized: %s", error)
-            else:
-                raise error
+            with lock:
+                yield
+        finally:
+            with self._logins_lock:
+                lock, nusers = self._logins_locks[login]
+                if nusers == 1:
+                    del self._logins_locks[login]
+                else:
+                    self._logins_locks[login] = (lock, nusers - 1)
 
     def _set_extra_headers(self):
         """Set extra headers for session"""
@@ -952,7 +1429,10 @@ class GitHubCommand(BackendCommand):
                                               from_date=True,
                                               to_date=True,
                                               token_auth=False,
-                                              archive=True)
+                                              archive=True,
+                                              resume=True,
+                                              http_cache=True,
+                                              rate_pacing=True)
         # GitHub options
         group = parser.parser.add_argument_group('GitHub arguments')
         group.add_argument('--enterprise-url', dest='base_url',
@@ -979,6 +1459,21 @@ class GitHubCommand(BackendCommand):
         group.add_argument('--sleep-time', dest='sleep_time',
                            default=DEFAULT_SLEEP_TIME, type=int,
                            help="sleeping time between API call retries")
+        group.add_argument('--max-workers', dest='max_workers',
+                           default=MAX_WORKERS, type=int,
+                           help="number of items enriched at the same time")
+        group.add_argument('--prefetch-depth', dest='prefetch_depth',
+                           default=PREFETCH_DEPTH, type=int,
+                           help="number of pages of items requested in advance")
+        group.add_argument('--users-cache-path', dest='users_cache_path',
+                           default=None,
+                           help="path to the persistent cache of users")
+        group.add_argument('--users-cache-ttl', dest='users_cache_ttl',
+                           default=USERS_CACHE_TTL, type=int,
+                           help="seconds before revalidating the cached users")
+        group.add_argument('--tokens-state-path', dest='tokens_state_path',
+                           default=None,
+                           help="path to the state of the API tokens shared with other processes")
 
         # Positional arguments
         parser.parser.add_argument('owner',
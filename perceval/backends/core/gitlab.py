@@ -90,9 +90,10 @@ class GitLab(Backend):
     :param extra_retry_after_status: retry HTTP requests after status (default 500 and 502). These status complete
         the ones (413, 429, 503) defined in the HttpClient class
     """
-    version = '0.11.0'
+    version = '0.12.0'
 
     CATEGORIES = [CATEGORY_ISSUE, CATEGORY_MERGE_REQUEST]
+    SORTED_FETCH = True
     ORIGIN_UNIQUE_FIELD = OriginUniqueField(name='iid', type=int)
 
     def __init__(self, owner=None, repository=None, api_token=None,
@@ -633,42 +634,42 @@ class GitLabClient(HttpClient, RateLimitHandler):
         return response
 
     def fetch_items(self, path, payload):
-        """Return the items from GitLab API using links pagination"""
+        """Return the items from GitLab API using links pagination.
 
+        The next pages are requested while the items of the current
+        one are processed (see `HttpClient.fetch_pages`).
+        """
         page = 0  # current page
         last_page = None  # last page
         url_next = urijoin(self.base_url, GitLabClient.PROJECTS, self.owner + '%2F' + self.repository, path)
 
         logger.debug("Get GitLab paginated items from " + url_next)
 
-        response = self.fetch(url_next, payload=payload)
-        response.encoding = 'utf-8'
+        def next_page(response):
+            if 'next' in response.links:
+                return response.links['next']['url'], payload  # Loving requests :)
+            return None
 
-        items = response.text
-        page += 1
+        for response in self.fetch_pages(url_next, next_page, payload=payload):
+            response.encoding = 'utf-8'
 
-        if 'last' in response.links:
-            last_url = response.links['last']['url']
-            last_page = last_url.split('&page=')[1].split('&')[0]
-            last_page = int(last_page)
-            logger.debug("Page: %i/%i" % (page, last_page))
+            items = response.text
+            page += 1
 
-        while items:
-            yield items
+            if page == 1 and 'last' in response.links:
+                last_url = response.links['last']['url']
+                last_page = last_url.split('&page=')[1].split('&')[0]
+                last_page = int(last_page)
+                logger.debug("Page: %i/%i" % (page, last_page))
+            elif page > 1 and not last_page:
+                logger.debug("Page: %i" % page)
+            elif page > 1:
+                logger.debug("Page: %i/%i" % (page, last_page))
 
-            items = None
+            if not items:
+                break
 
-            if 'next' in response.links:
-                url_next = response.links['next']['url']  # Loving requests :)
-                response = self.fetch(url_next, payload=payload)
-                page += 1
-
-                items = response.text
-
-                if not last_page:
-                    logger.debug("Page: %i" % page)
-                else:
-                    logger.debug("Page: %i/%i" % (page, last_page))
+            yield items
 
     @staticmethod
     def sanitize_for_archive(url, headers, payload):
@@ -733,7 +734,9 @@ class GitLabCommand(BackendCommand):
                                               from_date=True,
                                               token_auth=True,
                                               archive=True,
-                                              blacklist=True)
+                                              blacklist=True,
+                                              resume=True,
+                                              rate_pacing=True)
 
         # GitLab options
         group = parser.parser.add_argument_group('GitLab arguments')
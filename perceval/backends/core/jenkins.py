@@ -58,7 +58,7 @@ class Jenkins(Backend):
     :param archive: collect builds already retrieved from an archive
     :param blacklist_ids: exclude the jobs ID of this list while fetching
     """
-    version = '0.14.1'
+    version = '0.15.0'
 
     CATEGORIES = [CATEGORY_BUILD]
     EXTRA_SEARCH_FIELDS = {
@@ -113,6 +113,7 @@ class Jenkins(Backend):
 
         nbuilds = 0  # number of builds processed
         njobs = 0  # number of jobs processed
+        npartial = 0  # number of jobs whose builds were not completely parsed
 
         projects = json.loads(self.client.get_jobs())
         jobs = projects['jobs']
@@ -122,7 +123,7 @@ class Jenkins(Backend):
                          job['url'], njobs, len(jobs))
 
             try:
-                raw_builds = self.client.get_builds(job['name'])
+                builds = self.client.stream_builds(job['name'])
             except requests.exceptions.HTTPError as e:
                 if e.response.status_code == 500:
                     logger.warning(e)
@@ -133,26 +134,34 @@ class Jenkins(Backend):
                 else:
                     raise e
 
-            if not raw_builds:
+            if not builds:
                 self.summary.skipped += 1
                 continue
 
+            # Builds are decoded while they are downloaded, so some
+            # of them may be already returned when an error is found
+            job_builds = 0
             try:
-                builds = json.loads(raw_builds)
+                for build in builds:
+                    yield build
+                    job_builds += 1
             except ValueError:
-                logger.warning("Unable to parse builds from job %s; skipping",
-                               job['url'])
-                self.summary.skipped += 1
-                continue
+                if not job_builds:
+                    logger.warning("Unable to parse builds from job %s; skipping",
+                                   job['url'])
+                    self.summary.skipped += 1
+                    continue
 
-            builds = builds['builds']
-            for build in builds:
-                yield build
-                nbuilds += 1
+                logger.warning("Unable to parse the rest of builds from job %s; "
+                               "%i builds fetched", job['url'], job_builds)
+                npartial += 1
+            finally:
+                nbuilds += job_builds
 
             njobs += 1
 
-        logger.info("Total number of jobs: %i/%i", njobs, len(jobs))
+        logger.info("Total number of jobs: %i/%i (%i partially fetched)",
+                    njobs, len(jobs), npartial)
         logger.info("Total number of builds: %i", nbuilds)
 
     @classmethod
@@ -265,6 +274,26 @@ class JenkinsClient(HttpClient):
         response = self.fetch(url_build, payload=payload, auth=self.auth)
         return response.text
 
+    def stream_builds(self, job_name):
+        """Retrieve all builds from a job, decoding them as they are read.
+
+        Jobs with many builds return large documents, mostly when the
+        detail depth is increased, so builds are decoded one by one
+        instead of loading the whole document.
+
+        :returns: a `JSONArrayStream` with the builds; `None` when
+            the job is blacklisted
+        """
+        if self.blacklist_jobs and job_name in self.blacklist_jobs:
+            logger.warning("Not getting blacklisted job: %s", job_name)
+            return None
+
+        payload = {'depth': self.detail_depth}
+        url_build = urijoin(self.base_url, "job", job_name, "api", "json")
+
+        return self.fetch_json_stream(url_build, path=['builds'],
+                                      payload=payload, auth=self.auth)
+
 
 class JenkinsCommand(BackendCommand):
     """Class to run Jenkins backend from the command line."""
@@ -278,7 +307,8 @@ class JenkinsCommand(BackendCommand):
         parser = BackendCommandArgumentParser(cls.BACKEND,
                                               token_auth=True,
                                               archive=True,
-                                              blacklist=True)
+                                              blacklist=True,
+                                              http_cache=True)
 
         # Jenkins options
         group = parser.parser.add_argument_group('Jenkins arguments')
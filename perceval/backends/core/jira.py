@@ -95,9 +95,10 @@ class Jira(Backend):
     :param tag: label used to mark the data
     :param archive: archive to store/retrieve items
     """
-    version = '0.13.0'
+    version = '0.14.0'
 
     CATEGORIES = [CATEGORY_ISSUE]
+    SORTED_FETCH = True
     EXTRA_SEARCH_FIELDS = {
         'project_id': ['fields', 'project', 'id'],
         'project_key': ['fields', 'project', 'key'],
@@ -156,13 +157,12 @@ class Jira(Backend):
         logger.info("Looking for issues at site '%s', in project '%s' and updated from '%s'",
                     self.url, self.project, str(from_date))
 
-        whole_pages = self.client.get_issues(from_date)
+        pages = self.client.stream_issues(from_date)
 
         fields = json.loads(self.client.get_fields())
         custom_fields = filter_custom_fields(fields)
 
-        for whole_page in whole_pages:
-            issues = self.parse_issues(whole_page)
+        for issues in pages:
             for issue in issues:
                 mapping = map_custom_field(custom_fields, issue['fields'])
                 for k, v in mapping.items():
@@ -337,6 +337,39 @@ class JiraClient(HttpClient):
 
         return issues
 
+    def stream_issues(self, from_date):
+        """Retrieve all the issues from a given date, decoding them as they are read.
+
+        Pages of expanded issues can be large, so the issues of each
+        page are decoded one by one instead of loading the whole page.
+        The pages are returned as `JSONArrayStream` objects; each one
+        is read to its end before requesting the next page.
+
+        :param from_date: obtain issues updated since this date
+        """
+        url = urijoin(self.base_url, self.RESOURCE, self.VERSION_API, 'search')
+        start_at = 0
+
+        while True:
+            payload = self.__build_payload(start_at, from_date)
+            page = self.fetch_json_stream(url, path=['issues'], payload=payload)
+
+            yield page
+
+            # Totals might be placed after the issues
+            for _ in page:
+                pass
+
+            data = page.document
+            titems = data['total']
+            nitems = data['maxResults']
+
+            start_at += nitems
+            self.__log_status(start_at, titems, url)
+
+            if data['startAt'] + nitems >= titems:
+                break
+
     def get_comments(self, issue_id):
         """Retrieve all the comments of a given issue.
 
@@ -420,7 +453,9 @@ class JiraCommand(BackendCommand):
         parser = BackendCommandArgumentParser(cls.BACKEND,
                                               from_date=True,
                                               basic_auth=True,
-                                              archive=True)
+                                              archive=True,
+                                              resume=True,
+                                              http_cache=True)
 
         # JIRA options
         group = parser.parser.add_argument_group('JIRA arguments')
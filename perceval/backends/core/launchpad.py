@@ -59,9 +59,10 @@ class Launchpad(Backend):
     :param tag: label used to mark the data
     :param archive: archive to store/retrieve items
     """
-    version = '0.7.0'
+    version = '0.8.0'
 
     CATEGORIES = [CATEGORY_ISSUE]
+    SORTED_FETCH = True
 
     def __init__(self, distribution, package=None,
                  items_per_page=ITEMS_PER_PAGE, sleep_time=SLEEP_TIME,
@@ -436,34 +437,36 @@ class LaunchpadClient(HttpClient):
         return payload
 
     def __fetch_items(self, path, payload):
-        """Return the items from Launchpad API using pagination"""
+        """Return the items from Launchpad API using pagination.
 
+        The next pages are requested while the items of the current
+        one are processed (see `HttpClient.fetch_pages`).
+        """
         page = 0  # current page
-        url_next = path
-        fetch_data = True
-
-        while fetch_data:
-            logger.debug("Fetching page: %i", page)
-
-            try:
-                raw_content = self.__send_request(url_next, payload)
-                content = json.loads(raw_content)
-            except requests.exceptions.HTTPError as e:
-                if e.response.status_code in [410]:
-                    logger.warning("Data is not available - %s", url_next)
-                    raw_content = '{"total_size": 0, "start": 0, "entries": []}'
-                    content = json.loads(raw_content)
-                else:
-                    raise e
-
-            if 'next_collection_link' in content:
-                url_next = content['next_collection_link']
-                payload = None
+        pages = self.fetch_pages(path, self.__next_page, payload=payload)
+
+        try:
+            for response in pages:
+                logger.debug("Fetching page: %i", page)
+                yield response.text
+                page += 1
+        except requests.exceptions.HTTPError as e:
+            if e.response.status_code in [410]:
+                logger.warning("Data is not available - %s", e.response.url)
+                yield '{"total_size": 0, "start": 0, "entries": []}'
             else:
-                fetch_data = False
+                raise e
+
+    @staticmethod
+    def __next_page(response):
+        """Get the link to the next page of a collection"""
+
+        content = response.json()
+
+        if 'next_collection_link' in content:
+            return content['next_collection_link'], None
 
-            yield raw_content
-            page += 1
+        return None
 
 
 class LaunchpadCommand(BackendCommand):
@@ -478,7 +481,8 @@ class LaunchpadCommand(BackendCommand):
         parser = BackendCommandArgumentParser(cls.BACKEND,
                                               from_date=True,
                                               archive=True,
-                                              token_auth=False)
+                                              token_auth=False,
+                                              resume=True)
 
         # Optional arguments
         group = parser.parser.add_argument_group('Launchpad arguments')
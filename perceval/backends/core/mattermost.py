@@ -413,7 +413,8 @@ class MattermostCommand(BackendCommand):
         parser = BackendCommandArgumentParser(cls.BACKEND,
                                               from_date=True,
                                               token_auth=True,
-                                              archive=True)
+                                              archive=True,
+                                              rate_pacing=True)
 
         # Mattermost options
         group = parser.parser.add_argument_group('Mattermost arguments')
@@ -537,7 +537,8 @@ class MediaWikiCommand(BackendCommand):
 
         parser = BackendCommandArgumentParser(cls.BACKEND,
                                               from_date=True,
-                                              archive=True)
+                                              archive=True,
+                                              http_cache=True)
 
         # MediaWiki options
         group = parser.parser.add_argument_group('MediaWiki arguments')
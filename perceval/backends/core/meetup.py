@@ -71,6 +71,7 @@ class Meetup(Backend):
     version = '0.16.0'
 
     CATEGORIES = [CATEGORY_EVENT]
+    SORTED_FETCH = True
     CLASSIFIED_FIELDS = [
         ['group', 'topics'],
         ['event_hosts'],
@@ -282,7 +283,9 @@ class MeetupCommand(BackendCommand):
                                               from_date=True,
                                               to_date=True,
                                               token_auth=True,
-                                              archive=True)
+                                              archive=True,
+                                              resume=True,
+                                              rate_pacing=True)
 
         # Meetup options
         group = parser.parser.add_argument_group('Meetup arguments')
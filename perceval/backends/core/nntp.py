@@ -56,6 +56,7 @@ class NNTP(Backend):
     version = '0.6.0'
 
     CATEGORIES = [CATEGORY_ARTICLE]
+    SORTED_FETCH = True
     EXTRA_SEARCH_FIELDS = {
         'newsgroups': ['Newsgroups']
     }
@@ -369,7 +370,8 @@ class NNTPCommand(BackendCommand):
 
         parser = BackendCommandArgumentParser(cls.BACKEND,
                                               offset=True,
-                                              archive=True)
+                                              archive=True,
+                                              resume=True)
 
         # Required arguments
         parser.parser.add_argument('host',
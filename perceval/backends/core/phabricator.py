@@ -59,6 +59,7 @@ class Phabricator(Backend):
     version = '0.12.0'
 
     CATEGORIES = [CATEGORY_TASK]
+    SORTED_FETCH = True
 
     def __init__(self, url, api_token, tag=None, archive=None,
                  max_retries=MAX_RETRIES, sleep_time=DEFAULT_SLEEP_TIME):
@@ -618,7 +619,8 @@ class PhabricatorCommand(BackendCommand):
         parser = BackendCommandArgumentParser(cls.BACKEND,
                                               from_date=True,
                                               token_auth=True,
-                                              archive=True)
+                                              archive=True,
+                                              resume=True)
 
         # Phabricator options
         group = parser.parser.add_argument_group('Phabricator arguments')
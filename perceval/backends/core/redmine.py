@@ -59,6 +59,7 @@ class Redmine(Backend):
     version = '0.10.0'
 
     CATEGORIES = [CATEGORY_ISSUE]
+    SORTED_FETCH = True
     EXTRA_SEARCH_FIELDS = {
         'project_name': ['project', 'name'],
         'project_id': ['project', 'id']
@@ -297,7 +298,8 @@ class RedmineCommand(BackendCommand):
         parser = BackendCommandArgumentParser(cls.BACKEND,
                                               from_date=True,
                                               token_auth=True,
-                                              archive=True)
+                                              archive=True,
+                                              resume=True)
 
         # Redmine options
         group = parser.parser.add_argument_group('Redmine arguments')
@@ -180,7 +180,8 @@ class RSSCommand(BackendCommand):
         """Returns the RSS argument parser."""
 
         parser = BackendCommandArgumentParser(cls.BACKEND,
-                                              archive=True)
+                                              archive=True,
+                                              http_cache=True)
 
         # Required arguments
         parser.parser.add_argument('url',
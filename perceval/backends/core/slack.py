@@ -57,7 +57,7 @@ class Slack(Backend):
     :param tag: label used to mark the data
     :param archive: archive to store/retrieve items
     """
-    version = '0.8.0'
+    version = '0.9.0'
 
     CATEGORIES = [CATEGORY_MESSAGE]
     EXTRA_SEARCH_FIELDS = {
@@ -129,9 +129,9 @@ class Slack(Backend):
         nmsgs = 0
 
         while fetching:
-            raw_history = self.client.history(self.channel,
-                                              oldest=oldest, latest=latest)
-            messages, fetching = self.parse_history(raw_history)
+            # Messages are decoded while they are downloaded
+            messages = self.client.stream_history(self.channel,
+                                                  oldest=oldest, latest=latest)
 
             for message in messages:
                 # Fetch user data
@@ -148,9 +148,9 @@ class Slack(Backend):
                 yield message
 
                 nmsgs += 1
+                latest = float(message['ts'])
 
-                if fetching:
-                    latest = float(message['ts'])
+            fetching = messages.document['has_more']
 
         logger.info("Fetch process completed: %s message fetched", nmsgs)
 
@@ -355,21 +355,23 @@ class SlackClient(HttpClient):
     def history(self, channel, oldest=None, latest=None):
         """Fetch the history of a channel."""
 
-        resource = self.RCHANNEL_HISTORY
+        params = self.__build_history_params(channel, oldest, latest)
+        response = self._fetch(self.RCHANNEL_HISTORY, params)
 
-        params = {
-            self.PCHANNEL: channel,
-            self.PCOUNT: self.max_items
-        }
+        return response
 
-        if oldest is not None:
-            formatted_oldest = self.__format_timestamp(oldest, subtract=True)
-            params[self.POLDEST] = formatted_oldest
-        if latest is not None:
-            formatted_latest = self.__format_timestamp(latest)
-            params[self.PLATEST] = formatted_latest
+    def stream_history(self, channel, oldest=None, latest=None):
+        """Fetch the history of a channel, decoding the messages as they are read.
 
-        response = self._fetch(resource, params)
+        Instead of loading the whole page of messages, the messages
+        are decoded one by one. Once they are read, the other fields
+        of the page, like `has_more`, are available in the attribute
+        `document` of the returned stream.
+
+        :returns: a `JSONArrayStream` with the messages
+        """
+        params = self.__build_history_params(channel, oldest, latest)
+        response = self._fetch_stream(self.RCHANNEL_HISTORY, params, 'messages')
 
         return response
 
@@ -421,12 +423,49 @@ class SlackClient(HttpClient):
 
         # Check for possible API errors
         result = r.json()
+        self.__check_result(result)
+
+        return r.text
+
+    def _fetch_stream(self, resource, params, key):
+        """Fetch a resource, decoding the elements of one of its lists.
+
+        :param resource: resource to get
+        :param params: dict with the HTTP parameters needed to get
+            the given resource
+        :param key: key of the list to decode
+        """
+        url = self.URL % {'resource': resource}
+        headers = {
+            self.AUTHORIZATION_HEADER: 'Bearer {}'.format(self.api_token)
+        }
+
+        logger.debug("Slack client requests: %s params: %s",
+                     resource, str(params))
+
+        return self.fetch_json_stream(url, path=[key], payload=params, headers=headers,
+                                      validate=self.__check_result)
+
+    def __build_history_params(self, channel, oldest, latest):
+        params = {
+            self.PCHANNEL: channel,
+            self.PCOUNT: self.max_items
+        }
 
+        if oldest is not None:
+            formatted_oldest = self.__format_timestamp(oldest, subtract=True)
+            params[self.POLDEST] = formatted_oldest
+        if latest is not None:
+            formatted_latest = self.__format_timestamp(latest)
+            params[self.PLATEST] = formatted_latest
+
+        return params
+
+    @staticmethod
+    def __check_result(result):
         if not result['ok']:
             raise SlackClientError(error=result['error'])
 
-        return r.text
-
     def __format_timestamp(self, ts, subtract=False):
         """Handle the timestamp value to be passed to the channels.history API endpoint. In
         particular, two cases are covered:
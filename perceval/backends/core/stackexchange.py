@@ -54,7 +54,7 @@ class StackExchange(Backend):
     :param tag: label used to mark the data
     :param archive: archive to store/retrieve items
     """
-    version = '0.11.0'
+    version = '0.12.0'
 
     CATEGORIES = [CATEGORY_QUESTION]
     EXTRA_SEARCH_FIELDS = {
@@ -106,10 +106,9 @@ class StackExchange(Backend):
         logger.info("Looking for questions at site '%s', with tag '%s' and updated from '%s'",
                     self.site, self.tagged, str(from_date))
 
-        whole_pages = self.client.get_questions(from_date)
+        pages = self.client.stream_questions(from_date)
 
-        for whole_page in whole_pages:
-            questions = self.parse_questions(whole_page)
+        for questions in pages:
             for question in questions:
                 yield question
 
@@ -256,6 +255,55 @@ class StackExchangeClient(HttpClient):
                                   nquestions,
                                   tquestions)
 
+    def stream_questions(self, from_date):
+        """Retrieve all the questions from a given date, decoding them as they are read.
+
+        Questions include their answers and comments, so pages can be
+        large. The questions of each page are decoded one by one instead
+        of loading the whole page. The pages are returned as
+        `JSONArrayStream` objects; each one is read to its end before
+        requesting the next page.
+
+        :param from_date: obtain questions updated since this date
+        """
+        page = 1
+        url = urijoin(self.base_url, self.VERSION_API, "questions")
+
+        tquestions = None
+        nquestions = 0
+
+        while True:
+            stream = self.fetch_json_stream(url, path=['items'],
+                                            payload=self.__build_payload(page, from_date))
+
+            yield stream
+
+            # Paging data might be placed after the questions
+            for _ in stream:
+                pass
+
+            data = stream.document
+
+            if tquestions is None:
+                tquestions = data['total']
+            nquestions += data['page_size']
+
+            self.__log_status(data['quota_remaining'],
+                              data['quota_max'],
+                              nquestions,
+                              tquestions)
+
+            if not data['has_more']:
+                break
+
+            page += 1
+
+            backoff = data.get('backoff', None)
+            if backoff:
+                logger.debug("Expensive query. Wait %s secs to send a new request",
+                             backoff)
+                time.sleep(float(backoff))
+
     @staticmethod
     def sanitize_for_archive(url, headers, payload):
         """Sanitize payload of a HTTP request by removing the token information
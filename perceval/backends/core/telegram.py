@@ -64,6 +64,7 @@ class Telegram(Backend):
     version = '0.10.0'
 
     CATEGORIES = [CATEGORY_MESSAGE]
+    SORTED_FETCH = True
     EXTRA_SEARCH_FIELDS = {
         'chat_name': ['message', 'chat', 'title'],
         'chat_id': ['message', 'chat', 'id']
@@ -273,7 +274,8 @@ class TelegramCommand(BackendCommand):
                                               offset=True,
                                               token_auth=True,
                                               archive=True,
-                                              aliases=aliases)
+                                              aliases=aliases,
+                                              resume=True)
 
         # Backend token is required
         action = parser.parser._option_string_actions['--api-token']
@@ -368,7 +368,8 @@ class TwitterCommand(BackendCommand):
 
         parser = BackendCommandArgumentParser(cls.BACKEND,
                                               token_auth=True,
-                                              archive=True)
+                                              archive=True,
+                                              rate_pacing=True)
 
         # Backend token is required
         action = parser.parser._option_string_actions['--api-token']
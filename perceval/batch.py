@@ -0,0 +1,510 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2015-2019 Bitergia
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+#
+
+import collections
+import concurrent.futures
+import json
+import logging
+import os
+import shutil
+import sys
+import tempfile
+import time
+import urllib.parse
+
+try:
+    import yaml
+except ImportError:
+    yaml = None
+
+from .backend import Summary
+from .client import SharedPoolAdapter
+from .errors import BatchError
+
+
+logger = logging.getLogger(__name__)
+
+
+DEFAULT_WORKERS = 4
+DEFAULT_RETRY_DELAY = 30
+
+# Options whose values are credentials; they are hidden in the logs
+CREDENTIAL_OPTIONS = ('-t', '--api-token', '--api-key',
+                      '-u', '--user', '--backend-user',
+                      '-p', '--password', '--backend-password')
+REDACTED = '********'
+
+
+class BatchJob:
+    """Job of a batch.
+
+    A job runs the command of a backend with the given list of
+    arguments, the same ones that would be given to `perceval`
+    on the command line.
+
+    Jobs are grouped by `host` to limit the number of jobs that
+    access the same server at the same time. When it is not set,
+    the host is taken from the first URL found in the arguments or,
+    if there is none, from the name of the backend.
+
+    :param backend: name of the backend
+    :param args: list of arguments of the backend command
+    :param output: path to the output file of the job; `None` to
+        keep the output set in the arguments
+    :param host: name of the host accessed by the job
+    """
+    def __init__(self, backend, args=None, output=None, host=None):
+        self.backend = backend
+        self.args = list(args) if args else []
+        self.output = output
+        self.host = host or self._find_host()
+
+    @property
+    def command_args(self):
+        """List of arguments used to run the backend command"""
+
+        if self.output:
+            return self.args + ['--output', self.output]
+        return self.args
+
+    @property
+    def to_stdout(self):
+        """Whether the items of the job are written to the standard output"""
+
+        if self.output:
+            return False
+
+        for arg in self.args:
+            if arg == '--output' or arg.startswith('--output='):
+                return False
+            if arg.startswith('-o'):
+                return False
+
+        return True
+
+    @property
+    def redacted_args(self):
+        """List of arguments with the credentials hidden.
+
+        Values of the credential options, and users and passwords
+        of URLs, are replaced by a mask so the arguments can be
+        written to the log.
+        """
+        redacted = []
+        in_credential = False
+
+        for arg in self.args:
+            if arg.startswith('-'):
+                option, sep, value = arg.partition('=')
+                in_credential = option in CREDENTIAL_OPTIONS
+
+                if in_credential and sep:
+                    arg = option + sep + REDACTED
+                    in_credential = False
+                elif not in_credential and arg[:2] in CREDENTIAL_OPTIONS:
+                    # Short options with their values attached (i.e, '-tTOKEN')
+                    arg = arg[:2] + REDACTED
+            elif in_credential:
+                # Options like '--api-token' may have several values
+                arg = REDACTED
+            elif '://' in arg:
+                arg = self._redact_url(arg)
+
+            redacted.append(arg)
+
+        return redacted
+
+    @staticmethod
+    def _redact_url(url):
+        parts = urllib.parse.urlsplit(url)
+
+        if '@' not in parts.netloc:
+            return url
+
+        netloc = REDACTED + '@' + parts.netloc.rpartition('@')[2]
+        return urllib.parse.urlunsplit(parts._replace(netloc=netloc))
+
+    def _find_host(self):
+        for arg in self.args:
+            if '://' not in arg:
+                continue
+
+            netloc = urllib.parse.urlparse(arg).netloc
+            if netloc:
+                return netloc.lower()
+
+        return self.backend
+
+
+class BatchJobResult:
+    """Result of a batch job.
+
+    :param job: the job
+    :param attempts: number of times the job was run
+    :param summary: `Summary` of the last run; `None` when the
+        job failed
+    :param error: message of the error raised by the last run;
+        `None` when the job finished successfully
+    :param elapsed: seconds spent running the job, including
+        the time waiting between retries
+    """
+    def __init__(self, job, attempts, summary=None, error=None, elapsed=None):
+        self.job = job
+        self.attempts = attempts
+        self.summary = summary
+        self.error = error
+        self.elapsed = elapsed
+
+    @property
+    def failed(self):
+        return self.error is not None
+
+
+class BatchReport:
+    """Report of a batch execution.
+
+    It includes the results of every job and a summary that
+    aggregates the summaries of those jobs that finished
+    successfully.
+
+    :param results: list of `BatchJobResult` objects
+    """
+    def __init__(self, results):
+        self.results = results
+
+        self.summary = Summary()
+        for result in results:
+            self.summary.merge(result.summary)
+
+    @property
+    def failed(self):
+        return [result for result in self.results if result.failed]
+
+
+class BatchRunner:
+    """Run batches of jobs using a pool of workers.
+
+    Jobs run in a pool of `workers` threads or, when `processes`
+    is set, processes. The pool lives for the whole batch, so the
+    backends are only imported once.
+
+    To avoid overloading a server, no more than `host_limit` jobs
+    of the same host run at the same time. Jobs that fail are run
+    again up to `retries` times, waiting `retry_delay` seconds
+    between runs. Once every job ends, the pools of connections
+    shared by the clients of the jobs are closed.
+
+    Jobs without an output file write their items to a temporary
+    file, which is copied to the standard output when the job ends.
+    This way, the items of jobs running at the same time are not
+    mixed, and those written by failed runs are not repeated.
+
+    :param commands: dict of `BackendCommand` classes by backend name,
+        as returned by `find_backends`
+    :param workers: number of workers of the pool
+    :param host_limit: max number of jobs of the same host running
+        at the same time; `None` for no limit
+    :param retries: number of times a failed job is run again
+    :param retry_delay: seconds to wait before running a failed job
+    :param processes: run the jobs in processes instead of threads
+
+    :raises ValueError: when the number of workers, host limit or
+        retries are not valid
+    """
+    def __init__(self, commands, workers=DEFAULT_WORKERS, host_limit=None,
+                 retries=0, retry_delay=DEFAULT_RETRY_DELAY, processes=False):
+        if workers < 1:
+            raise ValueError("'workers' must be greater than 0; %s given" % workers)
+        if host_limit is not None and host_limit < 1:
+            raise ValueError("'host_limit' must be greater than 0; %s given" % host_limit)
+        if retries < 0:
+            raise ValueError("'retries' must be a positive number; %s given" % retries)
+
+        self.commands = commands
+        self.workers = workers
+        self.host_limit = host_limit
+        self.retries = retries
+        self.retry_delay = retry_delay
+        self.processes = processes
+
+    def run(self, jobs):
+        """Run a list of jobs.
+
+        Jobs are started following the order of the list, as soon as
+        there is a free worker and the limit of their host allows it.
+
+        :param jobs: list of `BatchJob` objects
+
+        :returns: a `BatchReport` with the results of the jobs
+
+        :raises BatchError: when the backend of any job is not found
+        """
+        for job in jobs:
+            if job.backend not in self.commands:
+                raise BatchError(cause="unknown backend %s" % job.backend)
+
+        if self.processes:
+            executor = concurrent.futures.ProcessPoolExecutor(max_workers=self.workers)
+        else:
+            executor = concurrent.futures.ThreadPoolExecutor(max_workers=self.workers)
+
+        outputs = {}
+        tmp_dir = None
+
+        if any(job.to_stdout for job in jobs):
+            tmp_dir = tempfile.mkdtemp(prefix='perceval_batch_')
+            outputs = {n: os.path.join(tmp_dir, '%s_%s.json' % (n, job.backend))
+                       for n, job in enumerate(jobs) if job.to_stdout}
+
+        try:
+            results = self._run_pool(executor, jobs, outputs)
+        finally:
+            if tmp_dir:
+                shutil.rmtree(tmp_dir, ignore_errors=True)
+
+        # Pools of processes are closed with their workers
+        SharedPoolAdapter.close_all()
+
+        return BatchReport(results)
+
+    def _run_pool(self, executor, jobs, outputs):
+        """Run the jobs in the pool until all of them end.
+
+        :returns: the list of results of the jobs
+        """
+        waiting = collections.deque(enumerate(jobs))
+        running = {}
+        active_hosts = collections.Counter()
+        results = [None] * len(jobs)
+
+        with executor:
+            while waiting or running:
+                # Jobs that cannot start keep their order
+                blocked = collections.deque()
+
+                while waiting:
+                    n, job = waiting.popleft()
+
+                    if len(running) >= self.workers or \
+                            (self.host_limit and active_hosts[job.host] >= self.host_limit):
+                        blocked.append((n, job))
+                        continue
+
+                    logger.info("Starting job %s: %s %s", n, job.backend, job.host)
+
+                    future = executor.submit(_run_job, self.commands[job.backend], job,
+                                             self.retries, self.retry_delay,
+                                             output=outputs.get(n, None))
+                    running[future] = n
+                    active_hosts[job.host] += 1
+
+                waiting = blocked
+
+                done, _ = concurrent.futures.wait(running,
+                                                  return_when=concurrent.futures.FIRST_COMPLETED)
+                for future in done:
+                    n = running.pop(future)
+                    result = future.result()
+                    results[n] = result
+                    active_hosts[result.job.host] -= 1
+
+                    if n in outputs:
+                        _copy_to_stdout(outputs[n])
+
+                    if result.failed:
+                        logger.error("Job %s failed after %s attempts: %s",
+                                     n, result.attempts, result.error)
+                    else:
+                        logger.info("Job %s finished; %s items fetched",
+                                    n, result.summary.fetched)
+
+        return results
+
+
+def read_manifest(filepath):
+    """Read the jobs of a batch from a manifest file.
+
+    Manifests are JSON or YAML files, the latter only when `PyYAML`
+    is installed. They define a list of `jobs`; each job sets the
+    name of the `backend` and the list of `args` given to its
+    command. Optionally, a job may also set its `output` file and
+    its `host`. When a manifest sets an `output_dir`, the output
+    of those jobs without one is written to a file named after
+    the position of the job and its backend.
+
+        {
+            "output_dir": "/tmp/perceval",
+            "jobs": [
+                {
+                    "backend": "git",
+                    "args": ["https://github.com/chaoss/grimoirelab-perceval.git"]
+                },
+                {
+                    "backend": "github",
+                    "args": ["chaoss", "grimoirelab-perceval", "-t", "abcd"],
+                    "output": "/tmp/perceval/github.json"
+                }
+            ]
+        }
+
+    :param filepath: path to the manifest
+
+    :returns: a list of `BatchJob` objects
+
+    :raises BatchError: when the manifest cannot be read or
+        it is not valid
+    """
+    is_yaml = filepath.endswith(('.yml', '.yaml'))
+
+    if is_yaml and not yaml:
+        raise BatchError(cause="YAML manifests need the 'PyYAML' package")
+
+    read_errors = (OSError, ValueError, yaml.YAMLError) if yaml else (OSError, ValueError)
+
+    try:
+        with open(filepath, 'r') as fd:
+            manifest = yaml.safe_load(fd) if is_yaml else json.load(fd)
+    except read_errors as e:
+        raise BatchError(cause="manifest %s cannot be read; %s" % (filepath, str(e)))
+
+    if not isinstance(manifest, dict) or not isinstance(manifest.get('jobs', None), list):
+        raise BatchError(cause="invalid manifest %s; list of jobs not found" % filepath)
+
+    output_dir = manifest.get('output_dir', None)
+
+    jobs = []
+    for n, entry in enumerate(manifest['jobs']):
+        if not isinstance(entry, dict) or 'backend' not in entry:
+            raise BatchError(cause="invalid manifest %s; job %s has no backend" % (filepath, n))
+
+        args = entry.get('args', [])
+        if not isinstance(args, list):
+            raise BatchError(cause="invalid manifest %s; args of job %s is not a list" % (filepath, n))
+
+        output = entry.get('output', None)
+        if not output and output_dir:
+            output = os.path.join(output_dir, '%s_%s.json' % (n, entry['backend']))
+
+        job = BatchJob(entry['backend'], [str(arg) for arg in args],
+                       output=output, host=entry.get('host', None))
+        jobs.append(job)
+
+    return jobs
+
+
+def log_report(report):
+    """Write a formatted batch report to the log"""
+
+    template = (
+        "Summary of batch results\n\n"
+        "\t          Jobs: \t{jobs}\n"
+        "\t   Failed jobs: \t{failed}\n"
+        "\n"
+        "\t   Total items: \t{total}\n"
+        "\tItems produced: \t{fetched}\n"
+        "\t Items skipped: \t{skipped}\n"
+        "\n"
+        "\tMin. item date: \t{min_updated_on}\n"
+        "\tMax. item date: \t{max_updated_on}\n"
+    )
+
+    summary = report.summary
+
+    values = {
+        'jobs': len(report.results),
+        'failed': len(report.failed),
+        'total': summary.total,
+        'fetched': summary.fetched,
+        'skipped': summary.skipped,
+        'min_updated_on': summary.min_updated_on or '-',
+        'max_updated_on': summary.max_updated_on or '-'
+    }
+    message = template.format(**values)
+
+    for result in report.failed:
+        message += "\n\tFailed: %s %s (%s attempts): %s" % (result.job.backend,
+                                                            ' '.join(result.job.redacted_args),
+                                                            result.attempts,
+                                                            result.error)
+
+    logger.info(message)
+
+
+def _run_job(command_class, job, retries, retry_delay, output=None):
+    """Run the command of a job; run by the workers of the pool.
+
+    When `output` is given, the items are written to that file
+    instead of the standard output.
+    """
+    start = time.time()
+    attempts = 0
+    error = None
+
+    command_args = job.args + ['--output', output] if output else job.command_args
+    output = output or job.output
+
+    if output:
+        dirpath = os.path.dirname(os.path.abspath(output))
+        os.makedirs(dirpath, exist_ok=True)
+
+    while attempts <= retries:
+        if attempts:
+            logger.warning("Retrying %s job for %s in %s seconds; error: %s",
+                           job.backend, job.host, retry_delay, error)
+            time.sleep(retry_delay)
+
+        attempts += 1
+        cmd = None
+
+        try:
+            cmd = command_class(*command_args)
+            cmd.run()
+        except SystemExit:
+            # Arguments not valid; running the job again won't help
+            error = "invalid arguments"
+            break
+        except Exception as e:
+            error = str(e) or e.__class__.__name__
+            continue
+        finally:
+            if cmd and output:
+                cmd.outfile.close()
+
+        return BatchJobResult(job, attempts, summary=cmd.summary,
+                              elapsed=time.time() - start)
+
+    return BatchJobResult(job, attempts, error=error,
+                          elapsed=time.time() - start)
+
+
+def _copy_to_stdout(filepath):
+    """Copy the output of a job to the standard output"""
+
+    if not os.path.exists(filepath):
+        return
+
+    sys.stdout.flush()
+
+    with open(filepath, 'rb') as fd:
+        stdout = getattr(sys.stdout, 'buffer', None)
+        if stdout:
+            shutil.copyfileobj(fd, stdout)
+        else:
+            sys.stdout.write(fd.read().decode('utf-8'))
+
+    sys.stdout.flush()
@@ -0,0 +1,250 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2015-2019 Bitergia
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+#
+
+import logging
+import os
+import sqlite3
+import threading
+import time
+
+from .archive import Archive, CompactCodec
+from .errors import CacheError
+
+
+logger = logging.getLogger(__name__)
+
+
+DEFAULT_MAX_SIZE = 256 * 1024 * 1024
+
+
+class ResponseCache:
+    """Cache of HTTP responses on disk.
+
+    This class stores, in a SQLite database, the responses that
+    include validators (`ETag` or `Last-Modified` headers), so they
+    can be revalidated with conditional requests by `HttpClient`.
+    When the server answers that the resource did not change, the
+    stored response is used instead of downloading it again.
+
+    The size of the stored bodies is limited to `max_size` bytes.
+    When the limit is exceeded, the least recently used responses
+    are removed. The total size is kept up to date in the database
+    on each change, so it does not have to be computed again. The
+    database can be shared by several threads and processes.
+
+    :param cache_path: path to the database; it will be created
+        when it does not exist
+    :param max_size: max number of bytes of the stored responses
+    :param codec: codec to encode the responses; by default,
+        uncompressed `CompactCodec`
+
+    :raises CacheError: when the database cannot be opened or
+        the max size is not valid
+    """
+    CACHE_TABLE = 'responses'
+
+    CACHE_CREATE_STMT = "CREATE TABLE IF NOT EXISTS " + CACHE_TABLE + " ( " \
+                        "hashcode VARCHAR(256) PRIMARY KEY, " \
+                        "etag TEXT, " \
+                        "last_modified TEXT, " \
+                        "data BLOB, " \
+                        "size INTEGER, " \
+                        "accessed_on REAL)"
+
+    CACHE_INDEX_STMT = "CREATE INDEX IF NOT EXISTS " + CACHE_TABLE + "_accessed_on " \
+                       "ON " + CACHE_TABLE + " (accessed_on)"
+
+    SIZE_TABLE = 'cache_size'
+
+    SIZE_CREATE_STMT = "CREATE TABLE IF NOT EXISTS " + SIZE_TABLE + " ( " \
+                       "id INTEGER PRIMARY KEY CHECK (id = 0), " \
+                       "total INTEGER)"
+
+    # Caches created before the table of the size are measured once
+    SIZE_INIT_STMT = "INSERT OR IGNORE INTO " + SIZE_TABLE + " (id, total) " \
+                     "SELECT 0, COALESCE(SUM(size), 0) FROM " + CACHE_TABLE
+
+    # Seconds to wait while other processes write in the cache
+    LOCK_TIMEOUT = 30
+
+    def __init__(self, cache_path, max_size=DEFAULT_MAX_SIZE, codec=None):
+        if max_size < 1:
+            raise CacheError(cause="max size must be greater than 0; %s given" % max_size)
+
+        self.cache_path = cache_path
+        self.max_size = max_size
+        self.codec = codec or CompactCodec()
+        self._lock = threading.Lock()
+
+        dirpath = os.path.dirname(os.path.abspath(cache_path))
+        if not os.path.exists(dirpath):
+            os.makedirs(dirpath)
+
+        try:
+            self._db = sqlite3.connect(cache_path, timeout=self.LOCK_TIMEOUT,
+                                       check_same_thread=False)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute(self.CACHE_CREATE_STMT)
+            self._db.execute(self.CACHE_INDEX_STMT)
+            self._db.execute(self.SIZE_CREATE_STMT)
+            self._db.execute(self.SIZE_INIT_STMT)
+            self._db.commit()
+        except sqlite3.DatabaseError as e:
+            msg = "invalid cache %s; %s" % (cache_path, str(e))
+            raise CacheError(cause=msg)
+
+    @property
+    def size(self):
+        """Number of bytes of the stored responses"""
+
+        with self._lock:
+            return self._read_size()
+
+    @staticmethod
+    def make_hashcode(uri, payload, headers):
+        """Generate the identifier of a request, as archives do"""
+
+        return Archive.make_hashcode(uri, payload, headers)
+
+    def get(self, hashcode):
+        """Get a stored response.
+
+        Reading a response makes it the most recently used one.
+
+        :param hashcode: identifier of the request
+
+        :returns: a dict with the `response` and its validators,
+            `etag` and `last_modified`; `None` when the request
+            is not cached
+        """
+        select_stmt = "SELECT etag, last_modified, data " \
+                      "FROM " + self.CACHE_TABLE + " " \
+                      "WHERE hashcode = ?"
+        update_stmt = "UPDATE " + self.CACHE_TABLE + " " \
+                      "SET accessed_on = ? WHERE hashcode = ?"
+
+        with self._lock:
+            row = self._execute(select_stmt, (hashcode,)).fetchone()
+
+            if not row:
+                return None
+
+            self._execute(update_stmt, (time.time(), hashcode))
+            self._db.commit()
+
+        etag, last_modified, data = row
+
+        return {
+            'etag': etag,
+            'last_modified': last_modified,
+            'response': self.codec.decode(data)
+        }
+
+    def store(self, hashcode, response):
+        """Store a response.
+
+        Responses without validators are not stored because
+        they cannot be revalidated. Neither are those larger
+        than the max size of the cache.
+
+        :param hashcode: identifier of the request
+        :param response: response to store
+
+        :returns: whether the response was stored or not
+        """
+        etag = response.headers.get('ETag', None)
+        last_modified = response.headers.get('Last-Modified', None)
+
+        if not etag and not last_modified:
+            return False
+
+        data = self.codec.encode(response)
+        size = len(data)
+
+        if size > self.max_size:
+            return False
+
+        insert_stmt = "INSERT OR REPLACE INTO " + self.CACHE_TABLE + " " \
+                      "(hashcode, etag, last_modified, data, size, accessed_on) " \
+                      "VALUES (?, ?, ?, ?, ?, ?)"
+
+        select_stmt = "SELECT size FROM " + self.CACHE_TABLE + " " \
+                      "WHERE hashcode = ?"
+
+        with self._lock:
+            # Other processes cannot write until the size is updated
+            self._execute("BEGIN IMMEDIATE")
+            row = self._execute(select_stmt, (hashcode,)).fetchone()
+            self._execute(insert_stmt, (hashcode, etag, last_modified,
+                                        data, size, time.time()))
+            self._update_size(size - (row[0] if row else 0))
+            self._evict()
+            self._db.commit()
+
+        return True
+
+    def close(self):
+        """Close the cache"""
+
+        with self._lock:
+            self._db.close()
+
+    def _evict(self):
+        """Remove the least recently used responses over the max size"""
+
+        total = self._read_size()
+
+        if total <= self.max_size:
+            return
+
+        select_stmt = "SELECT hashcode, size FROM " + self.CACHE_TABLE + " " \
+                      "ORDER BY accessed_on"
+
+        evicted = []
+        freed = 0
+        cursor = self._execute(select_stmt)
+        for hashcode, size in cursor:
+            if total - freed <= self.max_size:
+                break
+            evicted.append((hashcode,))
+            freed += size
+        cursor.close()
+
+        delete_stmt = "DELETE FROM " + self.CACHE_TABLE + " WHERE hashcode = ?"
+        self._db.executemany(delete_stmt, evicted)
+        self._update_size(-freed)
+
+        logger.debug("%s responses evicted from cache %s", len(evicted), self.cache_path)
+
+    def _read_size(self):
+        select_stmt = "SELECT total FROM " + self.SIZE_TABLE + " WHERE id = 0"
+
+        return self._execute(select_stmt).fetchone()[0]
+
+    def _update_size(self, delta):
+        update_stmt = "UPDATE " + self.SIZE_TABLE + " SET total = total + ? WHERE id = 0"
+
+        self._execute(update_stmt, (delta,))
+
+    def _execute(self, stmt, params=()):
+        try:
+            return self._db.execute(stmt, params)
+        except sqlite3.DatabaseError as e:
+            self._db.rollback()
+            msg = "cache %s error; cause: %s" % (self.cache_path, str(e))
+            raise CacheError(cause=msg)
@@ -0,0 +1,203 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2015-2019 Bitergia
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+#
+
+import contextlib
+import json
+import logging
+import os
+import tempfile
+import threading
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+from grimoirelab_toolkit.datetime import (datetime_utcnow,
+                                          str_to_datetime)
+
+from .errors import CheckpointError
+
+
+logger = logging.getLogger(__name__)
+
+
+class CheckpointStore:
+    """Store the progress of fetch executions.
+
+    This class keeps, in a JSON state file, the point reached by the
+    latest fetch of each backend, origin and category. The checkpoint
+    of a fetch is taken from its `Summary`: the newest update date and
+    the highest offset, when the backend uses offsets. These values can
+    be used later to resume a fetch that did not finish, as long as the
+    backend fetches its items sorted by any of them.
+
+    The file is read and replaced every time a checkpoint is saved,
+    so the entries written by other fetches are kept. Stores update
+    the file one at a time, even those running in different threads
+    or processes; the latter lock a file next to the state file
+    (`<filepath>.lock`), on systems that support `fcntl`.
+
+    :param filepath: path to the state file; it will be created
+        when it does not exist
+
+    :raises CheckpointError: when the state file cannot be read
+    """
+    _lock = threading.Lock()
+
+    LOCK_EXT = '.lock'
+
+    def __init__(self, filepath):
+        self.filepath = filepath
+
+        # Check the file is valid before fetching anything
+        self._load()
+
+    def load(self, backend_name, origin, category):
+        """Load the checkpoint of a fetch.
+
+        The returned dict includes the keys `from_date` and `offset`,
+        with the values from where the fetch can be resumed, plus the
+        `last_uuid`, number of items `fetched` and the date when the
+        checkpoint was `saved`.
+
+        :param backend_name: name of the backend
+        :param origin: origin of the items
+        :param category: category of the items
+
+        :returns: a dict with the checkpoint or `None` when it
+            does not exist
+        """
+        key = self._key(backend_name, origin, category)
+        entry = self._load().get(key, None)
+
+        if not entry:
+            return None
+
+        checkpoint = dict(entry)
+        for field in ('from_date', 'saved'):
+            if checkpoint[field]:
+                checkpoint[field] = str_to_datetime(checkpoint[field])
+
+        return checkpoint
+
+    def save(self, backend_name, origin, category, summary):
+        """Save the checkpoint of a fetch using its summary.
+
+        :param backend_name: name of the backend
+        :param origin: origin of the items
+        :param category: category of the items
+        :param summary: `Summary` object of the fetch
+        """
+        max_updated_on = summary.max_updated_on
+
+        entry = {
+            'backend_name': backend_name,
+            'origin': origin,
+            'category': category,
+            'from_date': max_updated_on.isoformat() if max_updated_on else None,
+            'offset': summary.max_offset,
+            'last_uuid': summary.last_uuid,
+            'fetched': summary.fetched,
+            'saved': datetime_utcnow().isoformat()
+        }
+
+        with self._locked():
+            entries = self._load()
+            entries[self._key(backend_name, origin, category)] = entry
+            self._dump(entries)
+
+        logger.debug("Checkpoint of %s (%s) saved; last item %s",
+                     origin, category, summary.last_uuid)
+
+    def remove(self, backend_name, origin, category):
+        """Remove the checkpoint of a fetch.
+
+        :param backend_name: name of the backend
+        :param origin: origin of the items
+        :param category: category of the items
+        """
+        with self._locked():
+            entries = self._load()
+
+            if entries.pop(self._key(backend_name, origin, category), None):
+                self._dump(entries)
+
+    @contextlib.contextmanager
+    def _locked(self):
+        """Update the state file without other threads or processes"""
+
+        with self._lock:
+            if not fcntl:
+                yield
+                return
+
+            dirpath = os.path.dirname(os.path.abspath(self.filepath))
+
+            try:
+                os.makedirs(dirpath, exist_ok=True)
+                fd = open(self.filepath + self.LOCK_EXT, 'a')
+            except OSError as e:
+                msg = "checkpoint file %s cannot be locked; %s" % (self.filepath, str(e))
+                raise CheckpointError(cause=msg)
+
+            try:
+                fcntl.flock(fd, fcntl.LOCK_EX)
+                yield
+            finally:
+                fd.close()
+
+    @staticmethod
+    def _key(backend_name, origin, category):
+        return ' '.join([backend_name, origin, category])
+
+    def _load(self):
+        if not os.path.exists(self.filepath):
+            return {}
+
+        try:
+            with open(self.filepath, 'r') as fd:
+                entries = json.load(fd)
+        except (OSError, ValueError) as e:
+            msg = "invalid checkpoint file %s; %s" % (self.filepath, str(e))
+            raise CheckpointError(cause=msg)
+
+        if not isinstance(entries, dict):
+            msg = "invalid checkpoint file %s; unexpected format" % self.filepath
+            raise CheckpointError(cause=msg)
+
+        return entries
+
+    def _dump(self, entries):
+        dirpath = os.path.dirname(os.path.abspath(self.filepath))
+
+        if not os.path.exists(dirpath):
+            os.makedirs(dirpath)
+
+        # Replace the file atomically, so it is never left half-written
+        fd, tmp_path = tempfile.mkstemp(dir=dirpath, suffix='.tmp')
+
+        try:
+            with os.fdopen(fd, 'w') as f:
+                json.dump(entries, f, indent=4, sort_keys=True)
+            os.replace(tmp_path, self.filepath)
+        except OSError as e:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            msg = "checkpoint file %s cannot be written; %s" % (self.filepath, str(e))
+            raise CheckpointError(cause=msg)
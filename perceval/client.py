@@ -19,15 +19,30 @@
 #     Valerio Cosentino <valcos@bitergia.com>
 #
 
+import asyncio
+import concurrent.futures
+import functools
+import io
 import logging
+import os
+import queue
+import ssl
+import threading
 import time
 
 import requests
+import urllib3
 import urllib3.util
 
-from .errors import RateLimitError
+from .errors import HttpClientError, RateLimitError
+from .jsonstream import JSONArrayStream
 from ._version import __version__
 
+try:
+    import httpx
+except ImportError:
+    httpx = None
+
 logger = logging.getLogger(__name__)
 
 
@@ -42,6 +57,51 @@ class HttpClient:
     Sub-classes can use the methods fetch to obtain data
     from the data source.
 
+    Requests can also be sent concurrently. The coroutine `afetch`
+    is the asynchronous version of `fetch`: it sends the request
+    from a pool of `max_concurrent_requests` threads, which share
+    the HTTP session and its retry policy, while the event loop
+    checks the response, stores it in the archive and, for clients
+    handling rate limits, keeps the rate limit updated. The method
+    `fetch_many` runs a set of these coroutines, so any backend can
+    fan out requests to several resources at the same time.
+    Clients that override `fetch` to add extra steps should
+    override `afetch` too.
+
+    Paginated resources can be read with `fetch_pages`, which
+    requests the next `prefetch_depth` pages in the background
+    while the current one is being consumed; set it to 0 to
+    request the pages one after the other. Clients that override
+    `fetch` should override `_send_prefetch_request` too.
+
+    GET requests can be revalidated using a `ResponseCache`, set
+    with the parameter or the attribute `cache`. Responses with an
+    `ETag` or `Last-Modified` header are stored in it. Later requests
+    of the same resources send these validators, so when the server
+    answers `304 Not Modified`, the stored response is returned as if
+    it was downloaded again. The attributes `cache_hits`, `cache_misses`
+    and `cache_bytes_saved` count the requests served from the cache,
+    those downloaded and the size of the bodies not downloaded.
+
+    Connections are kept alive in pools shared by every client with
+    the same pool settings, so clients targeting the same host reuse
+    the connections opened by the others. `pool_connections` sets the
+    number of hosts whose connections are kept and `pool_maxsize` the
+    number of connections kept for each host. By default, the pool
+    keeps a connection for each concurrent request. Requests can also
+    be sent using HTTP/2 setting `http2`; this requires the `httpx`
+    package.
+
+    Requests can be traced with a `FetchMetrics` object, set with
+    the parameter or the attribute `metrics`. For each request, it
+    records the latency, the retries, the bytes received and whether
+    it failed. The time spent storing responses in the archive is
+    recorded too.
+
+    Large JSON documents can be fetched with `fetch_json_stream`,
+    which decodes the elements of one of their arrays while the body
+    is downloaded, instead of loading the whole document in memory.
+
     To track which version of the client was used during
     the fetching process, this class provides a `version`
     attribute that each client may override.
@@ -51,8 +111,21 @@ class HttpClient:
         before raising a RetryError exception
     :param sleep_time: time (in seconds) to sleep in case
         of connection problems
+    :param cache: `ResponseCache` to revalidate GET requests;
+        it is not used with archived data
+    :param pool_connections: number of hosts whose connections are
+        kept alive
+    :param pool_maxsize: max number of connections kept alive for
+        each host
+    :param http2: send the requests using HTTP/2
+    :param metrics: `FetchMetrics` where requests are recorded
+    :param prefetch_depth: number of pages requested in advance
+        by `fetch_pages`
+
+    :raises HttpClientError: when `http2` is set but the `httpx`
+        package is not installed
     """
-    version = '0.2.0'
+    version = '0.6.0'
 
     DEFAULT_SLEEP_TIME = 1
 
@@ -72,12 +145,25 @@ class HttpClient:
 
     DEFAULT_HEADERS = {'User-Agent': 'Perceval/' + __version__}
 
+    MAX_CONCURRENT_REQUESTS = 10
+
+    PREFETCH_DEPTH = 1
+
+    DEFAULT_POOL_CONNECTIONS = requests.adapters.DEFAULT_POOLSIZE
+
+    STREAM_CHUNK_SIZE = 64 * 1024
+
+    # Headers of the cached body that are not updated on revalidation
+    CACHE_BODY_HEADERS = ['content-length', 'content-encoding', 'transfer-encoding']
+
     GET = "GET"
     POST = "POST"
 
     def __init__(self, base_url, max_retries=MAX_RETRIES, sleep_time=DEFAULT_SLEEP_TIME,
                  extra_headers=None, extra_status_forcelist=None, extra_retry_after_status=None,
-                 archive=None, from_archive=False):
+                 archive=None, from_archive=False, cache=None,
+                 pool_connections=DEFAULT_POOL_CONNECTIONS, pool_maxsize=None, http2=False,
+                 metrics=None, prefetch_depth=PREFETCH_DEPTH):
 
         self.base_url = base_url
 
@@ -104,14 +190,36 @@ class HttpClient:
         self.raise_on_status = self.DEFAULT_RAISE_ON_STATUS
         self.respect_retry_after_header = self.DEFAULT_RESPECT_RETRY_AFTER_HEADER
         self.sleep_time = sleep_time
+        self.max_concurrent_requests = self.MAX_CONCURRENT_REQUESTS
+        self.prefetch_depth = prefetch_depth
+
+        # Keep a connection for each concurrent request
+        if pool_maxsize is None:
+            pool_maxsize = max(requests.adapters.DEFAULT_POOLSIZE, self.max_concurrent_requests)
+
+        self.pool_connections = pool_connections
+        self.pool_maxsize = pool_maxsize
+        self.http2 = http2
 
         self.archive = archive
         self.from_archive = from_archive
 
+        self.cache = cache
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.cache_bytes_saved = 0
+        self._cache_lock = threading.Lock()
+
+        self.metrics = metrics
+
+        self._executor = None
+        self._loop = None
+
         self._create_http_session()
 
     def __del__(self):
         self._close_http_session()
+        self._close_async_engine()
 
     def fetch(self, url, payload=None, headers=None, method=GET, stream=False, verify=True, auth=None):
         """Fetch the data from a given URL.
@@ -133,6 +241,223 @@ class HttpClient:
 
         return response
 
+    async def afetch(self, url, payload=None, headers=None, method=GET, stream=False, verify=True, auth=None):
+        """Fetch the data from a given URL; coroutine version of `fetch`.
+
+        The request is sent from a pool of threads, so other
+        requests can be sent meanwhile. Retries, rate limit
+        handling and archiving work as in `fetch`.
+
+        :param url: link to the resource
+        :param payload: payload of the request
+        :param headers: headers of the request
+        :param method: type of request call (GET or POST)
+        :param stream: defer downloading the response body until the response content is available
+        :param verify: verifying the SSL certificate
+        :param auth: auth of the request
+
+        :returns a response object
+        """
+        if self.from_archive:
+            return self._fetch_from_archive(url, payload, headers)
+
+        rate_limited = isinstance(self, RateLimitHandler)
+
+        if rate_limited:
+            await self.asleep_for_rate_limit()
+
+        loop = asyncio.get_event_loop()
+        request = functools.partial(self._send_cached_request, url, payload, headers,
+                                    method, stream, verify, auth)
+        response = await loop.run_in_executor(self._get_executor(), request)
+
+        response = self._process_response(response, url, payload, headers)
+
+        if rate_limited:
+            self.update_rate_limit(response)
+
+        return response
+
+    def fetch_many(self, urls, payload=None, headers=None, method=GET, stream=False, verify=True, auth=None):
+        """Fetch the data from a list of URLs concurrently.
+
+        The method waits until all the requests are completed. When
+        any of them fails, the first exception, following the order
+        of `urls`, is raised. The rest of arguments are the same for
+        every request.
+
+        This method cannot be called from a running event loop; use
+        `afetch` instead.
+
+        :param urls: list of links to the resources
+        :param payload: payload of the requests
+        :param headers: headers of the requests
+        :param method: type of request call (GET or POST)
+        :param stream: defer downloading the response body until the response content is available
+        :param verify: verifying the SSL certificate
+        :param auth: auth of the requests
+
+        :returns: a list of response objects, in the same order of `urls`
+        """
+        if not urls:
+            return []
+
+        async def fetch_all():
+            # Wait for every request, so all of them are archived
+            coros = [self.afetch(url, payload=payload, headers=headers, method=method,
+                                 stream=stream, verify=verify, auth=auth)
+                     for url in urls]
+            return await asyncio.gather(*coros, return_exceptions=True)
+
+        if not self._loop:
+            self._loop = asyncio.new_event_loop()
+
+        responses = self._loop.run_until_complete(fetch_all())
+
+        for response in responses:
+            if isinstance(response, Exception):
+                raise response
+
+        return responses
+
+    def fetch_pages(self, url, next_page, payload=None, headers=None, depth=None):
+        """Fetch the pages of a paginated resource, requesting the next ones in advance.
+
+        While a page is being consumed, the requests of the next `depth`
+        pages are sent from a background thread, so the time spent
+        processing the items of a page overlaps with the download of
+        the following ones. The next page is obtained calling `next_page`
+        with the response of the previous one; it returns a tuple with
+        the URL and the payload of the next page or `None` when there
+        are no more pages.
+
+        Responses are checked and archived when they are returned,
+        not when they are received, so they are stored in the same
+        order as if the pages were fetched one after the other and
+        the archive can be replayed. The first page is fetched before
+        starting the background thread, which is only created when
+        there are more pages. Pages are fetched in sequence when they
+        are read from an archive or `depth` is 0. Once the generator
+        is closed, no more pages are requested.
+
+        :param url: link to the first page
+        :param next_page: function that returns the URL and payload
+            of the next page given a response
+        :param payload: payload of the first page
+        :param headers: headers of the requests
+        :param depth: number of pages requested in advance; by
+            default, `prefetch_depth`
+
+        :returns: a generator of response objects
+        """
+        depth = self.prefetch_depth if depth is None else depth
+
+        if self.from_archive or depth < 1:
+            while url:
+                response = self.fetch(url, payload=payload, headers=headers)
+                yield response
+                url, payload = next_page(response) or (None, None)
+            return
+
+        response = self.fetch(url, payload=payload, headers=headers)
+
+        try:
+            url, payload = next_page(response) or (None, None)
+        except Exception:
+            yield response
+            raise
+
+        # Single page resources do not need the background thread
+        if not url:
+            yield response
+            return
+
+        pages = queue.Queue()
+        slots = threading.Semaphore(depth)
+        stop = threading.Event()
+
+        prefetcher = threading.Thread(target=self._prefetch_pages,
+                                      args=(url, payload, headers, next_page, pages, slots, stop),
+                                      daemon=True)
+        prefetcher.start()
+
+        try:
+            yield response
+
+            while True:
+                page = pages.get()
+
+                if page is None:
+                    break
+
+                url, payload, response, error = page
+
+                if error:
+                    raise error
+
+                # Request one more page while this one is consumed
+                slots.release()
+
+                yield self._process_response(response, url, payload, headers)
+        finally:
+            stop.set()
+            slots.release()
+
+    def fetch_json_stream(self, url, path=None, payload=None, headers=None, method=GET,
+                          verify=True, auth=None, validate=None):
+        """Fetch a JSON document, decoding the elements of one of its arrays as they are read.
+
+        The body of the response is streamed and the elements of the
+        array found following `path` are decoded one by one (see
+        `JSONArrayStream`). When the response is archived, the body
+        is stored once it is completely read, either because every
+        element was iterated or because the stream was closed, so it
+        can be replayed with `fetch` or with this method. The same is
+        done with the cache: the request is revalidated, as in `fetch`,
+        and the body is stored in the cache once it is read. When the
+        server answers that it did not change, the elements are decoded
+        from the cached body. Consume or close the returned stream before
+        sending the same request again.
+
+        Clients handling rate limits wait and update the rate limit
+        as they do in `afetch`.
+
+        :param url: link to the resource
+        :param path: list of keys leading to the array
+        :param payload: payload of the request
+        :param headers: headers of the request
+        :param method: type of request call (GET or POST)
+        :param verify: verifying the SSL certificate
+        :param auth: auth of the request
+        :param validate: function to check the document once it is read
+
+        :returns: a `JSONArrayStream` object
+        """
+        if self.from_archive:
+            response = self._fetch_from_archive(url, payload, headers)
+            return JSONArrayStream(response.iter_content(self.STREAM_CHUNK_SIZE), path,
+                                   encoding=response.encoding or 'utf-8', validate=validate)
+
+        rate_limited = isinstance(self, RateLimitHandler)
+
+        if rate_limited:
+            self.sleep_for_rate_limit()
+
+        response, hashcode = self._revalidate_request(url, payload, headers, method,
+                                                      True, verify, auth)
+
+        if rate_limited:
+            self.update_rate_limit(response)
+
+        if response.ok and (self.archive or hashcode):
+            chunks = self._iter_stored_content(response, url, payload, headers, hashcode)
+        else:
+            response = self._process_response(response, url, payload, headers)
+            chunks = response.iter_content(self.STREAM_CHUNK_SIZE)
+
+        return JSONArrayStream(chunks, path, encoding=response.encoding or 'utf-8',
+                               validate=validate)
+
     @staticmethod
     def sanitize_for_archive(url, headers, payload):
         """Sanitize the URL, headers and payload of a HTTP request before storing/retrieving items.
@@ -159,24 +484,212 @@ class HttpClient:
 
     def _fetch_from_remote(self, url, payload, headers, method, stream, verify, auth):
 
-        if method == self.GET:
-            response = self.session.get(url, params=payload, headers=headers, stream=stream, verify=verify, auth=auth)
+        response = self._send_cached_request(url, payload, headers, method, stream, verify, auth)
+
+        return self._process_response(response, url, payload, headers)
+
+    def _send_cached_request(self, url, payload, headers, method, stream, verify, auth):
+        """Send a request revalidating the response stored in the cache.
+
+        Streamed requests are not revalidated because the caller
+        may read the raw body, which cached responses do not have.
+        """
+        if stream:
+            return self._send_request(url, payload, headers, method, stream, verify, auth)
+
+        response, hashcode = self._revalidate_request(url, payload, headers, method,
+                                                      stream, verify, auth)
+        if hashcode:
+            self.cache.store(hashcode, response)
+
+        return response
+
+    def _revalidate_request(self, url, payload, headers, method, stream, verify, auth):
+        """Send a request with the validators of the response stored in the cache.
+
+        :returns: a tuple with the response and the identifier in the
+            cache where it has to be stored; this one is `None` when
+            the response was taken from the cache or it cannot be stored
+        """
+        cacheable = self.cache and method == self.GET and \
+            not (headers and ('If-None-Match' in headers or 'If-Modified-Since' in headers))
+
+        if not cacheable:
+            return self._send_request(url, payload, headers, method, stream, verify, auth), None
+
+        hashcode = self.cache.make_hashcode(url, payload, headers)
+        entry = self.cache.get(hashcode)
+
+        request_headers = dict(headers) if headers else {}
+        if entry and entry['etag']:
+            request_headers['If-None-Match'] = entry['etag']
+        if entry and entry['last_modified']:
+            request_headers['If-Modified-Since'] = entry['last_modified']
+
+        response = self._send_request(url, payload, request_headers or None,
+                                      method, stream, verify, auth)
+
+        if response.status_code == 304 and entry:
+            cached = entry['response']
+
+            # Headers of the new response, like rate limits, are kept
+            for name, value in response.headers.items():
+                if name.lower() not in self.CACHE_BODY_HEADERS:
+                    cached.headers[name] = value
+
+            response.close()
+
+            with self._cache_lock:
+                self.cache_hits += 1
+                self.cache_bytes_saved += len(cached.content)
+
+            logger.debug("Response of %s not modified; taken from cache", url)
+            return cached, None
+
+        with self._cache_lock:
+            self.cache_misses += 1
+
+        return response, hashcode if response.status_code == 200 else None
+
+    def _send_request(self, url, payload, headers, method, stream, verify, auth):
+
+        start = time.perf_counter()
+
+        try:
+            if method == self.GET:
+                response = self.session.get(url, params=payload, headers=headers, stream=stream, verify=verify, auth=auth)
+            else:
+                response = self.session.post(url, data=payload, headers=headers, stream=stream, verify=verify, auth=auth)
+        except Exception:
+            if self.metrics:
+                self.metrics.record_request(method, url, time.perf_counter() - start)
+            raise
+
+        if self.metrics:
+            self._record_request(response, url, method, stream, time.perf_counter() - start)
+
+        return response
+
+    def _record_request(self, response, url, method, stream, elapsed):
+        """Record the metrics of a request"""
+
+        # Streamed bodies are not read yet; trust their headers
+        if stream:
+            nbytes = int(response.headers.get('Content-Length', 0) or 0)
         else:
-            response = self.session.post(url, data=payload, headers=headers, stream=stream, verify=verify, auth=auth)
+            nbytes = len(response.content)
+
+        retries = getattr(response.raw, 'retries', None)
+        nretries = len(retries.history) if retries else 0
+
+        self.metrics.record_request(method, url, elapsed,
+                                    status=response.status_code,
+                                    nbytes=nbytes, retries=nretries)
+
+    def _process_response(self, response, url, payload, headers):
 
         try:
             response.raise_for_status()
         except Exception as e:
             if self.archive:
                 url, headers, payload = self.sanitize_for_archive(url, headers, payload)
-                self.archive.store(url, payload, headers, e)
+                self._store_in_archive(url, payload, headers, e)
             raise e
 
         if self.archive:
             url, headers, payload = self.sanitize_for_archive(url, headers, payload)
-            self.archive.store(url, payload, headers, response)
+            self._store_in_archive(url, payload, headers, response)
+        return response
+
+    def _prefetch_pages(self, url, payload, headers, next_page, pages, slots, stop):
+        """Send the requests of the pages, waiting for a free slot before each one"""
+
+        while url:
+            slots.acquire()
+
+            if stop.is_set():
+                return
+
+            try:
+                response = self._send_prefetch_request(url, payload, headers)
+            except Exception as e:
+                pages.put((url, payload, None, e))
+                return
+
+            pages.put((url, payload, response, None))
+
+            # Errors are raised when the response is processed
+            if not response.ok:
+                return
+
+            try:
+                url, payload = next_page(response) or (None, None)
+            except Exception as e:
+                pages.put((url, payload, None, e))
+                return
+
+        pages.put(None)
+
+    def _send_prefetch_request(self, url, payload, headers):
+        """Send the request of a page fetched in advance.
+
+        The response is neither checked nor archived; this is done
+        when the page is consumed. Clients handling rate limits wait
+        and update the rate limit as they do in `afetch`.
+        """
+        rate_limited = isinstance(self, RateLimitHandler)
+
+        if rate_limited:
+            self.sleep_for_rate_limit()
+
+        response = self._send_cached_request(url, payload, headers, self.GET, False, True, None)
+
+        if rate_limited:
+            self.update_rate_limit(response)
+
         return response
 
+    def _store_in_archive(self, url, payload, headers, data):
+
+        start = time.perf_counter()
+        self.archive.store(url, payload, headers, data)
+
+        if self.metrics:
+            self.metrics.record_stage('archive', time.perf_counter() - start)
+
+    def _iter_stored_content(self, response, url, payload, headers, hashcode=None):
+        """Iterate the body of a streamed response, storing it once it is read.
+
+        The body is stored in the archive and, when `hashcode`
+        is given, in the cache with that identifier.
+        """
+
+        parts = []
+        chunks = response.iter_content(self.STREAM_CHUNK_SIZE)
+
+        try:
+            for chunk in chunks:
+                parts.append(chunk)
+                yield chunk
+        except GeneratorExit:
+            # Streams closed early are archived too
+            parts.extend(chunks)
+            self._store_streamed_response(response, parts, url, payload, headers, hashcode)
+            raise
+
+        self._store_streamed_response(response, parts, url, payload, headers, hashcode)
+
+    def _store_streamed_response(self, response, parts, url, payload, headers, hashcode):
+
+        response._content = b''.join(parts)
+        response._content_consumed = True
+        parts.clear()
+
+        if hashcode:
+            self.cache.store(hashcode, response)
+        if self.archive:
+            self._process_response(response, url, payload, headers)
+
     def _create_http_session(self):
         """Create a http session and initialize the retry object."""
 
@@ -197,25 +710,408 @@ class HttpClient:
                                      raise_on_status=self.raise_on_status,
                                      respect_retry_after_header=self.respect_retry_after_header)
 
-        self.session.mount('http://', requests.adapters.HTTPAdapter(max_retries=retries))
-        self.session.mount('https://', requests.adapters.HTTPAdapter(max_retries=retries))
+        adapter_class = HTTP2Adapter if self.http2 else SharedPoolAdapter
+        adapter = adapter_class(max_retries=retries,
+                                pool_connections=self.pool_connections,
+                                pool_maxsize=self.pool_maxsize)
+
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
 
     def _close_http_session(self):
         """Close the http session."""
 
         if self.session:
             self.session.keep_alive = False
+            self.session.close()
+
+    def _get_executor(self):
+        """Get the pool of threads that send concurrent requests."""
+
+        if not self._executor:
+            self._executor = concurrent.futures.ThreadPoolExecutor(max_workers=self.max_concurrent_requests)
+
+        return self._executor
+
+    def _close_async_engine(self):
+        """Shut down the pool of threads and the event loop."""
+
+        executor = getattr(self, '_executor', None)
+        if executor:
+            executor.shutdown(wait=False)
+            self._executor = None
+
+        loop = getattr(self, '_loop', None)
+        if loop:
+            loop.close()
+            self._loop = None
+
+
+class SharedPoolAdapter(requests.adapters.HTTPAdapter):
+    """HTTP adapter that shares its pools of connections.
+
+    Adapters created with the same pool settings use the same
+    `PoolManager`, so connections opened by a client to a host
+    are reused by other clients targeting that host instead of
+    opening new ones and repeating their TLS handshakes. Retries
+    are still set by each adapter.
+
+    Shared pools are closed when the last adapter using them is
+    closed. Processes that end a set of fetches, like a batch,
+    can close all of them calling `close_all`.
+    """
+    # Pool managers and number of adapters using them, by settings
+    _pool_managers = {}
+    _pool_managers_lock = threading.Lock()
+
+    def init_poolmanager(self, connections, maxsize, block=requests.adapters.DEFAULT_POOLBLOCK, **pool_kwargs):
+        self._pool_connections = connections
+        self._pool_maxsize = maxsize
+        self._pool_block = block
+
+        key = (connections, maxsize, block, tuple(sorted(pool_kwargs.items())))
+
+        with self._pool_managers_lock:
+            self._release_poolmanager()
+
+            if key not in self._pool_managers:
+                manager = urllib3.PoolManager(num_pools=connections, maxsize=maxsize,
+                                              block=block, **pool_kwargs)
+                self._pool_managers[key] = [manager, 0]
+
+            self._pool_managers[key][1] += 1
+            self._pool_key = key
+            self.poolmanager = self._pool_managers[key][0]
+
+    def close(self):
+        """Close the proxies and the pools no other adapter uses"""
+
+        with self._pool_managers_lock:
+            self._release_poolmanager()
+
+        for proxy in self.proxy_manager.values():
+            proxy.clear()
+
+    @classmethod
+    def close_all(cls):
+        """Close every shared pool of connections"""
+
+        with cls._pool_managers_lock:
+            for manager, _ in cls._pool_managers.values():
+                manager.clear()
+            cls._pool_managers.clear()
+
+    def _release_poolmanager(self):
+        """Stop using the shared pool manager; closed by the last adapter"""
+
+        key = getattr(self, '_pool_key', None)
+        self._pool_key = None
+
+        if key not in self._pool_managers:
+            return
+
+        entry = self._pool_managers[key]
+        entry[1] -= 1
+
+        if entry[1] == 0:
+            entry[0].clear()
+            del self._pool_managers[key]
+
+
+class HTTP2Adapter(requests.adapters.HTTPAdapter):
+    """HTTP adapter that sends the requests using HTTP/2.
+
+    Requests are sent with `httpx`, which multiplexes the requests
+    to the same host over a single connection. Servers that do not
+    support HTTP/2 are accessed using HTTP/1.1. As in the rest of
+    adapters, the `Retry` object set in `max_retries` decides which
+    requests are retried and how long to wait between them.
+
+    Adapters created with the same pool settings share the `httpx`
+    clients, and thus their connections. Requests are sent through
+    the proxy that `requests` selects for their URL. When the request
+    is streamed, the body is read as it is received; otherwise, it is
+    read before returning the response.
+
+    :raises HttpClientError: when `httpx` package is not installed
+    """
+    _clients = {}
+    _clients_lock = threading.Lock()
+
+    def __init__(self, *args, **kwargs):
+        if not httpx:
+            raise HttpClientError(cause="HTTP/2 not supported; httpx package not found")
+
+        super().__init__(*args, **kwargs)
+
+    def init_poolmanager(self, connections, maxsize, block=requests.adapters.DEFAULT_POOLBLOCK, **pool_kwargs):
+        self._pool_connections = connections
+        self._pool_maxsize = maxsize
+        self._pool_block = block
+        self.poolmanager = None
+
+    def send(self, request, stream=False, timeout=None, verify=True, cert=None, proxies=None):
+        """Send a request using HTTP/2.
+
+        The parameters and the returned value are the same of
+        `requests.adapters.HTTPAdapter.send`.
+        """
+        proxy = requests.utils.select_proxy(request.url, proxies)
+        client = self._get_client(verify, cert, proxy)
+        retries = self.max_retries
+
+        if isinstance(timeout, tuple):
+            connect, read = timeout
+            timeout = httpx.Timeout(read, connect=connect)
+        else:
+            timeout = httpx.Timeout(timeout)
+
+        while True:
+            h_request = client.build_request(request.method, request.url,
+                                             headers=request.headers,
+                                             content=request.body,
+                                             timeout=timeout)
+            try:
+                h_response = client.send(h_request, stream=True)
+                if stream:
+                    body = _HTTPXRawStream(h_response)
+                else:
+                    try:
+                        body = io.BytesIO(b''.join(h_response.iter_raw()))
+                    finally:
+                        h_response.close()
+            except httpx.TransportError as e:
+                try:
+                    retries = retries.increment(request.method, request.url, error=e)
+                except urllib3.exceptions.MaxRetryError as exc:
+                    if isinstance(e, httpx.TimeoutException):
+                        raise requests.exceptions.Timeout(exc, request=request)
+                    raise requests.exceptions.ConnectionError(exc, request=request)
+                retries.sleep()
+                continue
+
+            version = 20 if h_response.http_version == 'HTTP/2' else 11
+            response = urllib3.response.HTTPResponse(body=body,
+                                                     headers=list(h_response.headers.multi_items()),
+                                                     status=h_response.status_code,
+                                                     version=version,
+                                                     reason=h_response.reason_phrase,
+                                                     preload_content=False,
+                                                     decode_content=False,
+                                                     request_method=request.method,
+                                                     retries=retries)
+
+            has_retry_after = 'Retry-After' in response.headers
+            if not retries.is_retry(request.method, response.status, has_retry_after):
+                break
+
+            try:
+                retries = retries.increment(request.method, request.url, response=response)
+            except urllib3.exceptions.MaxRetryError as exc:
+                if retries.raise_on_status:
+                    body.close()
+                    raise requests.exceptions.RetryError(exc, request=request)
+                break
+            body.close()
+            retries.sleep(response)
+
+        return self.build_response(request, response)
+
+    def close(self):
+        """Close the adapter; clients are kept for other adapters"""
+
+        pass
+
+    def _get_client(self, verify, cert, proxy=None):
+        """Get the `httpx` client for the given TLS and proxy settings"""
+
+        key = (self._pool_connections, self._pool_maxsize, verify, cert, proxy)
+
+        with self._clients_lock:
+            if key not in self._clients:
+                if isinstance(verify, str):
+                    if os.path.isdir(verify):
+                        verify = ssl.create_default_context(capath=verify)
+                    else:
+                        verify = ssl.create_default_context(cafile=verify)
+
+                limits = httpx.Limits(max_connections=None,
+                                      max_keepalive_connections=self._pool_connections * self._pool_maxsize)
+                # Proxies are already chosen by `requests`
+                self._clients[key] = httpx.Client(http2=True, verify=verify, cert=cert,
+                                                  proxy=proxy, trust_env=False,
+                                                  limits=limits, follow_redirects=False)
+            return self._clients[key]
+
+
+class _HTTPXRawStream(io.RawIOBase):
+    """File object that reads the body of an `httpx` response as it is received"""
+
+    def __init__(self, response):
+        self._response = response
+        self._chunks = response.iter_raw()
+        self._pending = b''
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        try:
+            while not self._pending:
+                self._pending = next(self._chunks, None)
+                if self._pending is None:
+                    self._pending = b''
+                    return 0
+        except httpx.TransportError as e:
+            raise urllib3.exceptions.ProtocolError("Connection broken: %r" % e, e)
+
+        size = min(len(buffer), len(self._pending))
+        buffer[:size] = self._pending[:size]
+        self._pending = self._pending[size:]
+
+        return size
+
+    def close(self):
+        if not self.closed:
+            self._response.close()
+        super().close()
+
+
+class RatePacer:
+    """Pace the requests sent to a data source.
+
+    Instead of consuming the rate limit as fast as possible and
+    then waiting until it is reset, this class spreads the budget
+    of requests evenly over the time left to the reset. Each
+    request takes the next free slot; slots are separated by the
+    time to reset divided by the remaining budget. The budget is
+    updated with the values reported by the data source and,
+    meanwhile, it is reduced with every slot taken.
+
+    A pacer can be shared by several clients, even those running
+    in different threads, that send requests to the same host.
+    Shared pacers are obtained with `shared`.
+    """
+    _pacers = {}
+    _pacers_lock = threading.Lock()
+
+    def __init__(self):
+        self.remaining = None
+        self.reset_ts = None
+        self.requests = 0
+        self.delayed = 0
+        self.delay = 0
+        self._next_ts = 0
+        self._lock = threading.Lock()
+
+    @classmethod
+    def shared(cls, key):
+        """Get the pacer shared by the clients that use the same key.
+
+        :param key: identifier of the pacer, such as the host of
+            the data source
+
+        :returns: a `RatePacer` object
+        """
+        with cls._pacers_lock:
+            return cls._pacers.setdefault(key, cls())
+
+    @property
+    def interval(self):
+        """Seconds between two consecutive requests"""
+
+        with self._lock:
+            return self._interval(time.time())
+
+    @property
+    def metrics(self):
+        """Current pacing values and counters of the pacer.
+
+        :returns: a dict with the `interval` between requests, the
+            `remaining` budget, the seconds to its reset (`time_to_reset`),
+            the number of `requests` paced, how many of them were
+            `delayed` and the total `delay` in seconds
+        """
+        with self._lock:
+            now = time.time()
+            time_to_reset = max(self.reset_ts - now, 0) if self.reset_ts is not None else None
+
+            return {
+                'interval': self._interval(now),
+                'remaining': self.remaining,
+                'time_to_reset': time_to_reset,
+                'requests': self.requests,
+                'delayed': self.delayed,
+                'delay': self.delay
+            }
+
+    def update(self, remaining, time_to_reset):
+        """Update the budget of requests.
+
+        :param remaining: number of requests that can be sent
+            before the reset
+        :param time_to_reset: seconds to the reset of the budget
+        """
+        with self._lock:
+            self.remaining = remaining
+            self.reset_ts = time.time() + time_to_reset
+
+    def reserve(self):
+        """Take the next slot to send a request.
+
+        :returns: seconds to wait before sending the request
+        """
+        with self._lock:
+            now = time.time()
+            start = max(now, self._next_ts)
+            self._next_ts = start + self._interval(now)
+
+            if self.remaining is not None and self.remaining > 0:
+                self.remaining -= 1
+
+            delay = start - now
+            self.requests += 1
+            if delay > 0:
+                self.delayed += 1
+                self.delay += delay
+
+        return delay
+
+    def _interval(self, now):
+        if self.remaining is None or self.reset_ts is None:
+            return 0
+
+        time_to_reset = self.reset_ts - now
+
+        # The handler deals with exhausted budgets
+        if time_to_reset <= 0 or self.remaining <= 0:
+            return 0
+
+        return time_to_reset / self.remaining
 
 
 class RateLimitHandler:
     """Class to handle rate limit for HTTP clients.
 
+    When a `RatePacer` is set in the attribute `rate_pacer`, the
+    requests are spread over the time left to the rate limit reset,
+    keeping `min_rate_to_sleep` requests in reserve. Requests are
+    paced even when `sleep_for_rate` is not set.
+
+    Sleeps are recorded in the `metrics` of the client, when it
+    traces its requests.
+
+    Each request checked against the rate limit reserves one unit
+    of it until its response updates the rate limit, so concurrent
+    requests do not pass the check with the same stale value.
+
     :param sleep_for_rate: sleep until rate limit is reset
     :param min_rate_to_sleep: minimun rate needed to sleep until it will be rese
     :param rate_limit_header: header to know the current rate limit
     :param rate_limit_reset_header: header to know the next rate limit reset
+    :param rate_pacer: `RatePacer` to spread the requests
     """
-    version = '0.2'
+    version = '0.4'
 
     MIN_RATE_LIMIT = 10
     MAX_RATE_LIMIT = 500
@@ -224,16 +1120,20 @@ class RateLimitHandler:
 
     def setup_rate_limit_handler(self, sleep_for_rate=False, min_rate_to_sleep=MIN_RATE_LIMIT,
                                  rate_limit_header=RATE_LIMIT_HEADER,
-                                 rate_limit_reset_header=RATE_LIMIT_RESET_HEADER):
+                                 rate_limit_reset_header=RATE_LIMIT_RESET_HEADER,
+                                 rate_pacer=None):
         """Setup the rate limit handler.
 
         :param sleep_for_rate: sleep until rate limit is reset
         :param min_rate_to_sleep: minimun rate needed to make the fecthing process sleep
         :param rate_limit_header: header from where extract the rate limit data
         :param rate_limit_reset_header: header from where extract the rate limit reset data
+        :param rate_pacer: `RatePacer` to spread the requests
         """
         self.rate_limit = None
         self.rate_limit_reset_ts = None
+        self._rate_limit_lock = threading.Lock()
+        self.rate_pacer = rate_pacer
         self.sleep_for_rate = sleep_for_rate
         self.rate_limit_header = rate_limit_header
         self.rate_limit_reset_header = rate_limit_reset_header
@@ -251,6 +1151,59 @@ class RateLimitHandler:
         """The fetching process sleeps until the rate limit is restored or
            raises a RateLimitError exception if sleep_for_rate flag is disabled.
         """
+        seconds_to_reset = self._reserve_rate_limit()
+
+        if seconds_to_reset is not None:
+            self._record_sleep('rate_limit', seconds_to_reset)
+            time.sleep(seconds_to_reset)
+        elif self.rate_pacer:
+            delay = self.rate_pacer.reserve()
+            if delay > 0:
+                self._record_sleep('pacing', delay)
+                time.sleep(delay)
+
+    async def asleep_for_rate_limit(self):
+        """Coroutine version of `sleep_for_rate_limit`.
+
+        It waits without blocking other requests of the event loop.
+        """
+        seconds_to_reset = self._reserve_rate_limit()
+
+        if seconds_to_reset is not None:
+            self._record_sleep('rate_limit', seconds_to_reset)
+            await asyncio.sleep(seconds_to_reset)
+        elif self.rate_pacer:
+            delay = self.rate_pacer.reserve()
+            if delay > 0:
+                self._record_sleep('pacing', delay)
+                await asyncio.sleep(delay)
+
+    def _record_sleep(self, reason, seconds):
+        """Record a sleep when the client traces its requests"""
+
+        metrics = getattr(self, 'metrics', None)
+        if metrics:
+            metrics.record_sleep(reason, seconds)
+
+    def _reserve_rate_limit(self):
+        """Check the rate limit and reserve a request of it.
+
+        :returns: seconds to sleep until the rate limit is restored;
+            `None` when the request was reserved
+        """
+        with self._rate_limit_lock:
+            seconds_to_reset = self._time_to_sleep_for_rate_limit()
+
+            # The response of the request updates the real value
+            if seconds_to_reset is None and self.rate_limit is not None:
+                self.rate_limit -= 1
+
+        return seconds_to_reset
+
+    def _time_to_sleep_for_rate_limit(self):
+        """Seconds to sleep until the rate limit is restored; `None` when
+           the rate limit is not exhausted.
+        """
         if self.rate_limit is not None and self.rate_limit <= self.min_rate_to_sleep:
             seconds_to_reset = self.calculate_time_to_reset()
 
@@ -261,10 +1214,12 @@ class RateLimitHandler:
             cause = "Rate limit exhausted."
             if self.sleep_for_rate:
                 logger.info("%s Waiting %i secs for rate limit reset.", cause, seconds_to_reset)
-                time.sleep(seconds_to_reset)
+                return seconds_to_reset
             else:
                 raise RateLimitError(cause=cause, seconds_to_reset=seconds_to_reset)
 
+        return None
+
     def calculate_time_to_reset(self):
         """Calculate the seconds to reset the token requests."""
 
@@ -287,3 +1242,7 @@ class RateLimitHandler:
             logger.debug("Rate limit reset: %s", self.calculate_time_to_reset())
         else:
             self.rate_limit_reset_ts = None
+
+        if self.rate_pacer and self.rate_limit is not None and self.rate_limit_reset_ts is not None:
+            self.rate_pacer.update(self.rate_limit - self.min_rate_to_sleep,
+                                   self.calculate_time_to_reset())
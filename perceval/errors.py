@@ -53,12 +53,36 @@ class BackendError(BaseError):
     message = "%(cause)s"
 
 
+class BatchError(BaseError):
+    """Generic error for batches of jobs"""
+
+    message = "%(cause)s"
+
+
+class CacheError(BaseError):
+    """Generic error for caches"""
+
+    message = "%(cause)s"
+
+
+class CheckpointError(BaseError):
+    """Generic error for checkpoint stores"""
+
+    message = "%(cause)s"
+
+
 class HttpClientError(BaseError):
     """Generic error for HTTP Cient"""
 
     message = "%(cause)s"
 
 
+class MetricsError(BaseError):
+    """Generic error for metrics"""
+
+    message = "%(cause)s"
+
+
 class RepositoryError(BaseError):
     """Generic error for repositories"""
 
@@ -0,0 +1,220 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2015-2019 Bitergia
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+#
+
+import codecs
+import json
+
+
+WHITESPACE = ' \t\n\r'
+
+# Min number of characters read before decoding a value again
+MIN_READ_SIZE = 64 * 1024
+
+
+class JSONArrayStream:
+    """Iterator over the elements of an array of a JSON document.
+
+    The document is read in chunks and the elements of the array
+    are decoded and returned one by one, so only the element being
+    decoded is kept in memory instead of the whole document.
+
+    The array is located following `path`, the list of keys of the
+    nested objects which contain it, starting from the root of the
+    document. An empty path means the document is the array itself.
+    When the array is not found, there are no elements to iterate.
+
+    The values of the other keys of the objects in the path are
+    available in the attribute `document`, with the same structure
+    of the original document but without the array. Values placed
+    after the array are only set once every element was iterated.
+
+    Once the whole document is read, it is passed to `validate`,
+    so callers can check the values placed after the array, like
+    error flags, raising an exception when they are not valid.
+
+    The stream can be iterated only once. Closing it before reaching
+    its end also closes the chunks iterator.
+
+    :param chunks: iterator of chunks, as bytes or strings, of the
+        JSON document
+    :param path: list of keys leading to the array
+    :param encoding: encoding of the chunks given as bytes
+    :param validate: function called with `document` when the
+        whole document was read
+
+    :raises JSONDecodeError: when the document is not valid; it is
+        raised while the stream is iterated
+    """
+    def __init__(self, chunks, path=None, encoding='utf-8', validate=None):
+        self.path = list(path) if path else []
+        self.document = {}
+        self.finished = False
+        self.validate = validate
+
+        self._chunks = iter(chunks)
+        self._decoder = codecs.getincrementaldecoder(encoding)()
+        self._scanner = json.JSONDecoder()
+        self._buf = ''
+        self._pos = 0
+        self._eof = False
+        self._items = self._parse()
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        return next(self._items)
+
+    def close(self):
+        """Stop reading the document"""
+
+        self._items.close()
+
+        close = getattr(self._chunks, 'close', None)
+        if close:
+            close()
+
+    def _parse(self):
+        if self.path:
+            yield from self._parse_object(self.document, self.path)
+        else:
+            yield from self._parse_array()
+
+        if self._peek():
+            raise self._error("Extra data")
+
+        self.finished = True
+
+        if self.validate:
+            self.validate(self.document)
+
+    def _parse_object(self, document, path):
+        self._consume('{')
+
+        if self._peek() == '}':
+            self._pos += 1
+            return
+
+        while True:
+            if self._peek() != '"':
+                raise self._error("Expecting property name enclosed in double quotes")
+
+            key = self._decode_value()
+            self._consume(':')
+
+            if key != path[0]:
+                document[key] = self._decode_value()
+            elif len(path) == 1 and self._peek() == '[':
+                yield from self._parse_array()
+            elif len(path) > 1 and self._peek() == '{':
+                document[key] = {}
+                yield from self._parse_object(document[key], path[1:])
+            else:
+                document[key] = self._decode_value()
+
+            if self._consume(',}') == '}':
+                return
+
+    def _parse_array(self):
+        self._consume('[')
+
+        if self._peek() == ']':
+            self._pos += 1
+            return
+
+        while True:
+            yield self._decode_value()
+
+            if self._consume(',]') == ']':
+                return
+
+    def _decode_value(self):
+        """Decode the next value, reading chunks until it is complete"""
+
+        self._peek()
+
+        while True:
+            try:
+                value, end = self._scanner.raw_decode(self._buf, self._pos)
+            except json.JSONDecodeError:
+                if self._eof:
+                    raise
+            else:
+                # Values ending with the buffer, like numbers, might continue
+                if end < len(self._buf) or self._eof:
+                    self._pos = end
+                    return value
+
+            # Double the pending data, so large values are not decoded many times
+            pending = len(self._buf) - self._pos
+            target = pending + max(pending, MIN_READ_SIZE)
+
+            while len(self._buf) - self._pos < target and self._read():
+                pass
+
+    def _peek(self):
+        """Skip whitespaces and return the next character; empty at the end"""
+
+        while True:
+            buf = self._buf
+            pos = self._pos
+
+            while pos < len(buf) and buf[pos] in WHITESPACE:
+                pos += 1
+
+            self._pos = pos
+
+            if pos < len(buf):
+                return buf[pos]
+            if not self._read():
+                return ''
+
+    def _consume(self, expected):
+        """Consume the next character, which must be one of `expected`"""
+
+        char = self._peek()
+
+        if not char or char not in expected:
+            raise self._error("Expecting %s delimiter" % ' or '.join(repr(c) for c in expected))
+
+        self._pos += 1
+
+        return char
+
+    def _read(self):
+        """Add the next chunk to the buffer; `False` when there are no more chunks"""
+
+        if self._eof:
+            return False
+
+        try:
+            chunk = next(self._chunks)
+        except StopIteration:
+            text = self._decoder.decode(b'', final=True)
+            self._eof = True
+        else:
+            text = self._decoder.decode(chunk) if isinstance(chunk, bytes) else chunk
+
+        # Drop the data already decoded
+        self._buf = self._buf[self._pos:] + text
+        self._pos = 0
+
+        return True
+
+    def _error(self, msg):
+        return json.JSONDecodeError(msg, self._buf, self._pos)
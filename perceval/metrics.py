@@ -0,0 +1,335 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2015-2019 Bitergia
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+#
+
+import bisect
+import json
+import logging
+import re
+import threading
+import urllib.parse
+
+from .errors import MetricsError
+
+
+logger = logging.getLogger(__name__)
+
+
+# Upper bounds, in seconds, of the latency histograms
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+METRICS_FORMAT_JSON = 'json'
+METRICS_FORMAT_OPENMETRICS = 'openmetrics'
+
+ID_SEGMENT_PATTERN = re.compile(r'^(\d+|[0-9a-f]{40})$')
+
+
+class Histogram:
+    """Distribution of the values of a measure.
+
+    Values are counted in the first bucket whose upper bound is
+    equal or greater than them; values greater than every bound
+    are counted in the last, unbounded, bucket.
+
+    :param buckets: sorted list of upper bounds of the buckets
+    """
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.sum = 0
+        self.min = None
+        self.max = None
+
+    def observe(self, value):
+        """Add a value to the distribution"""
+
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+        self.min = value if self.min is None else min(self.min, value)
+        self.max = value if self.max is None else max(self.max, value)
+
+    def cumulative_counts(self):
+        """List of pairs with the upper bound of each bucket and
+        the number of values lower or equal than it"""
+
+        bounds = [str(bound) for bound in self.buckets] + ['+Inf']
+        total = 0
+        cumulative = []
+
+        for bound, count in zip(bounds, self.counts):
+            total += count
+            cumulative.append((bound, total))
+
+        return cumulative
+
+    def to_dict(self):
+        return {
+            'count': self.count,
+            'sum': self.sum,
+            'min': self.min,
+            'max': self.max,
+            'buckets': dict(self.cumulative_counts())
+        }
+
+
+class FetchMetrics:
+    """Metrics of the requests sent during a fetch.
+
+    This class records, for each endpoint and method, the number of
+    requests sent, how many of them failed, the retries done by the
+    HTTP adapter, the bytes received and a histogram of the latency
+    of the requests. Endpoints are the host and path of the URLs,
+    replacing numeric and hash segments by `:id`, so requests to the
+    same resource type are grouped.
+
+    It also records the time slept for each reason (e.g., waiting for
+    the rate limit reset) and the duration of other stages of the
+    fetch, like archive writes or the fetch itself.
+
+    Metrics can be recorded from several threads.
+
+    :param buckets: upper bounds of the latency histograms
+    """
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = buckets
+        self.endpoints = {}
+        self.sleeps = {}
+        self.stages = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def endpoint(url):
+        """Endpoint of a URL"""
+
+        parts = urllib.parse.urlsplit(url)
+        segments = [':id' if ID_SEGMENT_PATTERN.match(segment) else segment
+                    for segment in parts.path.split('/')]
+
+        return parts.netloc + '/'.join(segments)
+
+    def record_request(self, method, url, elapsed, status=None, nbytes=0, retries=0):
+        """Record a request.
+
+        :param method: method of the request
+        :param url: URL of the request
+        :param elapsed: seconds until the response was received,
+            including retries
+        :param status: status code of the response; `None` when
+            no response was received
+        :param nbytes: number of bytes of the response body
+        :param retries: number of retries
+        """
+        key = (method, self.endpoint(url))
+
+        with self._lock:
+            metrics = self.endpoints.get(key, None)
+
+            if not metrics:
+                metrics = {
+                    'requests': 0,
+                    'errors': 0,
+                    'retries': 0,
+                    'bytes': 0,
+                    'latency': Histogram(self.buckets)
+                }
+                self.endpoints[key] = metrics
+
+            metrics['requests'] += 1
+            metrics['retries'] += retries
+            metrics['bytes'] += nbytes
+            metrics['latency'].observe(elapsed)
+
+            if status is None or status >= 400:
+                metrics['errors'] += 1
+
+    def record_sleep(self, reason, seconds):
+        """Record the time slept for a reason"""
+
+        with self._lock:
+            sleep = self.sleeps.setdefault(reason, {'count': 0, 'seconds': 0})
+            sleep['count'] += 1
+            sleep['seconds'] += seconds
+
+    def record_stage(self, stage, elapsed):
+        """Record the duration of a stage of the fetch"""
+
+        with self._lock:
+            if stage not in self.stages:
+                self.stages[stage] = Histogram(self.buckets)
+            self.stages[stage].observe(elapsed)
+
+    @property
+    def totals(self):
+        """Totals of the recorded metrics.
+
+        When the duration of the fetch was recorded, the time not
+        spent on requests, sleeps or archive writes is reported as
+        `processing_seconds`; it is mostly the time parsing data.
+        """
+        with self._lock:
+            endpoints = list(self.endpoints.values())
+            sleeps = list(self.sleeps.values())
+            archive = self.stages.get('archive', None)
+            fetch = self.stages.get('fetch', None)
+
+            totals = {
+                'requests': sum(metrics['requests'] for metrics in endpoints),
+                'errors': sum(metrics['errors'] for metrics in endpoints),
+                'retries': sum(metrics['retries'] for metrics in endpoints),
+                'bytes': sum(metrics['bytes'] for metrics in endpoints),
+                'request_seconds': sum(metrics['latency'].sum for metrics in endpoints),
+                'sleep_seconds': sum(sleep['seconds'] for sleep in sleeps),
+                'archive_seconds': archive.sum if archive else 0
+            }
+
+        if fetch:
+            spent = totals['request_seconds'] + totals['sleep_seconds'] + totals['archive_seconds']
+            totals['fetch_seconds'] = fetch.sum
+            totals['processing_seconds'] = max(fetch.sum - spent, 0)
+
+        return totals
+
+    def to_dict(self):
+        totals = self.totals
+
+        with self._lock:
+            endpoints = [
+                {
+                    'method': method,
+                    'endpoint': endpoint,
+                    'requests': metrics['requests'],
+                    'errors': metrics['errors'],
+                    'retries': metrics['retries'],
+                    'bytes': metrics['bytes'],
+                    'latency': metrics['latency'].to_dict()
+                }
+                for (method, endpoint), metrics in sorted(self.endpoints.items())
+            ]
+            sleeps = {reason: dict(sleep) for reason, sleep in self.sleeps.items()}
+            stages = {stage: histogram.to_dict() for stage, histogram in self.stages.items()}
+
+        return {
+            'totals': totals,
+            'endpoints': endpoints,
+            'sleeps': sleeps,
+            'stages': stages
+        }
+
+
+class MetricsExporter:
+    """Abstract class to export the metrics of a fetch.
+
+    Derived classes have to implement `export` method.
+
+    :param filepath: path to the file where the metrics are written
+    """
+    def __init__(self, filepath):
+        self.filepath = filepath
+
+    def export(self, metrics):
+        """Export the metrics.
+
+        :param metrics: `FetchMetrics` to export
+
+        :raises MetricsError: when the metrics cannot be written
+        """
+        try:
+            with open(self.filepath, 'w') as fd:
+                fd.write(self.dumps(metrics))
+        except OSError as e:
+            msg = "metrics file %s cannot be written; %s" % (self.filepath, str(e))
+            raise MetricsError(cause=msg)
+
+    def dumps(self, metrics):
+        raise NotImplementedError
+
+
+class JSONMetricsExporter(MetricsExporter):
+    """Export the metrics as a JSON report"""
+
+    def dumps(self, metrics):
+        return json.dumps(metrics.to_dict(), indent=4, sort_keys=True)
+
+
+class OpenMetricsExporter(MetricsExporter):
+    """Export the metrics using the OpenMetrics text format"""
+
+    PREFIX = 'perceval_'
+
+    def dumps(self, metrics):
+        data = metrics.to_dict()
+        lines = []
+
+        def family(name, mtype, help_text):
+            lines.append("# TYPE %s%s %s" % (self.PREFIX, name, mtype))
+            lines.append("# HELP %s%s %s" % (self.PREFIX, name, help_text))
+
+        def sample(name, labels, value):
+            labels = ','.join('%s="%s"' % (label, self._escape(value)) for label, value in labels)
+            lines.append("%s%s{%s} %s" % (self.PREFIX, name, labels, value))
+
+        def histogram(name, labels, values):
+            for bound, count in values['buckets'].items():
+                sample(name + '_bucket', labels + [('le', bound)], count)
+            sample(name + '_count', labels, values['count'])
+            sample(name + '_sum', labels, values['sum'])
+
+        counters = [
+            ('http_requests', 'requests', "Number of HTTP requests"),
+            ('http_request_errors', 'errors', "Number of HTTP requests that failed"),
+            ('http_request_retries', 'retries', "Number of retries of HTTP requests"),
+            ('http_response_bytes', 'bytes', "Bytes received in HTTP responses")
+        ]
+
+        for name, field, help_text in counters:
+            family(name, 'counter', help_text)
+            for endpoint in data['endpoints']:
+                labels = [('method', endpoint['method']), ('endpoint', endpoint['endpoint'])]
+                sample(name + '_total', labels, endpoint[field])
+
+        family('http_request_duration_seconds', 'histogram', "Latency of HTTP requests")
+        for endpoint in data['endpoints']:
+            labels = [('method', endpoint['method']), ('endpoint', endpoint['endpoint'])]
+            histogram('http_request_duration_seconds', labels, endpoint['latency'])
+
+        family('sleeps', 'counter', "Number of sleeps")
+        for reason, sleep in sorted(data['sleeps'].items()):
+            sample('sleeps_total', [('reason', reason)], sleep['count'])
+
+        family('sleep_seconds', 'counter', "Seconds slept")
+        for reason, sleep in sorted(data['sleeps'].items()):
+            sample('sleep_seconds_total', [('reason', reason)], sleep['seconds'])
+
+        family('stage_duration_seconds', 'histogram', "Duration of the stages of the fetch")
+        for stage, values in sorted(data['stages'].items()):
+            histogram('stage_duration_seconds', [('stage', stage)], values)
+
+        lines.append("# EOF")
+
+        return '\n'.join(lines) + '\n'
+
+    @staticmethod
+    def _escape(value):
+        return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+METRICS_EXPORTERS = {
+    METRICS_FORMAT_JSON: JSONMetricsExporter,
+    METRICS_FORMAT_OPENMETRICS: OpenMetricsExporter
+}
@@ -0,0 +1,288 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2015-2019 Bitergia
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+#
+
+import json
+import logging
+import zlib
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+from .errors import BackendError
+
+
+logger = logging.getLogger(__name__)
+
+
+OUTPUT_FORMAT_JSON = 'json'
+OUTPUT_FORMAT_JSONL = 'jsonl'
+OUTPUT_FORMAT_JSONL_GZIP = 'jsonl.gz'
+OUTPUT_FORMAT_JSONL_ZSTD = 'jsonl.zst'
+OUTPUT_FORMAT_COLUMNAR = 'columnar'
+
+OUTPUT_FORMATS = [
+    OUTPUT_FORMAT_JSON,
+    OUTPUT_FORMAT_JSONL,
+    OUTPUT_FORMAT_JSONL_GZIP,
+    OUTPUT_FORMAT_JSONL_ZSTD,
+    OUTPUT_FORMAT_COLUMNAR
+]
+
+
+class JSONEncoder:
+    """Encode items to JSON.
+
+    Items are encoded using `orjson` when the package is installed
+    and the output is not indented; otherwise, the standard `json`
+    module is used. Objects that `orjson` cannot encode, such as
+    integers bigger than 64 bits, fall back to `json` too. Both
+    generate the same JSON documents, although `orjson` writes
+    non-ASCII characters without escaping them.
+
+    :param indent: number of spaces to indent the output; `None`
+        generates compact documents
+    :param sort_keys: sort the keys of the objects
+    """
+    def __init__(self, indent=None, sort_keys=True):
+        self.indent = indent
+        self.sort_keys = sort_keys
+
+        if orjson and indent is None:
+            self._orjson_opts = orjson.OPT_SORT_KEYS if sort_keys else 0
+        else:
+            self._orjson_opts = None
+
+        if indent is None:
+            self._separators = (',', ':')
+        else:
+            self._separators = None
+
+    def encode(self, obj):
+        """Encode an object to a JSON document"""
+
+        if self._orjson_opts is not None:
+            try:
+                return orjson.dumps(obj, option=self._orjson_opts).decode('utf-8')
+            except TypeError:
+                pass
+
+        return json.dumps(obj, indent=self.indent,
+                          separators=self._separators,
+                          sort_keys=self.sort_keys)
+
+
+class ItemWriter:
+    """Write items to an output stream.
+
+    Each item is encoded with `encoder` and written on its own line.
+    Encoded items are buffered and written to `outfile` in chunks of,
+    at least, `buffer_size` characters. The output can be compressed
+    using `gzip` or `zstd` (the latter requires `zstandard` package);
+    in that case, the data is written to the binary buffer of `outfile`.
+
+    Call to `close`, or use the writer as a context manager, to write
+    the pending data. The output stream is not closed by the writer.
+
+    :param outfile: text stream where the items will be written
+    :param encoder: encoder of the items; by default, a JSON
+        encoder that generates one line per item
+    :param compression: compress the output; `gzip` or `zstd`
+    :param buffer_size: number of characters buffered before
+        writing them to the output
+
+    :raises BackendError: when the compression is not supported
+        or the output cannot be compressed
+    """
+    BUFFER_SIZE = 2 ** 20
+
+    COMPRESSION_GZIP = 'gzip'
+    COMPRESSION_ZSTD = 'zstd'
+
+    def __init__(self, outfile, encoder=None, compression=None,
+                 buffer_size=None):
+        self.outfile = outfile
+        self.encoder = encoder or JSONEncoder()
+        self.compression = compression
+        self.buffer_size = buffer_size or self.BUFFER_SIZE
+
+        self._chunks = []
+        self._nchars = 0
+        self._compressor = None
+
+        if compression:
+            self._compressor = self._make_compressor(compression)
+
+            if not hasattr(self.outfile, 'buffer'):
+                msg = "output stream does not support compressed data"
+                raise BackendError(cause=msg)
+
+            # Make sure any previous text is written before the binary data
+            self.outfile.flush()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def write(self, item):
+        """Encode and write an item"""
+
+        self._append(self.encoder.encode(item))
+
+    def close(self):
+        """Write the pending data to the output stream"""
+
+        self.flush()
+
+        if self._compressor:
+            self.outfile.buffer.write(self._compressor.flush())
+            self.outfile.buffer.flush()
+            self._compressor = None
+
+    def flush(self):
+        """Write the buffered items to the output stream"""
+
+        if not self._chunks:
+            return
+
+        data = ''.join(self._chunks)
+
+        if self._compressor:
+            self.outfile.buffer.write(self._compressor.compress(data.encode('utf-8')))
+        else:
+            self.outfile.write(data)
+
+        self._chunks = []
+        self._nchars = 0
+
+    def _append(self, obj):
+        self._chunks.append(obj)
+        self._chunks.append('\n')
+        self._nchars += len(obj) + 1
+
+        if self._nchars >= self.buffer_size:
+            self.flush()
+
+    def _make_compressor(self, compression):
+        if compression == self.COMPRESSION_GZIP:
+            return zlib.compressobj(wbits=16 + zlib.MAX_WBITS)
+        elif compression == self.COMPRESSION_ZSTD:
+            if not zstandard:
+                msg = "compression zstd not supported; zstandard package not found"
+                raise BackendError(cause=msg)
+            return zstandard.ZstdCompressor().compressobj()
+        else:
+            msg = "compression %s not supported" % compression
+            raise BackendError(cause=msg)
+
+
+class ColumnarWriter(ItemWriter):
+    """Write items in columnar batches.
+
+    Items are grouped in batches of `batch_size` elements. Each batch
+    is written as a JSON object in a single line, where keys are the
+    top-level fields of the items and values, the lists with the values
+    of these fields for every item of the batch. Fields missing in an
+    item will have `null` values. Only one batch is kept in memory.
+
+    :param outfile: text stream where the items will be written
+    :param encoder: encoder of the batches
+    :param batch_size: number of items per batch
+    :param compression: compress the output; `gzip` or `zstd`
+    :param buffer_size: number of characters buffered before
+        writing them to the output
+    """
+    BATCH_SIZE = 1000
+
+    def __init__(self, outfile, encoder=None, batch_size=None,
+                 compression=None, buffer_size=None):
+        super().__init__(outfile, encoder=encoder, compression=compression,
+                         buffer_size=buffer_size)
+        self.batch_size = batch_size or self.BATCH_SIZE
+
+        self._columns = {}
+        self._nitems = 0
+
+    def write(self, item):
+        """Add an item to the current batch"""
+
+        for field in item:
+            if field not in self._columns:
+                self._columns[field] = [None] * self._nitems
+
+        for field, values in self._columns.items():
+            values.append(item.get(field, None))
+
+        self._nitems += 1
+
+        if self._nitems >= self.batch_size:
+            self._write_batch()
+
+    def close(self):
+        """Write the current batch and the pending data"""
+
+        self._write_batch()
+        super().close()
+
+    def _write_batch(self):
+        if not self._nitems:
+            return
+
+        self._append(self.encoder.encode(self._columns))
+
+        self._columns = {}
+        self._nitems = 0
+
+
+def make_item_writer(outfile, output_format=OUTPUT_FORMAT_JSON, sort_keys=True):
+    """Create a writer for the given output format.
+
+    :param outfile: text stream where the items will be written
+    :param output_format: format of the output; one of `OUTPUT_FORMATS`
+    :param sort_keys: sort the keys of the items
+
+    :returns: an `ItemWriter` object
+
+    :raises BackendError: when the format is not supported
+    """
+    if output_format == OUTPUT_FORMAT_JSON:
+        return ItemWriter(outfile, encoder=JSONEncoder(indent=4, sort_keys=sort_keys))
+
+    encoder = JSONEncoder(sort_keys=sort_keys)
+
+    if output_format == OUTPUT_FORMAT_JSONL:
+        return ItemWriter(outfile, encoder=encoder)
+    elif output_format == OUTPUT_FORMAT_JSONL_GZIP:
+        return ItemWriter(outfile, encoder=encoder,
+                          compression=ItemWriter.COMPRESSION_GZIP)
+    elif output_format == OUTPUT_FORMAT_JSONL_ZSTD:
+        return ItemWriter(outfile, encoder=encoder,
+                          compression=ItemWriter.COMPRESSION_ZSTD)
+    elif output_format == OUTPUT_FORMAT_COLUMNAR:
+        return ColumnarWriter(outfile, encoder=encoder)
+    else:
+        msg = "output format %s not supported" % output_format
+        raise BackendError(cause=msg)
@@ -97,10 +97,16 @@ setup(name="perceval",
           'requests>=2.7.0',
           'beautifulsoup4>=4.3.2',
           'feedparser>=5.1.3',
-          'dulwich>=0.18.5, <0.19',
+          'dulwich>=0.20.50, <0.22',
           'urllib3>=1.22',
           'grimoirelab-toolkit>=0.1.4'
       ],
+      extras_require={
+          'zstd': ['zstandard'],
+          'fast-json': ['orjson'],
+          'batch': ['PyYAML'],
+          'http2': ['httpx[http2]>=0.26']
+      },
       scripts=[
           'bin/perceval'
       ],
@@ -26,6 +26,7 @@ import pickle
 import shutil
 import sqlite3
 import tempfile
+import threading
 import unittest
 import unittest.mock
 
@@ -34,10 +35,31 @@ import requests
 
 from grimoirelab_toolkit.datetime import datetime_utcnow, datetime_to_utc
 
-from perceval.archive import Archive, ArchiveManager
+from perceval.archive import (Archive,
+                              ArchiveCodec,
+                              ArchiveManager,
+                              ArchiveManifest,
+                              ArchiveStore,
+                              ArchivedResponse,
+                              CompactCodec,
+                              PickleCodec,
+                              make_manifest_path,
+                              open_archive,
+                              split_manifest_path)
 from perceval.errors import ArchiveError, ArchiveManagerError
 
 
+def make_response(url, body, etag):
+    response = requests.Response()
+    response.status_code = 200
+    response.url = url
+    response.encoding = 'utf-8'
+    response.headers['ETag'] = etag
+    response._content = body
+
+    return response
+
+
 def count_number_rows(db, table_name):
     conn = sqlite3.connect(db)
     cursor = conn.cursor()
@@ -188,7 +210,7 @@ class TestArchive(unittest.TestCase):
         ds = data_stored[0]
         dr = data_requests[0]
         self.assertEqual(ds[0], '0fa4ce047340780f08efca92f22027514263521d')
-        self.assertEqual(pickle.loads(ds[1]).url, responses[0].url)
+        self.assertEqual(archive.codec.decode(ds[1]).url, responses[0].url)
         self.assertEqual(ds[2], dr[0])
         self.assertEqual(pickle.loads(ds[3]), dr[1])
         self.assertEqual(pickle.loads(ds[4]), dr[2])
@@ -196,7 +218,7 @@ class TestArchive(unittest.TestCase):
         ds = data_stored[1]
         dr = data_requests[1]
         self.assertEqual(ds[0], '3879a6f12828b7ac3a88b7167333e86168f2f5d2')
-        self.assertEqual(pickle.loads(ds[1]).url, responses[1].url)
+        self.assertEqual(archive.codec.decode(ds[1]).url, responses[1].url)
         self.assertEqual(ds[2], dr[0])
         self.assertEqual(pickle.loads(ds[3]), dr[1])
         self.assertEqual(pickle.loads(ds[4]), dr[2])
@@ -204,7 +226,7 @@ class TestArchive(unittest.TestCase):
         ds = data_stored[2]
         dr = data_requests[2]
         self.assertEqual(ds[0], 'ef38f574a0745b63a056e7befdb7a06e7cf1549b')
-        self.assertEqual(pickle.loads(ds[1]).url, responses[2].url)
+        self.assertEqual(archive.codec.decode(ds[1]).url, responses[2].url)
         self.assertEqual(ds[2], dr[0])
         self.assertEqual(pickle.loads(ds[3]), dr[1])
         self.assertEqual(pickle.loads(ds[4]), dr[2])
@@ -254,6 +276,344 @@ class TestArchive(unittest.TestCase):
 
         self.assertEqual(data.url, response.url)
 
+    def test_init_batching(self):
+        """Test whether the write-batching mode is properly initialized"""
+
+        archive_path = os.path.join(self.test_path, 'myarchive')
+        _ = Archive.create(archive_path)
+
+        archive = Archive(archive_path)
+        self.assertEqual(archive.batch_size, None)
+        self.assertEqual(archive.batch_timeout, None)
+        self.assertEqual(archive.batching, False)
+        self.assertEqual(archive.pending, 0)
+
+        archive = Archive(archive_path, batch_size=10, batch_timeout=5)
+        self.assertEqual(archive.batch_size, 10)
+        self.assertEqual(archive.batch_timeout, 5)
+        self.assertEqual(archive.batching, True)
+        self.assertEqual(archive.pending, 0)
+
+        # WAL journaling is enabled
+        db = sqlite3.connect(archive_path)
+        cursor = db.cursor()
+        cursor.execute("PRAGMA journal_mode")
+        self.assertEqual(cursor.fetchone()[0], 'wal')
+        cursor.close()
+        db.close()
+
+    def test_init_batching_invalid_params(self):
+        """Test whether an exception is raised when batching params are invalid"""
+
+        archive_path = os.path.join(self.test_path, 'myarchive')
+        _ = Archive.create(archive_path)
+
+        with self.assertRaisesRegex(ArchiveError, "batch size must be greater than 0"):
+            _ = Archive(archive_path, batch_size=0)
+
+        with self.assertRaisesRegex(ArchiveError, "batch timeout must be a positive number"):
+            _ = Archive(archive_path, batch_timeout=-1)
+
+    def test_store_batch_size(self):
+        """Test whether items are committed when the batch is full"""
+
+        archive_path = os.path.join(self.test_path, 'myarchive')
+        archive = Archive.create(archive_path, batch_size=3)
+
+        archive.store('0', None, None, {'item': 0})
+        archive.store('1', None, None, {'item': 1})
+
+        # Items are not visible yet for other connections
+        self.assertEqual(archive.pending, 2)
+        nrows = count_number_rows(archive_path, Archive.ARCHIVE_TABLE)
+        self.assertEqual(nrows, 0)
+
+        # But they are available for the archive itself
+        self.assertDictEqual(archive.retrieve('1', None, None), {'item': 1})
+
+        archive.store('2', None, None, {'item': 2})
+
+        self.assertEqual(archive.pending, 0)
+        nrows = count_number_rows(archive_path, Archive.ARCHIVE_TABLE)
+        self.assertEqual(nrows, 3)
+
+        archive.store('3', None, None, {'item': 3})
+        self.assertEqual(archive.pending, 1)
+        nrows = count_number_rows(archive_path, Archive.ARCHIVE_TABLE)
+        self.assertEqual(nrows, 3)
+
+    @unittest.mock.patch('perceval.archive.time.monotonic')
+    def test_store_batch_timeout(self, mock_monotonic):
+        """Test whether items are committed when the batch times out"""
+
+        mock_monotonic.return_value = 100.0
+
+        archive_path = os.path.join(self.test_path, 'myarchive')
+        archive = Archive.create(archive_path, batch_timeout=10)
+
+        archive.store('0', None, None, {'item': 0})
+        archive.store('1', None, None, {'item': 1})
+
+        self.assertEqual(archive.pending, 2)
+        nrows = count_number_rows(archive_path, Archive.ARCHIVE_TABLE)
+        self.assertEqual(nrows, 0)
+
+        mock_monotonic.return_value = 110.0
+        archive.store('2', None, None, {'item': 2})
+
+        self.assertEqual(archive.pending, 0)
+        nrows = count_number_rows(archive_path, Archive.ARCHIVE_TABLE)
+        self.assertEqual(nrows, 3)
+
+    def test_flush(self):
+        """Test whether pending items are committed when flush is called"""
+
+        archive_path = os.path.join(self.test_path, 'myarchive')
+        archive = Archive.create(archive_path, batch_size=100)
+
+        for x in range(5):
+            archive.store(str(x), None, None, {'item': x})
+
+        nrows = count_number_rows(archive_path, Archive.ARCHIVE_TABLE)
+        self.assertEqual(nrows, 0)
+
+        archive.flush()
+
+        self.assertEqual(archive.pending, 0)
+        nrows = count_number_rows(archive_path, Archive.ARCHIVE_TABLE)
+        self.assertEqual(nrows, 5)
+
+        # Nothing happens when there are not pending items
+        archive.flush()
+
+        nrows = count_number_rows(archive_path, Archive.ARCHIVE_TABLE)
+        self.assertEqual(nrows, 5)
+
+    def test_close(self):
+        """Test whether pending items are committed when the archive is closed"""
+
+        archive_path = os.path.join(self.test_path, 'myarchive')
+        archive = Archive.create(archive_path, batch_size=100)
+
+        for x in range(5):
+            archive.store(str(x), None, None, {'item': x})
+
+        archive.close()
+
+        nrows = count_number_rows(archive_path, Archive.ARCHIVE_TABLE)
+        self.assertEqual(nrows, 5)
+
+        # Closing twice does not fail
+        archive.close()
+
+    def test_store_duplicate_batching(self):
+        """Test whether pending items are committed when a duplicated entry is found"""
+
+        archive_path = os.path.join(self.test_path, 'myarchive')
+        archive = Archive.create(archive_path, batch_size=100)
+
+        archive.store('0', None, None, {'item': 0})
+        archive.store('1', None, None, {'item': 1})
+
+        with self.assertRaisesRegex(ArchiveError, "duplicated entry"):
+            archive.store('1', None, None, {'item': 1})
+
+        self.assertEqual(archive.pending, 0)
+        nrows = count_number_rows(archive_path, Archive.ARCHIVE_TABLE)
+        self.assertEqual(nrows, 2)
+
+    @httpretty.activate
+    def test_retrieve_legacy(self):
+        """Test whether data archived with the legacy format is retrieved"""
+
+        url = "https://example.com/tasks"
+        payload = {'task_id': 10}
+        headers = {'Accept': 'application/json'}
+
+        httpretty.register_uri(httpretty.GET,
+                               url,
+                               body='{"hey": "there"}',
+                               status=200)
+        response = requests.get(url, params=payload, headers=headers)
+
+        archive_path = os.path.join(self.test_path, 'myarchive')
+        archive = Archive.create(archive_path, codec=PickleCodec())
+        archive.init_metadata('example.com', 'tasks-backend', '0.1.0', 'task', {})
+        archive.store(url, payload, headers, response)
+        archive.store('item', None, None, {'item': 1})
+
+        archive = Archive(archive_path)
+        self.assertIsInstance(archive.codec, CompactCodec)
+
+        data = archive.retrieve(url, payload, headers)
+        self.assertNotIsInstance(data, ArchivedResponse)
+        self.assertEqual(data.url, response.url)
+        self.assertEqual(data.json(), {'hey': 'there'})
+
+        data = archive.retrieve('item', None, None)
+        self.assertDictEqual(data, {'item': 1})
+
+    @httpretty.activate
+    def test_migrate(self):
+        """Test whether legacy data is converted to the codec format"""
+
+        url = "https://example.com/tasks"
+        payload = {'task_id': 10}
+        headers = {'Accept': 'application/json'}
+
+        httpretty.register_uri(httpretty.GET,
+                               url,
+                               body='{"hey": "there"}',
+                               status=200)
+        response = requests.get(url, params=payload, headers=headers)
+
+        archive_path = os.path.join(self.test_path, 'myarchive')
+        archive = Archive.create(archive_path, codec=PickleCodec())
+        archive.init_metadata('example.com', 'tasks-backend', '0.1.0', 'task', {})
+        archive.store(url, payload, headers, response)
+        archive.store('item', None, None, {'item': 1})
+        archive.close()
+
+        archive = Archive(archive_path, codec=CompactCodec(compression='zlib'))
+        nentries = archive.migrate()
+        self.assertEqual(nentries, 2)
+
+        db = sqlite3.connect(archive_path)
+        cursor = db.cursor()
+        cursor.execute("SELECT data FROM archive")
+        rows = cursor.fetchall()
+        cursor.close()
+
+        for row in rows:
+            self.assertTrue(row[0].startswith(CompactCodec.MAGIC))
+
+        data = archive.retrieve(url, payload, headers)
+        self.assertIsInstance(data, ArchivedResponse)
+        self.assertEqual(data.url, response.url)
+        self.assertEqual(data.json(), {'hey': 'there'})
+
+        # Entries already migrated are not updated again
+        nentries = archive.migrate()
+        self.assertEqual(nentries, 0)
+
+    def test_replay(self):
+        """Test whether data is retrieved in replay mode"""
+
+        archive_path = os.path.join(self.test_path, 'myarchive')
+        archive = Archive.create(archive_path)
+        archive.init_metadata('marvel.com', 'marvel-comics-backend', '0.1.0',
+                              'issue', {})
+
+        for x in range(5):
+            archive.store(str(x), None, None, {'item': x})
+        archive.close()
+
+        for preload_index in [False, True]:
+            archive = Archive(archive_path, replay=True, preload_index=preload_index)
+
+            self.assertEqual(archive.replay, True)
+            self.assertEqual(archive.origin, 'marvel.com')
+            self.assertEqual(archive.category, 'issue')
+
+            for x in range(5):
+                self.assertDictEqual(archive.retrieve(str(x), None, None), {'item': x})
+
+            with self.assertRaisesRegex(ArchiveError, "not found in archive"):
+                _ = archive.retrieve("http://wrong", payload={}, headers={})
+
+            archive.close()
+
+    def test_replay_read_only(self):
+        """Test whether data cannot be written in replay mode"""
+
+        archive_path = os.path.join(self.test_path, 'myarchive')
+        _ = Archive.create(archive_path)
+
+        archive = Archive(archive_path, replay=True)
+
+        with self.assertRaisesRegex(ArchiveError, "opened in replay mode"):
+            archive.init_metadata('marvel.com', 'marvel-comics-backend', '0.1.0',
+                                  'issue', {})
+
+        with self.assertRaisesRegex(ArchiveError, "opened in replay mode"):
+            archive.store('0', None, None, {'item': 0})
+
+        with self.assertRaisesRegex(ArchiveError, "opened in replay mode"):
+            archive.migrate()
+
+        nrows = count_number_rows(archive_path, Archive.METADATA_TABLE)
+        self.assertEqual(nrows, 0)
+
+    def test_replay_invalid_params(self):
+        """Test whether an exception is raised when replay params are not valid"""
+
+        archive_path = os.path.join(self.test_path, 'myarchive')
+        _ = Archive.create(archive_path)
+
+        with self.assertRaisesRegex(ArchiveError, "not available in replay mode"):
+            _ = Archive(archive_path, replay=True, batch_size=10)
+
+        with self.assertRaisesRegex(ArchiveError, "only available in replay mode"):
+            _ = Archive(archive_path, preload_index=True)
+
+    def test_replay_threads(self):
+        """Test whether an archive in replay mode can be shared among threads"""
+
+        archive_path = os.path.join(self.test_path, 'myarchive')
+        archive = Archive.create(archive_path, batch_size=100)
+        archive.init_metadata('marvel.com', 'marvel-comics-backend', '0.1.0',
+                              'issue', {})
+
+        for x in range(100):
+            archive.store(str(x), None, None, {'item': x})
+        archive.close()
+
+        archive = Archive(archive_path, replay=True, preload_index=True)
+        errors = []
+
+        def retrieve_items():
+            try:
+                for x in range(100):
+                    self.assertDictEqual(archive.retrieve(str(x), None, None), {'item': x})
+            except Exception as e:
+                errors.append(e)
+
+        threads = [threading.Thread(target=retrieve_items) for _ in range(4)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        self.assertListEqual(errors, [])
+
+    def test_store_threads(self):
+        """Test whether items can be stored from several threads"""
+
+        archive_path = os.path.join(self.test_path, 'myarchive')
+        archive = Archive.create(archive_path, batch_size=10)
+        archive.init_metadata('marvel.com', 'marvel-comics-backend', '0.1.0',
+                              'issue', {})
+        errors = []
+
+        def store_items(n):
+            try:
+                for x in range(n * 100, (n + 1) * 100):
+                    archive.store(str(x), None, None, {'item': x})
+            except Exception as e:
+                errors.append(e)
+
+        threads = [threading.Thread(target=store_items, args=(n,)) for n in range(4)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        self.assertListEqual(errors, [])
+        archive.close()
+
+        nrows = count_number_rows(archive_path, Archive.ARCHIVE_TABLE)
+        self.assertEqual(nrows, 400)
+
     def test_retrieve_missing(self):
         """Test whether the retrieval of non archived data throws an error
 
@@ -268,9 +628,260 @@ class TestArchive(unittest.TestCase):
             _ = archive.retrieve("http://wrong", payload={}, headers={})
 
 
+class TestCompactCodec(unittest.TestCase):
+    """CompactCodec tests"""
+
+    @staticmethod
+    def make_response(status_code=200, body=b'{"hey": "there"}'):
+        response = requests.Response()
+        response.status_code = status_code
+        response.reason = 'OK' if status_code == 200 else 'Not Found'
+        response.url = 'https://example.com/tasks?task_id=10'
+        response.encoding = 'utf-8'
+        response.headers['Content-Type'] = 'application/json'
+        response.headers['Link'] = '<https://example.com/tasks?page=2>; rel="next"'
+        response._content = body
+        return response
+
+    def test_abstract_codec(self):
+        """Test whether the abstract codec raises NotImplementedError"""
+
+        codec = ArchiveCodec()
+
+        with self.assertRaises(NotImplementedError):
+            codec.encode({})
+        with self.assertRaises(NotImplementedError):
+            codec.decode(b'')
+
+    def test_response(self):
+        """Test whether responses are encoded and decoded"""
+
+        for compression in [None, 'zlib']:
+            codec = CompactCodec(compression=compression)
+            response = self.make_response()
+
+            blob = codec.encode(response)
+            self.assertTrue(blob.startswith(CompactCodec.MAGIC))
+
+            decoded = codec.decode(blob)
+            self.assertIsInstance(decoded, requests.Response)
+            self.assertEqual(decoded.status_code, 200)
+            self.assertEqual(decoded.reason, 'OK')
+            self.assertEqual(decoded.url, response.url)
+            self.assertEqual(decoded.encoding, 'utf-8')
+            self.assertEqual(decoded.headers['content-type'], 'application/json')
+            self.assertEqual(decoded.links['next']['url'], 'https://example.com/tasks?page=2')
+            self.assertEqual(decoded.content, response.content)
+            self.assertEqual(decoded.text, '{"hey": "there"}')
+            self.assertDictEqual(decoded.json(), {'hey': 'there'})
+            self.assertEqual(b''.join(decoded.iter_content(4)), response.content)
+
+            # Decoded responses can be pickled too
+            unpickled = pickle.loads(pickle.dumps(decoded))
+            self.assertEqual(unpickled.content, response.content)
+
+    def test_compression(self):
+        """Test whether the body is compressed"""
+
+        body = ('{"data": "%s"}' % ('x' * 4096)).encode('utf-8')
+        response = self.make_response(body=body)
+
+        raw_blob = CompactCodec().encode(response)
+        zlib_blob = CompactCodec(compression='zlib').encode(response)
+
+        self.assertLess(len(zlib_blob), len(raw_blob))
+        self.assertLess(len(raw_blob), len(PickleCodec().encode(response)))
+
+        # Any codec can decode compressed data
+        decoded = CompactCodec().decode(zlib_blob)
+        self.assertEqual(decoded.content, body)
+
+    def test_http_error(self):
+        """Test whether HTTP errors are encoded and decoded"""
+
+        codec = CompactCodec(compression='zlib')
+        response = self.make_response(status_code=404, body=b'not found')
+        error = requests.exceptions.HTTPError("404 Client Error", response=response)
+
+        decoded = codec.decode(codec.encode(error))
+
+        self.assertIsInstance(decoded, requests.exceptions.HTTPError)
+        self.assertEqual(str(decoded), "404 Client Error")
+        self.assertEqual(decoded.response.status_code, 404)
+        self.assertEqual(decoded.response.text, 'not found')
+
+    def test_objects(self):
+        """Test whether other types of objects are encoded and decoded"""
+
+        codec = CompactCodec(compression='zlib')
+
+        for obj in [{'item': 1}, b'raw data', 'text', ['a', 'b'], None]:
+            self.assertEqual(codec.decode(codec.encode(obj)), obj)
+
+    def test_legacy(self):
+        """Test whether pickled data is decoded"""
+
+        codec = CompactCodec()
+        response = self.make_response()
+
+        decoded = codec.decode(pickle.dumps(response, 0))
+        self.assertEqual(decoded.content, response.content)
+
+        decoded = codec.decode(pickle.dumps({'item': 1}, 0))
+        self.assertDictEqual(decoded, {'item': 1})
+
+    def test_compression_not_supported(self):
+        """Test whether an exception is raised for unknown compression types"""
+
+        with self.assertRaisesRegex(ArchiveError, "compression lzma not supported"):
+            _ = CompactCodec(compression='lzma')
+
+    @unittest.mock.patch('perceval.archive.zstandard', None)
+    def test_zstd_not_installed(self):
+        """Test whether an exception is raised when zstandard is not available"""
+
+        with self.assertRaisesRegex(ArchiveError, "zstandard package not found"):
+            _ = CompactCodec(compression='zstd')
+
+
 ARCHIVE_TEST_DIR = 'archivedir'
 
 
+class TestArchiveStore(unittest.TestCase):
+    """ArchiveStore tests"""
+
+    def setUp(self):
+        self.test_path = tempfile.mkdtemp(prefix='perceval_')
+
+    def tearDown(self):
+        shutil.rmtree(self.test_path)
+
+    def _create_archive(self, name, etag):
+        archive = Archive.create(os.path.join(self.test_path, name))
+        archive.init_metadata('https://example.com', 'github', '0.1', 'issue', {'owner': 'chaoss'})
+
+        for page in range(3):
+            url = 'https://example.com/issues?page=%s' % page
+            response = make_response(url, b'{"page": %d}' % page, etag)
+            archive.store(url, None, {}, response)
+
+        archive.store('https://example.com/user', None, {}, {'login': etag})
+        archive.close()
+
+        return archive
+
+    def test_add_archive(self):
+        """Test if bodies shared by several archives are stored once"""
+
+        archive_a = self._create_archive('a', '"A"')
+        archive_b = self._create_archive('b', '"B"')
+
+        store_path = os.path.join(self.test_path, 'issues.store')
+        store = ArchiveStore(store_path)
+
+        manifest_a, nentries, nblobs = store.add_archive(Archive(archive_a.archive_path), 'a')
+        self.assertEqual(nentries, 4)
+        self.assertEqual(nblobs, 4)
+
+        manifest_b, nentries, nblobs = store.add_archive(Archive(archive_b.archive_path), 'b')
+        self.assertEqual(nentries, 4)
+        self.assertEqual(nblobs, 1)
+
+        # Adding the same archive again does nothing
+        self.assertEqual(store.add_archive(Archive(archive_b.archive_path), 'b'),
+                         (manifest_b, 0, 0))
+
+        self.assertEqual(count_number_rows(store_path, ArchiveStore.ENTRIES_TABLE), 8)
+        self.assertEqual(count_number_rows(store_path, ArchiveStore.BLOBS_TABLE), 5)
+
+        manifests = store.manifests()
+        self.assertListEqual([m.archive_path for m in manifests],
+                             [make_manifest_path(store_path, manifest_a),
+                              make_manifest_path(store_path, manifest_b)])
+
+        # Each manifest keeps the headers of its own responses
+        manifest = ArchiveManifest(make_manifest_path(store_path, manifest_b))
+        self.assertEqual(manifest.origin, 'https://example.com')
+        self.assertEqual(manifest.backend_name, 'github')
+        self.assertEqual(manifest.category, 'issue')
+        self.assertDictEqual(manifest.backend_params, {'owner': 'chaoss'})
+        self.assertEqual(manifest.created_on, archive_b.created_on)
+
+        response = manifest.retrieve('https://example.com/issues?page=1', None, {})
+        self.assertEqual(response.headers['ETag'], '"B"')
+        self.assertEqual(response.content, b'{"page": 1}')
+
+        data = manifest.retrieve('https://example.com/user', None, {})
+        self.assertDictEqual(data, {'login': '"B"'})
+
+        with self.assertRaisesRegex(ArchiveError, "not found in archive"):
+            manifest.retrieve('https://example.com/issues?page=9', None, {})
+
+        # Manifests are read-only
+        with self.assertRaisesRegex(ArchiveError, "replay mode"):
+            manifest.store('https://example.com/user', None, {}, {})
+
+        store.close()
+
+    def test_remove_manifest(self):
+        """Test if bodies are removed when they are no longer used"""
+
+        archive_a = self._create_archive('a', '"A"')
+        archive_b = self._create_archive('b', '"B"')
+
+        store_path = os.path.join(self.test_path, 'issues.store')
+        store = ArchiveStore(store_path)
+        manifest_a, _, _ = store.add_archive(Archive(archive_a.archive_path), 'a')
+        store.add_archive(Archive(archive_b.archive_path), 'b')
+
+        store.remove_manifest(manifest_a)
+
+        self.assertEqual(count_number_rows(store_path, ArchiveStore.ENTRIES_TABLE), 4)
+        self.assertEqual(count_number_rows(store_path, ArchiveStore.BLOBS_TABLE), 4)
+
+        with self.assertRaisesRegex(ArchiveError, "does not exist"):
+            ArchiveManifest(make_manifest_path(store_path, manifest_a))
+
+        store.close()
+
+    def test_manifest_path(self):
+        """Test if manifest paths are built and split"""
+
+        path = make_manifest_path('/tmp/stores/abc.store', 3)
+        self.assertEqual(path, '/tmp/stores/abc.store#3')
+        self.assertEqual(split_manifest_path(path), ('/tmp/stores/abc.store', 3))
+
+        path = '/tmp/ab/cdef.sqlite3'
+        self.assertEqual(split_manifest_path(path), (path, None))
+
+        path = '/tmp/stores/abc.store#a'
+        self.assertEqual(split_manifest_path(path), (path, None))
+
+    def test_open_archive(self):
+        """Test if archives and manifests are opened"""
+
+        archive = self._create_archive('a', '"A"')
+
+        store_path = os.path.join(self.test_path, 'issues.store')
+        store = ArchiveStore(store_path)
+        manifest_id, _, _ = store.add_archive(Archive(archive.archive_path), 'a')
+        store.close()
+
+        obj = open_archive(archive.archive_path, replay=True)
+        self.assertIsInstance(obj, Archive)
+        self.assertNotIsInstance(obj, ArchiveManifest)
+
+        obj = open_archive(make_manifest_path(store_path, manifest_id),
+                           replay=True, preload_index=True)
+        self.assertIsInstance(obj, ArchiveManifest)
+
+        response = obj.retrieve('https://example.com/issues?page=2', None, {})
+        self.assertEqual(response.content, b'{"page": 2}')
+
+        with self.assertRaisesRegex(ArchiveError, "does not exist"):
+            open_archive(make_manifest_path(store_path, 99))
+
+
 class MockUUID:
     def __init__(self, uuid):
         self.hex = uuid
@@ -352,6 +963,24 @@ class TestArchiveManager(unittest.TestCase):
         manager.remove_archive(archive.archive_path)
         self.assertEqual(os.path.exists(archive.archive_path), False)
 
+    def test_remove_archive_batching(self):
+        """Test if an archive and its WAL files are removed by the archive manager"""
+
+        archive_mng_path = os.path.join(self.test_path, ARCHIVE_TEST_DIR)
+        manager = ArchiveManager(archive_mng_path, batch_size=10)
+
+        archive = manager.create_archive()
+        self.assertEqual(archive.batch_size, 10)
+        self.assertEqual(archive.batch_timeout, None)
+
+        archive.store('0', None, None, {'item': 0})
+        self.assertEqual(os.path.exists(archive.archive_path + '-wal'), True)
+
+        manager.remove_archive(archive.archive_path)
+        self.assertEqual(os.path.exists(archive.archive_path), False)
+        self.assertEqual(os.path.exists(archive.archive_path + '-wal'), False)
+        self.assertEqual(os.path.exists(archive.archive_path + '-shm'), False)
+
     def test_remove_archive_not_found(self):
         """Test if an exception is raised when the archive is not found"""
 
@@ -467,6 +1096,232 @@ class TestArchiveManager(unittest.TestCase):
         expected = [metadata[1]['filepath']]
         self.assertListEqual(archives, expected)
 
+    def test_search_catalog(self):
+        """Test if searches use the catalog instead of scanning the directory"""
+
+        archive_mng_path = os.path.join(self.test_path, ARCHIVE_TEST_DIR)
+        manager = ArchiveManager(archive_mng_path)
+
+        dt = datetime_utcnow()
+        archive = manager.create_archive()
+        archive.init_metadata('https://example.com', 'git', '0.8', 'commit', {})
+
+        self.assertEqual(os.path.exists(manager.catalog_path), True)
+
+        with unittest.mock.patch.object(ArchiveManager, '_search_files') as mock_files:
+            mock_files.side_effect = AssertionError("directory must not be scanned")
+            archives = manager.search('https://example.com', 'git', 'commit', dt)
+
+        self.assertListEqual(archives, [archive.archive_path])
+
+        # A new manager reuses the existing catalog
+        manager = ArchiveManager(archive_mng_path)
+
+        with unittest.mock.patch.object(ArchiveManager, '_search_files') as mock_files:
+            mock_files.side_effect = AssertionError("directory must not be scanned")
+            archives = manager.search('https://example.com', 'git', 'commit', dt)
+
+        self.assertListEqual(archives, [archive.archive_path])
+
+    def test_search_catalog_without_metadata(self):
+        """Test if archives without metadata are read again only when they change"""
+
+        archive_mng_path = os.path.join(self.test_path, ARCHIVE_TEST_DIR)
+        manager = ArchiveManager(archive_mng_path)
+
+        dt = datetime_utcnow()
+        archive = manager.create_archive()
+
+        with unittest.mock.patch('perceval.archive.open_archive', wraps=open_archive) as mock_open:
+            archives = manager.search('https://example.com', 'git', 'commit', dt)
+            self.assertListEqual(archives, [])
+            self.assertEqual(mock_open.call_count, 1)
+
+            # The archive did not change, so it is not opened again
+            archives = manager.search('https://example.com', 'git', 'commit', dt)
+            self.assertListEqual(archives, [])
+            self.assertEqual(mock_open.call_count, 1)
+
+            archive.init_metadata('https://example.com', 'git', '0.8', 'commit', {})
+
+            archives = manager.search('https://example.com', 'git', 'commit', dt)
+            self.assertListEqual(archives, [archive.archive_path])
+            self.assertEqual(mock_open.call_count, 2)
+
+    def test_catalog_new_columns(self):
+        """Test if catalogs created by previous versions are upgraded"""
+
+        archive_mng_path = os.path.join(self.test_path, ARCHIVE_TEST_DIR)
+        os.makedirs(archive_mng_path)
+
+        catalog_path = os.path.join(archive_mng_path, ArchiveManager.CATALOG_NAME)
+        conn = sqlite3.connect(catalog_path)
+        conn.execute("CREATE TABLE " + ArchiveManager.CATALOG_TABLE + " ( "
+                     "archive_path TEXT PRIMARY KEY, origin TEXT, backend_name TEXT, "
+                     "category TEXT, created_on REAL)")
+        conn.commit()
+        conn.close()
+
+        manager = ArchiveManager(archive_mng_path)
+
+        dt = datetime_utcnow()
+        archive = manager.create_archive()
+
+        archives = manager.search('https://example.com', 'git', 'commit', dt)
+        self.assertListEqual(archives, [])
+
+        archive.init_metadata('https://example.com', 'git', '0.8', 'commit', {})
+
+        archives = manager.search('https://example.com', 'git', 'commit', dt)
+        self.assertListEqual(archives, [archive.archive_path])
+
+    def test_catalog_built_from_disk(self):
+        """Test if the catalog is built when it does not exist"""
+
+        archive_mng_path = os.path.join(self.test_path, ARCHIVE_TEST_DIR)
+        manager = ArchiveManager(archive_mng_path)
+
+        dt = datetime_utcnow()
+        archive = manager.create_archive()
+        archive.init_metadata('https://example.com', 'git', '0.8', 'commit', {})
+        manager = None
+
+        catalog_path = os.path.join(archive_mng_path, ArchiveManager.CATALOG_NAME)
+        os.remove(catalog_path)
+
+        manager = ArchiveManager(archive_mng_path)
+        archives = manager.search('https://example.com', 'git', 'commit', dt)
+
+        self.assertEqual(os.path.exists(catalog_path), True)
+        self.assertListEqual(archives, [archive.archive_path])
+
+    def test_reindex(self):
+        """Test if the catalog is rebuilt from the archives on disk"""
+
+        archive_mng_path = os.path.join(self.test_path, ARCHIVE_TEST_DIR)
+        manager = ArchiveManager(archive_mng_path)
+
+        dt = datetime_utcnow()
+
+        archive_a = manager.create_archive()
+        archive_a.init_metadata('https://example.com', 'git', '0.8', 'commit', {})
+        archive_b = manager.create_archive()
+        archive_b.init_metadata('https://example.com', 'git', '0.8', 'commit', {})
+
+        # Archives created out of the manager are not found until
+        # the catalog is rebuilt
+        alt_path = os.path.join(archive_mng_path, 'ff', 'myarchive.sqlite3')
+        os.makedirs(os.path.dirname(alt_path))
+        archive_c = Archive.create(alt_path)
+        archive_c.init_metadata('https://example.com', 'git', '0.8', 'commit', {})
+
+        # Files removed by hand are ignored
+        os.remove(archive_b.archive_path)
+
+        # Invalid files are ignored too
+        with open(os.path.join(archive_mng_path, 'ff', 'invalid'), 'w') as fd:
+            fd.write("Invalid archive file")
+
+        archives = manager.search('https://example.com', 'git', 'commit', dt)
+        self.assertListEqual(archives, [archive_a.archive_path])
+
+        narchives = manager.reindex()
+        self.assertEqual(narchives, 2)
+
+        archives = manager.search('https://example.com', 'git', 'commit', dt)
+        self.assertListEqual(archives, [archive_a.archive_path, archive_c.archive_path])
+
+    def test_remove_archive_catalog(self):
+        """Test if removed archives are deleted from the catalog"""
+
+        archive_mng_path = os.path.join(self.test_path, ARCHIVE_TEST_DIR)
+        manager = ArchiveManager(archive_mng_path)
+
+        dt = datetime_utcnow()
+        archive = manager.create_archive()
+        archive.init_metadata('https://example.com', 'git', '0.8', 'commit', {})
+
+        manager.remove_archive(archive.archive_path)
+
+        count = count_number_rows(manager.catalog_path, ArchiveManager.CATALOG_TABLE)
+        self.assertEqual(count, 0)
+
+        archives = manager.search('https://example.com', 'git', 'commit', dt)
+        self.assertListEqual(archives, [])
+
+    def test_compact(self):
+        """Test if archives are compacted and still found by searches"""
+
+        archive_mng_path = os.path.join(self.test_path, ARCHIVE_TEST_DIR)
+        manager = ArchiveManager(archive_mng_path)
+
+        dt = datetime_utcnow()
+        url = 'https://example.com/issues'
+
+        archives = []
+        for etag in ['"A"', '"B"', '"C"']:
+            archive = manager.create_archive()
+            archive.init_metadata('https://example.com', 'github', '0.1', 'issue', {})
+            archive.store(url, None, {}, make_response(url, b'[]', etag))
+            archive.close()
+            archives.append(archive)
+
+        other = manager.create_archive()
+        other.init_metadata('https://example.com', 'git', '0.8', 'commit', {})
+
+        ncompacted = manager.compact(backend_name='github')
+        self.assertEqual(ncompacted, 3)
+
+        for archive in archives:
+            self.assertEqual(os.path.exists(archive.archive_path), False)
+        self.assertEqual(os.path.exists(other.archive_path), True)
+
+        # Manifests are returned in the same order as the archives
+        found = manager.search('https://example.com', 'github', 'issue', dt)
+        self.assertEqual(len(found), 3)
+
+        store_path, _ = split_manifest_path(found[0])
+        self.assertEqual(count_number_rows(store_path, ArchiveStore.BLOBS_TABLE), 1)
+
+        for archive_path, archive, etag in zip(found, archives, ['"A"', '"B"', '"C"']):
+            manifest = open_archive(archive_path)
+            self.assertEqual(manifest.created_on, archive.created_on)
+            response = manifest.retrieve(url, None, {})
+            self.assertEqual(response.headers['ETag'], etag)
+            self.assertEqual(response.content, b'[]')
+
+        # Searches by date still work on manifests
+        found_after = manager.search('https://example.com', 'github', 'issue',
+                                     archives[1].created_on)
+        self.assertListEqual(found_after, found[1:])
+
+        # The catalog is rebuilt with the manifests of the stores
+        self.assertEqual(manager.reindex(), 4)
+        self.assertListEqual(manager.search('https://example.com', 'github', 'issue', dt), found)
+
+        # Nothing else to compact
+        self.assertEqual(manager.compact(backend_name='github'), 0)
+
+        # Manifests can be removed
+        manager.remove_archive(found[0])
+        self.assertListEqual(manager.search('https://example.com', 'github', 'issue', dt), found[1:])
+
+    def test_compact_archived_before(self):
+        """Test if only archives created before a date are compacted"""
+
+        archive_mng_path = os.path.join(self.test_path, ARCHIVE_TEST_DIR)
+        manager = ArchiveManager(archive_mng_path)
+
+        archive_a = manager.create_archive()
+        archive_a.init_metadata('https://example.com', 'github', '0.1', 'issue', {})
+        archive_b = manager.create_archive()
+        archive_b.init_metadata('https://example.com', 'github', '0.1', 'issue', {})
+
+        ncompacted = manager.compact(archived_before=archive_b.created_on)
+        self.assertEqual(ncompacted, 1)
+        self.assertEqual(os.path.exists(archive_a.archive_path), False)
+        self.assertEqual(os.path.exists(archive_b.archive_path), True)
+
     def test_search_no_match(self):
         """Check if an empty set of archives is returned when none match the criteria"""
 
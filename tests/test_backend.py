@@ -22,6 +22,7 @@
 
 import argparse
 import datetime
+import gzip
 import io
 import json
 import os
@@ -32,6 +33,7 @@ import unittest
 import unittest.mock
 
 import dateutil.tz
+import httpretty
 
 from grimoirelab_toolkit.datetime import (InvalidDateError,
                                           datetime_utcnow,
@@ -49,7 +51,11 @@ from perceval.backend import (Backend,
                               fetch,
                               fetch_from_archive,
                               logger as backend_logger)
+from perceval.cache import ResponseCache
+from perceval.checkpoint import CheckpointStore
+from perceval.client import HttpClient, RateLimitHandler, RatePacer
 from perceval.errors import ArchiveError, BackendError, BackendCommandArgumentParserError
+from perceval.metrics import FetchMetrics
 from perceval.utils import DEFAULT_DATETIME
 from base import TestCaseBackendArchive
 
@@ -224,6 +230,40 @@ class ErrorCommandBackend(CommandBackend):
             raise BackendError(cause="Unhandled exception")
 
 
+class ResumableBackend(MockedBackend):
+    """Backend that supports resuming, used for testing checkpoints"""
+
+    SORTED_FETCH = True
+
+    def fetch(self, category=MockedBackend.DEFAULT_CATEGORY, from_date=DEFAULT_DATETIME):
+        return Backend.fetch(self, category, from_date=from_date)
+
+    def fetch_items(self, category, **kwargs):
+        from_date = kwargs['from_date'].timestamp()
+
+        for item in super().fetch_items(category, **kwargs):
+            if self.metadata_updated_on(item) >= from_date:
+                yield item
+
+    @classmethod
+    def has_resuming(cls):
+        return True
+
+
+class NotResumableBackend(MockedBackend):
+    """Backend that does not support resuming"""
+
+    @classmethod
+    def has_resuming(cls):
+        return False
+
+
+class UnsortedBackend(ResumableBackend):
+    """Backend that supports resuming but does not fetch its items sorted"""
+
+    SORTED_FETCH = False
+
+
 class MockedBackendCommand(BackendCommand):
     """Mocked backend command class used for testing"""
 
@@ -323,6 +363,69 @@ class ClassifiedFieldsBackendCommand(MockedBackendCommand):
     BACKEND = ClassifiedFieldsBackend
 
 
+class CachedBackend(MockedBackend):
+    """Mocked backend for testing HTTP caches"""
+
+    URL = 'http://example.com/items/'
+
+    def fetch_items(self, category, **kwargs):
+        for x in range(MockedBackend.ITEMS):
+            response = self.client.fetch(self.URL + str(x))
+            yield {'item': x, 'category': category, 'body': response.text}
+
+    def _init_client(self, from_archive=False):
+        return HttpClient(self.URL, archive=self.archive, from_archive=from_archive)
+
+
+class PacedClient(HttpClient, RateLimitHandler):
+    """Mocked client handling rate limits"""
+
+    def __init__(self, base_url, archive=None, from_archive=False):
+        super().__init__(base_url, archive=archive, from_archive=from_archive)
+        super().setup_rate_limit_handler()
+
+    def calculate_time_to_reset(self):
+        return 0
+
+
+class PacedBackend(CachedBackend):
+    """Mocked backend for testing rate pacing"""
+
+    def _init_client(self, from_archive=False):
+        return PacedClient(self.URL, archive=self.archive, from_archive=from_archive)
+
+
+class CachedBackendCommand(BackendCommand):
+    """Mocked backend command class used for testing HTTP caches"""
+
+    BACKEND = CachedBackend
+
+    @classmethod
+    def setup_cmd_parser(cls):
+        parser = BackendCommandArgumentParser(cls.BACKEND,
+                                              archive=True,
+                                              http_cache=True)
+        parser.parser.add_argument('origin')
+
+        return parser
+
+
+class ResumableBackendCommand(BackendCommand):
+    """Mocked backend command class used for testing resuming"""
+
+    BACKEND = ResumableBackend
+
+    @classmethod
+    def setup_cmd_parser(cls):
+        parser = BackendCommandArgumentParser(cls.BACKEND,
+                                              from_date=True,
+                                              archive=True,
+                                              resume=True)
+        parser.parser.add_argument('origin')
+
+        return parser
+
+
 class NoArchiveBackendCommand(BackendCommand):
     """Mocked backend command class used for testing which does not support archive"""
 
@@ -602,6 +705,29 @@ class TestBackend(unittest.TestCase):
         self.assertEqual(b.archive.origin, b.origin)
         self.assertEqual(b.archive.category, MockedBackend.DEFAULT_CATEGORY)
 
+    def test_fetch_flush_archive(self):
+        """Test whether the archived items are committed when the fetch ends"""
+
+        archive_path = os.path.join(self.test_path, 'myarchive')
+        archive = Archive.create(archive_path, batch_size=100)
+        b = MockedBackend('test', archive=archive)
+
+        items = b.fetch()
+        _ = next(items)
+
+        self.assertEqual(archive.pending, 1)
+
+        _ = [item for item in items]
+
+        self.assertEqual(archive.pending, 0)
+
+        conn = sqlite3.connect(archive_path)
+        cursor = conn.cursor()
+        cursor.execute("SELECT COUNT(*) FROM " + Archive.ARCHIVE_TABLE)
+        self.assertEqual(cursor.fetchone()[0], MockedBackend.ITEMS)
+        cursor.close()
+        conn.close()
+
     def test_fetch_wrong_category(self):
         """Check that an error is thrown if the category is not valid"""
 
@@ -846,6 +972,289 @@ class TestBackendArchive(TestCaseBackendArchive):
             _ = [item for item in b.fetch_from_archive()]
 
 
+class TestBackendHttpCache(unittest.TestCase):
+    """Unit tests for fetching items using an HTTP cache"""
+
+    def setUp(self):
+        self.test_path = tempfile.mkdtemp(prefix='perceval_')
+        self.cache = ResponseCache(os.path.join(self.test_path, 'http_cache.db'))
+
+    def tearDown(self):
+        shutil.rmtree(self.test_path)
+
+    @httpretty.activate
+    def test_fetch_cache_summary(self):
+        """Test whether the cache stats are included in the summary"""
+
+        for x in range(MockedBackend.ITEMS):
+            httpretty.register_uri(httpretty.GET,
+                                   CachedBackend.URL + str(x),
+                                   responses=[
+                                       httpretty.Response(body='item %s' % x, status=200,
+                                                          forcing_headers={'ETag': '"%s"' % x}),
+                                       httpretty.Response(body='', status=304)
+                                   ])
+
+        backend = CachedBackend('test')
+        backend.response_cache = self.cache
+
+        items = [item for item in backend.fetch()]
+        self.assertEqual(len(items), 5)
+        self.assertEqual(backend.summary.cache_hits, 0)
+        self.assertEqual(backend.summary.cache_misses, 5)
+        self.assertEqual(backend.summary.cache_bytes_saved, 0)
+
+        # Items are the same when responses are not modified
+        backend = CachedBackend('test')
+        backend.response_cache = self.cache
+
+        cached_items = [item for item in backend.fetch()]
+        self.assertListEqual([item['data'] for item in cached_items],
+                             [item['data'] for item in items])
+        self.assertEqual(backend.summary.cache_hits, 5)
+        self.assertEqual(backend.summary.cache_misses, 0)
+        self.assertEqual(backend.summary.cache_bytes_saved, 30)
+
+    @httpretty.activate
+    def test_fetch_without_cache(self):
+        """Test whether the cache is not used when it is not set"""
+
+        for x in range(MockedBackend.ITEMS):
+            httpretty.register_uri(httpretty.GET,
+                                   CachedBackend.URL + str(x),
+                                   body='item %s' % x, status=200,
+                                   forcing_headers={'ETag': '"%s"' % x})
+
+        backend = CachedBackend('test')
+
+        items = [item for item in backend.fetch()]
+        self.assertEqual(len(items), 5)
+        self.assertIsNone(backend.client.cache)
+        self.assertEqual(backend.summary.cache_misses, 0)
+
+        # Backends without HTTP clients ignore the cache
+        backend = MockedBackend('test')
+        backend.response_cache = self.cache
+
+        items = [item for item in backend.fetch()]
+        self.assertEqual(len(items), 5)
+        self.assertEqual(backend.summary.cache_hits, 0)
+
+
+class TestBackendRatePacing(unittest.TestCase):
+    """Unit tests for fetching items pacing the requests"""
+
+    @httpretty.activate
+    def test_fetch_rate_pacing(self):
+        """Test whether clients share the pacer of their host"""
+
+        for x in range(MockedBackend.ITEMS):
+            httpretty.register_uri(httpretty.GET,
+                                   CachedBackend.URL + str(x),
+                                   body='item %s' % x, status=200)
+
+        backend = PacedBackend('test')
+        self.assertFalse(backend.rate_pacing)
+
+        items = [item for item in backend.fetch()]
+        self.assertEqual(len(items), 5)
+        self.assertIsNone(backend.client.rate_pacer)
+
+        backend = PacedBackend('test')
+        backend.rate_pacing = True
+
+        items = [item for item in backend.fetch()]
+        self.assertEqual(len(items), 5)
+
+        pacer = backend.client.rate_pacer
+        self.assertIs(pacer, RatePacer.shared('example.com'))
+
+        other = PacedBackend('test')
+        other.rate_pacing = True
+
+        _ = [item for item in other.fetch()]
+        self.assertIs(other.client.rate_pacer, pacer)
+
+        # Backends without rate limit handlers ignore pacing
+        backend = CachedBackend('test')
+        backend.rate_pacing = True
+
+        items = [item for item in backend.fetch()]
+        self.assertEqual(len(items), 5)
+        self.assertFalse(hasattr(backend.client, 'rate_pacer'))
+
+
+class TestBackendMetrics(unittest.TestCase):
+    """Unit tests for fetching items tracing the requests"""
+
+    @httpretty.activate
+    def test_fetch_metrics(self):
+        """Test whether the requests and the fetch are traced"""
+
+        for x in range(MockedBackend.ITEMS):
+            httpretty.register_uri(httpretty.GET,
+                                   CachedBackend.URL + str(x),
+                                   body='item %s' % x, status=200)
+
+        backend = CachedBackend('test')
+        self.assertIsNone(backend.metrics)
+
+        items = [item for item in backend.fetch()]
+        self.assertEqual(len(items), 5)
+        self.assertIsNone(backend.client.metrics)
+
+        metrics = FetchMetrics()
+        backend = CachedBackend('test')
+        backend.metrics = metrics
+
+        items = [item for item in backend.fetch()]
+        self.assertEqual(len(items), 5)
+        self.assertIs(backend.client.metrics, metrics)
+
+        totals = metrics.totals
+        self.assertEqual(totals['requests'], 5)
+        self.assertEqual(totals['errors'], 0)
+        self.assertEqual(totals['bytes'], 30)
+        self.assertIn('processing_seconds', totals)
+        self.assertEqual(metrics.stages['fetch'].count, 1)
+
+        # Backends without HTTP clients only trace the fetch
+        metrics = FetchMetrics()
+        backend = MockedBackend('test')
+        backend.metrics = metrics
+
+        items = [item for item in backend.fetch()]
+        self.assertEqual(len(items), 5)
+        self.assertEqual(metrics.totals['requests'], 0)
+        self.assertEqual(metrics.stages['fetch'].count, 1)
+
+
+class TestBackendCheckpoint(unittest.TestCase):
+    """Unit tests for saving and resuming fetches from checkpoints"""
+
+    def setUp(self):
+        self.test_path = tempfile.mkdtemp(prefix='perceval_')
+        self.store = CheckpointStore(os.path.join(self.test_path, 'checkpoints.json'))
+
+    def tearDown(self):
+        shutil.rmtree(self.test_path)
+
+    def test_fetch_saves_checkpoint(self):
+        """Test whether the progress of a fetch is saved"""
+
+        backend = ResumableBackend('test')
+        backend.checkpoint_store = self.store
+
+        items = [item for item in backend.fetch()]
+        self.assertEqual(len(items), 5)
+
+        checkpoint = self.store.load('ResumableBackend', 'test', 'mock_item')
+        self.assertEqual(checkpoint['from_date'], str_to_datetime('2016-01-01 00:00:04'))
+        self.assertEqual(checkpoint['last_uuid'], items[-1]['uuid'])
+        self.assertEqual(checkpoint['fetched'], 5)
+
+    @unittest.mock.patch('perceval.backend.CHECKPOINT_INTERVAL', 2)
+    def test_fetch_checkpoint_interval(self):
+        """Test whether checkpoints are saved periodically"""
+
+        backend = ResumableBackend('test')
+        backend.checkpoint_store = self.store
+
+        with unittest.mock.patch.object(self.store, 'save', wraps=self.store.save) as mock_save:
+            items = backend.fetch()
+
+            _ = next(items)
+            _ = next(items)
+
+            # The second item might not be consumed yet
+            self.assertEqual(mock_save.call_count, 0)
+
+            _ = next(items)
+            self.assertEqual(mock_save.call_count, 1)
+
+            checkpoint = self.store.load('ResumableBackend', 'test', 'mock_item')
+            self.assertEqual(checkpoint['fetched'], 2)
+
+            _ = [item for item in items]
+            self.assertEqual(mock_save.call_count, 3)
+
+        checkpoint = self.store.load('ResumableBackend', 'test', 'mock_item')
+        self.assertEqual(checkpoint['fetched'], 5)
+
+    def test_fetch_not_resumable(self):
+        """Test whether checkpoints are not saved when resuming is not supported"""
+
+        backend = NotResumableBackend('test')
+        backend.checkpoint_store = self.store
+
+        items = [item for item in backend.fetch()]
+        self.assertEqual(len(items), 5)
+
+        self.assertIsNone(self.store.load('NotResumableBackend', 'test', 'mock_item'))
+
+    def test_fetch_unsorted(self):
+        """Test whether checkpoints are not saved when items are not fetched sorted"""
+
+        backend = UnsortedBackend('test')
+        backend.checkpoint_store = self.store
+
+        items = [item for item in backend.fetch()]
+        self.assertEqual(len(items), 5)
+
+        self.assertIsNone(self.store.load('UnsortedBackend', 'test', 'mock_item'))
+
+    def test_fetch_resume(self):
+        """Test whether a fetch is resumed from the last checkpoint"""
+
+        backend = ResumableBackend('test')
+        backend.checkpoint_store = self.store
+
+        items = backend.fetch()
+        for _ in range(3):
+            _ = next(items)
+        self.store.save('ResumableBackend', 'test', 'mock_item', backend.summary)
+
+        backend = ResumableBackend('test')
+        backend.checkpoint_store = self.store
+        backend.resume = True
+
+        items = [item for item in backend.fetch()]
+
+        # The last item of the checkpoint is fetched again
+        self.assertEqual(len(items), 3)
+        self.assertEqual([item['data']['item'] for item in items], [2, 3, 4])
+
+        checkpoint = self.store.load('ResumableBackend', 'test', 'mock_item')
+        self.assertEqual(checkpoint['from_date'], str_to_datetime('2016-01-01 00:00:04'))
+
+    def test_fetch_resume_later_from_date(self):
+        """Test whether a later from_date is kept when resuming"""
+
+        backend = ResumableBackend('test')
+        backend.checkpoint_store = self.store
+
+        items = backend.fetch()
+        for _ in range(2):
+            _ = next(items)
+        self.store.save('ResumableBackend', 'test', 'mock_item', backend.summary)
+
+        backend.resume = True
+        from_date = datetime.datetime(2016, 1, 1, 0, 0, 3)
+        items = [item for item in backend.fetch(from_date=from_date)]
+
+        self.assertEqual([item['data']['item'] for item in items], [3, 4])
+
+    def test_fetch_resume_no_checkpoint(self):
+        """Test whether all the items are fetched when there is no checkpoint"""
+
+        backend = ResumableBackend('test')
+        backend.checkpoint_store = self.store
+        backend.resume = True
+
+        items = [item for item in backend.fetch()]
+        self.assertEqual(len(items), 5)
+
+
 class TestBackendCommandArgumentParser(unittest.TestCase):
     """Unit tests for BackendCommandArgumentParser"""
 
@@ -1035,6 +1444,57 @@ class TestBackendCommandArgumentParser(unittest.TestCase):
         self.assertEqual(parsed_args.fetch_archive, True)
         self.assertEqual(parsed_args.no_archive, False)
         self.assertEqual(parsed_args.archived_since, expected_dt)
+        self.assertEqual(parsed_args.archive_batch_size, None)
+        self.assertEqual(parsed_args.archive_batch_timeout, None)
+
+    def test_parse_archive_batch_args(self):
+        """Test if archive batching arguments are parsed"""
+
+        args = ['--archive-path', '/tmp/archive',
+                '--archive-batch-size', '500',
+                '--archive-batch-timeout', '2.5']
+
+        parser = BackendCommandArgumentParser(MockedBackendCommand.BACKEND,
+                                              archive=True)
+        parsed_args = parser.parse(*args)
+
+        self.assertEqual(parsed_args.archive_batch_size, 500)
+        self.assertEqual(parsed_args.archive_batch_timeout, 2.5)
+        self.assertEqual(parsed_args.archive_compression, None)
+
+    def test_parse_archive_compression_args(self):
+        """Test if archive compression argument is parsed"""
+
+        args = ['--archive-path', '/tmp/archive',
+                '--archive-compression', 'zlib']
+
+        parser = BackendCommandArgumentParser(MockedBackendCommand.BACKEND,
+                                              archive=True)
+        parsed_args = parser.parse(*args)
+
+        self.assertEqual(parsed_args.archive_compression, 'zlib')
+
+    def test_parse_archive_workers_args(self):
+        """Test if archive workers arguments are parsed"""
+
+        args = ['--archive-path', '/tmp/archive', '--fetch-archive',
+                '--category', 'mocked']
+
+        parser = BackendCommandArgumentParser(MockedBackendCommand.BACKEND,
+                                              archive=True)
+        parsed_args = parser.parse(*args)
+
+        self.assertEqual(parsed_args.archive_workers, None)
+        self.assertEqual(parsed_args.archive_ordered, True)
+
+        args = ['--archive-path', '/tmp/archive', '--fetch-archive',
+                '--category', 'mocked', '--archive-workers', '4',
+                '--archive-unordered']
+
+        parsed_args = parser.parse(*args)
+
+        self.assertEqual(parsed_args.archive_workers, 4)
+        self.assertEqual(parsed_args.archive_ordered, False)
 
     def test_incompatible_fetch_archive_and_no_archive(self):
         """Test if fetch-archive and no-archive arguments are incompatible"""
@@ -1056,6 +1516,107 @@ class TestBackendCommandArgumentParser(unittest.TestCase):
         with self.assertRaises(AttributeError):
             _ = parser.parse(*args)
 
+    def test_resume_arguments(self):
+        """Test if resume arguments are parsed"""
+
+        args = ['--resume', '--checkpoint-path', '/tmp/checkpoints.json']
+        parser = BackendCommandArgumentParser(ResumableBackend,
+                                              from_date=True,
+                                              resume=True)
+        parsed_args = parser.parse(*args)
+
+        self.assertEqual(parsed_args.resume, True)
+        self.assertEqual(parsed_args.checkpoint_path, '/tmp/checkpoints.json')
+
+        parsed_args = parser.parse()
+
+        self.assertEqual(parsed_args.resume, False)
+        self.assertEqual(parsed_args.checkpoint_path, None)
+
+    def test_resume_unsorted_backend(self):
+        """Test if an exception is raised when the backend does not fetch its items sorted"""
+
+        with self.assertRaisesRegex(BackendCommandArgumentParserError,
+                                    "Resuming not supported by UnsortedBackend backend"):
+            _ = BackendCommandArgumentParser(UnsortedBackend,
+                                             from_date=True,
+                                             resume=True)
+
+    def test_http_cache_arguments(self):
+        """Test if HTTP cache arguments are parsed"""
+
+        args = ['--http-cache', '--http-cache-path', '/tmp/http_cache.db',
+                '--http-cache-size', '1024']
+        parser = BackendCommandArgumentParser(MockedBackend,
+                                              http_cache=True)
+        parsed_args = parser.parse(*args)
+
+        self.assertEqual(parsed_args.http_cache, True)
+        self.assertEqual(parsed_args.http_cache_path, '/tmp/http_cache.db')
+        self.assertEqual(parsed_args.http_cache_size, 1024)
+
+        parsed_args = parser.parse()
+
+        self.assertEqual(parsed_args.http_cache, False)
+        self.assertEqual(parsed_args.http_cache_path, None)
+        self.assertEqual(parsed_args.http_cache_size, None)
+
+    def test_rate_pacing_arguments(self):
+        """Test if rate pacing arguments are parsed"""
+
+        parser = BackendCommandArgumentParser(MockedBackend,
+                                              rate_pacing=True)
+
+        parsed_args = parser.parse('--rate-pacing')
+        self.assertEqual(parsed_args.rate_pacing, True)
+
+        parsed_args = parser.parse()
+        self.assertEqual(parsed_args.rate_pacing, False)
+
+    def test_metrics_arguments(self):
+        """Test if metrics arguments are parsed"""
+
+        parser = BackendCommandArgumentParser(MockedBackend)
+
+        parsed_args = parser.parse('--metrics-path', '/tmp/metrics.txt',
+                                   '--metrics-format', 'openmetrics')
+        self.assertEqual(parsed_args.metrics_path, '/tmp/metrics.txt')
+        self.assertEqual(parsed_args.metrics_format, 'openmetrics')
+
+        parsed_args = parser.parse()
+        self.assertEqual(parsed_args.metrics_path, None)
+        self.assertEqual(parsed_args.metrics_format, 'json')
+
+        with self.assertRaises(SystemExit):
+            _ = parser.parse('--metrics-format', 'xml')
+
+    def test_resume_needs_date_or_offset(self):
+        """Test if resume needs either from_date or offset parameters"""
+
+        with self.assertRaises(AttributeError):
+            _ = BackendCommandArgumentParser(ResumableBackend,
+                                             resume=True)
+
+    def test_resume_not_supported(self):
+        """Test if an exception is raised when the backend does not support resuming"""
+
+        with self.assertRaises(BackendCommandArgumentParserError):
+            _ = BackendCommandArgumentParser(NotResumableBackend,
+                                             from_date=True,
+                                             resume=True)
+
+    def test_incompatible_fetch_archive_and_resume(self):
+        """Test if fetch-archive and resume arguments are incompatible"""
+
+        args = ['--fetch-archive', '--category', 'mock_item', '--resume']
+        parser = BackendCommandArgumentParser(ResumableBackend,
+                                              from_date=True,
+                                              archive=True,
+                                              resume=True)
+
+        with self.assertRaises(AttributeError):
+            _ = parser.parse(*args)
+
     def test_remove_empty_category(self):
         """Test whether category argument is removed when no value is given"""
 
@@ -1191,6 +1752,180 @@ class TestBackendCommand(unittest.TestCase):
         cmd = MockedBackendCommand(*args)
         self.assertEqual(cmd.archive_manager, None)
 
+    @unittest.mock.patch('os.path.expanduser')
+    def test_checkpoint_store_on_init(self, mock_expanduser):
+        """Test if the checkpoint store is set when the class is initialized"""
+
+        checkpoint_path = os.path.join(self.test_path, 'checkpoints.json')
+        mock_expanduser.return_value = checkpoint_path
+
+        # No checkpoints are saved by default
+        args = ['--no-archive', '--output', self.fout_path, 'http://example.com/']
+
+        cmd = ResumableBackendCommand(*args)
+        self.assertEqual(cmd.checkpoint_store, None)
+
+        # Resuming uses the default path
+        args = ['--no-archive', '--resume', '--output', self.fout_path,
+                'http://example.com/']
+
+        cmd = ResumableBackendCommand(*args)
+        self.assertIsInstance(cmd.checkpoint_store, CheckpointStore)
+        self.assertEqual(cmd.checkpoint_store.filepath, checkpoint_path)
+
+        # Commands without resume arguments do not save checkpoints
+        args = ['--no-archive', '--output', self.fout_path, 'http://example.com/']
+
+        cmd = MockedBackendCommand(*args)
+        self.assertEqual(cmd.checkpoint_store, None)
+
+    @unittest.mock.patch('os.path.expanduser')
+    def test_http_cache_on_init(self, mock_expanduser):
+        """Test if the HTTP cache is set when the class is initialized"""
+
+        cache_path = os.path.join(self.test_path, 'http_cache.db')
+        mock_expanduser.return_value = cache_path
+
+        # The cache is not used by default
+        args = ['--no-archive', '--output', self.fout_path, 'http://example.com/']
+
+        cmd = CachedBackendCommand(*args)
+        self.assertEqual(cmd.response_cache, None)
+
+        # Enabling it uses the default path
+        args = ['--no-archive', '--http-cache', '--http-cache-size', '1024',
+                '--output', self.fout_path, 'http://example.com/']
+
+        cmd = CachedBackendCommand(*args)
+        self.assertIsInstance(cmd.response_cache, ResponseCache)
+        self.assertEqual(cmd.response_cache.cache_path, cache_path)
+        self.assertEqual(cmd.response_cache.max_size, 1024)
+
+        # Commands without HTTP cache arguments do not use it
+        args = ['--no-archive', '--output', self.fout_path, 'http://example.com/']
+
+        cmd = MockedBackendCommand(*args)
+        self.assertEqual(cmd.response_cache, None)
+
+    def test_http_cache_invalid_file(self):
+        """Test if an exception is raised when the HTTP cache is invalid"""
+
+        cache_path = os.path.join(self.test_path, 'http_cache.db')
+        with open(cache_path, 'w') as fd:
+            fd.write('invalid')
+
+        args = ['--no-archive', '--http-cache-path', cache_path,
+                '--output', self.fout_path, 'http://example.com/']
+
+        with self.assertRaisesRegex(BackendError, "invalid cache"):
+            _ = CachedBackendCommand(*args)
+
+    def test_metrics_on_init(self):
+        """Test if the metrics are set when the class is initialized"""
+
+        args = ['--no-archive', '--output', self.fout_path, 'http://example.com/']
+
+        cmd = CachedBackendCommand(*args)
+        self.assertEqual(cmd.metrics, None)
+
+        metrics_path = os.path.join(self.test_path, 'metrics.json')
+        args = ['--no-archive', '--metrics-path', metrics_path,
+                '--output', self.fout_path, 'http://example.com/']
+
+        cmd = CachedBackendCommand(*args)
+        self.assertIsInstance(cmd.metrics, FetchMetrics)
+
+    @httpretty.activate
+    def test_run_metrics(self):
+        """Test whether the run method exports the metrics"""
+
+        for x in range(MockedBackend.ITEMS):
+            httpretty.register_uri(httpretty.GET,
+                                   CachedBackend.URL + str(x),
+                                   body='item %s' % x, status=200)
+
+        metrics_path = os.path.join(self.test_path, 'metrics.json')
+        args = ['--no-archive', '--metrics-path', metrics_path,
+                '--json-line', '--output', self.fout_path,
+                'http://example.com/']
+
+        cmd = CachedBackendCommand(*args)
+        with self.assertLogs('perceval.backend', level='INFO') as cm:
+            cmd.run()
+        cmd.outfile.close()
+
+        self.assertRegex(cm.output[-1], r'Requests: \t5\n')
+
+        with open(metrics_path) as fd:
+            report = json.load(fd)
+
+        self.assertEqual(report['totals']['requests'], 5)
+        self.assertEqual(len(report['endpoints']), 1)
+        self.assertEqual(report['endpoints'][0]['endpoint'], 'example.com/items/:id')
+        self.assertEqual(report['stages']['fetch']['count'], 1)
+
+        # Export the metrics using OpenMetrics format
+        metrics_path = os.path.join(self.test_path, 'metrics.txt')
+        args = ['--no-archive', '--metrics-path', metrics_path,
+                '--metrics-format', 'openmetrics',
+                '--json-line', '--output', self.fout_path,
+                'http://example.com/']
+
+        cmd = CachedBackendCommand(*args)
+        cmd.run()
+        cmd.outfile.close()
+
+        with open(metrics_path) as fd:
+            report = fd.read()
+
+        self.assertIn('perceval_http_requests_total{method="GET",endpoint="example.com/items/:id"} 5\n',
+                      report)
+        self.assertTrue(report.endswith('# EOF\n'))
+
+    def test_checkpoint_store_invalid_file(self):
+        """Test if an exception is raised when the checkpoint file is invalid"""
+
+        checkpoint_path = os.path.join(self.test_path, 'checkpoints.json')
+        with open(checkpoint_path, 'w') as fd:
+            fd.write('invalid')
+
+        args = ['--no-archive', '--checkpoint-path', checkpoint_path,
+                '--output', self.fout_path, 'http://example.com/']
+
+        with self.assertRaisesRegex(BackendError, "invalid checkpoint file"):
+            _ = ResumableBackendCommand(*args)
+
+    def test_run_resume(self):
+        """Test whether the run method saves and resumes checkpoints"""
+
+        checkpoint_path = os.path.join(self.test_path, 'checkpoints.json')
+
+        args = ['--no-archive', '--checkpoint-path', checkpoint_path,
+                '--json-line', '--output', self.fout_path,
+                'http://example.com/']
+
+        cmd = ResumableBackendCommand(*args)
+        cmd.run()
+        cmd.outfile.close()
+
+        store = CheckpointStore(checkpoint_path)
+        checkpoint = store.load('ResumableBackend', 'http://example.com/', 'mock_item')
+        self.assertEqual(checkpoint['fetched'], 5)
+
+        args = ['--no-archive', '--checkpoint-path', checkpoint_path, '--resume',
+                '--json-line', '--output', self.fout_path,
+                'http://example.com/']
+
+        cmd = ResumableBackendCommand(*args)
+        cmd.run()
+        cmd.outfile.close()
+
+        with open(self.fout_path) as fout:
+            items = [json.loads(line) for line in fout.readlines()]
+
+        self.assertEqual(len(items), 1)
+        self.assertEqual(items[0]['data']['item'], 4)
+
     def test_pre_init(self):
         """Test if pre_init method is called during initialization"""
 
@@ -1415,6 +2150,33 @@ class TestBackendCommand(unittest.TestCase):
             self.assertEqual(item['category'], MockedBackend.DEFAULT_CATEGORY)
             self.assertEqual(item['classified_fields_filtered'], None)
 
+    def test_run_output_format(self):
+        """Test run method with --output-format"""
+
+        args = ['-u', 'jsmith', '-p', '1234', '-t', 'abcd',
+                '--archive-path', self.test_path,
+                '--from-date', '2015-01-01', '--tag', 'test',
+                '--output', self.fout_path, 'http://example.com/',
+                '--output-format', 'jsonl.gz', '--unsorted-keys']
+
+        cmd = MockedBackendCommand(*args)
+        self.assertEqual(cmd.output_format, 'jsonl.gz')
+        self.assertEqual(cmd.sort_keys, False)
+
+        cmd.run()
+        cmd.outfile.close()
+
+        with gzip.open(self.fout_path, 'rt') as fout:
+            items = [json.loads(line) for line in fout]
+
+        self.assertEqual(len(items), 5)
+
+        for x in range(5):
+            item = items[x]
+            self.assertEqual(item['data']['item'], x)
+            self.assertEqual(item['uuid'], uuid('http://example.com/', str(x)))
+            self.assertEqual(item['tag'], 'test')
+
     def test_filter_classified_fields(self):
         """Test if fields are filtered with filter-classified option is active"""
 
@@ -1787,6 +2549,84 @@ class TestBackendItemsGenerator(unittest.TestCase):
             self.assertEqual(item['tag'], 'test')
             self.assertEqual(item['classified_fields_filtered'], None)
 
+    def test_init_items_from_archive_workers(self):
+        """Test whether archives are replayed in parallel"""
+
+        manager = ArchiveManager(self.test_path)
+
+        category = 'mock_item'
+        args = {
+            'origin': 'http://example.com/',
+            'tag': 'test',
+            'subtype': 'mocksubtype',
+            'from-date': str_to_datetime('2015-01-01')
+        }
+
+        for _ in range(3):
+            with BackendItemsGenerator(CommandBackend, args, category, manager=manager) as big:
+                _ = [item for item in big.items]
+
+        with BackendItemsGenerator(CommandBackend, args, category,
+                                   manager=manager, fetch_archive=True,
+                                   archived_after=str_to_datetime('1970-01-01')) as big:
+            expected = [item for item in big.items]
+
+        for item in expected:
+            del item['timestamp']
+
+        for ordered in [True, False]:
+            with BackendItemsGenerator(CommandBackend, args, category,
+                                       manager=manager, fetch_archive=True,
+                                       archived_after=str_to_datetime('1970-01-01'),
+                                       archive_workers=2,
+                                       archive_ordered=ordered) as big:
+                items = [item for item in big.items]
+
+                summary = big.summary
+                self.assertEqual(summary.fetched, 15)
+                self.assertEqual(summary.skipped, 0)
+                self.assertEqual(summary.min_updated_on.timestamp(), 1451606400.0)
+                self.assertEqual(summary.max_updated_on.timestamp(), 1451606404.0)
+                self.assertEqual(summary.last_uuid, "6130c145435d661565bd7d402be403bea7cfb6b5")
+
+            self.assertEqual(len(items), 15)
+
+            for item in items:
+                del item['timestamp']
+
+            if ordered:
+                self.assertListEqual(items, expected)
+            else:
+                key = (lambda item: item['uuid'])
+                self.assertListEqual(sorted(items, key=key), sorted(expected, key=key))
+
+    def test_summary_from_archive(self):
+        """Test whether the summary includes the items of every archive"""
+
+        manager = ArchiveManager(self.test_path)
+
+        category = 'mock_item'
+        args = {
+            'origin': 'http://example.com/',
+            'tag': 'test',
+            'subtype': 'mocksubtype',
+            'from-date': str_to_datetime('2015-01-01')
+        }
+
+        for _ in range(2):
+            with BackendItemsGenerator(CommandBackend, args, category, manager=manager) as big:
+                _ = [item for item in big.items]
+
+        with BackendItemsGenerator(CommandBackend, args, category,
+                                   manager=manager, fetch_archive=True,
+                                   archived_after=str_to_datetime('1970-01-01')) as big:
+            _ = [item for item in big.items]
+
+            summary = big.summary
+            self.assertEqual(summary.fetched, 10)
+            self.assertEqual(summary.total, 10)
+            self.assertEqual(summary.last_uuid, "6130c145435d661565bd7d402be403bea7cfb6b5")
+
     def test_summary(self):
         """Test whether the method summary properly works"""
 
@@ -1832,6 +2672,9 @@ class TestSummary(unittest.TestCase):
         self.assertIsNone(summary.min_offset)
         self.assertIsNone(summary.max_offset)
         self.assertIsNone(summary.last_offset)
+        self.assertEqual(summary.cache_hits, 0)
+        self.assertEqual(summary.cache_misses, 0)
+        self.assertEqual(summary.cache_bytes_saved, 0)
         self.assertIsNone(summary.extras)
 
     def test_update(self):
@@ -1956,6 +2799,79 @@ class TestSummary(unittest.TestCase):
         self.assertEqual(summary.last_offset, 1)
 
 
+class TestSummaryMerge(unittest.TestCase):
+    """Unit tests for Summary.merge"""
+
+    def test_merge(self):
+        """Test whether two summaries are merged"""
+
+        item_a = {
+            'uuid': 'a',
+            'updated_on': 1483228800.0,
+            'offset': 10
+        }
+        item_b = {
+            'uuid': 'b',
+            'updated_on': 1483228700.0,
+            'offset': 5
+        }
+        item_c = {
+            'uuid': 'c',
+            'updated_on': 1483228900.0,
+            'offset': 7
+        }
+
+        summary = Summary()
+        summary.update(item_a)
+
+        other = Summary()
+        other.skipped = 2
+        other.update(item_b)
+        other.update(item_c)
+        other.extras = {'pages': 3}
+        other.cache_hits = 4
+        other.cache_misses = 1
+        other.cache_bytes_saved = 1024
+        summary.cache_hits = 1
+
+        summary.merge(other)
+
+        self.assertEqual(summary.fetched, 3)
+        self.assertEqual(summary.skipped, 2)
+        self.assertEqual(summary.total, 5)
+        self.assertEqual(summary.min_updated_on.timestamp(), 1483228700.0)
+        self.assertEqual(summary.max_updated_on.timestamp(), 1483228900.0)
+        self.assertEqual(summary.last_updated_on.timestamp(), 1483228900.0)
+        self.assertEqual(summary.last_uuid, 'c')
+        self.assertEqual(summary.min_offset, 5)
+        self.assertEqual(summary.max_offset, 10)
+        self.assertEqual(summary.last_offset, 7)
+        self.assertEqual(summary.cache_hits, 5)
+        self.assertEqual(summary.cache_misses, 1)
+        self.assertEqual(summary.cache_bytes_saved, 1024)
+        self.assertDictEqual(summary.extras, {'pages': 3})
+
+    def test_merge_empty(self):
+        """Test whether empty summaries do not change the last values"""
+
+        item = {
+            'uuid': 'a',
+            'updated_on': 1483228800.0
+        }
+
+        summary = Summary()
+        summary.update(item)
+
+        summary.merge(Summary())
+        summary.merge(None)
+
+        self.assertEqual(summary.fetched, 1)
+        self.assertEqual(summary.last_uuid, 'a')
+        self.assertEqual(summary.last_updated_on.timestamp(), 1483228800.0)
+        self.assertIsNone(summary.min_offset)
+        self.assertIsNone(summary.last_offset)
+
+
 class TestMetadata(unittest.TestCase):
     """Test metadata method"""
 
@@ -2013,6 +2929,38 @@ class TestMetadata(unittest.TestCase):
 
             before = item['timestamp']
 
+    def test_metadata_single_pass(self):
+        """Test if the id of an item is calculated once, without debug messages"""
+
+        backend = MockedBackend('test', 'mytag')
+
+        with unittest.mock.patch.object(MockedBackend, 'metadata_id',
+                                        wraps=MockedBackend.metadata_id) as mock_id:
+            with unittest.mock.patch('perceval.backend.uuid', wraps=uuid) as mock_uuid:
+                items = [item for item in backend.fetch(filter_classified=True)]
+
+        self.assertEqual(len(items), 5)
+        self.assertEqual(mock_id.call_count, 5)
+        self.assertEqual(mock_uuid.call_count, 5)
+
+        for x in range(5):
+            self.assertEqual(items[x]['uuid'], uuid('test', str(x)))
+            self.assertDictEqual(items[x]['search_fields'], {'item_id': str(x)})
+
+    def test_metadata_search_fields_overridden(self):
+        """Test if backends overriding search fields are supported"""
+
+        class SearchFieldsBackend(MockedBackend):
+            def search_fields(self, item):
+                return {'item_id': self.metadata_id(item), 'number': item['item']}
+
+        backend = SearchFieldsBackend('test', 'mytag')
+        items = [item for item in backend.fetch()]
+
+        for x in range(5):
+            self.assertEqual(items[x]['backend_name'], 'SearchFieldsBackend')
+            self.assertDictEqual(items[x]['search_fields'], {'item_id': str(x), 'number': x})
+
 
 class TestUUID(unittest.TestCase):
     """Unit tests for uuid function"""
@@ -2232,6 +3180,132 @@ class TestFetchFromArchive(unittest.TestCase):
                 self.assertEqual(item['tag'], 'test')
                 self.assertEqual(item['classified_fields_filtered'], None)
 
+    def test_archive_workers(self):
+        """Test whether archives are replayed in parallel"""
+
+        manager = ArchiveManager(self.test_path)
+
+        category = 'mock_item'
+        args = {
+            'origin': 'http://example.com/',
+            'tag': 'test',
+            'subtype': 'mocksubtype',
+            'from-date': str_to_datetime('2015-01-01')
+        }
+
+        for _ in range(3):
+            items = fetch(CommandBackend, args, category, manager=manager)
+            _ = [item for item in items]
+
+        items = fetch_from_archive(CommandBackend, args, manager,
+                                   category, str_to_datetime('1970-01-01'),
+                                   workers=3)
+        items = [item for item in items]
+
+        self.assertEqual(len(items), 15)
+
+        for x in range(3):
+            for y in range(5):
+                item = items[y + (x * 5)]
+                self.assertEqual(item['data']['item'], y)
+                self.assertEqual(item['data']['archive'], True)
+                self.assertEqual(item['uuid'], uuid('http://example.com/', str(y)))
+
+    @unittest.mock.patch('perceval.backend.REPLAY_QUEUE_SIZE', 1)
+    @unittest.mock.patch('perceval.backend.REPLAY_CHUNK_SIZE', 2)
+    def test_archive_workers_chunks(self):
+        """Test whether replayed items are sent back in chunks"""
+
+        manager = ArchiveManager(self.test_path)
+
+        category = 'mock_item'
+        args = {
+            'origin': 'http://example.com/',
+            'tag': 'test',
+            'subtype': 'mocksubtype',
+            'from-date': str_to_datetime('2015-01-01')
+        }
+
+        for _ in range(3):
+            items = fetch(CommandBackend, args, category, manager=manager)
+            _ = [item for item in items]
+
+        # Items keep the order of the archives
+        items = fetch_from_archive(CommandBackend, args, manager,
+                                   category, str_to_datetime('1970-01-01'),
+                                   workers=2)
+        items = [item['data']['item'] for item in items]
+        self.assertListEqual(items, [0, 1, 2, 3, 4] * 3)
+
+        # Items of different archives can be mixed
+        items = fetch_from_archive(CommandBackend, args, manager,
+                                   category, str_to_datetime('1970-01-01'),
+                                   workers=2, ordered=False)
+        items = [item['data']['item'] for item in items]
+        self.assertListEqual(sorted(items), sorted([0, 1, 2, 3, 4] * 3))
+
+    @unittest.mock.patch('perceval.backend.REPLAY_QUEUE_SIZE', 1)
+    @unittest.mock.patch('perceval.backend.REPLAY_CHUNK_SIZE', 1)
+    def test_archive_workers_close(self):
+        """Test whether workers stop when the items are no longer read"""
+
+        manager = ArchiveManager(self.test_path)
+
+        category = 'mock_item'
+        args = {
+            'origin': 'http://example.com/',
+            'tag': 'test',
+            'subtype': 'mocksubtype',
+            'from-date': str_to_datetime('2015-01-01')
+        }
+
+        for _ in range(4):
+            items = fetch(CommandBackend, args, category, manager=manager)
+            _ = [item for item in items]
+
+        items = fetch_from_archive(CommandBackend, args, manager,
+                                   category, str_to_datetime('1970-01-01'),
+                                   workers=2)
+        item = next(items)
+        self.assertEqual(item['data']['item'], 0)
+
+        # Workers waiting to send their chunks do not block the close
+        items.close()
+
+    def test_compacted_archives(self):
+        """Test whether compacted archives are replayed"""
+
+        manager = ArchiveManager(self.test_path)
+
+        category = 'mock_item'
+        args = {
+            'origin': 'http://example.com/',
+            'tag': 'test',
+            'subtype': 'mocksubtype',
+            'from-date': str_to_datetime('2015-01-01')
+        }
+
+        for _ in range(2):
+            items = fetch(CommandBackend, args, category, manager=manager)
+            _ = [item for item in items]
+
+        self.assertEqual(manager.compact(), 2)
+
+        for workers in [None, 2]:
+            items = fetch_from_archive(CommandBackend, args, manager,
+                                       category, str_to_datetime('1970-01-01'),
+                                       workers=workers)
+            items = [item for item in items]
+
+            self.assertEqual(len(items), 10)
+
+            for x in range(2):
+                for y in range(5):
+                    item = items[y + (x * 5)]
+                    self.assertEqual(item['data']['item'], y)
+                    self.assertEqual(item['data']['archive'], True)
+                    self.assertEqual(item['uuid'], uuid('http://example.com/', str(y)))
+
     def test_archived_after(self):
         """Test if only those items archived after a date are returned"""
 
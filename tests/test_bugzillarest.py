@@ -22,6 +22,7 @@
 
 import copy
 import datetime
+import json
 import os
 import shutil
 import unittest
@@ -499,6 +500,48 @@ class TestBugzillaRESTClient(unittest.TestCase):
         self.assertRegex(req.path, '/rest/bug')
         self.assertDictEqual(req.querystring, expected)
 
+    @httpretty.activate
+    def test_stream_bugs(self):
+        """Test whether bugs are streamed"""
+
+        body = read_file('data/bugzilla/bugzilla_rest_bugs.json')
+        httpretty.register_uri(httpretty.GET,
+                               BUGZILLA_BUGS_URL,
+                               body=body, status=200)
+
+        client = BugzillaRESTClient(BUGZILLA_SERVER_URL)
+        bugs = [bug for bug in client.stream_bugs(offset=100, max_bugs=5)]
+
+        self.assertListEqual(bugs, json.loads(body)['bugs'])
+
+        expected = {
+            'last_change_time': ['1970-01-01T00:00:00Z'],
+            'offset': ['100'],
+            'limit': ['5'],
+            'order': ['changeddate'],
+            'include_fields': ['_all']
+        }
+
+        req = httpretty.last_request()
+
+        self.assertEqual(req.method, 'GET')
+        self.assertRegex(req.path, '/rest/bug')
+        self.assertDictEqual(req.querystring, expected)
+
+    @httpretty.activate
+    def test_stream_bugs_error(self):
+        """Test if an exception is raised when a streamed response is an error"""
+
+        body = read_file('data/bugzilla/bugzilla_rest_error.json')
+        httpretty.register_uri(httpretty.GET,
+                               BUGZILLA_BUGS_URL,
+                               body=body, status=200)
+
+        client = BugzillaRESTClient(BUGZILLA_SERVER_URL)
+
+        with self.assertRaisesRegex(BugzillaRESTError, "code: 32000"):
+            _ = [bug for bug in client.stream_bugs()]
+
     @httpretty.activate
     def test_comments(self):
         """Test comments API call"""
@@ -0,0 +1,217 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2015-2019 Bitergia
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+#
+
+import os
+import shutil
+import tempfile
+import unittest
+import unittest.mock
+
+import requests
+
+from perceval.archive import Archive
+from perceval.cache import DEFAULT_MAX_SIZE, ResponseCache
+from perceval.errors import CacheError
+
+
+def make_response(url, body, headers=None):
+    """Build a response of a GET request to `url`"""
+
+    response = requests.Response()
+    response.status_code = 200
+    response.reason = 'OK'
+    response.url = url
+    response.encoding = 'utf-8'
+    response.headers.update(headers or {})
+    response._content = body.encode('utf-8')
+
+    return response
+
+
+class TestResponseCache(unittest.TestCase):
+    """Unit tests for ResponseCache class"""
+
+    def setUp(self):
+        self.test_path = tempfile.mkdtemp(prefix='perceval_')
+        self.cache_path = os.path.join(self.test_path, 'cache', 'http_cache.db')
+
+    def tearDown(self):
+        shutil.rmtree(self.test_path)
+
+    def test_init(self):
+        """Test whether the cache is created"""
+
+        cache = ResponseCache(self.cache_path)
+
+        self.assertEqual(cache.cache_path, self.cache_path)
+        self.assertEqual(cache.max_size, DEFAULT_MAX_SIZE)
+        self.assertEqual(cache.size, 0)
+        self.assertTrue(os.path.exists(self.cache_path))
+
+    def test_init_invalid_cache(self):
+        """Test whether an exception is raised when the cache is not valid"""
+
+        os.makedirs(os.path.dirname(self.cache_path))
+        with open(self.cache_path, 'w') as fd:
+            fd.write("Invalid cache")
+
+        with self.assertRaisesRegex(CacheError, "invalid cache"):
+            _ = ResponseCache(self.cache_path)
+
+    def test_init_invalid_max_size(self):
+        """Test whether an exception is raised when the max size is not valid"""
+
+        with self.assertRaisesRegex(CacheError, "max size must be greater than 0"):
+            _ = ResponseCache(self.cache_path, max_size=0)
+
+    def test_make_hashcode(self):
+        """Test whether requests are identified as archives do"""
+
+        hashcode = ResponseCache.make_hashcode('http://example.com', {'page': 1}, None)
+        self.assertEqual(hashcode, Archive.make_hashcode('http://example.com', {'page': 1}, None))
+
+    def test_store_get(self):
+        """Test whether responses are stored and retrieved"""
+
+        cache = ResponseCache(self.cache_path)
+
+        self.assertIsNone(cache.get('0001'))
+
+        response = make_response('http://example.com/a', 'a body', {'ETag': '"abcd"'})
+        self.assertTrue(cache.store('0001', response))
+
+        response = make_response('http://example.com/b', 'b body',
+                                 {'Last-Modified': 'Tue, 01 Jan 2019 00:00:00 GMT'})
+        self.assertTrue(cache.store('0002', response))
+
+        entry = cache.get('0001')
+        self.assertEqual(entry['etag'], '"abcd"')
+        self.assertIsNone(entry['last_modified'])
+        self.assertEqual(entry['response'].status_code, 200)
+        self.assertEqual(entry['response'].url, 'http://example.com/a')
+        self.assertEqual(entry['response'].text, 'a body')
+
+        entry = cache.get('0002')
+        self.assertIsNone(entry['etag'])
+        self.assertEqual(entry['last_modified'], 'Tue, 01 Jan 2019 00:00:00 GMT')
+        self.assertEqual(entry['response'].text, 'b body')
+
+        # Responses are shared with other instances
+        other = ResponseCache(self.cache_path)
+        self.assertEqual(other.get('0001')['response'].text, 'a body')
+
+        # Stored responses are replaced
+        response = make_response('http://example.com/a', 'new body', {'ETag': '"efgh"'})
+        other.store('0001', response)
+
+        entry = cache.get('0001')
+        self.assertEqual(entry['etag'], '"efgh"')
+        self.assertEqual(entry['response'].text, 'new body')
+
+    def test_store_without_validators(self):
+        """Test whether responses without validators are not stored"""
+
+        cache = ResponseCache(self.cache_path)
+
+        response = make_response('http://example.com/a', 'a body')
+        self.assertFalse(cache.store('0001', response))
+        self.assertIsNone(cache.get('0001'))
+
+    def test_store_too_large(self):
+        """Test whether responses larger than the cache are not stored"""
+
+        cache = ResponseCache(self.cache_path, max_size=100)
+
+        response = make_response('http://example.com/a', 'a' * 200, {'ETag': '"abcd"'})
+        self.assertFalse(cache.store('0001', response))
+        self.assertIsNone(cache.get('0001'))
+        self.assertEqual(cache.size, 0)
+
+    @unittest.mock.patch('perceval.cache.time.time')
+    def test_eviction(self, mock_time):
+        """Test whether the least recently used responses are evicted"""
+
+        response = make_response('http://example.com', 'x' * 100, {'ETag': '"abcd"'})
+        size = len(ResponseCache(self.cache_path).codec.encode(response))
+
+        cache = ResponseCache(self.cache_path, max_size=3 * size)
+
+        mock_time.return_value = 1
+        cache.store('0001', response)
+        mock_time.return_value = 2
+        cache.store('0002', response)
+        mock_time.return_value = 3
+        cache.store('0003', response)
+
+        self.assertEqual(cache.size, 3 * size)
+
+        # Reading a response makes it the most recently used one
+        mock_time.return_value = 4
+        self.assertIsNotNone(cache.get('0001'))
+
+        mock_time.return_value = 5
+        cache.store('0004', response)
+
+        self.assertEqual(cache.size, 3 * size)
+        self.assertIsNone(cache.get('0002'))
+        self.assertIsNotNone(cache.get('0001'))
+        self.assertIsNotNone(cache.get('0003'))
+        self.assertIsNotNone(cache.get('0004'))
+
+    def test_size(self):
+        """Test whether the size is kept up to date when responses are replaced"""
+
+        cache = ResponseCache(self.cache_path)
+
+        small = make_response('http://example.com', 'x' * 100, {'ETag': '"abcd"'})
+        large = make_response('http://example.com', 'x' * 500, {'ETag': '"efgh"'})
+        small_size = len(cache.codec.encode(small))
+        large_size = len(cache.codec.encode(large))
+
+        cache.store('0001', small)
+        cache.store('0002', small)
+        self.assertEqual(cache.size, 2 * small_size)
+
+        cache.store('0001', large)
+        self.assertEqual(cache.size, small_size + large_size)
+
+        # The size is read from the database by other instances
+        cache.close()
+        cache = ResponseCache(self.cache_path)
+        self.assertEqual(cache.size, small_size + large_size)
+
+    def test_size_not_measured(self):
+        """Test whether the size of a cache without its size recorded is measured once"""
+
+        response = make_response('http://example.com', 'x' * 100, {'ETag': '"abcd"'})
+
+        cache = ResponseCache(self.cache_path)
+        size = len(cache.codec.encode(response))
+        cache.store('0001', response)
+        cache.store('0002', response)
+        cache._db.execute("DROP TABLE " + ResponseCache.SIZE_TABLE)
+        cache._db.commit()
+        cache.close()
+
+        cache = ResponseCache(self.cache_path)
+        self.assertEqual(cache.size, 2 * size)
+
+
+if __name__ == "__main__":
+    unittest.main(warnings='ignore')
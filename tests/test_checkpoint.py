@@ -0,0 +1,225 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2015-2019 Bitergia
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+#
+
+import datetime
+import json
+import multiprocessing
+import os
+import shutil
+import tempfile
+import unittest
+
+import dateutil.tz
+
+from perceval.backend import Summary
+from perceval.checkpoint import CheckpointStore
+from perceval.errors import CheckpointError
+
+
+def make_summary(timestamps, offsets=None):
+    """Build a summary of a fetch with items updated on `timestamps`"""
+
+    summary = Summary()
+    offsets = offsets or [None] * len(timestamps)
+
+    for n, (ts, offset) in enumerate(zip(timestamps, offsets)):
+        item = {
+            'uuid': str(n),
+            'updated_on': ts
+        }
+        if offset is not None:
+            item['offset'] = offset
+        summary.update(item)
+
+    return summary
+
+
+def save_checkpoints(filepath, origin, nsaves):
+    """Save checkpoints of an origin; run by other processes"""
+
+    store = CheckpointStore(filepath)
+
+    for n in range(nsaves):
+        store.save('Backend', origin, 'issue', make_summary([1451606400.0], [n]))
+
+
+class TestCheckpointStore(unittest.TestCase):
+    """Unit tests for CheckpointStore class"""
+
+    def setUp(self):
+        self.test_path = tempfile.mkdtemp(prefix='perceval_')
+        self.filepath = os.path.join(self.test_path, 'checkpoints.json')
+
+    def tearDown(self):
+        shutil.rmtree(self.test_path)
+
+    def test_init(self):
+        """Test whether the store is initialized without creating the file"""
+
+        store = CheckpointStore(self.filepath)
+
+        self.assertEqual(store.filepath, self.filepath)
+        self.assertFalse(os.path.exists(self.filepath))
+        self.assertIsNone(store.load('Backend', 'http://example.com', 'issue'))
+
+    def test_save_and_load(self):
+        """Test whether a checkpoint is saved and loaded"""
+
+        store = CheckpointStore(self.filepath)
+        summary = make_summary([1451606400.0, 1451606460.0])
+
+        store.save('Backend', 'http://example.com', 'issue', summary)
+
+        expected_dt = datetime.datetime(2016, 1, 1, 0, 1, tzinfo=dateutil.tz.tzutc())
+
+        checkpoint = store.load('Backend', 'http://example.com', 'issue')
+        self.assertEqual(checkpoint['backend_name'], 'Backend')
+        self.assertEqual(checkpoint['origin'], 'http://example.com')
+        self.assertEqual(checkpoint['category'], 'issue')
+        self.assertEqual(checkpoint['from_date'], expected_dt)
+        self.assertIsNone(checkpoint['offset'])
+        self.assertEqual(checkpoint['last_uuid'], '1')
+        self.assertEqual(checkpoint['fetched'], 2)
+        self.assertIsInstance(checkpoint['saved'], datetime.datetime)
+
+        # Checkpoints are kept by a different store
+        store = CheckpointStore(self.filepath)
+        checkpoint = store.load('Backend', 'http://example.com', 'issue')
+        self.assertEqual(checkpoint['from_date'], expected_dt)
+
+    def test_save_offset(self):
+        """Test whether the last offset is saved"""
+
+        store = CheckpointStore(self.filepath)
+        summary = make_summary([1451606400.0, 1451606460.0], offsets=[10, 11])
+
+        store.save('Backend', 'http://example.com', 'issue', summary)
+
+        checkpoint = store.load('Backend', 'http://example.com', 'issue')
+        self.assertEqual(checkpoint['offset'], 11)
+
+    def test_save_newest_values(self):
+        """Test whether the newest date and highest offset are saved"""
+
+        store = CheckpointStore(self.filepath)
+        summary = make_summary([1451606460.0, 1451606400.0], offsets=[11, 10])
+
+        store.save('Backend', 'http://example.com', 'issue', summary)
+
+        expected_dt = datetime.datetime(2016, 1, 1, 0, 1, tzinfo=dateutil.tz.tzutc())
+
+        checkpoint = store.load('Backend', 'http://example.com', 'issue')
+        self.assertEqual(checkpoint['from_date'], expected_dt)
+        self.assertEqual(checkpoint['offset'], 11)
+
+    def test_keys(self):
+        """Test whether checkpoints are kept by backend, origin and category"""
+
+        store = CheckpointStore(self.filepath)
+
+        store.save('Backend', 'http://example.com', 'issue',
+                   make_summary([1451606400.0]))
+        store.save('Backend', 'http://example.com', 'pull_request',
+                   make_summary([1451606400.0, 1451606460.0]))
+        store.save('Backend', 'http://example.org', 'issue',
+                   make_summary([1451606400.0, 1451606460.0, 1451606520.0]))
+
+        self.assertEqual(store.load('Backend', 'http://example.com', 'issue')['fetched'], 1)
+        self.assertEqual(store.load('Backend', 'http://example.com', 'pull_request')['fetched'], 2)
+        self.assertEqual(store.load('Backend', 'http://example.org', 'issue')['fetched'], 3)
+        self.assertIsNone(store.load('OtherBackend', 'http://example.com', 'issue'))
+
+        # Saving again replaces the checkpoint
+        store.save('Backend', 'http://example.com', 'issue',
+                   make_summary([1451606400.0, 1451606460.0, 1451606520.0, 1451606580.0]))
+        self.assertEqual(store.load('Backend', 'http://example.com', 'issue')['fetched'], 4)
+
+        with open(self.filepath, 'r') as fd:
+            entries = json.load(fd)
+        self.assertEqual(len(entries), 3)
+
+    def test_remove(self):
+        """Test whether a checkpoint is removed"""
+
+        store = CheckpointStore(self.filepath)
+        store.save('Backend', 'http://example.com', 'issue',
+                   make_summary([1451606400.0]))
+        store.save('Backend', 'http://example.org', 'issue',
+                   make_summary([1451606400.0]))
+
+        store.remove('Backend', 'http://example.com', 'issue')
+        self.assertIsNone(store.load('Backend', 'http://example.com', 'issue'))
+        self.assertIsNotNone(store.load('Backend', 'http://example.org', 'issue'))
+
+        # Removing a checkpoint that does not exist does nothing
+        store.remove('Backend', 'http://example.com', 'issue')
+
+    def test_save_creates_dirs(self):
+        """Test whether the directories of the file are created"""
+
+        filepath = os.path.join(self.test_path, 'a', 'b', 'checkpoints.json')
+
+        store = CheckpointStore(filepath)
+        store.save('Backend', 'http://example.com', 'issue',
+                   make_summary([1451606400.0]))
+
+        self.assertTrue(os.path.exists(filepath))
+        self.assertListEqual(sorted(os.listdir(os.path.dirname(filepath))),
+                             ['checkpoints.json', 'checkpoints.json.lock'])
+
+    def test_save_processes(self):
+        """Test whether checkpoints saved by several processes at the same time are kept"""
+
+        origins = ['http://example.com/%s' % n for n in range(8)]
+
+        ctx = multiprocessing.get_context('fork')
+        processes = [ctx.Process(target=save_checkpoints, args=(self.filepath, origin, 30))
+                     for origin in origins]
+
+        for process in processes:
+            process.start()
+        for process in processes:
+            process.join()
+            self.assertEqual(process.exitcode, 0)
+
+        store = CheckpointStore(self.filepath)
+
+        for origin in origins:
+            checkpoint = store.load('Backend', origin, 'issue')
+            self.assertIsNotNone(checkpoint)
+            self.assertEqual(checkpoint['offset'], 29)
+
+    def test_invalid_file(self):
+        """Test whether an exception is raised when the file is not valid"""
+
+        with open(self.filepath, 'w') as fd:
+            fd.write('not a JSON file')
+
+        with self.assertRaisesRegex(CheckpointError, "invalid checkpoint file"):
+            _ = CheckpointStore(self.filepath)
+
+        with open(self.filepath, 'w') as fd:
+            fd.write('[1, 2, 3]')
+
+        with self.assertRaisesRegex(CheckpointError, "unexpected format"):
+            _ = CheckpointStore(self.filepath)
+
+
+if __name__ == "__main__":
+    unittest.main()
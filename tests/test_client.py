@@ -20,11 +20,16 @@
 #     Valerio Cosentino <valcos@bitergia.com>
 #
 
+import asyncio
+import http.server
+import json
 import os
 import shutil
+import threading
 import time
 import tempfile
 import unittest
+import unittest.mock
 
 import httpretty
 import pkg_resources
@@ -35,7 +40,15 @@ pkg_resources.declare_namespace('perceval.backends')
 from grimoirelab_toolkit.datetime import datetime_utcnow
 
 from perceval.archive import Archive
-from perceval.client import HttpClient, RateLimitHandler
+from perceval.cache import ResponseCache
+import perceval.client
+from perceval.client import (HttpClient,
+                             HTTP2Adapter,
+                             RateLimitHandler,
+                             RatePacer,
+                             SharedPoolAdapter)
+from perceval.errors import HttpClientError, RateLimitError
+from perceval.metrics import FetchMetrics
 
 
 CLIENT_API_URL = "https://gateway.marvel.com/v1/"
@@ -57,19 +70,25 @@ class MockedClient(HttpClient, RateLimitHandler):
                  min_rate_to_sleep=RateLimitHandler.MIN_RATE_LIMIT,
                  rate_limit_header=RateLimitHandler.RATE_LIMIT_HEADER,
                  rate_limit_reset_header=RateLimitHandler.RATE_LIMIT_RESET_HEADER,
-                 define_calculate_time_to_reset=True,
-                 archive=None, from_archive=False, sanitize=False):
+                 define_calculate_time_to_reset=True, rate_pacer=None,
+                 archive=None, from_archive=False, sanitize=False,
+                 pool_connections=HttpClient.DEFAULT_POOL_CONNECTIONS,
+                 pool_maxsize=None, http2=False, metrics=None,
+                 prefetch_depth=HttpClient.PREFETCH_DEPTH):
 
         self.define_calculate_time_to_reset = define_calculate_time_to_reset
         MockedClient.sanitize = sanitize
         super().__init__(base_url, sleep_time=sleep_time, max_retries=max_retries,
                          extra_status_forcelist=extra_status_forcelist,
                          extra_retry_after_status=extra_retry_after_status,
-                         extra_headers=extra_headers, archive=archive, from_archive=from_archive)
+                         extra_headers=extra_headers, archive=archive, from_archive=from_archive,
+                         pool_connections=pool_connections, pool_maxsize=pool_maxsize, http2=http2,
+                         metrics=metrics, prefetch_depth=prefetch_depth)
         super().setup_rate_limit_handler(sleep_for_rate=sleep_for_rate,
                                          min_rate_to_sleep=min_rate_to_sleep,
                                          rate_limit_header=rate_limit_header,
-                                         rate_limit_reset_header=rate_limit_reset_header)
+                                         rate_limit_reset_header=rate_limit_reset_header,
+                                         rate_pacer=rate_pacer)
 
     def calculate_time_to_reset(self):
         if self.define_calculate_time_to_reset:
@@ -106,8 +125,17 @@ class TestHttpClient(unittest.TestCase):
         self.assertEqual(client.raise_on_status, HttpClient.DEFAULT_RAISE_ON_STATUS)
         self.assertEqual(client.respect_retry_after_header, HttpClient.DEFAULT_RESPECT_RETRY_AFTER_HEADER)
         self.assertEqual(client.sleep_time, HttpClient.DEFAULT_SLEEP_TIME)
+        self.assertIsNone(client.cache)
+        self.assertEqual(client.cache_hits, 0)
+        self.assertEqual(client.cache_misses, 0)
+        self.assertEqual(client.cache_bytes_saved, 0)
+        self.assertEqual(client.pool_connections, HttpClient.DEFAULT_POOL_CONNECTIONS)
+        self.assertEqual(client.pool_maxsize, HttpClient.MAX_CONCURRENT_REQUESTS)
+        self.assertFalse(client.http2)
+        self.assertIsNone(client.metrics)
 
         self.assertIsNotNone(client.session)
+        self.assertIsInstance(client.session.get_adapter(CLIENT_API_URL), SharedPoolAdapter)
         self.assertEqual(client.session.headers['User-Agent'], HttpClient.DEFAULT_HEADERS.get('User-Agent'))
 
         self.assertEqual(client.rate_limit, None)
@@ -132,6 +160,74 @@ class TestHttpClient(unittest.TestCase):
         self.assertTrue(extra_status in client.status_forcelist)
         self.assertTrue(extra_status in client.retry_after_status)
 
+    def test_shared_pools(self):
+        """Test whether clients with the same pool settings share their connections"""
+
+        client = MockedClient(CLIENT_API_URL)
+        other = MockedClient(CLIENT_API_URL, max_retries=1)
+        sized = MockedClient(CLIENT_API_URL, pool_connections=2, pool_maxsize=4)
+
+        self.assertEqual(sized.pool_connections, 2)
+        self.assertEqual(sized.pool_maxsize, 4)
+
+        adapter = client.session.get_adapter(CLIENT_API_URL)
+        other_adapter = other.session.get_adapter(CLIENT_API_URL)
+        sized_adapter = sized.session.get_adapter(CLIENT_API_URL)
+
+        self.assertIs(adapter.poolmanager, other_adapter.poolmanager)
+        self.assertIsNot(adapter.poolmanager, sized_adapter.poolmanager)
+        self.assertEqual(sized_adapter.poolmanager.connection_pool_kw['maxsize'], 4)
+
+        # Each client keeps its own retries
+        self.assertEqual(adapter.max_retries.total, HttpClient.MAX_RETRIES)
+        self.assertEqual(other_adapter.max_retries.total, 1)
+
+        # Closing a session does not close the shared pools
+        client.session.close()
+        self.assertIs(other_adapter.poolmanager, adapter.poolmanager)
+
+    def test_shared_pools_closed(self):
+        """Test whether shared pools are closed when no adapter uses them"""
+
+        client = MockedClient(CLIENT_API_URL, pool_connections=3, pool_maxsize=7)
+        other = MockedClient(CLIENT_API_URL, pool_connections=3, pool_maxsize=7)
+
+        key = client.session.get_adapter(CLIENT_API_URL)._pool_key
+        manager, nadapters = SharedPoolAdapter._pool_managers[key]
+        self.assertEqual(nadapters, 2)
+
+        # Sessions close their adapter for each scheme
+        client.session.close()
+        self.assertEqual(SharedPoolAdapter._pool_managers[key][1], 1)
+
+        with unittest.mock.patch.object(manager, 'clear') as mock_clear:
+            other.session.close()
+            mock_clear.assert_called_once_with()
+
+        self.assertNotIn(key, SharedPoolAdapter._pool_managers)
+
+    def test_shared_pools_close_all(self):
+        """Test whether every shared pool is closed"""
+
+        client = MockedClient(CLIENT_API_URL, pool_connections=3, pool_maxsize=8)
+        adapter = client.session.get_adapter(CLIENT_API_URL)
+
+        SharedPoolAdapter.close_all()
+        self.assertDictEqual(SharedPoolAdapter._pool_managers, {})
+
+        # Adapters closed later do not fail
+        adapter.close()
+
+        client = MockedClient(CLIENT_API_URL, pool_connections=3, pool_maxsize=8)
+        self.assertEqual(SharedPoolAdapter._pool_managers[(3, 8, False, ())][1], 1)
+
+    @unittest.mock.patch('perceval.client.httpx', None)
+    def test_http2_not_supported(self):
+        """Test whether an exception is raised when httpx is not installed"""
+
+        with self.assertRaisesRegex(HttpClientError, "httpx package not found"):
+            _ = MockedClient(CLIENT_API_URL, http2=True)
+
     @httpretty.activate
     def test_close_session(self):
         """Test wheter the session is properly closed"""
@@ -293,6 +389,317 @@ class TestHttpClient(unittest.TestCase):
             with self.assertRaises(requests.exceptions.RetryError):
                 _ = client.fetch(url)
 
+    @httpretty.activate
+    def test_fetch_metrics(self):
+        """Test whether requests and archive writes are traced"""
+
+        archive_path = os.path.join(self.test_path, 'myarchive')
+        archive = Archive.create(archive_path)
+
+        httpretty.register_uri(httpretty.GET,
+                               CLIENT_SUPERMAN_URL,
+                               body="good",
+                               status=200)
+        httpretty.register_uri(httpretty.GET,
+                               CLIENT_SPIDERMAN_URL,
+                               body="bad",
+                               status=404)
+
+        metrics = FetchMetrics()
+        client = MockedClient(CLIENT_API_URL, sleep_time=0.1, max_retries=1,
+                              archive=archive, metrics=metrics)
+
+        _ = client.fetch(CLIENT_SUPERMAN_URL)
+        _ = client.fetch(CLIENT_SUPERMAN_URL, payload={'page': 2})
+
+        with self.assertRaises(requests.exceptions.HTTPError):
+            _ = client.fetch(CLIENT_SPIDERMAN_URL)
+
+        # Requests to the same resource type are grouped
+        self.assertEqual(len(metrics.endpoints), 1)
+
+        characters = metrics.endpoints[('GET', 'gateway.marvel.com/v1/public/characters/:id')]
+        self.assertEqual(characters['requests'], 3)
+        self.assertEqual(characters['errors'], 1)
+        self.assertEqual(characters['retries'], 0)
+        self.assertEqual(characters['bytes'], 11)
+        self.assertEqual(characters['latency'].count, 3)
+
+        # Errors are archived too
+        self.assertEqual(metrics.stages['archive'].count, 3)
+
+        # Nothing is recorded when data comes from the archive
+        metrics = FetchMetrics()
+        client = MockedClient(CLIENT_API_URL, archive=archive,
+                              from_archive=True, metrics=metrics)
+        _ = client.fetch(CLIENT_SUPERMAN_URL)
+
+        self.assertDictEqual(metrics.endpoints, {})
+        self.assertDictEqual(metrics.stages, {})
+
+    @staticmethod
+    def setup_pages(npages, error_page=None):
+        """Register a paginated resource; pages are selected with the `page` parameter"""
+
+        def request_callback(request, uri, headers):
+            # The last request may be a different one sent at the same time
+            page = int(request.querystring['page'][0])
+            status = 404 if page == error_page else 200
+            return status, headers, 'page %s' % page
+
+        httpretty.register_uri(httpretty.GET,
+                               CLIENT_SUPERMAN_URL,
+                               responses=[httpretty.Response(body=request_callback)
+                                          for _ in range(npages)])
+
+    @staticmethod
+    def next_page(npages):
+        def next_page(response):
+            page = int(response.text.split()[1])
+            return (CLIENT_SUPERMAN_URL, {'page': page + 1}) if page < npages else None
+
+        return next_page
+
+    @staticmethod
+    def wait_for_requests(nrequests, timeout=5):
+        """Wait until the number of requests received is reached"""
+
+        start = time.time()
+
+        while len(httpretty.HTTPretty.latest_requests) < nrequests and time.time() - start < timeout:
+            time.sleep(0.01)
+
+        return len(httpretty.HTTPretty.latest_requests)
+
+    @httpretty.activate
+    def test_fetch_pages(self):
+        """Test whether the next pages are requested while a page is consumed"""
+
+        self.setup_pages(4)
+
+        client = MockedClient(CLIENT_API_URL, sleep_time=0.1, max_retries=1)
+        self.assertEqual(client.prefetch_depth, 1)
+
+        pages = client.fetch_pages(CLIENT_SUPERMAN_URL, self.next_page(4), payload={'page': 1})
+
+        response = next(pages)
+        self.assertEqual(response.text, 'page 1')
+
+        # The second page is requested in advance, but not the third one
+        self.assertEqual(self.wait_for_requests(2), 2)
+        time.sleep(0.1)
+        self.assertEqual(len(httpretty.HTTPretty.latest_requests), 2)
+
+        texts = [response.text for response in pages]
+        self.assertListEqual(texts, ['page 2', 'page 3', 'page 4'])
+
+        requests_sent = httpretty.HTTPretty.latest_requests
+        self.assertEqual(len(requests_sent), 4)
+        self.assertListEqual([req.querystring['page'][0] for req in requests_sent],
+                             ['1', '2', '3', '4'])
+
+    @httpretty.activate
+    def test_fetch_pages_depth(self):
+        """Test whether the number of pages requested in advance is set"""
+
+        self.setup_pages(5)
+
+        client = MockedClient(CLIENT_API_URL, sleep_time=0.1, max_retries=1)
+
+        pages = client.fetch_pages(CLIENT_SUPERMAN_URL, self.next_page(5),
+                                   payload={'page': 1}, depth=3)
+        _ = next(pages)
+
+        self.assertEqual(self.wait_for_requests(4), 4)
+        time.sleep(0.1)
+        self.assertEqual(len(httpretty.HTTPretty.latest_requests), 4)
+        pages.close()
+
+        # Pages are fetched in sequence when depth is 0
+        httpretty.reset()
+        self.setup_pages(3)
+
+        pages = client.fetch_pages(CLIENT_SUPERMAN_URL, self.next_page(3),
+                                   payload={'page': 1}, depth=0)
+        _ = next(pages)
+
+        time.sleep(0.1)
+        self.assertEqual(len(httpretty.HTTPretty.latest_requests), 1)
+        self.assertListEqual([response.text for response in pages], ['page 2', 'page 3'])
+
+    @httpretty.activate
+    def test_fetch_pages_single_page(self):
+        """Test whether no background thread is started when there is only one page"""
+
+        self.setup_pages(1)
+
+        client = MockedClient(CLIENT_API_URL, sleep_time=0.1, max_retries=1, prefetch_depth=2)
+        self.assertEqual(client.prefetch_depth, 2)
+
+        with unittest.mock.patch.object(client, '_prefetch_pages') as mock_prefetch:
+            pages = client.fetch_pages(CLIENT_SUPERMAN_URL, self.next_page(1), payload={'page': 1})
+            self.assertListEqual([response.text for response in pages], ['page 1'])
+            mock_prefetch.assert_not_called()
+
+        self.assertEqual(len(httpretty.HTTPretty.latest_requests), 1)
+
+    @httpretty.activate
+    def test_fetch_pages_close(self):
+        """Test whether no more pages are requested once the generator is closed"""
+
+        self.setup_pages(4)
+
+        client = MockedClient(CLIENT_API_URL, sleep_time=0.1, max_retries=1)
+
+        pages = client.fetch_pages(CLIENT_SUPERMAN_URL, self.next_page(4), payload={'page': 1})
+        _ = next(pages)
+        self.wait_for_requests(2)
+        pages.close()
+
+        time.sleep(0.1)
+        self.assertEqual(len(httpretty.HTTPretty.latest_requests), 2)
+
+    @httpretty.activate
+    def test_fetch_pages_error(self):
+        """Test whether errors are raised when the failed page is reached"""
+
+        self.setup_pages(3, error_page=2)
+
+        client = MockedClient(CLIENT_API_URL, sleep_time=0.1, max_retries=1)
+
+        pages = client.fetch_pages(CLIENT_SUPERMAN_URL, self.next_page(3), payload={'page': 1})
+        self.assertEqual(next(pages).text, 'page 1')
+
+        with self.assertRaises(requests.exceptions.HTTPError):
+            _ = next(pages)
+
+        # Errors found getting the next page are raised too
+        def next_page(response):
+            raise ValueError("invalid page")
+
+        pages = client.fetch_pages(CLIENT_SUPERMAN_URL, next_page, payload={'page': 1})
+        self.assertEqual(next(pages).text, 'page 1')
+
+        with self.assertRaisesRegex(ValueError, "invalid page"):
+            _ = next(pages)
+
+    @httpretty.activate
+    def test_fetch_pages_archive(self):
+        """Test whether pages are archived in the order they are consumed"""
+
+        archive_path = os.path.join(self.test_path, 'myarchive')
+        archive = Archive.create(archive_path)
+
+        self.setup_pages(3)
+        httpretty.register_uri(httpretty.GET,
+                               CLIENT_BATMAN_URL,
+                               body='item',
+                               status=200)
+
+        client = MockedClient(CLIENT_API_URL, sleep_time=0.1, max_retries=1, archive=archive)
+
+        with unittest.mock.patch.object(archive, 'store', wraps=archive.store) as store:
+            for response in client.fetch_pages(CLIENT_SUPERMAN_URL, self.next_page(3),
+                                               payload={'page': 1}, depth=2):
+                page = response.text.split()[1]
+                _ = client.fetch(CLIENT_BATMAN_URL, payload={'page': page})
+
+        stored = [(call[0][0], call[0][1]['page']) for call in store.call_args_list]
+        expected = [
+            (CLIENT_SUPERMAN_URL, 1), (CLIENT_BATMAN_URL, '1'),
+            (CLIENT_SUPERMAN_URL, 2), (CLIENT_BATMAN_URL, '2'),
+            (CLIENT_SUPERMAN_URL, 3), (CLIENT_BATMAN_URL, '3')
+        ]
+        self.assertListEqual(stored, expected)
+
+        # The pages can be replayed
+        client = MockedClient(CLIENT_API_URL, sleep_time=0.1, max_retries=1, archive=archive, from_archive=True)
+
+        pages = client.fetch_pages(CLIENT_SUPERMAN_URL, self.next_page(3), payload={'page': 1})
+        self.assertListEqual([response.text for response in pages], ['page 1', 'page 2', 'page 3'])
+
+    @httpretty.activate
+    def test_fetch_json_stream(self):
+        """Test whether the elements of a JSON array are decoded while they are downloaded"""
+
+        body = json.dumps({'total': 3, 'items': [{'id': x} for x in range(3)], 'more': False})
+        httpretty.register_uri(httpretty.GET,
+                               CLIENT_SUPERMAN_URL,
+                               body=body,
+                               status=200)
+
+        client = MockedClient(CLIENT_API_URL, sleep_time=0.1, max_retries=1)
+
+        stream = client.fetch_json_stream(CLIENT_SUPERMAN_URL, path=['items'], payload={'page': 1})
+
+        self.assertListEqual(list(stream), [{'id': 0}, {'id': 1}, {'id': 2}])
+        self.assertDictEqual(stream.document, {'total': 3, 'more': False})
+        self.assertDictEqual(httpretty.last_request().querystring, {'page': ['1']})
+
+    @httpretty.activate
+    def test_fetch_json_stream_archive(self):
+        """Test whether streamed responses are archived and replayed"""
+
+        archive_path = os.path.join(self.test_path, 'myarchive')
+        archive = Archive.create(archive_path)
+
+        body = json.dumps({'total': 3, 'items': [{'id': x} for x in range(3)]})
+        httpretty.register_uri(httpretty.GET,
+                               CLIENT_SUPERMAN_URL,
+                               body=body,
+                               status=200)
+        httpretty.register_uri(httpretty.GET,
+                               CLIENT_SPIDERMAN_URL,
+                               body="bad",
+                               status=404)
+
+        client = MockedClient(CLIENT_API_URL, sleep_time=0.1, max_retries=1, archive=archive)
+
+        stream = client.fetch_json_stream(CLIENT_SUPERMAN_URL, path=['items'], payload={'page': 1})
+        self.assertEqual(len(list(stream)), 3)
+
+        # Streams closed before reaching their end are archived too
+        stream = client.fetch_json_stream(CLIENT_SUPERMAN_URL, path=['items'], payload={'page': 2})
+        self.assertEqual(next(stream), {'id': 0})
+        stream.close()
+
+        with self.assertRaises(requests.exceptions.HTTPError):
+            _ = client.fetch_json_stream(CLIENT_SPIDERMAN_URL, path=['items'])
+
+        # Archived responses can be replayed with or without streams
+        client = MockedClient(CLIENT_API_URL, sleep_time=0.1, max_retries=1, archive=archive, from_archive=True)
+
+        stream = client.fetch_json_stream(CLIENT_SUPERMAN_URL, path=['items'], payload={'page': 1})
+        self.assertListEqual(list(stream), [{'id': 0}, {'id': 1}, {'id': 2}])
+        self.assertDictEqual(stream.document, {'total': 3})
+
+        response = client.fetch(CLIENT_SUPERMAN_URL, payload={'page': 2})
+        self.assertEqual(response.text, body)
+
+        with self.assertRaises(requests.exceptions.HTTPError):
+            _ = client.fetch_json_stream(CLIENT_SPIDERMAN_URL, path=['items'])
+
+    @httpretty.activate
+    def test_fetch_json_stream_rate_limit(self):
+        """Test whether streamed requests update the rate limit"""
+
+        httpretty.register_uri(httpretty.GET,
+                               CLIENT_SUPERMAN_URL,
+                               body='[1, 2]',
+                               status=200,
+                               forcing_headers={
+                                   'X-RateLimit-Remaining': '20',
+                                   'X-RateLimit-Reset': '15'
+                               })
+
+        client = MockedClient(CLIENT_API_URL, sleep_time=0.1, max_retries=1,
+                              min_rate_to_sleep=10)
+
+        stream = client.fetch_json_stream(CLIENT_SUPERMAN_URL)
+
+        self.assertListEqual(list(stream), [1, 2])
+        self.assertEqual(client.rate_limit, 20)
+
     @httpretty.activate
     def test_fetch_from_archive(self):
         """Test whether responses are correctly fecthed from an archive"""
@@ -336,6 +743,137 @@ class TestHttpClient(unittest.TestCase):
         with self.assertRaises(requests.exceptions.HTTPError):
             _ = client.fetch(CLIENT_SPIDERMAN_URL)
 
+    @httpretty.activate
+    def test_fetch_cache(self):
+        """Test whether responses not modified are taken from the cache"""
+
+        archive = Archive.create(os.path.join(self.test_path, 'myarchive'))
+        cache = ResponseCache(os.path.join(self.test_path, 'http_cache.db'))
+
+        httpretty.register_uri(httpretty.GET,
+                               CLIENT_SUPERMAN_URL,
+                               responses=[
+                                   httpretty.Response(body="good", status=200,
+                                                      forcing_headers={'ETag': '"abcd"'}),
+                                   httpretty.Response(body="", status=304,
+                                                      forcing_headers={'ETag': '"abcd"',
+                                                                       'X-Extra': 'new'})
+                               ])
+
+        client = MockedClient(CLIENT_API_URL, sleep_time=0.1, max_retries=1)
+        client.cache = cache
+
+        response = client.fetch(CLIENT_SUPERMAN_URL, payload={'page': 1})
+        self.assertEqual(response.text, "good")
+        self.assertNotIn('If-None-Match', httpretty.last_request().headers)
+        self.assertEqual(client.cache_hits, 0)
+        self.assertEqual(client.cache_misses, 1)
+
+        # The second time, the response is revalidated
+        client = MockedClient(CLIENT_API_URL, sleep_time=0.1, max_retries=1, archive=archive)
+        client.cache = cache
+
+        response = client.fetch(CLIENT_SUPERMAN_URL, payload={'page': 1})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.text, "good")
+        self.assertEqual(response.headers['X-Extra'], 'new')
+        self.assertEqual(httpretty.last_request().headers['If-None-Match'], '"abcd"')
+        self.assertEqual(client.cache_hits, 1)
+        self.assertEqual(client.cache_misses, 0)
+        self.assertEqual(client.cache_bytes_saved, 4)
+
+        # Responses taken from the cache are archived as usual
+        client = MockedClient(CLIENT_API_URL, sleep_time=0.1, max_retries=1, archive=archive, from_archive=True)
+        response = client.fetch(CLIENT_SUPERMAN_URL, payload={'page': 1})
+        self.assertEqual(response.text, "good")
+
+    @httpretty.activate
+    def test_fetch_json_stream_cache(self):
+        """Test whether streamed responses are stored in the cache and revalidated"""
+
+        archive = Archive.create(os.path.join(self.test_path, 'myarchive'))
+        cache = ResponseCache(os.path.join(self.test_path, 'http_cache.db'))
+
+        body = json.dumps({'total': 3, 'items': [{'id': x} for x in range(3)]})
+        httpretty.register_uri(httpretty.GET,
+                               CLIENT_SUPERMAN_URL,
+                               responses=[
+                                   httpretty.Response(body=body, status=200,
+                                                      forcing_headers={'ETag': '"abcd"'}),
+                                   httpretty.Response(body="", status=304,
+                                                      forcing_headers={'ETag': '"abcd"'})
+                               ])
+
+        client = MockedClient(CLIENT_API_URL, sleep_time=0.1, max_retries=1)
+        client.cache = cache
+
+        # The body is stored once it is read
+        stream = client.fetch_json_stream(CLIENT_SUPERMAN_URL, path=['items'])
+        self.assertEqual(cache.size, 0)
+        self.assertEqual(len(list(stream)), 3)
+        self.assertGreater(cache.size, 0)
+        self.assertEqual(client.cache_misses, 1)
+
+        client = MockedClient(CLIENT_API_URL, sleep_time=0.1, max_retries=1, archive=archive)
+        client.cache = cache
+
+        stream = client.fetch_json_stream(CLIENT_SUPERMAN_URL, path=['items'])
+        self.assertListEqual(list(stream), [{'id': 0}, {'id': 1}, {'id': 2}])
+        self.assertDictEqual(stream.document, {'total': 3})
+        self.assertEqual(httpretty.last_request().headers['If-None-Match'], '"abcd"')
+        self.assertEqual(client.cache_hits, 1)
+        self.assertEqual(client.cache_bytes_saved, len(body))
+
+        # Responses taken from the cache are archived as usual
+        client = MockedClient(CLIENT_API_URL, sleep_time=0.1, max_retries=1, archive=archive, from_archive=True)
+        response = client.fetch(CLIENT_SUPERMAN_URL)
+        self.assertEqual(response.text, body)
+
+    @httpretty.activate
+    def test_fetch_stream_not_cached(self):
+        """Test whether streamed responses read by the caller are not cached"""
+
+        cache = ResponseCache(os.path.join(self.test_path, 'http_cache.db'))
+
+        httpretty.register_uri(httpretty.GET,
+                               CLIENT_SUPERMAN_URL,
+                               body="good", status=200,
+                               forcing_headers={'ETag': '"abcd"'})
+
+        client = MockedClient(CLIENT_API_URL, sleep_time=0.1, max_retries=1)
+        client.cache = cache
+
+        response = client.fetch(CLIENT_SUPERMAN_URL, stream=True)
+        self.assertEqual(response.raw.read(), b"good")
+
+        self.assertEqual(cache.size, 0)
+        self.assertEqual(client.cache_misses, 0)
+
+    @httpretty.activate
+    def test_fetch_cache_not_cacheable(self):
+        """Test whether only GET requests without validators use the cache"""
+
+        cache = ResponseCache(os.path.join(self.test_path, 'http_cache.db'))
+
+        httpretty.register_uri(httpretty.POST,
+                               CLIENT_SUPERMAN_URL,
+                               body="good", status=200,
+                               forcing_headers={'ETag': '"abcd"'})
+        httpretty.register_uri(httpretty.GET,
+                               CLIENT_BATMAN_URL,
+                               body="good", status=200,
+                               forcing_headers={'ETag': '"abcd"'})
+
+        client = MockedClient(CLIENT_API_URL, sleep_time=0.1, max_retries=1)
+        client.cache = cache
+
+        client.fetch(CLIENT_SUPERMAN_URL, method=HttpClient.POST)
+        client.fetch(CLIENT_BATMAN_URL, headers={'If-None-Match': '"efgh"'})
+
+        self.assertEqual(cache.size, 0)
+        self.assertEqual(client.cache_hits, 0)
+        self.assertEqual(client.cache_misses, 0)
+
     def test_sanitize_for_archive(self):
         """Test whether the default sanitize method works properly"""
 
@@ -346,6 +884,317 @@ class TestHttpClient(unittest.TestCase):
         self.assertEqual(payload, "payload")
 
 
+class StandInRequestHandler(http.server.BaseHTTPRequestHandler):
+    """Handler of the stand-in HTTP server.
+
+    Every response is delayed `DELAY` seconds. Paths starting with
+    '/flaky' fail with a 503 status the first time they are requested
+    while those starting with '/notfound' always return a 404 status.
+    The remaining rate limit is set by paths like '/limit/<remaining>'.
+    """
+    DELAY = 0.2
+
+    requests = []
+    lock = threading.Lock()
+
+    def do_GET(self):
+        with self.lock:
+            attempt = sum(1 for path in self.requests if path == self.path) + 1
+            self.requests.append(self.path)
+
+        remaining = self.path.split('/')[-1] if self.path.startswith('/limit') else '100'
+
+        time.sleep(self.DELAY)
+
+        if self.path.startswith('/notfound'):
+            status = 404
+        elif self.path.startswith('/flaky') and attempt == 1:
+            status = 503
+        else:
+            status = 200
+
+        body = ("%s %s" % (self.path, attempt)).encode('utf-8')
+
+        self.send_response(status)
+        self.send_header('Content-Length', str(len(body)))
+        self.send_header(RateLimitHandler.RATE_LIMIT_HEADER, remaining)
+        self.send_header(RateLimitHandler.RATE_LIMIT_RESET_HEADER, '0')
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class TestHttpClientAsync(unittest.TestCase):
+    """Tests for the concurrent requests of HttpClient using a stand-in server"""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.server = http.server.ThreadingHTTPServer(('127.0.0.1', 0), StandInRequestHandler)
+        cls.server.daemon_threads = True
+        cls.base_url = 'http://127.0.0.1:%s' % cls.server.server_address[1]
+
+        cls.thread = threading.Thread(target=cls.server.serve_forever, daemon=True)
+        cls.thread.start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+
+    def setUp(self):
+        self.test_path = tempfile.mkdtemp(prefix='perceval_')
+        StandInRequestHandler.requests = []
+
+    def tearDown(self):
+        shutil.rmtree(self.test_path)
+
+    def urls(self, prefix, n):
+        return ['%s/%s/%s' % (self.base_url, prefix, x) for x in range(n)]
+
+    def test_fetch_many(self):
+        """Test whether concurrent requests are faster than sequential ones"""
+
+        client = MockedClient(self.base_url, sleep_time=0.1)
+        urls = self.urls('items', 10)
+
+        before = time.time()
+        expected = [client.fetch(url).text for url in urls]
+        sequential = time.time() - before
+
+        before = time.time()
+        responses = client.fetch_many(urls)
+        concurrent = time.time() - before
+
+        self.assertListEqual([response.text for response in responses],
+                             [text.replace(' 1', ' 2') for text in expected])
+
+        # Ten requests take almost as long as a single one
+        self.assertGreaterEqual(sequential, 10 * StandInRequestHandler.DELAY)
+        self.assertLess(concurrent, sequential / 3)
+
+    def test_fetch_many_empty(self):
+        """Test whether an empty list of URLs is fetched"""
+
+        client = MockedClient(self.base_url)
+        self.assertListEqual(client.fetch_many([]), [])
+
+    def test_fetch_many_retry(self):
+        """Test whether failed requests are retried as in sequential requests"""
+
+        client = MockedClient(self.base_url, sleep_time=0.1,
+                              extra_status_forcelist=[503])
+        urls = self.urls('flaky', 5)
+
+        responses = client.fetch_many(urls)
+
+        for url, response in zip(urls, responses):
+            path = url[len(self.base_url):]
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response.text, "%s 2" % path)
+
+        self.assertEqual(len(StandInRequestHandler.requests), 10)
+
+    def test_fetch_many_metrics(self):
+        """Test whether retries and failures of concurrent requests are traced"""
+
+        metrics = FetchMetrics()
+        client = MockedClient(self.base_url, sleep_time=0.1,
+                              extra_status_forcelist=[503], metrics=metrics)
+
+        _ = client.fetch_many(self.urls('flaky', 3))
+
+        with self.assertRaises(requests.exceptions.HTTPError):
+            _ = client.fetch_many(self.urls('notfound', 2))
+
+        host = self.base_url[len('http://'):]
+
+        flaky = metrics.endpoints[('GET', host + '/flaky/:id')]
+        self.assertEqual(flaky['requests'], 3)
+        self.assertEqual(flaky['retries'], 3)
+        self.assertEqual(flaky['errors'], 0)
+        self.assertGreaterEqual(flaky['latency'].min, 2 * StandInRequestHandler.DELAY)
+
+        notfound = metrics.endpoints[('GET', host + '/notfound/:id')]
+        self.assertEqual(notfound['requests'], 2)
+        self.assertEqual(notfound['retries'], 0)
+        self.assertEqual(notfound['errors'], 2)
+
+        # Requests without response are traced as failed
+        client = MockedClient('http://127.0.0.1:1', sleep_time=0.1, max_retries=1,
+                              metrics=metrics)
+
+        with self.assertRaises(requests.exceptions.ConnectionError):
+            _ = client.fetch('http://127.0.0.1:1/items/1')
+
+        failed = metrics.endpoints[('GET', '127.0.0.1:1/items/:id')]
+        self.assertEqual(failed['requests'], 1)
+        self.assertEqual(failed['errors'], 1)
+
+    @unittest.skipIf(perceval.client.httpx is None, "httpx not installed")
+    def test_fetch_http2(self):
+        """Test whether requests are sent and retried by the HTTP/2 transport"""
+
+        metrics = FetchMetrics()
+        client = MockedClient(self.base_url, sleep_time=0.1, http2=True,
+                              extra_status_forcelist=[503], metrics=metrics)
+        self.assertIsInstance(client.session.get_adapter(self.base_url), HTTP2Adapter)
+
+        response = client.fetch(self.base_url + '/items/1')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.text, "/items/1 1")
+        self.assertEqual(response.headers[RateLimitHandler.RATE_LIMIT_HEADER], '100')
+
+        response = client.fetch(self.base_url + '/flaky/1')
+        self.assertEqual(response.text, "/flaky/1 2")
+
+        host = self.base_url[len('http://'):]
+        self.assertEqual(metrics.endpoints[('GET', host + '/flaky/:id')]['retries'], 1)
+
+        with self.assertRaises(requests.exceptions.HTTPError):
+            _ = client.fetch(self.base_url + '/notfound/1')
+
+        responses = client.fetch_many(self.urls('others', 3))
+        self.assertListEqual([response.text for response in responses],
+                             ["/others/%s 1" % x for x in range(3)])
+
+        # Clients with the same settings share the connections
+        other = MockedClient(self.base_url, http2=True)
+        self.assertIs(other.session.get_adapter(self.base_url)._get_client(True, None),
+                      client.session.get_adapter(self.base_url)._get_client(True, None))
+
+    @unittest.skipIf(perceval.client.httpx is None, "httpx not installed")
+    def test_fetch_http2_proxy(self):
+        """Test whether the HTTP/2 transport sends the requests through the proxies"""
+
+        # The stand-in server acts as the proxy, so it receives the whole URL
+        client = MockedClient(self.base_url, sleep_time=0.1, http2=True)
+        client.session.proxies = {'http': self.base_url}
+
+        response = client.fetch('http://perceval.example/items/1')
+        self.assertEqual(response.text, "http://perceval.example/items/1 1")
+        self.assertListEqual(StandInRequestHandler.requests, ['http://perceval.example/items/1'])
+
+    @unittest.skipIf(perceval.client.httpx is None, "httpx not installed")
+    def test_fetch_http2_stream(self):
+        """Test whether the HTTP/2 transport reads the body of streamed requests when it is consumed"""
+
+        client = MockedClient(self.base_url, sleep_time=0.1, http2=True,
+                              extra_status_forcelist=[503])
+
+        response = client.session.get(self.base_url + '/flaky/1', stream=True)
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(response.raw.closed)
+
+        chunks = list(response.iter_content(chunk_size=4))
+        self.assertEqual(b''.join(chunks), b"/flaky/1 2")
+        self.assertEqual(len(chunks), 3)
+
+        response.close()
+        self.assertTrue(response.raw.closed)
+
+    @unittest.skipIf(perceval.client.httpx is None, "httpx not installed")
+    def test_fetch_http2_retry_error(self):
+        """Test whether an exception is raised when the HTTP/2 transport runs out of retries"""
+
+        client = MockedClient(self.base_url, sleep_time=0.1, max_retries=1,
+                              http2=True, extra_status_forcelist=[404])
+
+        with self.assertRaises(requests.exceptions.RetryError):
+            _ = client.fetch(self.base_url + '/notfound/1')
+
+        self.assertEqual(len(StandInRequestHandler.requests), 2)
+
+        client = MockedClient('http://127.0.0.1:1', sleep_time=0.1, max_retries=1, http2=True)
+
+        with self.assertRaises(requests.exceptions.ConnectionError):
+            _ = client.fetch('http://127.0.0.1:1/items/1')
+
+    def test_fetch_many_http_error(self):
+        """Test whether HTTP errors are raised after all requests are completed"""
+
+        archive_path = os.path.join(self.test_path, 'myarchive')
+        archive = Archive.create(archive_path)
+
+        client = MockedClient(self.base_url, archive=archive)
+        urls = self.urls('items', 3) + self.urls('notfound', 1) + self.urls('others', 3)
+
+        with self.assertRaises(requests.exceptions.HTTPError):
+            _ = client.fetch_many(urls)
+
+        # The responses of every request were archived
+        client = MockedClient(self.base_url, archive=archive, from_archive=True)
+
+        for url in urls[:3] + urls[4:]:
+            self.assertEqual(client.fetch(url).status_code, 200)
+
+        with self.assertRaises(requests.exceptions.HTTPError):
+            _ = client.fetch(urls[3])
+
+    def test_fetch_many_from_archive(self):
+        """Test whether concurrent requests are stored and retrieved from an archive"""
+
+        archive_path = os.path.join(self.test_path, 'myarchive')
+        archive = Archive.create(archive_path)
+
+        client = MockedClient(self.base_url, archive=archive)
+        urls = self.urls('items', 5)
+
+        responses = client.fetch_many(urls)
+
+        client = MockedClient(self.base_url, archive=archive, from_archive=True)
+        archived = client.fetch_many(urls)
+
+        self.assertListEqual([response.text for response in archived],
+                             [response.text for response in responses])
+        self.assertEqual(len(StandInRequestHandler.requests), 5)
+
+    def test_fetch_many_rate_limit(self):
+        """Test whether the rate limit is updated by concurrent requests"""
+
+        client = MockedClient(self.base_url, min_rate_to_sleep=50)
+
+        _ = client.fetch_many(self.urls('items', 3))
+        self.assertEqual(client.rate_limit, 100)
+        self.assertEqual(client.rate_limit_reset_ts, 0)
+
+        _ = client.fetch_many([self.base_url + '/limit/50'])
+        self.assertEqual(client.rate_limit, 50)
+
+        # The rate limit is exhausted; no more requests are sent
+        with self.assertRaises(RateLimitError):
+            _ = client.fetch_many(self.urls('items', 2))
+
+        self.assertEqual(len(StandInRequestHandler.requests), 4)
+
+    def test_fetch_many_rate_limit_reserved(self):
+        """Test whether concurrent requests reserve the rate limit before they are sent"""
+
+        client = MockedClient(self.base_url, min_rate_to_sleep=50)
+        client.rate_limit = 52
+
+        # Only two requests fit in the rate limit left
+        with self.assertRaises(RateLimitError):
+            _ = client.fetch_many(self.urls('items', 3))
+
+        self.assertEqual(len(StandInRequestHandler.requests), 2)
+
+    def test_fetch_many_sleep_for_rate_limit(self):
+        """Test whether concurrent requests wait until the rate limit is reset"""
+
+        client = MockedClient(self.base_url, min_rate_to_sleep=50, sleep_for_rate=True)
+        client.rate_limit = 10
+
+        with unittest.mock.patch('perceval.client.asyncio.sleep',
+                                 wraps=asyncio.sleep) as mock_sleep:
+            responses = client.fetch_many(self.urls('items', 3))
+
+        self.assertEqual(len(responses), 3)
+        self.assertEqual(mock_sleep.call_count, 3)
+        mock_sleep.assert_called_with(0)
+
+
 class TestRateLimitHandler(unittest.TestCase):
     """RateLimit handler tests"""
 
@@ -358,6 +1207,7 @@ class TestRateLimitHandler(unittest.TestCase):
         self.assertEqual(client.min_rate_to_sleep, RateLimitHandler.MIN_RATE_LIMIT)
         self.assertEqual(client.rate_limit_header, RateLimitHandler.RATE_LIMIT_HEADER)
         self.assertEqual(client.rate_limit_reset_header, RateLimitHandler.RATE_LIMIT_RESET_HEADER)
+        self.assertIsNone(client.rate_pacer)
 
         expected_sleep_for_rate = True
         expected_min_rate_to_sleep = 200
@@ -453,6 +1303,141 @@ class TestRateLimitHandler(unittest.TestCase):
 
         self.assertEqual(before, after)
 
+    @httpretty.activate
+    @unittest.mock.patch('perceval.client.time.sleep')
+    def test_sleep_for_rate_limit_paced(self, mock_sleep):
+        """Test whether requests are spread when a pacer is set"""
+
+        httpretty.register_uri(httpretty.GET,
+                               CLIENT_SPIDERMAN_URL,
+                               body="",
+                               status=200,
+                               forcing_headers={
+                                   'X-RateLimit-Remaining': '110',
+                                   'X-RateLimit-Reset': '15'
+                               })
+
+        pacer = RatePacer()
+        metrics = FetchMetrics()
+        client = MockedClient(CLIENT_API_URL, sleep_time=0.1, max_retries=1,
+                              min_rate_to_sleep=10, rate_pacer=pacer,
+                              define_calculate_time_to_reset=False,
+                              metrics=metrics)
+        client.calculate_time_to_reset = lambda: 100
+
+        # The budget is unknown, so the first request is not delayed
+        client.sleep_for_rate_limit()
+        mock_sleep.assert_not_called()
+
+        response = client.fetch(CLIENT_SPIDERMAN_URL)
+        client.update_rate_limit(response)
+
+        self.assertEqual(pacer.remaining, 100)
+
+        # Requests are sent every second; the reserve is kept
+        client.sleep_for_rate_limit()
+        client.sleep_for_rate_limit()
+
+        self.assertEqual(mock_sleep.call_count, 1)
+        self.assertAlmostEqual(mock_sleep.call_args[0][0], 1, places=1)
+
+        metrics = pacer.metrics
+        self.assertEqual(metrics['requests'], 3)
+        self.assertEqual(metrics['delayed'], 1)
+        self.assertEqual(metrics['remaining'], 98)
+
+        # Delays are recorded in the metrics of the client
+        sleeps = client.metrics.sleeps
+        self.assertEqual(sleeps['pacing']['count'], 1)
+        self.assertAlmostEqual(sleeps['pacing']['seconds'], 1, places=1)
+        self.assertNotIn('rate_limit', sleeps)
+
+
+class TestRatePacer(unittest.TestCase):
+    """RatePacer tests"""
+
+    def test_initialization(self):
+        """Test whether attributes are initialized"""
+
+        pacer = RatePacer()
+
+        self.assertIsNone(pacer.remaining)
+        self.assertIsNone(pacer.reset_ts)
+        self.assertEqual(pacer.interval, 0)
+
+        expected = {
+            'interval': 0,
+            'remaining': None,
+            'time_to_reset': None,
+            'requests': 0,
+            'delayed': 0,
+            'delay': 0
+        }
+        self.assertDictEqual(pacer.metrics, expected)
+
+    def test_shared(self):
+        """Test whether pacers are shared by key"""
+
+        pacer = RatePacer.shared('api.example.com')
+
+        self.assertIs(RatePacer.shared('api.example.com'), pacer)
+        self.assertIsNot(RatePacer.shared('api.example.org'), pacer)
+
+    @unittest.mock.patch('perceval.client.time.time')
+    def test_reserve(self, mock_time):
+        """Test whether the budget is spread over the time to reset"""
+
+        mock_time.return_value = 1000
+
+        pacer = RatePacer()
+        pacer.update(10, 90)
+
+        self.assertEqual(pacer.interval, 9)
+
+        # Slots are taken one after the other
+        self.assertEqual(pacer.reserve(), 0)
+        self.assertEqual(pacer.remaining, 9)
+
+        self.assertEqual(pacer.reserve(), 9)
+        self.assertEqual(pacer.remaining, 8)
+
+        # The interval is adapted to the new budget
+        mock_time.return_value = 1019
+        pacer.update(40, 80)
+        self.assertEqual(pacer.interval, 2)
+
+        self.assertEqual(pacer.reserve(), 0)
+        self.assertEqual(pacer.reserve(), 2)
+
+        expected = {
+            'interval': 80 / 38,
+            'remaining': 38,
+            'time_to_reset': 80,
+            'requests': 4,
+            'delayed': 2,
+            'delay': 11
+        }
+        self.assertDictEqual(pacer.metrics, expected)
+
+    @unittest.mock.patch('perceval.client.time.time')
+    def test_reserve_exhausted(self, mock_time):
+        """Test whether requests are not paced when the budget is exhausted or reset"""
+
+        mock_time.return_value = 1000
+
+        pacer = RatePacer()
+        pacer.update(0, 100)
+
+        self.assertEqual(pacer.reserve(), 0)
+        self.assertEqual(pacer.reserve(), 0)
+        self.assertEqual(pacer.remaining, 0)
+
+        pacer.update(10, 100)
+
+        mock_time.return_value = 1100
+        self.assertEqual(pacer.interval, 0)
+        self.assertEqual(pacer.reserve(), 0)
+
 
 if __name__ == "__main__":
     unittest.main(warnings='ignore')
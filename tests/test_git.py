@@ -21,6 +21,7 @@
 #
 
 import datetime
+import io
 import os
 import shutil
 import subprocess
@@ -34,12 +35,14 @@ import pkg_resources
 pkg_resources.declare_namespace('perceval.backends')
 
 from perceval.backend import BackendCommandArgumentParser, uuid
-from perceval.errors import RepositoryError
+from perceval.errors import ParseError, RepositoryError
 from perceval.utils import DEFAULT_DATETIME, DEFAULT_LAST_DATETIME
 from perceval.backends.core.git import (EmptyRepositoryError,
                                         Git,
                                         GitCommand,
+                                        GitMachineParser,
                                         GitParser,
+                                        GitRef,
                                         GitRepository)
 
 
@@ -112,6 +115,21 @@ class TestGitBackend(TestCaseGit):
         git = Git('http://example.com', self.git_path, tag='')
         self.assertEqual(git.origin, 'http://example.com')
         self.assertEqual(git.tag, 'http://example.com')
+        self.assertEqual(git.max_workers, 1)
+        self.assertEqual(git.chunk_size, 1000)
+
+        git = Git('http://example.com', self.git_path, max_workers=4, chunk_size=10)
+        self.assertEqual(git.max_workers, 4)
+        self.assertEqual(git.chunk_size, 10)
+
+    def test_initialization_invalid_workers(self):
+        """Test whether an exception is raised when the number of workers or the chunk size are invalid"""
+
+        with self.assertRaisesRegex(ValueError, "'max_workers' must be greater than 0"):
+            _ = Git('http://example.com', self.git_path, max_workers=0)
+
+        with self.assertRaisesRegex(ValueError, "'chunk_size' must be greater than 0"):
+            _ = Git('http://example.com', self.git_path, chunk_size=0)
 
     def test_has_archiving(self):
         """Test if it returns False when has_archiving is called"""
@@ -172,6 +190,79 @@ class TestGitBackend(TestCaseGit):
 
         shutil.rmtree(new_path)
 
+    def test_fetch_parallel(self):
+        """Test whether commits parsed by several workers are the same of the serial fetch"""
+
+        new_path = os.path.join(self.tmp_path, 'newgit')
+
+        # Clone the repository
+        git = Git(self.git_path, new_path)
+        _ = [commit for commit in git.fetch()]
+
+        from_date = datetime.datetime(2014, 2, 11, 22, 7, 49)
+
+        cases = [
+            {},
+            {'branches': ['lzp']},
+            {'branches': []},
+            {'from_date': from_date}
+        ]
+
+        for kwargs in cases:
+            git = Git(self.git_path, new_path)
+            expected = [commit['data'] for commit in git.fetch(no_update=True, **kwargs)]
+
+            for chunk_size in [1, 2, 100]:
+                git = Git(self.git_path, new_path, max_workers=2, chunk_size=chunk_size)
+                commits = [commit['data'] for commit in git.fetch(no_update=True, **kwargs)]
+
+                self.assertListEqual(commits, expected)
+
+        shutil.rmtree(new_path)
+
+    def test_fetch_machine_log(self):
+        """Test whether commits read from a machine-oriented log are the same of the pretty log"""
+
+        new_path = os.path.join(self.tmp_path, 'newgit')
+
+        from_date = datetime.datetime(2014, 2, 11, 22, 7, 49)
+
+        cases = [
+            (self.git_path, {}),
+            (self.git_path, {'branches': ['lzp']}),
+            (self.git_path, {'from_date': from_date}),
+            (self.git_detached_path, {}),
+            (self.git_submodules_path, {}),
+            (self.git_top_submodules_path, {}),
+            (self.git_empty_path, {})
+        ]
+
+        for git_path, kwargs in cases:
+            git = Git(git_path, new_path)
+            expected = [commit['data'] for commit in git.fetch(**kwargs)]
+
+            git = Git(git_path, new_path)
+            commits = [commit['data'] for commit in git.fetch(no_update=True, machine_log=True, **kwargs)]
+            self.assertListEqual(commits, expected)
+
+            git = Git(git_path, new_path, max_workers=2, chunk_size=2)
+            commits = [commit['data'] for commit in git.fetch(no_update=True, machine_log=True, **kwargs)]
+            self.assertListEqual(commits, expected)
+
+            shutil.rmtree(new_path)
+
+    def test_fetch_parallel_empty_repository(self):
+        """Test whether it returns an empty list when the repository is empty"""
+
+        new_path = os.path.join(self.tmp_path, 'newgit')
+
+        git = Git(self.git_empty_path, new_path, max_workers=2)
+        commits = [commit for commit in git.fetch()]
+
+        self.assertListEqual(commits, [])
+
+        shutil.rmtree(new_path)
+
     def test_search_fields(self):
         """Test whether the search_fields is properly set"""
 
@@ -849,6 +940,23 @@ class TestGitCommand(TestCaseGit):
         self.assertEqual(parsed_args.uri, 'http://example.com/')
         self.assertEqual(parsed_args.branches, ['master', 'testing'])
         self.assertFalse(parsed_args.no_update)
+        self.assertEqual(parsed_args.max_workers, 1)
+        self.assertEqual(parsed_args.chunk_size, 1000)
+
+        args = ['http://example.com/',
+                '--max-workers', '4',
+                '--chunk-size', '500']
+
+        parsed_args = parser.parse(*args)
+        self.assertEqual(parsed_args.max_workers, 4)
+        self.assertEqual(parsed_args.chunk_size, 500)
+        self.assertFalse(parsed_args.machine_log)
+
+        args = ['http://example.com/',
+                '--machine-log']
+
+        parsed_args = parser.parse(*args)
+        self.assertTrue(parsed_args.machine_log)
 
     def test_mutual_exclusive_update(self):
         """Test whether an exception is thrown when no-update and latest-items flags are set"""
@@ -1081,6 +1189,94 @@ class TestGitParser(TestCaseGit):
 
         self.assertListEqual(commits, [])
 
+    def test_parser_unusual_lines(self):
+        """Test if lines with an unusual form are parsed as the regular expressions do"""
+
+        log = "\n".join([
+            "commit 7debcf8a2f57f86663809c58b5c07a398be7674c 87783129c3f00d2c81a3a8e585eb86a47e39891a",
+            "Author:\t\tEduardo Morais <companheiro.vermelho@example.com>",
+            "Commit_Date:   Tue Aug 14 14:33:27 2012 -0300",
+            "",
+            "    Commit with unusual lines",
+            "\t\t\t\tindented with tabs",
+            "    Signed-off-by: John Smith <jsmith@example.com>",
+            "    Signed-off-by:John Doe <jdoe@example.com>",
+            "",
+            ":100644 100644 e69de29... 0000000...  D\tbbb/bthing",
+            ":100644 100644 e69de29... e69de29... R100\t\taaa/something\t\tbbb/something",
+            "0 0\tbbb/bthing",
+            "1\t0\t\t{aaa => bbb}/something",
+            ""
+        ])
+
+        parser = GitParser(io.StringIO(log))
+        commits = [commit for commit in parser.parse()]
+
+        expected = {
+            'commit': '7debcf8a2f57f86663809c58b5c07a398be7674c',
+            'parents': ['87783129c3f00d2c81a3a8e585eb86a47e39891a'],
+            'refs': [],
+            'Author': 'Eduardo Morais <companheiro.vermelho@example.com>',
+            'Commit_Date': 'Tue Aug 14 14:33:27 2012 -0300',
+            'Signed-off-by': ['John Smith <jsmith@example.com>'],
+            'message': "Commit with unusual lines\n"
+                       "indented with tabs\n"
+                       "Signed-off-by: John Smith <jsmith@example.com>\n"
+                       "Signed-off-by:John Doe <jdoe@example.com>",
+            'files': [
+                {
+                    'file': 'aaa/something',
+                    'newfile': 'bbb/something',
+                    'added': '1',
+                    'removed': '0',
+                    'modes': ['100644', '100644'],
+                    'indexes': ['e69de29...', 'e69de29...'],
+                    'action': 'R100'
+                },
+                {
+                    'file': 'bbb/bthing',
+                    'added': '0',
+                    'removed': '0',
+                    'modes': ['100644', '100644'],
+                    'indexes': ['e69de29...', '0000000...'],
+                    'action': ' D'
+                }
+            ]
+        }
+
+        self.assertEqual(len(commits), 1)
+        self.assertDictEqual(commits[0], expected)
+
+    def test_split_lines(self):
+        """Test if only lines with the usual form are split without regular expressions"""
+
+        data = GitParser._split_action(":100644 100644 e69de29... e69de29... R100\taaa/otherthing\taaa/otherthing.renamed")
+        self.assertEqual(data, (['100644', '100644'], ['e69de29...', 'e69de29...'], 'R100',
+                                'aaa/otherthing', 'aaa/otherthing.renamed'))
+
+        data = GitParser._split_action("::100644 100644 100644 e69de29... 58a6c75... 58a6c75... MR\taaa/otherthing.renamed")
+        self.assertEqual(data, (['100644', '100644', '100644'], ['e69de29...', '58a6c75...', '58a6c75...'],
+                                'MR', 'aaa/otherthing.renamed', None))
+
+        self.assertIsNone(GitParser._split_action(":100644 100644 123456 e69de29... M\tfile"))
+        self.assertIsNone(GitParser._split_action(":100644 100644 e69de29.... e69de29... M\tfile"))
+        self.assertIsNone(GitParser._split_action(":100644 100644 e69de29... e69de29... M\t\tfile"))
+        self.assertIsNone(GitParser._split_action(":100644 100644 e69de29... e69de29... M\tfile\t"))
+
+        data = GitParser._split_stats("10\t-\taaa/{otherthing => otherthing.renamed}")
+        self.assertEqual(data, ('10', '-', 'aaa/{otherthing => otherthing.renamed}'))
+
+        self.assertIsNone(GitParser._split_stats("10 0\tfile"))
+        self.assertIsNone(GitParser._split_stats("10\t0\t file"))
+        self.assertIsNone(GitParser._split_stats("commit 7debcf8a2f57f86663809c58b5c07a398be7674c"))
+
+        data = GitParser._split_header("AuthorDate: Tue Aug 14 14:33:27 2012 -0300")
+        self.assertEqual(data, ('AuthorDate', 'Tue Aug 14 14:33:27 2012 -0300'))
+
+        self.assertIsNone(GitParser._split_header("Author:John Smith"))
+        self.assertIsNone(GitParser._split_header("Author_Date: Tue Aug 14 14:33:27 2012 -0300"))
+        self.assertIsNone(GitParser._split_header("Author:   "))
+
     def test_commit_pattern(self):
         """Test commit pattern"""
 
@@ -1199,6 +1395,175 @@ class TestGitParser(TestCaseGit):
         self.assertIsNotNone(m)
 
 
+class TestGitMachineParser(TestCaseGit):
+    """Git machine-oriented log parser tests"""
+
+    @staticmethod
+    def read_file(filename):
+        with open(os.path.join(os.path.dirname(os.path.abspath(__file__)), filename), 'rb') as f:
+            return f.read()
+
+    def test_parser(self):
+        """Test if it parsers a git machine-oriented log stream"""
+
+        with open(os.path.join(os.path.dirname(os.path.abspath(__file__)), "data/git/git_log_machine.txt"), 'rb') as f:
+            parser = GitMachineParser(f)
+            commits = [commit for commit in parser.parse()]
+
+        self.assertEqual(len(commits), 9)
+
+        expected = {
+            'commit': '456a68ee1407a77f3e804a30dff245bb6c6b872f',
+            'parents': [
+                'ce8e0b86a1e9877f42fe9453ede418519115f367',
+                '51a3b654f252210572297f47597b31527c475fb8'],
+            'refs': ['HEAD -> refs/heads/master'],
+            'Merge': 'ce8e0b8 51a3b65',
+            'Author': 'Zhongpeng Lin (林中鹏) <lin.zhp@example.com>',
+            'AuthorDate': 'Tue Feb 11 22:10:39 2014 -0800',
+            'Commit': 'Zhongpeng Lin (林中鹏) <lin.zhp@example.com>',
+            'CommitDate': 'Tue Feb 11 22:10:39 2014 -0800',
+            'message': "Merge branch 'lzp'\n\nConflicts:\n        aaa/otherthing",
+            'files': [
+                {
+                    'file': "aaa/otherthing.renamed",
+                    'added': '1',
+                    'removed': '0',
+                    'modes': ['100644', '100644', '100644'],
+                    'indexes': ['e69de29', '58a6c75', '58a6c75'],
+                    'action': 'MR'
+                }
+            ]
+        }
+        self.assertDictEqual(commits[0], expected)
+
+        expected = {
+            'commit': 'c0d66f92a95e31c77be08dc9d0f11a16715d1885',
+            'parents': ['7debcf8a2f57f86663809c58b5c07a398be7674c'],
+            'refs': [],
+            'Author': 'Eduardo Morais <companheiro.vermelho@example.com>',
+            'AuthorDate': 'Tue Aug 14 14:35:02 2012 -0300',
+            'Commit': 'Eduardo Morais <companheiro.vermelho@example.com>',
+            'CommitDate': 'Tue Aug 14 14:35:02 2012 -0300',
+            'message': 'Deleted and renamed file',
+            'files': [
+                {
+                    'file': 'bbb/bthing',
+                    'newfile': 'bbb/something.renamed',
+                    'added': '0',
+                    'removed': '0',
+                    'modes': ['100644', '100644'],
+                    'indexes': ['e69de29', 'e69de29'],
+                    'action': 'R100'
+                },
+                {
+                    'file': 'bbb/something',
+                    'added': '0',
+                    'removed': '0',
+                    'modes': ['100644', '000000'],
+                    'indexes': ['e69de29', '0000000'],
+                    'action': 'D'
+                }
+            ]
+        }
+        self.assertDictEqual(commits[5], expected)
+
+        expected = ['456a68ee1407a77f3e804a30dff245bb6c6b872f',
+                    '51a3b654f252210572297f47597b31527c475fb8',
+                    'ce8e0b86a1e9877f42fe9453ede418519115f367',
+                    '589bb080f059834829a2a5955bebfd7c2baa110a',
+                    'c6ba8f7a1058db3e6b4bc6f1090e932b107605fb',
+                    'c0d66f92a95e31c77be08dc9d0f11a16715d1885',
+                    '7debcf8a2f57f86663809c58b5c07a398be7674c',
+                    '87783129c3f00d2c81a3a8e585eb86a47e39891a',
+                    'bc57a9209f096a130dcc5ba7089a8663f758a703']
+        self.assertListEqual([commit['commit'] for commit in commits], expected)
+        self.assertListEqual(commits[3]['refs'], ['refs/remotes/origin/master', 'refs/remotes/origin/HEAD'])
+
+    def test_parser_chunks(self):
+        """Test whether fields split between chunks are parsed"""
+
+        log = self.read_file("data/git/git_log_machine.txt")
+        expected = [commit for commit in GitMachineParser([log]).parse()]
+
+        for size in [1, 3, 50, 1000]:
+            chunks = [log[i:i + size] for i in range(0, len(log), size)]
+            commits = [commit for commit in GitMachineParser(chunks).parse()]
+
+            self.assertListEqual(commits, expected)
+
+    def test_parser_messages(self):
+        """Test if messages are cleaned like Git pretty formats do"""
+
+        header = ['7debcf8a2f57f86663809c58b5c07a398be7674c', '87783129c3f00d2c81a3a8e585eb86a47e39891a', '',
+                  'Eduardo Morais <companheiro.vermelho@example.com>', 'Tue Aug 14 14:33:27 2012 -0300',
+                  'Eduardo Morais <companheiro.vermelho@example.com>', 'Tue Aug 14 14:33:27 2012 -0300',
+                  '8778312']
+        message = "\n\n  Title with\ttab  \r\n\nHeader: in the message\n" \
+                  "Signed-off-by: John Smith <jsmith@example.com>\n" \
+                  "Signed-off-by:\tJane Rae <jrae@example.com>  \n\n\n"
+        diff = ['', '\n:000000 100644 0000000 e69de29 A', 'bbb/ccc/yet anotherthing',
+                '0\t0\tbbb/ccc/yet anotherthing', '']
+        log = '\0'.join(header + [message] + diff)
+
+        commits = [commit for commit in GitMachineParser([log.encode('utf-8')]).parse()]
+
+        self.assertEqual(len(commits), 1)
+        self.assertEqual(commits[0]['message'],
+                         "  Title with    tab\n\nHeader: in the message\n"
+                         "Signed-off-by: John Smith <jsmith@example.com>\n"
+                         "Signed-off-by:  Jane Rae <jrae@example.com>")
+        self.assertListEqual(commits[0]['Signed-off-by'],
+                             ['John Smith <jsmith@example.com>', 'Jane Rae <jrae@example.com>'])
+        self.assertNotIn('Header', commits[0])
+        self.assertListEqual(commits[0]['files'],
+                             [{'modes': ['000000', '100644'],
+                               'indexes': ['0000000', 'e69de29'],
+                               'action': 'A',
+                               'file': 'bbb/ccc/yet anotherthing',
+                               'added': '0',
+                               'removed': '0'}])
+
+        # Commits without message don't have the field
+        log = '\0'.join(header + ['', ''])
+        commits = [commit for commit in GitMachineParser([log.encode('utf-8')]).parse()]
+
+        self.assertEqual(len(commits), 1)
+        self.assertNotIn('message', commits[0])
+        self.assertListEqual(commits[0]['files'], [])
+
+    def test_parser_empty_log(self):
+        """Test if it parsers an empty git log stream"""
+
+        commits = [commit for commit in GitMachineParser([]).parse()]
+        self.assertListEqual(commits, [])
+
+        commits = [commit for commit in GitMachineParser([b'']).parse()]
+        self.assertListEqual(commits, [])
+
+    def test_parser_invalid_log(self):
+        """Test if an exception is raised when the log is not valid"""
+
+        log = self.read_file("data/git/git_log_machine.txt")
+        fields = log.split(b'\0')
+
+        invalid = [
+            # Plain log
+            self.read_file("data/git/git_log.txt"),
+            # Incomplete header
+            b'\0'.join(fields[:5]),
+            # Invalid action
+            b'\0'.join(fields[:12] + [b'::100644 100644 e69de29 58a6c75 MR'] + fields[13:]),
+            # Missing file name
+            b'\0'.join(fields[:13]),
+            b'\0'.join(fields[:11] + [b'1\t0\t', b''])
+        ]
+
+        for data in invalid:
+            with self.assertRaises(ParseError):
+                _ = [commit for commit in GitMachineParser([data]).parse()]
+
+
 class TestEmptyRepositoryError(TestCaseGit):
     """EmptyRepositoryError tests"""
 
@@ -1585,6 +1950,138 @@ class TestGitRepository(TestCaseGit):
 
         shutil.rmtree(new_path)
 
+    def test_discover_refs(self):
+        """Test whether loose and packed heads and tags are discovered"""
+
+        new_path = os.path.join(self.tmp_path, 'discover')
+
+        repo = GitRepository.clone(self.git_path, new_path)
+
+        # Pack the current refs and add some loose ones
+        cmds = [
+            ['git', 'pack-refs', '--all'],
+            ['git', 'update-ref', 'refs/heads/loose', '589bb080f059834829a2a5955bebfd7c2baa110a'],
+            ['git', 'update-ref', 'refs/tags/v0.1', '456a68ee1407a77f3e804a30dff245bb6c6b872f'],
+            ['git', 'update-ref', 'refs/notes/commits', '456a68ee1407a77f3e804a30dff245bb6c6b872f']
+        ]
+        for cmd in cmds:
+            subprocess.check_output(cmd, stderr=subprocess.STDOUT,
+                                    cwd=new_path, env={'LANG': 'C'})
+
+        refs = repo._discover_refs()
+
+        # Refs are the same 'git show-ref' lists
+        cmd = ['git', 'show-ref', '--heads', '--tags']
+        outs = subprocess.check_output(cmd, stderr=subprocess.STDOUT,
+                                       cwd=new_path, env={'LANG': 'C'})
+        expected = [GitRef(*line.split(' ')) for line in outs.decode('utf-8').splitlines()]
+
+        self.assertEqual(len(refs), 4)
+        self.assertListEqual(refs, expected)
+
+        shutil.rmtree(new_path)
+
+    def test_discover_refs_empty_repository(self):
+        """Test whether an exception is raised when the repository is empty"""
+
+        new_path = os.path.join(self.tmp_path, 'discoverempty')
+
+        repo = GitRepository.clone(self.git_empty_path, new_path)
+
+        with self.assertRaises(EmptyRepositoryError):
+            repo._discover_refs()
+
+        shutil.rmtree(new_path)
+
+    def test_update_references(self):
+        """Test whether references are updated in a single transaction"""
+
+        new_path = os.path.join(self.tmp_path, 'updaterefs')
+
+        repo = GitRepository.clone(self.git_path, new_path)
+
+        refs = [
+            GitRef('589bb080f059834829a2a5955bebfd7c2baa110a', 'refs/heads/master'),
+            GitRef('51a3b654f252210572297f47597b31527c475fb8', 'refs/heads/feature'),
+            GitRef('456a68ee1407a77f3e804a30dff245bb6c6b872f', 'refs/tags/v0.1'),
+            GitRef('589bb080f059834829a2a5955bebfd7c2baa110a', 'refs/tags/v0.1^{}'),
+            GitRef('589bb080f059834829a2a5955bebfd7c2baa110a', 'refs/pull/1/head')
+        ]
+
+        with unittest.mock.patch.object(GitRepository, '_update_ref') as mock_update_ref:
+            repo._update_references(refs)
+            self.assertEqual(mock_update_ref.call_count, 0)
+
+        # 'lzp' branch was removed while annotated tags
+        # and other references were ignored
+        expected = {
+            'refs/heads/feature': '51a3b654f252210572297f47597b31527c475fb8',
+            'refs/heads/master': '589bb080f059834829a2a5955bebfd7c2baa110a',
+            'refs/tags/v0.1': '456a68ee1407a77f3e804a30dff245bb6c6b872f'
+        }
+        self.assertDictEqual(discover_refs(new_path), expected)
+
+        shutil.rmtree(new_path)
+
+    def test_update_references_one_by_one(self):
+        """Test whether references are updated one by one when the transaction fails"""
+
+        new_path = os.path.join(self.tmp_path, 'updaterefsone')
+
+        repo = GitRepository.clone(self.git_path, new_path)
+
+        # The object of 'refs/heads/missing' does not exist
+        refs = [
+            GitRef('589bb080f059834829a2a5955bebfd7c2baa110a', 'refs/heads/master'),
+            GitRef('0000000000000000000000000000000000000001', 'refs/heads/missing'),
+            GitRef('456a68ee1407a77f3e804a30dff245bb6c6b872f', 'refs/tags/v0.1')
+        ]
+
+        with self.assertLogs('perceval.backends.core.git', level='WARNING') as cm:
+            repo._update_references(refs)
+            self.assertRegex(cm.output[0], "refs could not be updated in a single transaction")
+            self.assertRegex(cm.output[1], "refs/heads/missing ref could not be updated")
+
+        expected = {
+            'refs/heads/master': '589bb080f059834829a2a5955bebfd7c2baa110a',
+            'refs/tags/v0.1': '456a68ee1407a77f3e804a30dff245bb6c6b872f'
+        }
+        self.assertDictEqual(discover_refs(new_path), expected)
+
+        shutil.rmtree(new_path)
+
+    def test_read_commits_from_pack(self):
+        """Test whether the commits of a pack are read from the newest to the oldest"""
+
+        new_path = os.path.join(self.tmp_path, 'newgit')
+
+        repo = GitRepository.clone(self.git_path, new_path)
+
+        # Store every object of the repository in a single pack
+        cmd = ['git', 'repack', '-a', '-d', '-q']
+        subprocess.check_output(cmd, stderr=subprocess.STDOUT,
+                                cwd=new_path, env={'LANG': 'C'})
+
+        packs = [filename for filename in os.listdir(os.path.join(new_path, 'objects', 'pack'))
+                 if filename.endswith('.pack')]
+        self.assertEqual(len(packs), 1)
+
+        pack_name = packs[0][len('pack-'):-len('.pack')]
+        commits = repo._read_commits_from_pack(pack_name)
+
+        # Commits are listed like 'git verify-pack' does
+        cmd = ['git', 'verify-pack', '-v', os.path.join('objects', 'pack', packs[0])]
+        outs = subprocess.check_output(cmd, stderr=subprocess.STDOUT,
+                                       cwd=new_path, env={'LANG': 'C'})
+        lines = [line.split(' ') for line in outs.decode('utf-8').split('\n')]
+        expected = [parts[0] for parts in lines if len(parts) > 1 and parts[1] == 'commit']
+        expected.reverse()
+
+        self.assertEqual(len(commits), 9)
+        self.assertListEqual(commits, expected)
+
+        shutil.rmtree(new_path)
+
     def test_rev_list(self):
         """Test rev-list command"""
 
@@ -1648,6 +2145,24 @@ class TestGitRepository(TestCaseGit):
         self.assertListEqual(gitrev, expected)
         shutil.rmtree(new_path)
 
+    def test_rev_list_since_date(self):
+        """Test whether the rev-list command returns the commits between the given dates"""
+
+        new_path = os.path.join(self.tmp_path, 'newgit')
+
+        repo = GitRepository.clone(self.git_path, new_path)
+
+        from_date = datetime.datetime(2014, 2, 11, 22, 7, 49)
+        to_date = datetime.datetime(2014, 2, 12, 6, 10, 0, tzinfo=dateutil.tz.tzutc())
+        gitrev = repo.rev_list(from_date=from_date, to_date=to_date)
+        gitrev = [line for line in gitrev]
+
+        expected = ['51a3b654f252210572297f47597b31527c475fb8',
+                    'ce8e0b86a1e9877f42fe9453ede418519115f367']
+
+        self.assertListEqual(gitrev, expected)
+        shutil.rmtree(new_path)
+
     def test_rev_list_from_empty_repository(self):
         """Test if an exception is raised when the repository is empty"""
 
@@ -1723,6 +2238,80 @@ class TestGitRepository(TestCaseGit):
 
         shutil.rmtree(new_path)
 
+    def test_log_commits(self):
+        """Test whether the log of a list of commits is returned in the same order"""
+
+        new_path = os.path.join(self.tmp_path, 'newgit')
+
+        repo = GitRepository.clone(self.git_path, new_path)
+
+        commits = ['456a68ee1407a77f3e804a30dff245bb6c6b872f',
+                   'bc57a9209f096a130dcc5ba7089a8663f758a703',
+                   '7debcf8a2f57f86663809c58b5c07a398be7674c']
+
+        gitlog = repo.log_commits(commits)
+        gitlog = [line for line in gitlog if line.startswith('commit ')]
+
+        self.assertEqual(len(gitlog), 3)
+        self.assertEqual(gitlog[0][:14], "commit 456a68e")
+        self.assertEqual(gitlog[1][:14], "commit bc57a92")
+        self.assertEqual(gitlog[2][:14], "commit 7debcf8")
+
+        # The log of the whole list is the same of the log command
+        commits = [line.rstrip('\n') for line in repo.rev_list()]
+        commits.reverse()
+
+        gitlog = [line for line in repo.log_commits(commits)]
+        self.assertListEqual(gitlog, [line for line in repo.log()])
+
+        # Nothing is returned when the list is empty
+        gitlog = [line for line in repo.log_commits([])]
+        self.assertListEqual(gitlog, [])
+
+        shutil.rmtree(new_path)
+
+    def test_log_machine(self):
+        """Test log command using the machine-oriented format"""
+
+        new_path = os.path.join(self.tmp_path, 'newgit')
+
+        repo = GitRepository.clone(self.git_path, new_path)
+        gitlog = repo.log(machine=True)
+        gitlog = b''.join(gitlog)
+
+        fields = gitlog.split(b'\0')
+        self.assertEqual(fields[0], b'bc57a9209f096a130dcc5ba7089a8663f758a703')
+        self.assertEqual(fields[8], b'Initial commit on test repository\n')
+
+        commits = [commit for commit in GitMachineParser([gitlog]).parse()]
+        self.assertEqual(len(commits), 9)
+
+        gitlog = repo.log_commits(['456a68ee1407a77f3e804a30dff245bb6c6b872f'], machine=True)
+        commits = [commit for commit in GitMachineParser(gitlog).parse()]
+        self.assertEqual(len(commits), 1)
+        self.assertEqual(commits[0]['Merge'], 'ce8e0b8 51a3b65')
+
+        gitshow = repo.show(['51a3b65', '8778312'], machine=True)
+        commits = [commit for commit in GitMachineParser(gitshow).parse()]
+        self.assertListEqual([commit['commit'] for commit in commits],
+                             ['51a3b654f252210572297f47597b31527c475fb8',
+                              '87783129c3f00d2c81a3a8e585eb86a47e39891a'])
+
+        shutil.rmtree(new_path)
+
+    def test_log_commits_invalid_commit(self):
+        """Test whether an exception is raised when a commit does not exist"""
+
+        new_path = os.path.join(self.tmp_path, 'newgit')
+
+        repo = GitRepository.clone(self.git_path, new_path)
+        gitlog = repo.log_commits(['0000000000000000000000000000000000000000'])
+
+        with self.assertRaises(RepositoryError):
+            _ = [line for line in gitlog]
+
+        shutil.rmtree(new_path)
+
     def test_log_from_empty_repository(self):
         """Test if an exception is raised when the repository is empty"""
 
@@ -23,9 +23,12 @@
 import datetime
 import dateutil
 import os
+import shutil
+import tempfile
 import time
 import unittest
 import unittest.mock
+import urllib.parse
 
 import httpretty
 import pkg_resources
@@ -34,17 +37,24 @@ import requests
 pkg_resources.declare_namespace('perceval.backends')
 
 from grimoirelab_toolkit.datetime import datetime_utcnow
+from perceval.archive import Archive
+from perceval.cache import ResponseCache
 from perceval.backend import BackendCommandArgumentParser
 from perceval.client import RateLimitHandler
-from perceval.errors import RateLimitError
+from perceval.errors import BackendError, RateLimitError
 from perceval.utils import (DEFAULT_DATETIME, DEFAULT_LAST_DATETIME)
 from perceval.backends.core.github import (logger, GitHub,
                                            GitHubCommand,
                                            GitHubClient,
+                                           GitHubTokenPool,
+                                           GitHubUsersCache,
                                            CATEGORY_ISSUE,
                                            CATEGORY_PULL_REQUEST,
                                            CATEGORY_REPO,
-                                           MAX_CATEGORY_ITEMS_PER_PAGE)
+                                           MAX_CATEGORY_ITEMS_PER_PAGE,
+                                           MAX_WORKERS,
+                                           PREFETCH_DEPTH,
+                                           USERS_CACHE_TTL)
 from base import TestCaseBackendArchive
 
 
@@ -124,6 +134,11 @@ class TestGitHubBackend(unittest.TestCase):
         self.assertEqual(github.origin, 'https://github.com/zhquan_example/repo')
         self.assertEqual(github.tag, 'test')
         self.assertEqual(github.max_items, MAX_CATEGORY_ITEMS_PER_PAGE)
+        self.assertEqual(github.max_workers, MAX_WORKERS)
+        self.assertIsNone(github.users_cache_path)
+        self.assertEqual(github.users_cache_ttl, USERS_CACHE_TTL)
+        self.assertIsNone(github.tokens_state_path)
+        self.assertEqual(github.prefetch_depth, PREFETCH_DEPTH)
 
         self.assertEqual(github.categories, [CATEGORY_ISSUE, CATEGORY_PULL_REQUEST, CATEGORY_REPO])
 
@@ -140,6 +155,15 @@ class TestGitHubBackend(unittest.TestCase):
         self.assertEqual(github.origin, 'https://github.com/zhquan_example/repo')
         self.assertEqual(github.tag, 'https://github.com/zhquan_example/repo')
 
+        github = GitHub('zhquan_example', 'repo', ['aaa'], max_workers=1)
+        self.assertEqual(github.max_workers, 1)
+
+    def test_invalid_max_workers(self):
+        """Test whether an exception is raised when the number of workers is not valid"""
+
+        with self.assertRaisesRegex(ValueError, "'max_workers' must be greater than 0"):
+            GitHub('zhquan_example', 'repo', ['aaa'], max_workers=0)
+
     def test_pool_of_tokens_initialization(self):
         """Test whether tokens parameter is initialized"""
 
@@ -549,6 +573,42 @@ class TestGitHubBackend(unittest.TestCase):
         self.assertEqual(pull['search_fields']['owner'], 'zhquan_example')
         self.assertEqual(pull['search_fields']['repo'], 'repo')
 
+    @httpretty.activate
+    def test_fetch_close_client(self):
+        """Test whether the cache of users and the pool of tokens are closed when the fetch ends"""
+
+        httpretty.register_uri(httpretty.GET,
+                               GITHUB_REPO_URL,
+                               body=read_file('data/github/github_repo'),
+                               status=200,
+                               forcing_headers={
+                                   'X-RateLimit-Remaining': '20',
+                                   'X-RateLimit-Reset': '15'
+                               })
+
+        tmp_path = tempfile.mkdtemp(prefix='perceval_')
+        self.addCleanup(shutil.rmtree, tmp_path)
+
+        github = GitHub("zhquan_example", "repo", ["aaa"],
+                        users_cache_path=os.path.join(tmp_path, 'users.db'),
+                        tokens_state_path=os.path.join(tmp_path, 'tokens.db'))
+
+        with unittest.mock.patch.object(GitHubUsersCache, 'close') as mock_users_close, \
+                unittest.mock.patch.object(GitHubTokenPool, 'close') as mock_pool_close:
+            repo = [repo for repo in github.fetch(category=CATEGORY_REPO)]
+
+            self.assertEqual(len(repo), 1)
+            mock_users_close.assert_called_once_with()
+            mock_pool_close.assert_called_once_with()
+
+            # Fetches stopped before the end close them too
+            items = github.fetch(category=CATEGORY_REPO)
+            _ = next(items)
+            items.close()
+
+            self.assertEqual(mock_users_close.call_count, 2)
+            self.assertEqual(mock_pool_close.call_count, 2)
+
     @httpretty.activate
     @unittest.mock.patch('perceval.backends.core.github.datetime_utcnow')
     def test_fetch_repo(self, mock_utcnow):
@@ -757,6 +817,90 @@ class TestGitHubBackend(unittest.TestCase):
         self.assertEqual(issue['data']['comments_data'][0]['reactions']['total_count'],
                          len(issue['data']['comments_data'][0]['reactions_data']))
 
+    @httpretty.activate
+    def test_fetch_issues_in_order(self):
+        """Test whether issues enriched in parallel keep the order of the API"""
+
+        login = read_file('data/github/github_login')
+        orgs = read_file('data/github/github_orgs')
+        issue_1 = read_file('data/github/github_issue_1')
+        issue_2 = read_file('data/github/github_issue_2')
+        issue_2_reactions = read_file('data/github/github_issue_2_reactions')
+        issue_1_comments = read_file('data/github/github_issue_comments_1')
+        issue_2_comments = read_file('data/github/github_issue_comments_2')
+        issue_comment_1_reactions = read_file('data/github/github_issue_comment_1_reactions')
+        issue_comment_2_reactions = read_file('data/github/github_empty_request')
+        rate_limit = read_file('data/github/rate_limit')
+
+        def slow_response(request, uri, headers):
+            # The first issue is enriched after the second one
+            time.sleep(0.5)
+            return [200, headers, issue_1_comments]
+
+        forcing_headers = {
+            'X-RateLimit-Remaining': '20',
+            'X-RateLimit-Reset': '15'
+        }
+        responses = [
+            (GITHUB_RATE_LIMIT, rate_limit),
+            (GITHUB_ISSUES_URL + '/?&page=2', issue_2),
+            (GITHUB_ISSUE_COMMENT_1_REACTION_URL, issue_comment_1_reactions),
+            (GITHUB_ISSUE_2_REACTION_URL, issue_2_reactions),
+            (GITHUB_ISSUE_2_COMMENTS_URL, issue_2_comments),
+            (GITHUB_ISSUE_COMMENT_2_REACTION_URL, issue_comment_2_reactions),
+            (GITHUB_USER_URL, login),
+            (GITHUB_ORGS_URL, orgs)
+        ]
+        for url, body in responses:
+            httpretty.register_uri(httpretty.GET, url,
+                                   body=body, status=200,
+                                   forcing_headers=forcing_headers)
+
+        httpretty.register_uri(httpretty.GET,
+                               GITHUB_ISSUES_URL,
+                               body=issue_1,
+                               status=200,
+                               forcing_headers={
+                                   'X-RateLimit-Remaining': '20',
+                                   'X-RateLimit-Reset': '5',
+                                   'Link': '<' + GITHUB_ISSUES_URL + '/?&page=2>; rel="next", <' +
+                                           GITHUB_ISSUES_URL + '/?&page=3>; rel="last"'
+                               })
+        httpretty.register_uri(httpretty.GET,
+                               GITHUB_ISSUE_1_COMMENTS_URL,
+                               body=slow_response)
+
+        # Clean the caches to fetch the users using the API
+        GitHubClient._users.clear()
+        GitHubClient._users_orgs.clear()
+
+        github = GitHub("zhquan_example", "repo", ["aaa"], max_workers=4)
+        issues = [issue for issue in github.fetch()]
+
+        self.assertEqual(len(issues), 2)
+        self.assertEqual(issues[0]['uuid'], '58c073fd2a388c44043b9cc197c73c5c540270ac')
+        self.assertEqual(len(issues[0]['data']['comments_data']), 1)
+        self.assertEqual(issues[1]['uuid'], '4236619ac2073491640f1698b5c4e169895aaf69')
+        self.assertEqual(len(issues[1]['data']['comments_data']), 1)
+
+        # Users requested by several workers are fetched only once
+        users_requests = [req for req in httpretty.latest_requests()
+                          if req.path == '/users/zhquan_example']
+        self.assertEqual(len(users_requests), 1)
+
+        # Locks of the logins are removed once they are fetched
+        self.assertDictEqual(github.client._logins_locks, {})
+
+        # Items are the same when they are enriched one by one
+        GitHubClient._users.clear()
+        GitHubClient._users_orgs.clear()
+
+        github = GitHub("zhquan_example", "repo", ["aaa"], max_workers=1)
+        serial_issues = [issue for issue in github.fetch()]
+
+        self.assertListEqual([issue['data'] for issue in serial_issues],
+                             [issue['data'] for issue in issues])
+
     @httpretty.activate
     def test_fetch_more_pulls(self):
         """Test when return two pulls"""
@@ -1376,6 +1520,18 @@ class TestGitHubBackend(unittest.TestCase):
         self.assertEqual(len(pull['data']['commits_data']), 1)
         self.assertEqual(pull['data']['updated_at'], '2016-01-04T17:42:23Z')
 
+        # Workers do not enrich pull requests updated after 'to_date'
+        github = GitHub("zhquan_example", "repo", ["aaa"], max_workers=4)
+        pulls = [pulls for pulls in github.fetch(category=CATEGORY_PULL_REQUEST, to_date=to_date)]
+
+        self.assertEqual(len(pulls), 1)
+        self.assertEqual(pulls[0]['uuid'], '58c073fd2a388c44043b9cc197c73c5c540270ac')
+
+        pull_2_path = urllib.parse.urlparse(GITHUB_PULL_REQUEST_2_URL).path
+        pull_2_requests = [req for req in httpretty.latest_requests()
+                           if req.path.startswith(pull_2_path + '/')]
+        self.assertListEqual(pull_2_requests, [])
+
     @httpretty.activate
     def test_fetch_zero_reactions_on_issue(self):
         """Test zero reactions on a issue"""
@@ -2236,11 +2392,13 @@ class TestGitHubClient(unittest.TestCase):
         self.assertEqual(client.sleep_time, GitHubClient.DEFAULT_SLEEP_TIME)
         self.assertEqual(client.max_retries, GitHubClient.MAX_RETRIES)
         self.assertEqual(client.base_url, 'https://api.github.com')
+        self.assertEqual(client.prefetch_depth, PREFETCH_DEPTH)
 
         client = GitHubClient('zhquan_example', 'repo', ['aaa'], base_url=None,
                               sleep_for_rate=False, min_rate_to_sleep=3,
                               sleep_time=20, max_retries=2, max_items=1,
-                              archive=None, from_archive=False)
+                              archive=None, from_archive=False, prefetch_depth=0)
+        self.assertEqual(client.prefetch_depth, 0)
         self.assertEqual(client.owner, 'zhquan_example')
         self.assertEqual(client.repository, 'repo')
         self.assertEqual(client.tokens, ['aaa'])
@@ -2963,6 +3121,161 @@ class TestGitHubClient(unittest.TestCase):
 
         self.assertEqual(response, orgs)
 
+    @httpretty.activate
+    def test_get_user_persistent_cache(self):
+        """Test whether users are taken from the persistent cache"""
+
+        login = read_file('data/github/github_login')
+        orgs = read_file('data/github/github_orgs')
+        rate_limit = read_file('data/github/rate_limit')
+
+        httpretty.register_uri(httpretty.GET,
+                               GITHUB_RATE_LIMIT,
+                               body=rate_limit,
+                               status=200,
+                               forcing_headers={
+                                   'X-RateLimit-Remaining': '20',
+                                   'X-RateLimit-Reset': '15'
+                               })
+        httpretty.register_uri(httpretty.GET,
+                               GITHUB_USER_URL,
+                               responses=[
+                                   httpretty.Response(body=login, status=200,
+                                                      forcing_headers={
+                                                          'ETag': '"abcd"',
+                                                          'X-RateLimit-Remaining': '20',
+                                                          'X-RateLimit-Reset': '15'
+                                                      }),
+                                   httpretty.Response(body='', status=304,
+                                                      forcing_headers={
+                                                          'X-RateLimit-Remaining': '20',
+                                                          'X-RateLimit-Reset': '15'
+                                                      })
+                               ])
+        httpretty.register_uri(httpretty.GET,
+                               GITHUB_ORGS_URL,
+                               body=orgs, status=200,
+                               forcing_headers={
+                                   'X-RateLimit-Remaining': '20',
+                                   'X-RateLimit-Reset': '15'
+                               })
+
+        tmp_path = tempfile.mkdtemp(prefix='perceval_')
+        self.addCleanup(shutil.rmtree, tmp_path)
+        cache_path = os.path.join(tmp_path, 'users.db')
+
+        def user_requests():
+            return [req for req in httpretty.latest_requests()
+                    if req.path == '/users/zhquan_example']
+
+        # The first time, the user is fetched and stored in the cache
+        GitHubClient._users.clear()
+        GitHubClient._users_orgs.clear()
+
+        cache = GitHubUsersCache(cache_path)
+        client = GitHubClient("zhquan_example", "repo", ["aaa"], None, users_cache=cache)
+        self.assertEqual(client.user("zhquan_example"), login)
+        self.assertEqual(client.user_orgs("zhquan_example"), orgs)
+        self.assertEqual(len(user_requests()), 1)
+
+        entry = cache.get(GITHUB_USER_URL)
+        self.assertEqual(entry['data'], login)
+        self.assertEqual(entry['etag'], '"abcd"')
+        self.assertFalse(entry['expired'])
+
+        # Later runs take fresh users from the cache
+        GitHubClient._users.clear()
+        GitHubClient._users_orgs.clear()
+
+        client = GitHubClient("zhquan_example", "repo", ["aaa"], None,
+                              users_cache=GitHubUsersCache(cache_path))
+        self.assertEqual(client.user("zhquan_example"), login)
+        self.assertEqual(len(user_requests()), 1)
+
+        # Expired users are revalidated; the response is archived
+        # as if it was fetched
+        GitHubClient._users.clear()
+        GitHubClient._users_orgs.clear()
+
+        archive = Archive.create(os.path.join(tmp_path, 'archive'))
+        client = GitHubClient("zhquan_example", "repo", ["aaa"], None, archive=archive,
+                              users_cache=GitHubUsersCache(cache_path, ttl=0))
+        self.assertEqual(client.user("zhquan_example"), login)
+
+        requests_sent = user_requests()
+        self.assertEqual(len(requests_sent), 2)
+        self.assertEqual(requests_sent[1].headers['If-None-Match'], '"abcd"')
+        self.assertEqual(archive.retrieve(GITHUB_USER_URL, None, None).text, login)
+
+    @httpretty.activate
+    def test_get_user_persistent_cache_response_cache(self):
+        """Test whether users not found in the persistent cache use the response cache"""
+
+        login = read_file('data/github/github_login')
+        rate_limit = read_file('data/github/rate_limit')
+
+        httpretty.register_uri(httpretty.GET,
+                               GITHUB_RATE_LIMIT,
+                               body=rate_limit,
+                               status=200,
+                               forcing_headers={
+                                   'X-RateLimit-Remaining': '20',
+                                   'X-RateLimit-Reset': '15'
+                               })
+        httpretty.register_uri(httpretty.GET,
+                               GITHUB_USER_URL,
+                               responses=[
+                                   httpretty.Response(body=login, status=200,
+                                                      forcing_headers={
+                                                          'ETag': '"abcd"',
+                                                          'X-RateLimit-Remaining': '20',
+                                                          'X-RateLimit-Reset': '15'
+                                                      }),
+                                   httpretty.Response(body='', status=304,
+                                                      forcing_headers={
+                                                          'X-RateLimit-Remaining': '20',
+                                                          'X-RateLimit-Reset': '15'
+                                                      })
+                               ])
+
+        tmp_path = tempfile.mkdtemp(prefix='perceval_')
+        self.addCleanup(shutil.rmtree, tmp_path)
+        response_cache = ResponseCache(os.path.join(tmp_path, 'http_cache.db'))
+
+        GitHubClient._users.clear()
+        GitHubClient._users_orgs.clear()
+
+        client = GitHubClient("zhquan_example", "repo", ["aaa"], None,
+                              users_cache=GitHubUsersCache(os.path.join(tmp_path, 'users.db')))
+        client.cache = response_cache
+        self.assertEqual(client.user("zhquan_example"), login)
+        self.assertEqual(client.cache_misses, 1)
+
+        # A new users cache does not have the user, but the response cache does
+        GitHubClient._users.clear()
+        GitHubClient._users_orgs.clear()
+
+        users_cache = GitHubUsersCache(os.path.join(tmp_path, 'other_users.db'))
+        client = GitHubClient("zhquan_example", "repo", ["aaa"], None, users_cache=users_cache)
+        client.cache = response_cache
+        self.assertEqual(client.user("zhquan_example"), login)
+        self.assertEqual(client.cache_hits, 1)
+        self.assertEqual(httpretty.last_request().headers['If-None-Match'], '"abcd"')
+        self.assertEqual(users_cache.get(GITHUB_USER_URL)['data'], login)
+
+    def test_get_user_persistent_cache_from_archive(self):
+        """Test whether the persistent cache is not used when fetching from an archive"""
+
+        tmp_path = tempfile.mkdtemp(prefix='perceval_')
+        self.addCleanup(shutil.rmtree, tmp_path)
+
+        cache = GitHubUsersCache(os.path.join(tmp_path, 'users.db'))
+        archive = Archive.create(os.path.join(tmp_path, 'archive'))
+
+        client = GitHubClient("zhquan_example", "repo", ["aaa"], None,
+                              archive=archive, from_archive=True, users_cache=cache)
+        self.assertIsNone(client.users_cache)
+
     @httpretty.activate
     def test_http_wrong_status(self):
         """Test if a error is raised when the http status was not 200"""
@@ -3039,120 +3352,92 @@ class TestGitHubClient(unittest.TestCase):
     def test_choose_best_token_on_init(self):
         """Test if the client chooses the best token when there are several available"""
 
-        # Token selection is based on the headers returned
-        # by the server to each request made with different tokens
-        forcing_headers_aaa = {
-            'X-RateLimit-Remaining': '10',
-            'X-RateLimit-Reset': '15'
-        }
-        forcing_headers_bbb = {
-            'X-RateLimit-Remaining': '20',
-            'X-RateLimit-Reset': '15'
-        }
-        forcing_headers_bbb_updated = {
-            'X-RateLimit-Remaining': '19',
-            'X-RateLimit-Reset': '15'
-        }
-
-        # Body of the response is ignored. Rate limit is got
-        # from the headers
-        rate_limit_body_aaa = read_file('data/github/rate_limit_aaa')
-        rate_limit_body_bbb = read_file('data/github/rate_limit_bbb')
+        reset = int(time.time()) + 3600
+        rate_limit_body = read_file('data/github/rate_limit_aaa')
 
-        # The client request the rate limit for tokens 'aaa' and 'bbb'.
-        # Once it has selected the best token, it makes a new request
-        # with that token to update the rate limit
         httpretty.register_uri(httpretty.GET,
                                GITHUB_RATE_LIMIT,
-                               responses=[
-                                   httpretty.Response(rate_limit_body_aaa, forcing_headers=forcing_headers_aaa),
-                                   httpretty.Response(rate_limit_body_bbb, forcing_headers=forcing_headers_bbb),
-                                   httpretty.Response(rate_limit_body_bbb, forcing_headers=forcing_headers_bbb_updated)
-                               ])
+                               body=rate_limit_body,
+                               status=200,
+                               forcing_headers={
+                                   'X-RateLimit-Remaining': '19',
+                                   'X-RateLimit-Reset': str(reset)
+                               })
+
+        # The points of the tokens are known by the pool,
+        # so the rate limit is not requested
+        token_pool = GitHubTokenPool(["aaa", "bbb"])
+        token_pool.update("aaa", 10, reset)
+        token_pool.update("bbb", 20, reset)
 
         client = GitHubClient("zhquan_example", "repo", ["aaa", "bbb"],
-                              sleep_for_rate=True)
+                              sleep_for_rate=True, token_pool=token_pool)
         self.assertEqual(client.current_token, 'bbb')
-        self.assertEqual(client.rate_limit, 19)
+        self.assertEqual(client.rate_limit, 20)
+        self.assertEqual(client.rate_limit_reset_ts, reset)
+        self.assertEqual(len(httpretty.latest_requests()), 0)
+
+        # Without previous data, the rate limit is not requested
+        # either; it is set by the headers of the next response
+        client = GitHubClient("zhquan_example", "repo", ["aaa", "bbb"],
+                              sleep_for_rate=True)
+        self.assertEqual(client.current_token, 'aaa')
+        self.assertIsNone(client.rate_limit)
+        self.assertIsNone(client.rate_limit_reset_ts)
+        self.assertEqual(len(httpretty.latest_requests()), 0)
 
     @httpretty.activate
     def test_choose_best_token_when_approaching_limit(self):
         """Test if the client chooses the best token when the current one approaches the limit"""
 
-        # The process will be as follows. The client request the rate limit
-        # for tokens 'aaa', 'bbb' and 'ccc'. Once it has selected the best token,
-        # in this case 'bbb', it makes a new request with that token to update
-        # the rate limit.
+        # The process will be as follows. The client chooses the token
+        # 'aaa' without requesting its rate limit.
         #
-        # When it performs a query to get user data, first checks whether the
-        # token is reaching to its limit. In this case it is, so it asks for
-        # new tokens. Tokens 'aaa' and 'ccc' are refreshed so it gets the best
-        # one, in this case 'aaa'.
-
-        # Token selection is based on the headers returned
-        # by the server to each request made with different tokens
-        forcing_headers_aaa_init = {
-            'X-RateLimit-Remaining': '10',
-            'X-RateLimit-Reset': '15'
-        }
-        forcing_headers_bbb_init = {
-            'X-RateLimit-Remaining': '20',
-            'X-RateLimit-Reset': '15'
-        }
-        forcing_headers_ccc_init = {
-            'X-RateLimit-Remaining': '0',
-            'X-RateLimit-Reset': '15'
-        }
-        forcing_headers_bbb_updated = {
+        # When it performs a query to get the repository, the token
+        # approaches to its limit. The pool does not know the points
+        # of 'bbb' and 'ccc', which means they have their full budget,
+        # so the first one is chosen.
+        #
+        # On the next query, 'bbb' approaches to its limit too. This time
+        # the points of 'ccc' are known by the pool, so it is chosen.
+        # The rate limit is never requested to the API.
+        reset = str(int(time.time()) + 3600)
+
+        forcing_headers_repo = {
             'X-RateLimit-Remaining': '19',
-            'X-RateLimit-Reset': '15'
-        }
-        forcing_headers_aaa_reset = {
-            'X-RateLimit-Remaining': '200',
-            'X-RateLimit-Reset': '15'
-        }
-        forcing_headers_ccc_reset = {
-            'X-RateLimit-Remaining': '100',
-            'X-RateLimit-Reset': '15'
-        }
-        forcing_headers_user = {
-            'X-RateLimit-Remaining': '199',
-            'X-RateLimit-Reset': '15'
+            'X-RateLimit-Reset': reset
         }
 
-        # Body of the response is ignored. Rate limit is got
-        # from the headers
-        rate_limit_body_aaa = read_file('data/github/rate_limit_aaa')
-        rate_limit_body_bbb = read_file('data/github/rate_limit_bbb')
         repo_body = read_file('data/github/github_repo')
 
-        httpretty.register_uri(httpretty.GET,
-                               GITHUB_RATE_LIMIT,
-                               responses=[
-                                   httpretty.Response(rate_limit_body_aaa, forcing_headers=forcing_headers_aaa_init),
-                                   httpretty.Response(rate_limit_body_bbb, forcing_headers=forcing_headers_bbb_init),
-                                   httpretty.Response(rate_limit_body_bbb, forcing_headers=forcing_headers_ccc_init),
-                                   httpretty.Response(rate_limit_body_bbb, forcing_headers=forcing_headers_bbb_updated),
-                                   httpretty.Response(rate_limit_body_aaa, forcing_headers=forcing_headers_aaa_reset),
-                                   httpretty.Response(rate_limit_body_bbb, forcing_headers=forcing_headers_bbb_updated),
-                                   httpretty.Response(rate_limit_body_aaa, forcing_headers=forcing_headers_ccc_reset),
-                                   httpretty.Response(rate_limit_body_aaa, forcing_headers=forcing_headers_aaa_reset),
-                               ])
         httpretty.register_uri(httpretty.GET,
                                GITHUB_REPO_URL,
                                body=repo_body, status=200,
-                               forcing_headers=forcing_headers_user)
+                               forcing_headers=forcing_headers_repo)
 
         client = GitHubClient("zhquan_example", "repo", ["aaa", "bbb", "ccc"],
                               sleep_for_rate=True, min_rate_to_sleep=18)
 
+        self.assertEqual(client.current_token, 'aaa')
+        self.assertIsNone(client.rate_limit)
+
+        client.repo()
+
         self.assertEqual(client.current_token, 'bbb')
-        self.assertEqual(client.rate_limit, 19)
+        self.assertIsNone(client.rate_limit)
+
+        # Another process reported the points of 'ccc'
+        client.token_pool.update('ccc', 100, int(reset))
 
         client.repo()
 
-        self.assertEqual(client.current_token, 'aaa')
-        self.assertEqual(client.rate_limit, 200)
+        self.assertEqual(client.current_token, 'ccc')
+        self.assertEqual(client.rate_limit, 100)
+
+        rate_limit_requests = [req for req in httpretty.latest_requests()
+                               if req.path == '/rate_limit']
+        self.assertEqual(len(rate_limit_requests), 0)
+        self.assertEqual(httpretty.last_request().headers["Authorization"], "token bbb")
 
     @httpretty.activate
     def test_calculate_time_to_reset(self):
@@ -3169,6 +3454,7 @@ class TestGitHubClient(unittest.TestCase):
                                })
 
         client = GitHubClient("zhquan_example", "repo", ["aaa"], sleep_for_rate=True)
+        client.rate_limit_reset_ts = int(datetime_utcnow().replace(microsecond=0).timestamp())
         time_to_reset = client.calculate_time_to_reset()
 
         self.assertEqual(time_to_reset, 0)
@@ -3278,6 +3564,213 @@ class TestGitHubClient(unittest.TestCase):
         self.assertEqual(httpretty.last_request().headers["Authorization"], "token aaa")
 
 
+class TestGitHubUsersCache(unittest.TestCase):
+    """GitHubUsersCache tests"""
+
+    def setUp(self):
+        self.tmp_path = tempfile.mkdtemp(prefix='perceval_')
+        self.cache_path = os.path.join(self.tmp_path, 'cache', 'users.db')
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_path)
+
+    def test_init(self):
+        """Test whether the cache is created"""
+
+        cache = GitHubUsersCache(self.cache_path)
+
+        self.assertEqual(cache.cache_path, self.cache_path)
+        self.assertEqual(cache.ttl, USERS_CACHE_TTL)
+        self.assertTrue(os.path.exists(self.cache_path))
+
+    def test_init_invalid_cache(self):
+        """Test whether an exception is raised when the cache is not valid"""
+
+        os.makedirs(os.path.dirname(self.cache_path))
+        with open(self.cache_path, 'w') as fd:
+            fd.write("Invalid cache")
+
+        with self.assertRaisesRegex(BackendError, "invalid users cache"):
+            _ = GitHubUsersCache(self.cache_path)
+
+    def test_set_get(self):
+        """Test whether entries are stored and retrieved"""
+
+        cache = GitHubUsersCache(self.cache_path)
+
+        self.assertIsNone(cache.get('https://api.github.com/users/jsmith'))
+
+        cache.set('https://api.github.com/users/jsmith', '{"login": "jsmith"}', etag='"abcd"')
+        cache.set('https://api.github.com/users/jdoe', '{"login": "jdoe"}')
+
+        entry = cache.get('https://api.github.com/users/jsmith')
+        self.assertDictEqual(entry, {'etag': '"abcd"', 'data': '{"login": "jsmith"}', 'expired': False})
+
+        entry = cache.get('https://api.github.com/users/jdoe')
+        self.assertDictEqual(entry, {'etag': None, 'data': '{"login": "jdoe"}', 'expired': False})
+
+        # Entries are shared with other instances
+        other = GitHubUsersCache(self.cache_path)
+        entry = other.get('https://api.github.com/users/jsmith')
+        self.assertEqual(entry['data'], '{"login": "jsmith"}')
+
+        # Stored entries are replaced
+        other.set('https://api.github.com/users/jsmith', '{"login": "jsmith", "name": "John"}', etag='"efgh"')
+
+        entry = cache.get('https://api.github.com/users/jsmith')
+        self.assertDictEqual(entry, {'etag': '"efgh"',
+                                     'data': '{"login": "jsmith", "name": "John"}',
+                                     'expired': False})
+
+    @unittest.mock.patch('perceval.backends.core.github.time.time')
+    def test_expired(self, mock_time):
+        """Test whether entries expire and can be refreshed"""
+
+        mock_time.return_value = 1000
+        cache = GitHubUsersCache(self.cache_path, ttl=100)
+        cache.set('https://api.github.com/users/jsmith', '{"login": "jsmith"}', etag='"abcd"')
+
+        mock_time.return_value = 1099
+        self.assertFalse(cache.get('https://api.github.com/users/jsmith')['expired'])
+
+        mock_time.return_value = 1100
+        self.assertTrue(cache.get('https://api.github.com/users/jsmith')['expired'])
+
+        cache.refresh('https://api.github.com/users/jsmith')
+
+        entry = cache.get('https://api.github.com/users/jsmith')
+        self.assertDictEqual(entry, {'etag': '"abcd"', 'data': '{"login": "jsmith"}', 'expired': False})
+
+
+class TestGitHubTokenPool(unittest.TestCase):
+    """GitHubTokenPool tests"""
+
+    def setUp(self):
+        self.tmp_path = tempfile.mkdtemp(prefix='perceval_')
+        self.state_path = os.path.join(self.tmp_path, 'state', 'tokens.db')
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_path)
+
+    def test_init(self):
+        """Test whether the pool is created"""
+
+        pool = GitHubTokenPool(['aaa', 'bbb'])
+
+        self.assertEqual(pool.tokens, ['aaa', 'bbb'])
+        self.assertIsNone(pool.state_path)
+
+        pool = GitHubTokenPool(['aaa', 'bbb'], state_path=self.state_path)
+
+        self.assertEqual(pool.state_path, self.state_path)
+        self.assertTrue(os.path.exists(self.state_path))
+
+    def test_init_invalid_state(self):
+        """Test whether an exception is raised when the state is not valid"""
+
+        os.makedirs(os.path.dirname(self.state_path))
+        with open(self.state_path, 'w') as fd:
+            fd.write("Invalid state")
+
+        with self.assertRaisesRegex(BackendError, "invalid tokens state"):
+            _ = GitHubTokenPool(['aaa'], state_path=self.state_path)
+
+    def test_pick_empty(self):
+        """Test whether nothing is picked when there are no tokens"""
+
+        pool = GitHubTokenPool([])
+        self.assertEqual(pool.pick(), (None, None, None))
+
+    @unittest.mock.patch('perceval.backends.core.github.time.time')
+    def test_pick(self, mock_time):
+        """Test whether the token with more points is picked"""
+
+        mock_time.return_value = 1000
+
+        pool = GitHubTokenPool(['aaa', 'bbb', 'ccc'])
+
+        # Tokens not used yet are picked first,
+        # the least recently picked one before
+        self.assertEqual(pool.pick(), ('aaa', None, None))
+        mock_time.return_value = 1001
+        self.assertEqual(pool.pick(), ('bbb', None, None))
+
+        pool.update('aaa', 100, 2000)
+        pool.update('bbb', 300, 2000)
+
+        mock_time.return_value = 1002
+        self.assertEqual(pool.pick(), ('ccc', None, None))
+
+        pool.update('ccc', 200, 2000)
+
+        mock_time.return_value = 1003
+        self.assertEqual(pool.pick(), ('bbb', 300, 2000))
+
+        # Ties are solved using the least recently picked token
+        pool.update('bbb', 200, 2000)
+
+        mock_time.return_value = 1004
+        self.assertEqual(pool.pick(), ('ccc', 200, 2000))
+        mock_time.return_value = 1005
+        self.assertEqual(pool.pick(), ('bbb', 200, 2000))
+
+        # Points of 'aaa' were reset
+        mock_time.return_value = 2000
+        self.assertEqual(pool.pick(), ('aaa', None, None))
+
+    def test_update(self):
+        """Test whether outdated updates are ignored"""
+
+        pool = GitHubTokenPool(['aaa'])
+
+        pool.update('aaa', None, None)
+        self.assertEqual(pool.pick(), ('aaa', None, None))
+
+        reset = int(time.time()) + 3600
+
+        pool.update('aaa', 100, reset)
+        self.assertEqual(pool.pick(), ('aaa', 100, reset))
+
+        # Points only decrease within the same window
+        pool.update('aaa', 150, reset)
+        self.assertEqual(pool.pick(), ('aaa', 100, reset))
+
+        pool.update('aaa', 50, reset)
+        self.assertEqual(pool.pick(), ('aaa', 50, reset))
+
+        # Updates from a previous window are ignored
+        pool.update('aaa', 10, reset - 3600)
+        self.assertEqual(pool.pick(), ('aaa', 50, reset))
+
+        # Updates from a new window are applied
+        pool.update('aaa', 4000, reset + 3600)
+        self.assertEqual(pool.pick(), ('aaa', 4000, reset + 3600))
+
+    def test_shared_state(self):
+        """Test whether the state is shared by several pools"""
+
+        reset = int(time.time()) + 3600
+
+        pool = GitHubTokenPool(['aaa', 'bbb'], state_path=self.state_path)
+        other = GitHubTokenPool(['aaa', 'bbb'], state_path=self.state_path)
+
+        pool.update('aaa', 100, reset)
+        other.update('bbb', 200, reset)
+
+        self.assertEqual(pool.pick(), ('bbb', 200, reset))
+
+        other.update('bbb', 50, reset)
+
+        self.assertEqual(pool.pick(), ('aaa', 100, reset))
+
+        # Tokens are not stored in plain text
+        with open(self.state_path, 'rb') as fd:
+            content = fd.read()
+
+        self.assertNotIn(b'aaa', content)
+        self.assertNotIn(b'bbb', content)
+
+
 class TestGitHubCommand(unittest.TestCase):
     """GitHubCommand unit tests"""
 
@@ -3298,6 +3791,11 @@ class TestGitHubCommand(unittest.TestCase):
                 '--max-retries', '5',
                 '--max-items', '10',
                 '--sleep-time', '10',
+                '--max-workers', '2',
+                '--prefetch-depth', '3',
+                '--users-cache-path', '/tmp/users.db',
+                '--users-cache-ttl', '3600',
+                '--tokens-state-path', '/tmp/tokens.db',
                 '--tag', 'test', '--no-archive',
                 '--api-token', 'abcdefgh', 'ijklmnop',
                 '--from-date', '1970-01-01',
@@ -3313,6 +3811,11 @@ class TestGitHubCommand(unittest.TestCase):
         self.assertEqual(parsed_args.max_retries, 5)
         self.assertEqual(parsed_args.max_items, 10)
         self.assertEqual(parsed_args.sleep_time, 10)
+        self.assertEqual(parsed_args.max_workers, 2)
+        self.assertEqual(parsed_args.prefetch_depth, 3)
+        self.assertEqual(parsed_args.users_cache_path, '/tmp/users.db')
+        self.assertEqual(parsed_args.users_cache_ttl, 3600)
+        self.assertEqual(parsed_args.tokens_state_path, '/tmp/tokens.db')
         self.assertEqual(parsed_args.tag, 'test')
         self.assertEqual(parsed_args.from_date, DEFAULT_DATETIME)
         self.assertEqual(parsed_args.to_date, DEFAULT_LAST_DATETIME)
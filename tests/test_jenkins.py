@@ -479,6 +479,38 @@ class TestJenkinsBackend(unittest.TestCase):
 
         self.assertEqual(len(builds), 0)
 
+    @httpretty.activate
+    def test_fetch_partial_job(self):
+        """Test whether jobs with builds fetched before an invalid one are not skipped"""
+
+        jobs = {'jobs': [{'name': JENKINS_JOB_BUILDS_1,
+                          'url': JENKINS_SERVER_URL + '/job/' + JENKINS_JOB_BUILDS_1 + '/'}]}
+        job_builds = json.loads(read_file('data/jenkins/jenkins_job_builds.json'))
+
+        # The document is cut after the second build
+        body = json.dumps({'builds': job_builds['builds'][:2]})[:-2] + ', {"url": '
+
+        httpretty.register_uri(httpretty.GET,
+                               JENKINS_JOBS_URL,
+                               body=json.dumps(jobs), status=200)
+        httpretty.register_uri(httpretty.GET,
+                               JENKINS_JOB_BUILDS_URL_1_DEPTH_1,
+                               body=body, status=200)
+
+        jenkins = Jenkins(JENKINS_SERVER_URL)
+
+        with self.assertLogs(logger, level='INFO') as cm:
+            builds = [build for build in jenkins.fetch()]
+
+        self.assertEqual(len(builds), 2)
+        self.assertEqual(jenkins.summary.fetched, 2)
+        self.assertEqual(jenkins.summary.skipped, 0)
+
+        self.assertIn('WARNING:perceval.backends.core.jenkins:Unable to parse the rest of builds from job '
+                      'http://example.com/ci/job/apex-build-brahmaputra/; 2 builds fetched', cm.output)
+        self.assertIn('INFO:perceval.backends.core.jenkins:Total number of jobs: 1/1 (1 partially fetched)',
+                      cm.output)
+
     @httpretty.activate
     def test_fetch_blacklist(self):
         """Test whether jobs in blacklist are not retrieved"""
@@ -674,6 +706,29 @@ class TestJenkinsClient(unittest.TestCase):
 
         self.assertEqual(response, body)
 
+    @httpretty.activate
+    def test_stream_builds(self):
+        """Test whether builds are decoded one by one"""
+
+        # Set up a mock HTTP server
+        body = read_file('data/jenkins/jenkins_job_builds.json')
+        httpretty.register_uri(httpretty.GET,
+                               JENKINS_JOB_BUILDS_URL_1_DEPTH_1,
+                               body=body, status=200)
+
+        client = JenkinsClient(JENKINS_SERVER_URL, blacklist_jobs=[JENKINS_JOB_BUILDS_2])
+        builds = client.stream_builds(JENKINS_JOB_BUILDS_1)
+
+        self.assertListEqual(list(builds), json.loads(body)['builds'])
+
+        req = httpretty.last_request()
+        self.assertDictEqual(req.querystring, {'depth': ['1']})
+
+        # Blacklisted jobs are not requested
+        builds = client.stream_builds(JENKINS_JOB_BUILDS_2)
+        self.assertIsNone(builds)
+        self.assertEqual(len(httpretty.HTTPretty.latest_requests), 1)
+
     @httpretty.activate
     def test_get_builds_auth_api_token(self):
         """Test get_builds API call with username and API token"""
@@ -841,6 +841,53 @@ class TestJiraClient(unittest.TestCase):
 
         self.assertDictEqual(httpretty.last_request().querystring, expected_req)
 
+    @httpretty.activate
+    def test_stream_issues(self):
+        """Test stream issues API call"""
+
+        from_date = str_to_datetime('2015-01-01')
+
+        bodies_json = [read_file('data/jira/jira_issues_page_1.json'),
+                       read_file('data/jira/jira_issues_page_2.json')]
+
+        httpretty.register_uri(httpretty.GET,
+                               JIRA_SEARCH_URL,
+                               responses=[httpretty.Response(body=body)
+                                          for body in bodies_json])
+
+        client = JiraClient(url='http://example.com', project='perceval',
+                            user='user', password='password',
+                            verify=False, cert=None, max_results=2)
+
+        issues = [[issue for issue in page] for page in client.stream_issues(from_date)]
+
+        self.assertEqual(len(issues), 2)
+        self.assertListEqual(issues[0], json.loads(bodies_json[0])['issues'])
+        self.assertListEqual(issues[1], json.loads(bodies_json[1])['issues'])
+
+        requests = httpretty.HTTPretty.latest_requests
+        self.assertEqual(len(requests), 2)
+        self.assertEqual(requests[0].querystring['startAt'], ['0'])
+        self.assertEqual(requests[1].querystring['startAt'], ['2'])
+
+    @httpretty.activate
+    def test_stream_issues_empty(self):
+        """Test stream issues API call when there are no issues"""
+
+        from_date = str_to_datetime('2015-01-01')
+
+        httpretty.register_uri(httpretty.GET,
+                               JIRA_SEARCH_URL,
+                               body='{"total": 0, "maxResults": 0, "startAt": 0}', status=200)
+
+        client = JiraClient(url='http://example.com', project='perceval',
+                            user='user', password='password',
+                            verify=False, cert=None, max_results=1)
+
+        issues = [[issue for issue in page] for page in client.stream_issues(from_date)]
+
+        self.assertListEqual(issues, [[]])
+
 
 class TestJiraCommand(unittest.TestCase):
     """JiraCommand unit tests"""
@@ -0,0 +1,195 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2015-2019 Bitergia
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+#
+
+import json
+import unittest
+
+from perceval.jsonstream import JSONArrayStream
+
+
+def split(data, size):
+    """Split data in chunks of `size` length"""
+
+    return [data[i:i + size] for i in range(0, len(data), size)]
+
+
+class TestJSONArrayStream(unittest.TestCase):
+    """Unit tests for JSONArrayStream class"""
+
+    DOCUMENT = {
+        'total': 3,
+        'paging': {'next': None, 'sizes': [1, 2]},
+        'issues': [
+            {'id': 1, 'title': 'ñandú', 'labels': ['bug', 'ui']},
+            {'id': 2, 'title': 'a "quoted" title', 'score': 12345.678},
+            {'id': 3, 'title': None, 'closed': True}
+        ],
+        'has_more': False
+    }
+
+    def test_stream(self):
+        """Test whether the elements of the array are decoded regardless of the chunks size"""
+
+        data = json.dumps(self.DOCUMENT, indent=4).encode('utf-8')
+
+        for size in [1, 2, 3, 10, 100, len(data)]:
+            stream = JSONArrayStream(split(data, size), path=['issues'])
+
+            self.assertListEqual(list(stream), self.DOCUMENT['issues'])
+            self.assertTrue(stream.finished)
+            self.assertDictEqual(stream.document, {'total': 3,
+                                                   'paging': {'next': None, 'sizes': [1, 2]},
+                                                   'has_more': False})
+
+    def test_stream_lazy(self):
+        """Test whether chunks are read only when they are needed"""
+
+        issues = [{'id': x, 'body': 'x' * 1024} for x in range(1000)]
+        data = json.dumps({'total': 1000, 'issues': issues, 'has_more': False}).encode('utf-8')
+        chunks = iter(split(data, 1024))
+
+        stream = JSONArrayStream(chunks, path=['issues'])
+        issue = next(stream)
+
+        self.assertEqual(issue['id'], 0)
+        self.assertFalse(stream.finished)
+
+        # Values placed before the array are already available
+        self.assertEqual(stream.document['total'], 1000)
+        self.assertNotIn('has_more', stream.document)
+
+        # There are chunks pending to be read
+        self.assertIsNotNone(next(chunks, None))
+
+    def test_stream_strings(self):
+        """Test whether chunks can be strings"""
+
+        data = json.dumps(self.DOCUMENT)
+        stream = JSONArrayStream(split(data, 7), path=['issues'])
+
+        self.assertListEqual(list(stream), self.DOCUMENT['issues'])
+
+    def test_stream_multibyte_split(self):
+        """Test whether characters split between chunks are decoded"""
+
+        data = '[{"name": "ñandú"}, "日本"]'.encode('utf-8')
+        stream = JSONArrayStream(split(data, 1))
+
+        self.assertListEqual(list(stream), [{'name': 'ñandú'}, '日本'])
+
+    def test_root_array(self):
+        """Test whether the document can be the array itself"""
+
+        stream = JSONArrayStream([b' [1, 2', b'3, 4] \n'])
+
+        self.assertListEqual(list(stream), [1, 23, 4])
+        self.assertDictEqual(stream.document, {})
+
+        stream = JSONArrayStream([b'[]'])
+        self.assertListEqual(list(stream), [])
+
+    def test_nested_path(self):
+        """Test whether arrays of nested objects are found"""
+
+        data = b'{"a": 1, "data": {"b": [1], "items": [{"x": 1}, {"x": 2}], "c": 2}, "d": 3}'
+        stream = JSONArrayStream(split(data, 4), path=['data', 'items'])
+
+        self.assertListEqual(list(stream), [{'x': 1}, {'x': 2}])
+        self.assertDictEqual(stream.document, {'a': 1, 'data': {'b': [1], 'c': 2}, 'd': 3})
+
+    def test_array_not_found(self):
+        """Test whether there are no elements when the array is not found"""
+
+        stream = JSONArrayStream([b'{"ok": false, "error": "not_authed"}'], path=['messages'])
+
+        self.assertListEqual(list(stream), [])
+        self.assertDictEqual(stream.document, {'ok': False, 'error': 'not_authed'})
+
+        stream = JSONArrayStream([b'{"messages": null}'], path=['messages'])
+
+        self.assertListEqual(list(stream), [])
+        self.assertDictEqual(stream.document, {'messages': None})
+
+        stream = JSONArrayStream([b'{}'], path=['messages'])
+        self.assertListEqual(list(stream), [])
+
+    def test_validate(self):
+        """Test whether the document is validated once it is read"""
+
+        def validate(document):
+            if not document['ok']:
+                raise ValueError(document['error'])
+
+        stream = JSONArrayStream([b'{"items": [1, 2], "ok": true}'], path=['items'],
+                                 validate=validate)
+        self.assertListEqual(list(stream), [1, 2])
+
+        stream = JSONArrayStream([b'{"items": [1, 2], "ok": false, "error": "failed"}'],
+                                 path=['items'], validate=validate)
+
+        self.assertEqual(next(stream), 1)
+        self.assertEqual(next(stream), 2)
+
+        with self.assertRaisesRegex(ValueError, "failed"):
+            next(stream)
+
+    def test_close(self):
+        """Test whether closing the stream closes the chunks iterator"""
+
+        data = json.dumps(self.DOCUMENT).encode('utf-8')
+        closed = []
+
+        def chunks():
+            try:
+                yield from split(data, 10)
+            finally:
+                closed.append(True)
+
+        stream = JSONArrayStream(chunks(), path=['issues'])
+        _ = next(stream)
+        stream.close()
+
+        self.assertListEqual(closed, [True])
+        self.assertFalse(stream.finished)
+
+        with self.assertRaises(StopIteration):
+            next(stream)
+
+    def test_invalid_document(self):
+        """Test whether an exception is raised when the document is not valid"""
+
+        invalid = [
+            (b'', None),
+            (b'{"items": [1, 2', ['items']),
+            (b'{"items": [1,, 2]}', ['items']),
+            (b'{"items": [1] "a": 2}', ['items']),
+            (b'{items: [1]}', ['items']),
+            (b'[1, 2] 3', None),
+            (b'{"items": [1]', ['items'])
+        ]
+
+        for data, path in invalid:
+            stream = JSONArrayStream(split(data, 3), path=path)
+
+            with self.assertRaises(json.JSONDecodeError):
+                _ = list(stream)
+
+
+if __name__ == "__main__":
+    unittest.main(warnings='ignore')
@@ -0,0 +1,240 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2015-2019 Bitergia
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+#
+
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+from perceval.errors import MetricsError
+from perceval.metrics import (DEFAULT_BUCKETS,
+                              METRICS_EXPORTERS,
+                              FetchMetrics,
+                              Histogram,
+                              JSONMetricsExporter,
+                              OpenMetricsExporter)
+
+
+class TestHistogram(unittest.TestCase):
+    """Unit tests for Histogram class"""
+
+    def test_init(self):
+        """Test whether the histogram is empty when it is created"""
+
+        histogram = Histogram()
+
+        self.assertEqual(histogram.buckets, DEFAULT_BUCKETS)
+        self.assertEqual(histogram.count, 0)
+        self.assertEqual(histogram.sum, 0)
+        self.assertIsNone(histogram.min)
+        self.assertIsNone(histogram.max)
+
+    def test_observe(self):
+        """Test whether values are counted in their buckets"""
+
+        histogram = Histogram(buckets=[0.1, 1])
+
+        for value in [0.05, 0.1, 0.5, 2, 3]:
+            histogram.observe(value)
+
+        self.assertEqual(histogram.count, 5)
+        self.assertAlmostEqual(histogram.sum, 5.65)
+        self.assertEqual(histogram.min, 0.05)
+        self.assertEqual(histogram.max, 3)
+        self.assertListEqual(histogram.cumulative_counts(),
+                             [('0.1', 2), ('1', 3), ('+Inf', 5)])
+
+        expected = {
+            'count': 5,
+            'sum': histogram.sum,
+            'min': 0.05,
+            'max': 3,
+            'buckets': {'0.1': 2, '1': 3, '+Inf': 5}
+        }
+        self.assertDictEqual(histogram.to_dict(), expected)
+
+
+class TestFetchMetrics(unittest.TestCase):
+    """Unit tests for FetchMetrics class"""
+
+    def test_endpoint(self):
+        """Test whether identifiers and queries are removed from the URLs"""
+
+        endpoint = FetchMetrics.endpoint('https://api.github.com/repos/chaoss/grimoirelab/issues/12?page=2')
+        self.assertEqual(endpoint, 'api.github.com/repos/chaoss/grimoirelab/issues/:id')
+
+        endpoint = FetchMetrics.endpoint('http://example.com/commit/1b8e1d14f6b1f0ef2ba0a4b4b0a9b8d7f0c7e6a5/')
+        self.assertEqual(endpoint, 'example.com/commit/:id/')
+
+        endpoint = FetchMetrics.endpoint('http://example.com:8080')
+        self.assertEqual(endpoint, 'example.com:8080')
+
+    def test_record_request(self):
+        """Test whether requests are recorded by endpoint and method"""
+
+        metrics = FetchMetrics()
+        metrics.record_request('GET', 'http://example.com/items/1', 0.2,
+                               status=200, nbytes=100, retries=1)
+        metrics.record_request('GET', 'http://example.com/items/2', 0.4,
+                               status=404, nbytes=10)
+        metrics.record_request('GET', 'http://example.com/items/3', 1.5)
+        metrics.record_request('POST', 'http://example.com/items/1', 0.1,
+                               status=201, nbytes=5)
+
+        self.assertEqual(len(metrics.endpoints), 2)
+
+        items = metrics.endpoints[('GET', 'example.com/items/:id')]
+        self.assertEqual(items['requests'], 3)
+        self.assertEqual(items['errors'], 2)
+        self.assertEqual(items['retries'], 1)
+        self.assertEqual(items['bytes'], 110)
+        self.assertEqual(items['latency'].count, 3)
+        self.assertEqual(items['latency'].max, 1.5)
+
+        items = metrics.endpoints[('POST', 'example.com/items/:id')]
+        self.assertEqual(items['requests'], 1)
+        self.assertEqual(items['errors'], 0)
+
+    def test_totals(self):
+        """Test whether totals are calculated"""
+
+        metrics = FetchMetrics()
+        metrics.record_request('GET', 'http://example.com/items/1', 2,
+                               status=200, nbytes=100, retries=1)
+        metrics.record_request('GET', 'http://example.com/users/1', 1,
+                               status=500, nbytes=10)
+        metrics.record_sleep('rate_limit', 4)
+        metrics.record_sleep('pacing', 0.5)
+        metrics.record_sleep('pacing', 0.5)
+        metrics.record_stage('archive', 1)
+
+        expected = {
+            'requests': 2,
+            'errors': 1,
+            'retries': 1,
+            'bytes': 110,
+            'request_seconds': 3,
+            'sleep_seconds': 5,
+            'archive_seconds': 1
+        }
+        self.assertDictEqual(metrics.totals, expected)
+        self.assertDictEqual(metrics.sleeps['pacing'], {'count': 2, 'seconds': 1})
+
+        # The time left of the fetch is spent processing data
+        metrics.record_stage('fetch', 12)
+
+        totals = metrics.totals
+        self.assertEqual(totals['fetch_seconds'], 12)
+        self.assertEqual(totals['processing_seconds'], 3)
+
+    def test_to_dict(self):
+        """Test whether metrics are converted to a dict"""
+
+        metrics = FetchMetrics(buckets=[1])
+        metrics.record_request('GET', 'http://example.com/users/1', 2, status=200, nbytes=10)
+        metrics.record_request('GET', 'http://example.com/items/1', 0.5, status=200, nbytes=100)
+        metrics.record_sleep('rate_limit', 4)
+        metrics.record_stage('fetch', 10)
+
+        data = metrics.to_dict()
+
+        self.assertDictEqual(data['totals'], metrics.totals)
+        self.assertListEqual([endpoint['endpoint'] for endpoint in data['endpoints']],
+                             ['example.com/items/:id', 'example.com/users/:id'])
+        self.assertDictEqual(data['endpoints'][0]['latency']['buckets'], {'1': 1, '+Inf': 1})
+        self.assertDictEqual(data['sleeps'], {'rate_limit': {'count': 1, 'seconds': 4}})
+        self.assertEqual(data['stages']['fetch']['sum'], 10)
+
+        # The dict can be encoded in JSON
+        self.assertDictEqual(json.loads(json.dumps(data)), data)
+
+
+class TestMetricsExporters(unittest.TestCase):
+    """Unit tests for metrics exporters"""
+
+    def setUp(self):
+        self.test_path = tempfile.mkdtemp(prefix='perceval_')
+
+        self.metrics = FetchMetrics(buckets=[1])
+        self.metrics.record_request('GET', 'http://example.com/items/1', 0.5,
+                                    status=200, nbytes=100, retries=2)
+        self.metrics.record_sleep('rate_limit', 4)
+        self.metrics.record_stage('archive', 0.25)
+
+    def tearDown(self):
+        shutil.rmtree(self.test_path)
+
+    def test_exporters(self):
+        """Test whether the exporters are registered by format"""
+
+        self.assertDictEqual(METRICS_EXPORTERS, {'json': JSONMetricsExporter,
+                                                 'openmetrics': OpenMetricsExporter})
+
+    def test_json_export(self):
+        """Test whether metrics are exported as a JSON report"""
+
+        filepath = os.path.join(self.test_path, 'metrics.json')
+        JSONMetricsExporter(filepath).export(self.metrics)
+
+        with open(filepath) as fd:
+            report = json.load(fd)
+
+        self.assertDictEqual(report, self.metrics.to_dict())
+
+    def test_openmetrics_export(self):
+        """Test whether metrics are exported using OpenMetrics format"""
+
+        filepath = os.path.join(self.test_path, 'metrics.txt')
+        OpenMetricsExporter(filepath).export(self.metrics)
+
+        with open(filepath) as fd:
+            lines = fd.read().splitlines()
+
+        labels = 'method="GET",endpoint="example.com/items/:id"'
+
+        self.assertIn('# TYPE perceval_http_requests counter', lines)
+        self.assertIn('perceval_http_requests_total{%s} 1' % labels, lines)
+        self.assertIn('perceval_http_request_retries_total{%s} 2' % labels, lines)
+        self.assertIn('perceval_http_response_bytes_total{%s} 100' % labels, lines)
+        self.assertIn('# TYPE perceval_http_request_duration_seconds histogram', lines)
+        self.assertIn('perceval_http_request_duration_seconds_bucket{%s,le="1"} 1' % labels, lines)
+        self.assertIn('perceval_http_request_duration_seconds_bucket{%s,le="+Inf"} 1' % labels, lines)
+        self.assertIn('perceval_http_request_duration_seconds_count{%s} 1' % labels, lines)
+        self.assertIn('perceval_http_request_duration_seconds_sum{%s} 0.5' % labels, lines)
+        self.assertIn('perceval_sleep_seconds_total{reason="rate_limit"} 4', lines)
+        self.assertIn('perceval_stage_duration_seconds_sum{stage="archive"} 0.25', lines)
+        self.assertEqual(lines[-1], '# EOF')
+
+    def test_openmetrics_escape_labels(self):
+        """Test whether label values are escaped"""
+
+        self.assertEqual(OpenMetricsExporter._escape('a"b\\c\nd'), 'a\\"b\\\\c\\nd')
+
+    def test_export_error(self):
+        """Test whether an exception is raised when the report cannot be written"""
+
+        filepath = os.path.join(self.test_path, 'missing', 'metrics.json')
+
+        with self.assertRaisesRegex(MetricsError, "metrics file .+ cannot be written"):
+            JSONMetricsExporter(filepath).export(self.metrics)
+
+
+if __name__ == "__main__":
+    unittest.main(warnings='ignore')
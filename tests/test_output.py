@@ -0,0 +1,245 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2015-2019 Bitergia
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+#
+
+import gzip
+import io
+import json
+import os
+import shutil
+import tempfile
+import unittest
+import unittest.mock
+
+import perceval.output
+from perceval.errors import BackendError
+from perceval.output import (ColumnarWriter,
+                             ItemWriter,
+                             JSONEncoder,
+                             make_item_writer)
+
+
+ITEMS = [
+    {'uuid': str(x), 'data': {'number': x, 'title': 'Issue ñ %s' % x}, 'origin': 'http://example.com'}
+    for x in range(5)
+]
+
+
+class TestJSONEncoder(unittest.TestCase):
+    """JSONEncoder tests"""
+
+    def test_encode(self):
+        """Test if objects are encoded as compact JSON documents"""
+
+        encoder = JSONEncoder()
+
+        for item in ITEMS:
+            obj = encoder.encode(item)
+            self.assertNotIn('\n', obj)
+            self.assertDictEqual(json.loads(obj), item)
+
+        obj = encoder.encode({'b': 1, 'a': [1, 2]})
+        self.assertEqual(obj, '{"a":[1,2],"b":1}')
+
+    def test_encode_indent(self):
+        """Test if the indented output is the same as the standard one"""
+
+        encoder = JSONEncoder(indent=4)
+
+        for item in ITEMS:
+            obj = encoder.encode(item)
+            self.assertEqual(obj, json.dumps(item, indent=4, sort_keys=True))
+
+    def test_encode_unsorted(self):
+        """Test if keys are not sorted when it is not required"""
+
+        encoder = JSONEncoder(sort_keys=False)
+
+        obj = encoder.encode({'b': 1, 'a': 2})
+        self.assertEqual(obj, '{"b":1,"a":2}')
+
+    def test_encode_fallback(self):
+        """Test if objects not supported by the fast encoder are encoded"""
+
+        encoder = JSONEncoder()
+
+        obj = encoder.encode({'number': 2 ** 70})
+        self.assertEqual(obj, '{"number":%s}' % (2 ** 70))
+
+    @unittest.mock.patch('perceval.output.orjson', None)
+    def test_encode_no_orjson(self):
+        """Test if the standard encoder is used when orjson is not installed"""
+
+        encoder = JSONEncoder()
+
+        obj = encoder.encode({'b': 1, 'a': 'ñ'})
+        self.assertEqual(obj, '{"a":"\\u00f1","b":1}')
+
+
+class TestItemWriter(unittest.TestCase):
+    """ItemWriter tests"""
+
+    def setUp(self):
+        self.test_path = tempfile.mkdtemp(prefix='perceval_')
+        self.fout_path = os.path.join(self.test_path, 'items.out')
+
+    def tearDown(self):
+        shutil.rmtree(self.test_path)
+
+    def test_write(self):
+        """Test if items are written one per line"""
+
+        outfile = io.StringIO()
+
+        with ItemWriter(outfile) as writer:
+            for item in ITEMS:
+                writer.write(item)
+
+        lines = outfile.getvalue().splitlines()
+        self.assertListEqual([json.loads(line) for line in lines], ITEMS)
+
+    def test_buffer(self):
+        """Test if items are written in chunks"""
+
+        outfile = unittest.mock.Mock()
+
+        writer = ItemWriter(outfile, buffer_size=50)
+
+        writer.write(ITEMS[0])
+        self.assertEqual(outfile.write.call_count, 1)
+
+        writer = ItemWriter(outfile, buffer_size=1024)
+
+        for item in ITEMS:
+            writer.write(item)
+        self.assertEqual(outfile.write.call_count, 1)
+
+        writer.close()
+        self.assertEqual(outfile.write.call_count, 2)
+
+    def test_gzip(self):
+        """Test if the output is compressed with gzip"""
+
+        with open(self.fout_path, 'w') as outfile:
+            outfile.write('')
+
+            with ItemWriter(outfile, compression='gzip', buffer_size=100) as writer:
+                for item in ITEMS:
+                    writer.write(item)
+
+        with gzip.open(self.fout_path, 'rt') as fd:
+            items = [json.loads(line) for line in fd]
+
+        self.assertListEqual(items, ITEMS)
+
+    def test_compression_not_supported(self):
+        """Test if an error is raised for unknown compressions or streams"""
+
+        with self.assertRaisesRegex(BackendError, "compression bz2 not supported"):
+            ItemWriter(io.StringIO(), compression='bz2')
+
+        with self.assertRaisesRegex(BackendError, "does not support compressed data"):
+            ItemWriter(io.StringIO(), compression='gzip')
+
+    @unittest.mock.patch('perceval.output.zstandard', None)
+    def test_zstd_not_installed(self):
+        """Test if an error is raised when zstandard is not installed"""
+
+        with open(self.fout_path, 'w') as outfile:
+            with self.assertRaisesRegex(BackendError, "zstandard package not found"):
+                ItemWriter(outfile, compression='zstd')
+
+    @unittest.skipIf(perceval.output.zstandard is None, "zstandard not installed")
+    def test_zstd(self):
+        """Test if the output is compressed with zstd"""
+
+        with open(self.fout_path, 'w') as outfile:
+            with ItemWriter(outfile, compression='zstd') as writer:
+                for item in ITEMS:
+                    writer.write(item)
+
+        with open(self.fout_path, 'rb') as fd:
+            reader = perceval.output.zstandard.ZstdDecompressor().stream_reader(fd)
+            data = reader.read().decode('utf-8')
+
+        items = [json.loads(line) for line in data.splitlines()]
+        self.assertListEqual(items, ITEMS)
+
+
+class TestColumnarWriter(unittest.TestCase):
+    """ColumnarWriter tests"""
+
+    def test_write(self):
+        """Test if items are written in columnar batches"""
+
+        outfile = io.StringIO()
+
+        items = ITEMS + [{'uuid': '5', 'updated_on': 1.0}]
+
+        with ColumnarWriter(outfile, batch_size=4) as writer:
+            for item in items:
+                writer.write(item)
+
+        lines = outfile.getvalue().splitlines()
+        self.assertEqual(len(lines), 2)
+
+        batch = json.loads(lines[0])
+        self.assertListEqual(sorted(batch.keys()), ['data', 'origin', 'uuid'])
+        self.assertListEqual(batch['uuid'], ['0', '1', '2', '3'])
+        self.assertListEqual(batch['data'], [item['data'] for item in ITEMS[0:4]])
+
+        batch = json.loads(lines[1])
+        self.assertListEqual(batch['uuid'], ['4', '5'])
+        self.assertListEqual(batch['origin'], ['http://example.com', None])
+        self.assertListEqual(batch['updated_on'], [None, 1.0])
+
+
+class TestMakeItemWriter(unittest.TestCase):
+    """Tests for make_item_writer function"""
+
+    def test_formats(self):
+        """Test if the writer of each format is created"""
+
+        outfile = io.StringIO()
+
+        writer = make_item_writer(outfile)
+        self.assertIsInstance(writer, ItemWriter)
+        self.assertEqual(writer.encoder.indent, 4)
+        self.assertEqual(writer.encoder.sort_keys, True)
+
+        writer = make_item_writer(outfile, 'jsonl', sort_keys=False)
+        self.assertEqual(writer.encoder.indent, None)
+        self.assertEqual(writer.encoder.sort_keys, False)
+        self.assertEqual(writer.compression, None)
+
+        writer = make_item_writer(outfile, 'columnar')
+        self.assertIsInstance(writer, ColumnarWriter)
+
+        with tempfile.TemporaryFile('w') as fd:
+            writer = make_item_writer(fd, 'jsonl.gz')
+            self.assertEqual(writer.compression, 'gzip')
+
+    def test_format_not_supported(self):
+        """Test if an error is raised for unknown formats"""
+
+        with self.assertRaisesRegex(BackendError, "output format csv not supported"):
+            make_item_writer(io.StringIO(), 'csv')
+
+
+if __name__ == "__main__":
+    unittest.main()
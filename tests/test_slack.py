@@ -23,6 +23,7 @@ import copy
 import datetime
 import dateutil
 import httpretty
+import json
 import os
 import pkg_resources
 import unittest
@@ -807,6 +808,41 @@ class TestSlackClient(unittest.TestCase):
         with self.assertRaises(SlackClientError):
             _ = client.history('CH0')
 
+    @httpretty.activate
+    def test_stream_history(self):
+        """Test whether the messages of a channel history are streamed"""
+
+        http_requests = setup_http_server()
+
+        client = SlackClient('aaaa', max_items=5)
+
+        stream = client.stream_history('C011DUKE8',
+                                       oldest=1, latest=1427135733.000068)
+        messages = [message for message in stream]
+
+        expected = json.loads(read_file('data/slack/slack_history_next.json'))
+
+        self.assertListEqual(messages, expected['messages'])
+        self.assertEqual(stream.document['has_more'], expected['has_more'])
+
+        self.assertEqual(len(http_requests), 1)
+
+        req = http_requests[0]
+        self.assertRegex(req.path, '/channels.history')
+        self.assertEqual(req.querystring['count'], ['5'])
+        self.assertIn((SlackClient.AUTHORIZATION_HEADER, 'Bearer aaaa'), req.headers._headers)
+
+    @httpretty.activate
+    def test_stream_history_error(self):
+        """Test if an exception is raised when a streamed history returns an error"""
+
+        setup_http_server()
+
+        client = SlackClient('aaaa', max_items=5)
+
+        with self.assertRaises(SlackClientError):
+            _ = [message for message in client.stream_history('CH0')]
+
     def test_sanitize_for_archive(self):
         """Test whether the sanitize method works properly"""
 
@@ -401,6 +401,40 @@ class TestStackExchangeClient(unittest.TestCase):
         for i in range(len(expected)):
             self.assertDictEqual(http_requests[i].querystring, expected[i])
 
+    @httpretty.activate
+    def test_stream_questions(self):
+        """Test whether questions are streamed page by page"""
+
+        page_1 = read_file('data/stackexchange/stackexchange_question_page')
+        page_2 = read_file('data/stackexchange/stackexchange_question_page_2')
+
+        def request_callback(method, uri, headers):
+            params = urllib.parse.parse_qs(urllib.parse.urlparse(uri).query)
+            page = params.get('page')[0]
+            body = page_1 if page == '1' else page_2
+            return (200, headers, body)
+
+        httpretty.register_uri(httpretty.GET,
+                               STACKEXCHANGE_QUESTIONS_URL,
+                               responses=[
+                                   httpretty.Response(body=request_callback)
+                               ])
+
+        client = StackExchangeClient(site="stackoverflow",
+                                     tagged="python",
+                                     token="aaa", max_questions=1)
+        pages = [[question for question in page]
+                 for page in client.stream_questions(from_date=None)]
+
+        self.assertEqual(len(pages), 2)
+        self.assertListEqual(pages[0], json.loads(page_1)['items'])
+        self.assertListEqual(pages[1], json.loads(page_2)['items'])
+
+        requests = httpretty.HTTPretty.latest_requests
+        self.assertEqual(len(requests), 2)
+        self.assertEqual(requests[0].querystring['page'], ['1'])
+        self.assertEqual(requests[1].querystring['page'], ['2'])
+
     @httpretty.activate
     def test_backoff_waiting(self):
         """Test if the clients waits some seconds when backoff field is received"""